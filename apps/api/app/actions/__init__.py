@@ -3,16 +3,24 @@ Action Runner - Ejecuta acciones de LLM con soporte de fallbacks
 """
 import time
 import json
+import asyncio
 import traceback
 import os
-from typing import Dict, List, Optional, Any, Union
+import hashlib
+import threading
+from typing import Callable, Dict, List, Optional, Any, Union
 from dataclasses import dataclass
 from datetime import datetime
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from ..router import get_model_router, ActionConfig, ModelConfig
 from ..audit import FileProcessingLogger
 from ..services.llm_adapter import get_llm_adapter
+from ..services.extraction_cache import ExtractionCache, get_extraction_cache
+from ..services.rate_limiter import get_rate_limiter, is_throttled
+from ..services.hedging import get_hedge_policy
+from ..services.chunking import Chunk, chunk_content, estimate_tokens, input_token_budget, merge_extractions, get_chunking_config
 from ..config import settings
 
 @dataclass
@@ -34,6 +42,29 @@ class ActionResult:
     # Información de fallback
     fallback_used: bool = False
     models_attempted: Optional[List[str]] = None
+    
+    # Cache de extracción
+    cache_hit: bool = False
+    
+    # Hedge: el primer fallback se lanzó en paralelo al primario (winner: primary, fallback o None)
+    hedged: bool = False
+    hedge_winner: Optional[str] = None
+    hedge_delay_ms: Optional[int] = None
+    
+    # Contenido dividido en trozos estructurales (None = una sola llamada)
+    chunks: Optional[int] = None
+
+class HedgeLeg:
+    """
+    Una de las dos llamadas de un hedge. on_started se llama al obtener el slot del
+    rate limiter (el reloj del hedge no cuenta la espera ni la cola del pool) y
+    cancelled pide al perdedor que no llame / no reintente.
+    """
+    def __init__(self, on_started: Optional[Callable[[], None]] = None):
+        self.on_started = on_started or (lambda: None)
+        self.cancelled = threading.Event()
+
+CANCELLED_RESULT = {"success": False, "error": "Cancelled: the hedge was won by the other model", "cancelled": True, "tokens_in": 0, "tokens_out": 0}
 
 class ActionRunner:
     """
@@ -44,6 +75,11 @@ class ActionRunner:
         self.router = get_model_router()
         self.logger = logger or FileProcessingLogger()
         self.llm_service = get_llm_adapter()
+        self.cache = get_extraction_cache()
+        self.rate_limiter = get_rate_limiter()
+        self.hedging = get_hedge_policy()
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._prompt_hashes: Dict[str, tuple] = {} # prompt_path -> (mtime, sha256)
         
         # Estimaciones de costo por modelo (USD por 1K tokens)
         self.cost_estimates = {
@@ -68,6 +104,7 @@ class ActionRunner:
         try:
             from ..services.extractors.registry import ExtractorRegistry
             from ..models.cir import CIRPackage
+            from ..services.parallel_extract import cir_to_result_data
             
             registry = ExtractorRegistry()
             extractor = registry.get_extractor(file_path)
@@ -82,59 +119,9 @@ class ActionRunner:
                 # Iterate transformations and inject SQL if needed
                 # (This is where we would call the LLM for each expression)
                 # For now, we return the CIR structure mapped to standard output
-                
-                # Convert CIR to Standard Result (Nodes/Edges)
-                nodes = []
-                edges = []
-                
-                # Group transformations by node_id
-                trans_map = {}
-                for t in cir_package.transformations:
-                    if t.node_id not in trans_map: trans_map[t.node_id] = []
-                    trans_map[t.node_id].append({
-                        "column": t.column_name,
-                        "expression": t.expression_raw
-                    })
-
-                for node in cir_package.nodes:
-                    attrs = node.properties.copy()
-                    attrs["transformations"] = trans_map.get(node.id, [])
-                    attrs["columns_metadata"] = node.columns_metadata
-                    
-                    # Derive a flat list of unique column names for simple UI display
-                    flat_columns = sorted(list(set([c.get("name") for c in node.columns_metadata if c.get("name")])))
-                    attrs["columns"] = flat_columns
-                    
-                    nodes.append({
-                        "node_id": node.id,
-                        "name": node.name,
-                        "node_type": node.type.lower(),
-                        "system": cir_package.source_system,
-                        "parent_node_id": node.parent_id, # Top level for Pydantic model
-                        "attributes": attrs,
-                        "columns_metadata": node.columns_metadata # Keep as field too
-                    })
-                    
-                for flow in cir_package.data_flows:
-                    edges.append({
-                        "edge_id": str(uuid.uuid4()),
-                        "from_node_id": flow.source_id,
-                        "to_node_id": flow.target_id,
-                        "edge_type": "FLOWS_TO",
-                        "confidence": 1.0,
-                        "rationale": "Directly extracted from SSIS Data Flow pipeline XML",
-                        "attributes": {"columns": flow.columns}
-                    })
-                
                 return ActionResult(
                     success=True,
-                    data={
-                        "nodes": nodes, 
-                        "edges": edges,
-                        "metadata": {"extractor": "native_deep_ssis", "version": "3.0"},
-                        "evidences": [],
-                        "cir_package": cir_package.dict()
-                    },
+                    data=cir_to_result_data(cir_package),
                     model_used="native_deep_parser",
                     latency_ms=int((time.time() - start_time) * 1000)
                 )
@@ -177,190 +164,607 @@ class ActionRunner:
             # Obtener configuración de la acción
             action_config = self.router.get_action_config(action_name)
             
-            # Ejecutar con el modelo primario
-            result = self._execute_single_model(
-                action_config.primary, 
-                input_data, 
-                context,
-                log_id
-            )
+            # Cache de extracción: mismo contenido + acción + modelo + prompt -> mismo resultado
+            cache_key, cached_result = self._lookup_cache(action_name, action_config, input_data, context, log_id, start_time)
+            if cached_result:
+                return cached_result
             
-            # Si falló y hay fallbacks, intentarlos
-            if not result.success and action_config.fallbacks:
-                return self._execute_fallbacks(
-                    action_config.fallbacks,
-                    input_data,
-                    context,
-                    log_id,
-                    start_time,
-                    action_config.primary.model
-                )
+            # Contenido que no cabe en el contexto: trozos estructurales en paralelo
+            chunks = self._plan_chunks(action_config, input_data, context)
+            if chunks:
+                result = self._execute_chunked(action_name, action_config, input_data, context, log_id, chunks, start_time)
+            else:
+                result = self._execute_chain(action_name, action_config, input_data, context, log_id, start_time)
+            
+            if cache_key and result.success:
+                self.cache.put(cache_key, action_name, action_config.primary.model, result.data, result.model_used)
             
             return result
             
         except Exception as e:
-            error_msg = f"Error ejecutando acción '{action_name}': {str(e)}"
-            print(f"[ACTION_RUNNER] {error_msg}")
+            return self._action_exception_result(action_name, e, start_time)
+    
+    async def arun_action(
+        self, 
+        action_name: str, 
+        input_data: Dict[str, Any], 
+        context: Dict[str, Any],
+        log_id: Optional[str] = None
+    ) -> ActionResult:
+        """
+        Versión async de run_action: las llamadas al LLM no bloquean el event loop,
+        así muchas extracciones pueden correr concurrentemente (asyncio.gather).
+        """
+        start_time = time.time()
+        
+        try:
+            action_config = self.router.get_action_config(action_name)
+            
+            # Cache (SQLite/Supabase) fuera del event loop
+            cache_key, cached_result = await asyncio.to_thread(
+                self._lookup_cache, action_name, action_config, input_data, context, log_id, start_time)
+            if cached_result:
+                return cached_result
             
+            chunks = self._plan_chunks(action_config, input_data, context)
+            if chunks:
+                result = await self._aexecute_chunked(action_name, action_config, input_data, context, log_id, chunks, start_time)
+            else:
+                result = await self._aexecute_chain(action_name, action_config, input_data, context, log_id, start_time)
+            
+            if cache_key and result.success:
+                await asyncio.to_thread(self.cache.put, cache_key, action_name, action_config.primary.model, result.data, result.model_used)
+            
+            return result
+            
+        except Exception as e:
+            return self._action_exception_result(action_name, e, start_time)
+    
+    def _execute_chain(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        start_time: float
+    ) -> ActionResult:
+        """Modelo primario (con hedge si aplica) y, si falla, la cadena de fallbacks"""
+        # Ejecutar con el modelo primario (en carrera con el primer fallback si tarda más que su p95)
+        hedge_delay_ms = self._hedge_delay_ms(action_name, action_config)
+        if hedge_delay_ms is not None:
+            result = self._execute_hedged(action_name, action_config, input_data, context, log_id, hedge_delay_ms)
+        else:
+            result = self._execute_single_model(
+                action_config.primary, 
+                input_data, 
+                context,
+                log_id
+            )
+        
+        # Si falló y hay fallbacks, intentarlos (el primero ya corrió si hubo hedge)
+        if not result.success and action_config.fallbacks:
+            result = self._execute_fallbacks(
+                action_config.fallbacks[1:] if result.hedged else action_config.fallbacks,
+                input_data,
+                context,
+                log_id,
+                start_time,
+                action_config.primary.model,
+                result.models_attempted
+            )
+        return result
+    
+    async def _aexecute_chain(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        start_time: float
+    ) -> ActionResult:
+        """Versión async de _execute_chain"""
+        hedge_delay_ms = self._hedge_delay_ms(action_name, action_config)
+        if hedge_delay_ms is not None:
+            result = await self._aexecute_hedged(action_name, action_config, input_data, context, log_id, hedge_delay_ms)
+        else:
+            result = await self._aexecute_single_model(
+                action_config.primary, 
+                input_data, 
+                context,
+                log_id
+            )
+        
+        if not result.success and action_config.fallbacks:
+            result = await self._aexecute_fallbacks(
+                action_config.fallbacks[1:] if result.hedged else action_config.fallbacks,
+                input_data,
+                context,
+                log_id,
+                start_time,
+                action_config.primary.model,
+                result.models_attempted
+            )
+        return result
+    
+    # --- Chunking ---
+    
+    def _plan_chunks(self, action_config: ActionConfig, input_data: Dict[str, Any], context: Dict[str, Any]) -> Optional[List[Chunk]]:
+        """
+        Trozos estructurales si el contenido no cabe en el contexto de algún modelo de la cadena
+        (solo acciones de extracción, cuyos nodos/edges se pueden unir). None = una sola llamada.
+        """
+        content = input_data.get("content")
+        config = get_chunking_config()
+        if not config["enabled"] or not isinstance(content, str) or "extract" not in action_config.primary.prompt_file:
+            return None
+        
+        # El trozo debe caber en todos los modelos de la cadena (fallbacks incluidos)
+        budget = min(
+            input_token_budget(
+                model_config.context_tokens,
+                model_config.max_tokens,
+                estimate_tokens(self._load_prompt(model_config.prompt_file, {}, context)),
+                config
+            )
+            for model_config in [action_config.primary] + action_config.fallbacks
+        )
+        if estimate_tokens(content) <= budget:
+            return None
+        
+        chunks = chunk_content(input_data.get("file_path", ""), content, budget)
+        if len(chunks) < 2:
+            return None
+        print(f"[ACTION_RUNNER] Splitting {input_data.get('file_path', '')} ({len(content)} chars) into {len(chunks)} chunks of <= {budget} tokens")
+        return chunks
+    
+    def _chunk_input(self, input_data: Dict[str, Any], chunk: Chunk, total: int) -> Dict[str, Any]:
+        chunk_input = {**input_data, "content": chunk.text}
+        chunk_input["chunk"] = {"index": chunk.index + 1, "total": total, "start_line": chunk.start_line, "end_line": chunk.end_line}
+        return chunk_input
+    
+    def _execute_chunked(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        chunks: List[Chunk],
+        start_time: float
+    ) -> ActionResult:
+        """Ejecuta la acción sobre cada trozo (en paralelo) y une los resultados"""
+        max_parallel = max(1, int(get_chunking_config()["max_parallel"]))
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(chunks)), thread_name_prefix="chunk") as pool:
+            results = list(pool.map(
+                lambda chunk: self._execute_chain(action_name, action_config, self._chunk_input(input_data, chunk, len(chunks)), context, None, time.time()),
+                chunks
+            ))
+        return self._merge_chunk_results(action_config, chunks, results, log_id, start_time)
+    
+    async def _aexecute_chunked(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        chunks: List[Chunk],
+        start_time: float
+    ) -> ActionResult:
+        """Versión async de _execute_chunked"""
+        gate = asyncio.Semaphore(max(1, int(get_chunking_config()["max_parallel"])))
+        
+        async def run_chunk(chunk: Chunk) -> ActionResult:
+            async with gate:
+                return await self._aexecute_chain(action_name, action_config, self._chunk_input(input_data, chunk, len(chunks)), context, None, time.time())
+        
+        results = await asyncio.gather(*[run_chunk(chunk) for chunk in chunks])
+        return await asyncio.to_thread(self._merge_chunk_results, action_config, chunks, results, log_id, start_time)
+    
+    def _merge_chunk_results(
+        self,
+        action_config: ActionConfig,
+        chunks: List[Chunk],
+        results: List[ActionResult],
+        log_id: Optional[str],
+        start_time: float
+    ) -> ActionResult:
+        """
+        Une los resultados por trozo. Si falla un trozo falla la acción: un resultado
+        parcial no se cachea ni se persiste como si fuera el archivo completo.
+        """
+        latency_ms = int((time.time() - start_time) * 1000)
+        models_attempted = []
+        for r in results:
+            for model in r.models_attempted or [r.model_used]:
+                if model and model not in models_attempted:
+                    models_attempted.append(model)
+        fallback_used = any(r.fallback_used for r in results)
+        
+        failed = [(chunk, r) for chunk, r in zip(chunks, results) if not r.success]
+        if failed:
+            detail = "; ".join(f"chunk {c.index + 1} (lines {c.start_line}-{c.end_line}): {r.error_message}" for c, r in failed[:3])
             return ActionResult(
                 success=False,
-                error_message=error_msg,
-                error_type="action_execution_error",
-                latency_ms=int((time.time() - start_time) * 1000)
+                error_message=f"{len(failed)}/{len(chunks)} chunks failed: {detail}",
+                error_type="chunk_failed",
+                fallback_used=fallback_used,
+                models_attempted=models_attempted,
+                latency_ms=latency_ms,
+                chunks=len(chunks)
             )
+        
+        # Modelo que respondió la mayoría de los trozos
+        models_used = [r.model_used for r in results]
+        tokens_in = sum(r.tokens_in or 0 for r in results)
+        tokens_out = sum(r.tokens_out or 0 for r in results)
+        result = ActionResult(
+            success=True,
+            data=merge_extractions([r.data or {} for r in results], chunks),
+            model_used=max(set(models_used), key=models_used.count),
+            latency_ms=latency_ms,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            total_tokens=tokens_in + tokens_out,
+            cost_estimate_usd=sum(r.cost_estimate_usd or 0.0 for r in results),
+            fallback_used=fallback_used,
+            models_attempted=models_attempted,
+            hedged=any(r.hedged for r in results),
+            chunks=len(chunks)
+        )
+        if log_id:
+            self._log_model_usage(log_id, result)
+            if fallback_used:
+                self.logger.update_model_usage(log_id, "openrouter", result.model_used, fallback_used=True, fallback_chain=models_attempted)
+        
+        print(f"[ACTION_RUNNER] Merged {len(chunks)} chunks: {len(result.data.get('nodes', []))} nodes, {len(result.data.get('edges', []))} edges")
+        return result
+    
+    def _lookup_cache(self, action_name: str, action_config: ActionConfig, input_data: Dict[str, Any], context: Dict[str, Any], log_id: Optional[str], start_time: float):
+        """Returns (cache_key, ActionResult if hit)"""
+        cache_key = self._get_cache_key(action_name, action_config, input_data)
+        if not cache_key:
+            return None, None
+        cached = self.cache.get(cache_key)
+        if not cached:
+            return cache_key, None
+        
+        print(f"[ACTION_RUNNER] Cache hit for '{action_name}' ({context.get('file_path', '')})")
+        if log_id:
+            self.logger.update_model_usage(log_id, "cache", cached["model_used"])
+        return cache_key, ActionResult(
+            success=True,
+            data=cached["data"],
+            model_used=cached["model_used"],
+            latency_ms=int((time.time() - start_time) * 1000),
+            tokens_in=0,
+            tokens_out=0,
+            total_tokens=0,
+            cost_estimate_usd=0.0,
+            cache_hit=True
+        )
+    
+    def _action_exception_result(self, action_name: str, e: Exception, start_time: float) -> ActionResult:
+        error_msg = f"Error ejecutando acción '{action_name}': {str(e)}"
+        print(f"[ACTION_RUNNER] {error_msg}")
+        
+        return ActionResult(
+            success=False,
+            error_message=error_msg,
+            error_type="action_execution_error",
+            latency_ms=int((time.time() - start_time) * 1000)
+        )
     
     def _execute_single_model(
         self, 
         model_config: ModelConfig, 
         input_data: Dict[str, Any], 
         context: Dict[str, Any],
-        log_id: Optional[str] = None
+        log_id: Optional[str] = None,
+        leg: Optional[HedgeLeg] = None
     ) -> ActionResult:
         """Ejecuta un modelo individual"""
         start_time = time.time()
         
         try:
-            # Cargar prompt
-            prompt_content = self._load_prompt(model_config.prompt_file, input_data, context)
-            
-            # Preparar mensajes para LLM
-            # Truncar input_data de forma segura (sin romper el JSON)
-            # Copiar input_data para no modificar el original
-            safe_input = input_data.copy()
-            
-            # Si hay contenido grande, truncarlo ANTES de dumps
-            if "content" in safe_input and isinstance(safe_input["content"], str):
-                limit = 200000 
-                if len(safe_input["content"]) > limit:
-                    print(f"[ACTION_RUNNER] Truncating content from {len(safe_input['content'])} to {limit} chars (preserving head and tail)")
-                    head_size = limit // 2
-                    tail_size = limit // 2
-                    safe_input["content"] = safe_input["content"][:head_size] + "\n... (TRUNCATED) ...\n" + safe_input["content"][-tail_size:]
-            
-            input_json = json.dumps(safe_input)
-            
-            messages = [
-                {"role": "system", "content": prompt_content},
-                {"role": "user", "content": input_json}
-            ]
-            
-            # Ejecutar LLM
-            llm_result = self.llm_service.call_model(
-                model=model_config.model,
-                messages=messages,
-                temperature=model_config.temperature,
-                max_tokens=model_config.max_tokens,
-                provider=model_config.provider or settings.LLM_PROVIDER
-            )
+            messages = self._build_messages(model_config, input_data, context)
             
-            latency_ms = int((time.time() - start_time) * 1000)
+            # Ejecutar LLM (respetando los límites del proveedor/modelo)
+            llm_result = self._call_with_limits(model_config, messages, leg)
             
-            if not llm_result.get("success"):
-                error_detail = llm_result.get("error", "Unknown LLM error")
-                print(f"[ACTION_RUNNER] Model {model_config.model} failed: {error_detail}")
-                return ActionResult(
-                    success=False,
-                    error_message=error_detail,
-                    error_type="llm_error",
-                    model_used=model_config.model,
-                    latency_ms=latency_ms
-                )
+            result = self._to_action_result(model_config, llm_result, int((time.time() - start_time) * 1000))
+            if log_id and result.success:
+                self._log_model_usage(log_id, result)
+            return result
             
-            # Parsear respuesta
-            response_content = llm_result.get("content", "")
+        except Exception as e:
+            return self._model_exception_result(model_config, e, start_time)
+    
+    async def _aexecute_single_model(
+        self, 
+        model_config: ModelConfig, 
+        input_data: Dict[str, Any], 
+        context: Dict[str, Any],
+        log_id: Optional[str] = None,
+        leg: Optional[HedgeLeg] = None
+    ) -> ActionResult:
+        """Versión async de _execute_single_model (LLMAdapter.acall_model)"""
+        start_time = time.time()
+        
+        try:
+            messages = self._build_messages(model_config, input_data, context)
             
-            # Validar JSON si es necesario
-            if self._requires_json_validation(model_config.prompt_file):
-                try:
-                    cleaned_content = self._clean_json_response(response_content)
-                    parsed_data = json.loads(cleaned_content)
-                    
-                    validation_error = self._validate_json_schema(
-                        parsed_data, 
-                        model_config.prompt_file
-                    )
-                    
-                    if validation_error:
-                        print(f"[ACTION_RUNNER] JSON Validation Failed for {model_config.model}: {validation_error}")
-                        return ActionResult(
-                            success=False,
-                            error_message=f"JSON validation failed: {validation_error}",
-                            error_type="validation_error",
-                            model_used=model_config.model,
-                            latency_ms=latency_ms
-                        )
-                    
-                    response_data = parsed_data
-                    
-                except json.JSONDecodeError as e:
-                    print(f"[ACTION_RUNNER] JSON Decode Error for {model_config.model}: {e}")
+            llm_result = await self._acall_with_limits(model_config, messages, leg)
+            
+            result = self._to_action_result(model_config, llm_result, int((time.time() - start_time) * 1000))
+            if log_id and result.success:
+                # El logger es síncrono (Supabase): fuera del event loop
+                await asyncio.to_thread(self._log_model_usage, log_id, result)
+            return result
+            
+        except Exception as e:
+            return self._model_exception_result(model_config, e, start_time)
+    
+    def _call_with_limits(self, model_config: ModelConfig, messages: List[Dict[str, str]], leg: Optional[HedgeLeg] = None) -> Dict[str, Any]:
+        """
+        Llama al modelo dentro de su rate limit. Un 429/503 reduce la concurrencia (AIMD)
+        y se reintenta el mismo modelo tras el Retry-After; solo si se agotan los reintentos
+        (o la espera máxima) el resultado falla y entra la cadena de fallbacks.
+        En un hedge (leg) el perdedor cancelado deja de esperar y no reintenta; una
+        llamada HTTP sync ya en curso no se puede cortar y queda acotada por timeout_ms.
+        """
+        provider = model_config.provider or settings.LLM_PROVIDER
+        limiter = self.rate_limiter.get(provider, model_config.model)
+        tokens = self.rate_limiter.estimate_tokens(messages, model_config.max_tokens)
+        cancelled = leg.cancelled if leg else None
+        
+        for attempt in range(self.rate_limiter.max_throttle_retries + 1):
+            if not self.rate_limiter.acquire(limiter, tokens, cancelled=cancelled):
+                return dict(CANCELLED_RESULT) if cancelled is not None and cancelled.is_set() else self._rate_limit_timeout(limiter)
+            if cancelled is not None and cancelled.is_set():
+                self.rate_limiter.release(limiter, CANCELLED_RESULT, tokens)
+                return dict(CANCELLED_RESULT)
+            if leg and attempt == 0:
+                leg.on_started()
+            started_at = time.monotonic()
+            try:
+                llm_result = self.llm_service.call_model(
+                    model=model_config.model,
+                    messages=messages,
+                    temperature=model_config.temperature,
+                    max_tokens=model_config.max_tokens,
+                    provider=provider,
+                    timeout_ms=model_config.timeout_ms
+                )
+            except Exception as e:
+                llm_result = {"success": False, "error": str(e)}
+            self.rate_limiter.release(limiter, llm_result, tokens, started_at)
+            self._record_latency(model_config, llm_result, started_at)
+            if not is_throttled(llm_result) or (cancelled is not None and cancelled.is_set()):
+                return llm_result
+            print(f"[ACTION_RUNNER] {model_config.model} throttled (attempt {attempt + 1}), waiting for rate limit")
+        return llm_result
+    
+    async def _acall_with_limits(self, model_config: ModelConfig, messages: List[Dict[str, str]], leg: Optional[HedgeLeg] = None) -> Dict[str, Any]:
+        """Versión async de _call_with_limits (el perdedor de un hedge se cancela como task)"""
+        provider = model_config.provider or settings.LLM_PROVIDER
+        limiter = self.rate_limiter.get(provider, model_config.model)
+        tokens = self.rate_limiter.estimate_tokens(messages, model_config.max_tokens)
+        
+        for attempt in range(self.rate_limiter.max_throttle_retries + 1):
+            if not await self.rate_limiter.aacquire(limiter, tokens):
+                return self._rate_limit_timeout(limiter)
+            if leg and attempt == 0:
+                leg.on_started()
+            started_at = time.monotonic()
+            try:
+                llm_result = await self.llm_service.acall_model(
+                    model=model_config.model,
+                    messages=messages,
+                    temperature=model_config.temperature,
+                    max_tokens=model_config.max_tokens,
+                    provider=provider,
+                    timeout_ms=model_config.timeout_ms
+                )
+            except BaseException as e:
+                self.rate_limiter.release(limiter, {"success": False, "error": str(e)}, tokens, started_at)
+                raise
+            self.rate_limiter.release(limiter, llm_result, tokens, started_at)
+            self._record_latency(model_config, llm_result, started_at)
+            if not is_throttled(llm_result):
+                return llm_result
+            print(f"[ACTION_RUNNER] {model_config.model} throttled (attempt {attempt + 1}), waiting for rate limit")
+        return llm_result
+    
+    def _record_latency(self, model_config: ModelConfig, llm_result: Dict[str, Any], started_at: float):
+        # Latencia de la llamada (sin la espera del rate limiter) para el p95 del hedge
+        if llm_result.get("success"):
+            self.hedging.record_latency(model_config.model, (time.monotonic() - started_at) * 1000)
+    
+    def _rate_limit_timeout(self, limiter) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": f"Rate limit wait exceeded {self.rate_limiter.max_wait_seconds:.0f}s for {limiter.key}",
+            "rate_limited": True,
+            "tokens_in": 0,
+            "tokens_out": 0
+        }
+    
+    def _build_messages(self, model_config: ModelConfig, input_data: Dict[str, Any], context: Dict[str, Any]) -> List[Dict[str, str]]:
+        # Cargar prompt
+        prompt_content = self._load_prompt(model_config.prompt_file, input_data, context)
+        
+        # Preparar mensajes para LLM
+        # Truncar input_data de forma segura (sin romper el JSON)
+        # Copiar input_data para no modificar el original
+        safe_input = input_data.copy()
+        
+        # Si hay contenido grande, truncarlo ANTES de dumps
+        if "content" in safe_input and isinstance(safe_input["content"], str):
+            limit = 200000 
+            if len(safe_input["content"]) > limit:
+                print(f"[ACTION_RUNNER] Truncating content from {len(safe_input['content'])} to {limit} chars (preserving head and tail)")
+                head_size = limit // 2
+                tail_size = limit // 2
+                safe_input["content"] = safe_input["content"][:head_size] + "\n... (TRUNCATED) ...\n" + safe_input["content"][-tail_size:]
+        
+        input_json = json.dumps(safe_input)
+        
+        return [
+            {"role": "system", "content": prompt_content},
+            {"role": "user", "content": input_json}
+        ]
+    
+    def _to_action_result(self, model_config: ModelConfig, llm_result: Dict[str, Any], latency_ms: int) -> ActionResult:
+        """Convierte el dict del LLMAdapter en ActionResult (validando el JSON si aplica)"""
+        if not llm_result.get("success"):
+            error_detail = llm_result.get("error", "Unknown LLM error")
+            print(f"[ACTION_RUNNER] Model {model_config.model} failed: {error_detail}")
+            if llm_result.get("timed_out"):
+                error_type = "timeout"
+            elif llm_result.get("rate_limited") or is_throttled(llm_result):
+                error_type = "rate_limited"
+            else:
+                error_type = "llm_error"
+            return ActionResult(
+                success=False,
+                error_message=error_detail,
+                error_type=error_type,
+                model_used=model_config.model,
+                latency_ms=latency_ms
+            )
+        
+        # Parsear respuesta
+        response_content = llm_result.get("content", "")
+        
+        # Validar JSON si es necesario
+        if self._requires_json_validation(model_config.prompt_file):
+            try:
+                cleaned_content = self._clean_json_response(response_content)
+                parsed_data = json.loads(cleaned_content)
+                
+                validation_error = self._validate_json_schema(
+                    parsed_data, 
+                    model_config.prompt_file
+                )
+                
+                if validation_error:
+                    print(f"[ACTION_RUNNER] JSON Validation Failed for {model_config.model}: {validation_error}")
                     return ActionResult(
                         success=False,
-                        error_message=f"Invalid JSON response: {str(e)}",
-                        error_type="json_parse_error",
+                        error_message=f"JSON validation failed: {validation_error}",
+                        error_type="validation_error",
                         model_used=model_config.model,
                         latency_ms=latency_ms
                     )
-            else:
-                response_data = {"content": response_content}
-            
-            tokens_in = llm_result.get("tokens_in", 0)
-            tokens_out = llm_result.get("tokens_out", 0)
-            total_tokens = tokens_in + tokens_out
-            
-            cost_estimate = self._estimate_cost(
-                model_config.model, 
-                total_tokens
-            )
-            
-            if log_id:
-                self.logger.update_model_usage(log_id, "openrouter", model_config.model)
-                self.logger.update_tokens_and_cost(
-                    log_id, tokens_in, tokens_out, cost_estimate, latency_ms
+                
+                response_data = parsed_data
+                
+            except json.JSONDecodeError as e:
+                print(f"[ACTION_RUNNER] JSON Decode Error for {model_config.model}: {e}")
+                return ActionResult(
+                    success=False,
+                    error_message=f"Invalid JSON response: {str(e)}",
+                    error_type="json_parse_error",
+                    model_used=model_config.model,
+                    latency_ms=latency_ms
                 )
+        else:
+            response_data = {"content": response_content}
+        
+        tokens_in = llm_result.get("tokens_in", 0)
+        tokens_out = llm_result.get("tokens_out", 0)
+        total_tokens = tokens_in + tokens_out
+        
+        cost_estimate = self._estimate_cost(
+            model_config.model, 
+            total_tokens
+        )
+        
+        return ActionResult(
+            success=True,
+            data=response_data,
+            model_used=model_config.model,
+            latency_ms=latency_ms,
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            total_tokens=total_tokens,
+            cost_estimate_usd=cost_estimate
+        )
+    
+    def _log_model_usage(self, log_id: str, result: ActionResult):
+        self.logger.update_model_usage(log_id, "openrouter", result.model_used)
+        self.logger.update_tokens_and_cost(
+            log_id, result.tokens_in, result.tokens_out, result.cost_estimate_usd, result.latency_ms
+        )
+    
+    def _model_exception_result(self, model_config: ModelConfig, e: Exception, start_time: float) -> ActionResult:
+        error_msg = f"Error ejecutando modelo '{model_config.model}': {str(e)}"
+        print(f"[ACTION_RUNNER] {error_msg}")
+        
+        return ActionResult(
+            success=False,
+            error_message=error_msg,
+            error_type="model_execution_error",
+            model_used=model_config.model,
+            latency_ms=int((time.time() - start_time) * 1000)
+        )
+    
+    def _execute_fallbacks(
+        self,
+        fallback_configs: List[ModelConfig],
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        start_time: float,
+        primary_model: str,
+        models_attempted: Optional[List[str]] = None
+    ) -> ActionResult:
+        """Ejecuta cadena de fallbacks (models_attempted: modelos ya intentados, p. ej. tras un hedge)"""
+        
+        print(f"[ACTION_RUNNER] Primary model '{primary_model}' failed, trying fallbacks...")
+        
+        models_attempted = list(models_attempted or [primary_model])
+        
+        for i, fallback_config in enumerate(fallback_configs):
+            print(f"[ACTION_RUNNER] Trying fallback {i+1}/{len(fallback_configs)}: {fallback_config.model}")
             
-            return ActionResult(
-                success=True,
-                data=response_data,
-                model_used=model_config.model,
-                latency_ms=latency_ms,
-                tokens_in=tokens_in,
-                tokens_out=tokens_out,
-                total_tokens=total_tokens,
-                cost_estimate_usd=cost_estimate
+            result = self._execute_single_model(
+                fallback_config, 
+                input_data, 
+                context,
+                log_id
             )
             
-        except Exception as e:
-            error_msg = f"Error ejecutando modelo '{model_config.model}': {str(e)}"
-            print(f"[ACTION_RUNNER] {error_msg}")
+            models_attempted.append(fallback_config.model)
             
-            return ActionResult(
-                success=False,
-                error_message=error_msg,
-                error_type="model_execution_error",
-                model_used=model_config.model,
-                latency_ms=int((time.time() - start_time) * 1000)
-            )
+            if result.success:
+                return self._fallback_succeeded(result, models_attempted, log_id)
+        
+        return self._fallback_exhausted(models_attempted, start_time)
     
-    def _execute_fallbacks(
+    async def _aexecute_fallbacks(
         self,
         fallback_configs: List[ModelConfig],
         input_data: Dict[str, Any],
         context: Dict[str, Any],
         log_id: Optional[str],
         start_time: float,
-        primary_model: str
+        primary_model: str,
+        models_attempted: Optional[List[str]] = None
     ) -> ActionResult:
-        """Ejecuta cadena de fallbacks"""
+        """Versión async de _execute_fallbacks"""
         
         print(f"[ACTION_RUNNER] Primary model '{primary_model}' failed, trying fallbacks...")
         
-        models_attempted = [primary_model]
+        models_attempted = list(models_attempted or [primary_model])
         
         for i, fallback_config in enumerate(fallback_configs):
             print(f"[ACTION_RUNNER] Trying fallback {i+1}/{len(fallback_configs)}: {fallback_config.model}")
             
-            result = self._execute_single_model(
+            result = await self._aexecute_single_model(
                 fallback_config, 
                 input_data, 
                 context,
@@ -370,21 +774,169 @@ class ActionRunner:
             models_attempted.append(fallback_config.model)
             
             if result.success:
-                result.fallback_used = True
-                result.models_attempted = models_attempted
-                
-                if log_id:
-                    self.logger.update_model_usage(
-                        log_id, 
-                        "openrouter", 
-                        result.model_used,
-                        fallback_used=True,
-                        fallback_chain=models_attempted
-                    )
-                
-                print(f"[ACTION_RUNNER] Fallback successful with {result.model_used}")
-                return result
+                return await asyncio.to_thread(self._fallback_succeeded, result, models_attempted, log_id)
         
+        return self._fallback_exhausted(models_attempted, start_time)
+    
+    # --- Hedging ---
+    
+    def _hedge_delay_ms(self, action_name: str, action_config: ActionConfig) -> Optional[float]:
+        """Delay antes de lanzar el primer fallback en paralelo, o None si no aplica hedge"""
+        if not action_config.fallbacks or not self.hedging.applies_to(action_name):
+            return None
+        delay = self.hedging.hedge_delay_ms(action_config.primary.model)
+        if delay is None or delay >= action_config.primary.timeout_ms:
+            return None
+        # Primario en cooldown (Retry-After de un 429): su lentitud es la espera, no la cola de latencia
+        primary = action_config.primary
+        if self.rate_limiter.in_cooldown(self.rate_limiter.get(primary.provider or settings.LLM_PROVIDER, primary.model)):
+            return None
+        return delay
+    
+    def _get_hedge_pool(self) -> ThreadPoolExecutor:
+        if self._hedge_pool is None:
+            # Dos llamadas por acción en carrera, una acción por worker del pipeline
+            self._hedge_pool = ThreadPoolExecutor(max_workers=max(4, settings.PIPELINE_MAX_WORKERS * 2), thread_name_prefix="hedge")
+        return self._hedge_pool
+    
+    def _execute_hedged(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        hedge_delay_ms: float
+    ) -> ActionResult:
+        """
+        Primario con hedge: si no respondió en hedge_delay_ms (contados desde que obtuvo
+        slot del rate limiter) se lanza el primer fallback y gana el primer resultado
+        válido. En sync una llamada en curso no se puede interrumpir: el perdedor se
+        marca cancelado (no reintenta ni espera slot) y su resultado se descarta.
+        """
+        primary, backup = action_config.primary, action_config.fallbacks[0]
+        pool = self._get_hedge_pool()
+        
+        started = threading.Event()
+        primary_leg = HedgeLeg(started.set)
+        first = pool.submit(self._execute_single_model, primary, input_data, context, None, primary_leg)
+        first.add_done_callback(lambda _: started.set())
+        started.wait()
+        done, _ = wait([first], timeout=hedge_delay_ms / 1000.0)
+        if done:
+            return self._unhedged_result(first.result(), log_id)
+        
+        print(f"[ACTION_RUNNER] {primary.model} slower than {hedge_delay_ms:.0f}ms, hedging with {backup.model}")
+        backup_leg = HedgeLeg()
+        second = pool.submit(self._execute_single_model, backup, input_data, context, None, backup_leg)
+        roles = {first: "primary", second: "fallback"}
+        legs = {first: primary_leg, second: backup_leg}
+        failed = {}
+        pending = set(roles)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result.success:
+                    for loser in pending:
+                        legs[loser].cancelled.set()
+                        loser.cancel()
+                    return self._hedge_finished(action_name, action_config, result, roles[future], hedge_delay_ms, log_id)
+                failed[roles[future]] = result
+        return self._hedge_finished(action_name, action_config, failed["primary"], None, hedge_delay_ms, log_id)
+    
+    async def _aexecute_hedged(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        input_data: Dict[str, Any],
+        context: Dict[str, Any],
+        log_id: Optional[str],
+        hedge_delay_ms: float
+    ) -> ActionResult:
+        """Versión async de _execute_hedged: la llamada perdedora se cancela"""
+        primary, backup = action_config.primary, action_config.fallbacks[0]
+        
+        started = asyncio.Event()
+        first = asyncio.create_task(self._aexecute_single_model(primary, input_data, context, None, HedgeLeg(started.set)))
+        first.add_done_callback(lambda _: started.set())
+        await started.wait()
+        done, _ = await asyncio.wait([first], timeout=hedge_delay_ms / 1000.0)
+        if done:
+            return await asyncio.to_thread(self._unhedged_result, first.result(), log_id)
+        
+        print(f"[ACTION_RUNNER] {primary.model} slower than {hedge_delay_ms:.0f}ms, hedging with {backup.model}")
+        roles = {first: "primary", asyncio.create_task(self._aexecute_single_model(backup, input_data, context)): "fallback"}
+        failed = {}
+        pending = set(roles)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if result.success:
+                        return await asyncio.to_thread(self._hedge_finished, action_name, action_config, result, roles[task], hedge_delay_ms, log_id)
+                    failed[roles[task]] = result
+        finally:
+            # Cancelar el perdedor (libera su slot del rate limiter y la conexión)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        return await asyncio.to_thread(self._hedge_finished, action_name, action_config, failed["primary"], None, hedge_delay_ms, log_id)
+    
+    def _unhedged_result(self, result: ActionResult, log_id: Optional[str]) -> ActionResult:
+        # El primario respondió antes del delay: mismo resultado que sin hedge
+        if log_id and result.success:
+            self._log_model_usage(log_id, result)
+        return result
+    
+    def _hedge_finished(
+        self,
+        action_name: str,
+        action_config: ActionConfig,
+        result: ActionResult,
+        winner: Optional[str],
+        hedge_delay_ms: float,
+        log_id: Optional[str]
+    ) -> ActionResult:
+        """Anota el resultado del hedge (estadísticas + auditoría) en el resultado ganador"""
+        models_attempted = [action_config.primary.model, action_config.fallbacks[0].model]
+        self.hedging.record_outcome(action_name, winner)
+        
+        result.hedged = True
+        result.hedge_winner = winner
+        result.hedge_delay_ms = int(hedge_delay_ms)
+        result.models_attempted = models_attempted
+        
+        if log_id:
+            if result.success:
+                self._log_model_usage(log_id, result)
+            self.logger.update_hedge(log_id, winner, int(hedge_delay_ms))
+        
+        if winner == "fallback":
+            return self._fallback_succeeded(result, models_attempted, log_id)
+        if winner == "primary":
+            print(f"[ACTION_RUNNER] Hedge won by primary {result.model_used}")
+        return result
+    
+    def _fallback_succeeded(self, result: ActionResult, models_attempted: List[str], log_id: Optional[str]) -> ActionResult:
+        result.fallback_used = True
+        result.models_attempted = models_attempted
+        
+        if log_id:
+            self.logger.update_model_usage(
+                log_id, 
+                "openrouter", 
+                result.model_used,
+                fallback_used=True,
+                fallback_chain=models_attempted
+            )
+        
+        print(f"[ACTION_RUNNER] Fallback successful with {result.model_used}")
+        return result
+    
+    def _fallback_exhausted(self, models_attempted: List[str], start_time: float) -> ActionResult:
         return ActionResult(
             success=False,
             error_message="All models failed. Fallback chain exhausted.",
@@ -394,29 +946,62 @@ class ActionRunner:
             latency_ms=int((time.time() - start_time) * 1000)
         )
     
+    def _resolve_prompt_path(self, prompt_file: str) -> str:
+        """Resuelve el path absoluto de un prompt dentro de app/prompts"""
+        # Forzamos limpieza del path
+        clean_file = prompt_file.strip().replace("\\", "/")
+        
+        # Si empieza con / o ./ lo quitamos
+        if clean_file.startswith("./"): clean_file = clean_file[2:]
+        if clean_file.startswith("/"): clean_file = clean_file[1:]
+        
+        # Si empieza con prompts/ lo quitamos
+        if clean_file.startswith("prompts/"):
+            clean_file = clean_file.replace("prompts/", "", 1)
+        
+        prompt_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "prompts"))
+        prompt_path = os.path.normpath(os.path.join(prompt_dir, clean_file))
+        
+        # Log de depuración para ver qué está pasando exactamente
+        # print(f"[ACTION_RUNNER] Loading prompt: original='{prompt_file}', clean='{clean_file}', final='{prompt_path}'")
+        
+        # Security check
+        if not prompt_path.startswith(prompt_dir):
+            raise Exception(f"Insecure prompt path: {prompt_file}")
+        return prompt_path
+
+    def _prompt_hash(self, prompt_file: str) -> str:
+        """sha256 del archivo de prompt (memoizado por mtime). Prompt ausente -> hash del nombre."""
+        try:
+            prompt_path = self._resolve_prompt_path(prompt_file)
+            mtime = os.path.getmtime(prompt_path)
+        except Exception:
+            return hashlib.sha256(f"missing:{prompt_file}".encode()).hexdigest()
+        
+        cached = self._prompt_hashes.get(prompt_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(prompt_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._prompt_hashes[prompt_path] = (mtime, digest)
+        return digest
+
+    def _get_cache_key(self, action_name: str, action_config: ActionConfig, input_data: Dict[str, Any]) -> Optional[str]:
+        """Clave de cache para la acción, o None si no aplica (sin cache o sin contenido)"""
+        content = input_data.get("content")
+        if not self.cache or not isinstance(content, str) or not content:
+            return None
+        return ExtractionCache.make_key(
+            ExtractionCache.content_hash(content),
+            action_name,
+            action_config.primary.model,
+            self._prompt_hash(action_config.primary.prompt_file)
+        )
+
     def _load_prompt(self, prompt_file: str, input_data: Dict[str, Any], context: Dict[str, Any]) -> str:
         """Carga y prepara el prompt"""
         try:
-            # Forzamos limpieza del path
-            clean_file = prompt_file.strip().replace("\\", "/")
-            
-            # Si empieza con / o ./ lo quitamos
-            if clean_file.startswith("./"): clean_file = clean_file[2:]
-            if clean_file.startswith("/"): clean_file = clean_file[1:]
-            
-            # Si empieza con prompts/ lo quitamos
-            if clean_file.startswith("prompts/"):
-                clean_file = clean_file.replace("prompts/", "", 1)
-            
-            prompt_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "prompts"))
-            prompt_path = os.path.normpath(os.path.join(prompt_dir, clean_file))
-            
-            # Log de depuración para ver qué está pasando exactamente
-            # print(f"[ACTION_RUNNER] Loading prompt: original='{prompt_file}', clean='{clean_file}', final='{prompt_path}'")
-            
-            # Security check
-            if not prompt_path.startswith(prompt_dir):
-                raise Exception(f"Insecure prompt path: {prompt_file}")
+            prompt_path = self._resolve_prompt_path(prompt_file)
             
             if not os.path.exists(prompt_path):
                 # Intentamos buscarlo sin el prefijo v3 si fallara, por si acaso
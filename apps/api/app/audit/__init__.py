@@ -29,6 +29,11 @@ class FileProcessingLog:
     fallback_used: bool = False
     fallback_chain: Optional[List[str]] = None
     
+    # Hedge: primario y primer fallback en carrera (winner: primary, fallback, none)
+    hedged: bool = False
+    hedge_winner: Optional[str] = None
+    hedge_delay_ms: Optional[int] = None
+    
     status: str = "pending"  # success, failed, fallback_exhausted
     input_tokens: Optional[int] = None
     output_tokens: Optional[int] = None
@@ -149,6 +154,17 @@ class FileProcessingLogger:
         log_entry.latency_ms = latency_ms
         log_entry.updated_at = datetime.utcnow()
     
+    def update_hedge(self, log_id: str, winner: Optional[str], delay_ms: int):
+        """Registra que se lanzó un hedge y quién ganó (None = fallaron ambos)"""
+        if log_id not in self._current_logs:
+            return
+        
+        log_entry = self._current_logs[log_id]
+        log_entry.hedged = True
+        log_entry.hedge_winner = winner or "none"
+        log_entry.hedge_delay_ms = delay_ms
+        log_entry.updated_at = datetime.utcnow()
+    
     def update_processing_results(
         self,
         log_id: str,
@@ -284,6 +300,15 @@ class FileProcessingLogger:
                 'stats': {}
             }
 
+    def get_hedge_win_rates(self) -> List[Dict[str, Any]]:
+        """Tasa de victorias del hedge por acción y modelo primario (vista hedge_win_rates)"""
+        try:
+            result = self.supabase.table('hedge_win_rates').select('*').execute()
+            return result.data or []
+        except Exception as e:
+            print(f"[AUDIT] Error al obtener estadísticas de hedge: {e}")
+            return []
+
 # Función auxiliar para RPC de estadísticas
 def create_file_processing_stats_rpc():
     """Crea función RPC para estadísticas agregadas"""
@@ -3,12 +3,21 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # App Mode
-    GRAPH_MODE: str = "MOCK" 
+    GRAPH_MODE: str = "MOCK" # NEO4J | SUPABASE | MEMORY | MOCK
+
+    # Grafo en memoria (GRAPH_MODE=MEMORY, requiere numpy)
+    GRAPH_ENGINE_MAX_SOLUTIONS: int = 8 # Grafos de solución cargados a la vez (LRU)
+    GRAPH_ENGINE_REFRESH_SECONDS: float = 10.0 # Cada cuánto se comprueba si otro proceso completó un job
+
+    # GET /solutions/{id}/graph
+    GRAPH_PAGE_MAX_LIMIT: int = 10000 # Máximo de nodos+aristas por página
+    GZIP_MIN_BYTES: int = 1000 # Respuestas más chicas se envían sin comprimir
 
     # Neo4j
     NEO4J_URI: str = "bolt://localhost:7687"
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str = "password"
+    NEO4J_BATCH_SIZE: int = 5000 # Filas por transacción en las escrituras UNWIND
     
     # Supabase (Required for Auth & DB)
     SUPABASE_URL: str = ""
@@ -23,9 +32,49 @@ class Settings(BaseSettings):
     # Groq
     GROQ_API_KEY: str = ""
     LLM_PROVIDER: str = "openrouter" # "openrouter" or "groq"
+
+    # Async LLM client (LLMAdapter.acall_model)
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
+    GROQ_BASE_URL: str = "https://api.groq.com/openai/v1"
+    LLM_HTTP2: bool = True # Requiere el paquete h2; si no está, HTTP/1.1 con keep-alive
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    LLM_REQUEST_TIMEOUT_SECONDS: float = 120.0
+    LLM_MAX_CONCURRENCY_OPENROUTER: int = 32 # Llamadas en vuelo por proveedor
+    LLM_MAX_CONCURRENCY_GROQ: int = 8
     
     # Storage
     UPLOAD_DIR: str = os.path.join(os.getcwd(), "temp_uploads")
+    INGEST_MODE: str = "stream" # "stream": ZIP leído en sitio (solo se leen los items PROCESS); "extract": extractall a UPLOAD_DIR
+    STORAGE_DOWNLOAD_CHUNK_BYTES: int = 1024 * 1024
+
+    # Local caches (extraction results, etc.)
+    CACHE_DIR: str = os.path.join(os.getcwd(), ".cache")
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_MAX_BYTES: int = 512 * 1024 * 1024 # 512 MB, LRU eviction above this
+    SQL_PARSE_CACHE_MAX_ENTRIES: int = 50_000 # Sentencias SQL parseadas (resumen de tablas) en memoria, LRU (0 = deshabilitado)
+    SQL_PARSE_CACHE_PERSIST: bool = False # Persistir ese cache en CACHE_DIR/sql_parse_cache.sqlite
+
+    # Pipeline
+    PIPELINE_MAX_WORKERS: int = 4 # Items ejecutados en paralelo dentro de un Area (1 = serial)
+    INVENTORY_MAX_WORKERS: int = 4 # Threads del planner para listar/stat-ear directorios y hashear archivos (1 = serial)
+    PARSER_PROCESSES: int = 0 # Procesos para los parsers nativos (DTSX/SQL/Python) de items PARSER_ONLY (0 = uno por core, 1 = en proceso)
+    PY_PARSER_ONLY_CONFIDENCE: float = 0.9 # .py con confianza del parser AST >= este valor: PARSER_ONLY (sin LLM)
+    PY_PARSER_PLUS_LLM_CONFIDENCE: float = 0.6 # >= este valor: PARSER_PLUS_LLM (estructura AST como pista); debajo: LLM_ONLY
+    GRAPH_PROJECTION_BATCH_SIZE: int = 5000 # Filas de catálogo (assets + edges) por lote proyectado al grafo (GRAPH_MODE=NEO4J)
+    GRAPH_PROJECTION_BACKGROUND: bool = True # Proyectar en un thread mientras se extraen las áreas siguientes
+
+    # Job Queue / Worker
+    QUEUE_BACKEND: str = "supabase" # "supabase" or "sqlite" (local, load testing without Supabase)
+    QUEUE_SQLITE_PATH: str = os.path.join(os.getcwd(), ".cache", "job_queue.sqlite")
+    DATABASE_URL: str = "" # Postgres DSN for LISTEN/NOTIFY (optional, needs psycopg); polling otherwise
+    WORKER_CONCURRENCY: int = 2 # Jobs en paralelo por proceso worker
+    QUEUE_LEASE_SECONDS: int = 120 # Un job sin heartbeat durante este tiempo se reclama de nuevo
+    QUEUE_POLL_INTERVAL: float = 5.0 # Fallback si no llega notificación
+    QUEUE_MAX_ATTEMPTS: int = 3
+    QUEUE_BACKOFF_BASE_SECONDS: float = 10.0
+    QUEUE_BACKOFF_MAX_SECONDS: float = 600.0
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), ".env"),
@@ -1,8 +1,13 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Response
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Response, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
 from dotenv import load_dotenv
 from .tasks import analyze_solution_task
 from pydantic import BaseModel
+from typing import List, Optional
+import hashlib
+import threading
 from .routers import planning
 
 load_dotenv()
@@ -18,6 +23,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# gzip when the client accepts it (large graph pages compress ~10x)
+from .config import settings
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MIN_BYTES)
+
 app.include_router(planning.router)
 
 class JobRequest(BaseModel):
@@ -34,7 +43,7 @@ def health_check():
 
 @app.post("/jobs")
 async def create_job(job: JobRequest):
-    from .services.queue import SQLJobQueue
+    from .services.queue import get_job_queue
     from supabase import create_client
     from .config import settings
     
@@ -66,7 +75,7 @@ async def create_job(job: JobRequest):
     supabase.table("solutions").update({"status": "QUEUED"}).eq("id", job.solution_id).execute()
     
     # 2. Enqueue
-    queue = SQLJobQueue()
+    queue = get_job_queue()
     queue.enqueue_job(new_job_id)
     
     # We also need to store the file_path somewhere so the worker knows what to process.
@@ -78,13 +87,99 @@ async def create_job(job: JobRequest):
     
     return {"job_id": new_job_id, "status": "queued"}
 
+def _parse_node_fields(fields: Optional[str]) -> Optional[List[str]]:
+    from .services.graph import NODE_FIELDS
+    if not fields:
+        return None
+    node_fields = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(node_fields) - set(NODE_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields {unknown}. Available: {list(NODE_FIELDS)}")
+    return node_fields
+
+_etag_supabase = None
+_etag_supabase_lock = threading.Lock()
+
+def _get_etag_supabase():
+    """One client for the ETag lookups (a new one per request costs a connection setup)"""
+    global _etag_supabase
+    with _etag_supabase_lock:
+        if _etag_supabase is None:
+            from supabase import create_client
+            from .config import settings
+            _etag_supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    return _etag_supabase
+
+def _graph_etag(solution_id: str, graph_service, *parts) -> Optional[str]:
+    """
+    Weak ETag keyed on the version of the data the service serves: the job the in-memory
+    graph was loaded from (GRAPH_MODE=MEMORY), else the last completed job of the solution.
+    None when the solution has no completed job.
+    """
+    from .config import settings
+    from .services.graph_engine import last_completed_job
+    version = graph_service.data_version(solution_id) or last_completed_job(_get_etag_supabase(), solution_id)
+    if not version:
+        return None
+    key = "|".join(str(p) for p in (solution_id, version, settings.GRAPH_MODE, *parts))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+def _etag_matches(request: Request, etag: Optional[str]) -> bool:
+    if not etag:
+        return False
+    header = request.headers.get("if-none-match") or ""
+    return any(tag.strip() in (etag, "*") for tag in header.split(","))
+
 @app.get("/solutions/{solution_id}/graph")
-def get_solution_graph(solution_id: str):
+def get_solution_graph(solution_id: str, request: Request, cursor: Optional[str] = None,
+                       limit: Optional[int] = None, fields: Optional[str] = None):
+    """
+    Whole graph, or one page when limit/cursor is given: ?limit=5000, then ?cursor=<next_cursor>
+    until next_cursor is null (nodes first, then edges, both by id).
+    fields=label,type,parentId restricts node data; details via POST /solutions/{id}/graph/nodes.
+    Responds 304 to If-None-Match while no new job has completed for the solution.
+    """
+    from .config import settings
+    from .services.graph import get_graph_service, project_node
+    node_fields = _parse_node_fields(fields)
+    paged = cursor is not None or limit is not None
+    if paged:
+        limit = max(1, min(limit or settings.GRAPH_PAGE_MAX_LIMIT, settings.GRAPH_PAGE_MAX_LIMIT))
+    
+    graph_service = get_graph_service()
+    etag = _graph_etag(solution_id, graph_service, cursor, limit if paged else None, fields)
+    headers = {"Cache-Control": "private, no-cache"}
+    if etag:
+        headers["ETag"] = etag
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    if paged:
+        try:
+            data = graph_service.get_graph_page(solution_id, cursor, limit, node_fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        data = graph_service.get_graph_data(solution_id)
+        if node_fields is not None and "tags" in node_fields:
+            # The graph comes without tags (opt-in): the services read them for the requested fields
+            data = {**data, "nodes": graph_service.get_nodes(solution_id, [n["id"] for n in data.get("nodes", [])], node_fields)}
+        elif node_fields is not None:
+            data = {**data, "nodes": [project_node(n, node_fields) for n in data.get("nodes", [])]}
+    return JSONResponse(data, headers=headers)
+
+class GraphNodesRequest(BaseModel):
+    ids: List[str]
+    fields: Optional[str] = None
+
+@app.post("/solutions/{solution_id}/graph/nodes")
+def get_solution_graph_nodes(solution_id: str, req: GraphNodesRequest):
+    from .config import settings
     from .services.graph import get_graph_service
-    # For now we return the whole graph as we are not filtering by subgraph yet in Neo4j service
+    if len(req.ids) > settings.GRAPH_PAGE_MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"At most {settings.GRAPH_PAGE_MAX_LIMIT} ids per request")
     graph_service = get_graph_service()
-    data = graph_service.get_graph_data(solution_id)
-    return data
+    return {"nodes": graph_service.get_nodes(solution_id, req.ids, _parse_node_fields(req.fields))}
 
 class ChatRequest(BaseModel):
     question: str
@@ -209,11 +304,11 @@ async def delete_solution(solution_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 class ReanalyzeRequest(BaseModel):
-    mode: str = "update" # update | full
+    mode: str = "update" # update | full | incremental (only files changed since the last run)
 
 @app.post("/solutions/{solution_id}/analyze")
 async def reanalyze_solution(solution_id: str, request: ReanalyzeRequest = ReanalyzeRequest(mode="update")):
-    from .services.queue import SQLJobQueue
+    from .services.queue import get_job_queue
     from supabase import create_client
     from .config import settings
     
@@ -228,6 +323,7 @@ async def reanalyze_solution(solution_id: str, request: ReanalyzeRequest = Reana
             supabase.table("edge_index").delete().eq("project_id", solution_id).execute()
             supabase.table("asset").delete().eq("project_id", solution_id).execute()
             supabase.table("evidence").delete().eq("project_id", solution_id).execute()
+            supabase.table("solution_manifest").delete().eq("project_id", solution_id).execute()
         except Exception as e:
             print(f"Warning during cleanup: {e}")
 
@@ -245,7 +341,8 @@ async def reanalyze_solution(solution_id: str, request: ReanalyzeRequest = Reana
             "project_id": solution_id,
             "status": "queued",
             "current_stage": "ingest",
-            "requires_approval": True
+            "requires_approval": True,
+            "analysis_mode": request.mode
         }
         res = supabase.table("job_run").insert(job_data).execute()
         
@@ -258,7 +355,7 @@ async def reanalyze_solution(solution_id: str, request: ReanalyzeRequest = Reana
         supabase.table("solutions").update({"status": "QUEUED"}).eq("id", solution_id).execute()
         
         # Enqueue
-        queue = SQLJobQueue()
+        queue = get_job_queue()
         queue.enqueue_job(new_job_id)
         
         return {"status": "queued", "job_id": new_job_id, "mode": request.mode}
@@ -279,6 +376,12 @@ class PathRequest(BaseModel):
     to_id: str
     max_hops: int = 5
 
+class ImpactRequest(BaseModel):
+    asset_id: str
+    direction: str = "downstream" # "downstream" | "upstream"
+    max_depth: Optional[int] = None
+    limit: int = 1000
+
 @app.post("/graph/subgraph")
 async def get_subgraph(req: SubgraphRequest):
     from .services.graph import get_graph_service
@@ -291,6 +394,14 @@ async def find_paths(req: PathRequest):
     graph = get_graph_service()
     return graph.find_paths(req.from_id, req.to_id, req.max_hops)
 
+@app.post("/graph/impact")
+async def get_impact(req: ImpactRequest):
+    from .services.graph import get_graph_service
+    if req.direction not in ("downstream", "upstream"):
+        raise HTTPException(status_code=400, detail="direction must be 'downstream' or 'upstream'")
+    graph = get_graph_service()
+    return graph.get_impact(req.asset_id, req.direction, req.max_depth, req.limit)
+
 @app.post("/admin/cleanup")
 async def admin_cleanup_database():
     """
@@ -453,6 +564,31 @@ async def get_solution_assets(
     res = query.execute()
     return {"data": res.data, "count": res.count}
 
+@app.get("/solutions/{solution_id}/columns/lineage")
+async def get_column_lineage(solution_id: str, column: str, max_depth: Optional[int] = None, limit: int = 20):
+    """
+    Where a column comes from, across the SSIS/DataStage packages of the solution:
+    `column` is a name or a dotted suffix (`Email`, `Customers.Email`, `dbo.customers.email`).
+    """
+    from supabase import create_client
+    from .services.column_lineage import ColumnLineageStore
+    supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    
+    graph = ColumnLineageStore(supabase).load(solution_id)
+    matches = graph.find(column)
+    return {
+        "column": column,
+        "total_matches": len(matches),
+        "matches": [
+            {
+                "column": graph.labels[col_id],
+                "upstream": [{"column": graph.labels[s], "depth": depth} for s, depth in graph.upstream(col_id, max_depth)],
+                "origins": [graph.labels[s] for s in graph.origins(col_id)]
+            }
+            for col_id in matches[:limit]
+        ]
+    }
+
 @app.get("/assets/{asset_id}/details")
 async def get_asset_details(asset_id: str):
     from supabase import create_client
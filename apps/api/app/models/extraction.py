@@ -23,7 +23,7 @@ class ExtractedNode(BaseModel):
     system: str = Field(..., description="sqlserver|files|api|unknown")
     parent_node_id: Optional[str] = Field(None, description="ID of the parent node (e.g. Package ID for a Task)")
     attributes: Dict[str, Any] = Field(default_factory=dict)
-    columns_metadata: List[Dict[str, Any]] = Field(default_factory=dict)
+    columns_metadata: List[Dict[str, Any]] = Field(default_factory=list)
 
 class ExtractedEdge(BaseModel):
     edge_id: str
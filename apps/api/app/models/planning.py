@@ -17,6 +17,7 @@ class JobPlanMode(str, Enum):
     LOW_COST = "low_cost"
     DEEP_SCAN = "deep_scan"
     STANDARD = "standard"
+    INCREMENTAL = "incremental" # Only files changed since the last successful run
 
 class AreaKey(str, Enum):
     FOUNDATION = "FOUNDATION"
@@ -28,6 +29,7 @@ class Strategy(str, Enum):
     PARSER_PLUS_LLM = "PARSER_PLUS_LLM"
     LLM_ONLY = "LLM_ONLY"
     SKIP = "SKIP"
+    REUSE = "REUSE" # Unchanged since last run: keep existing assets/edges
 
 class RecommendedAction(str, Enum):
     PROCESS = "PROCESS"
@@ -82,6 +84,7 @@ class JobPlanBase(BaseModel):
     mode: JobPlanMode = JobPlanMode.STANDARD
     summary: Dict[str, Any] = {}
     user_overrides: Dict[str, Any] = {}
+    policy_version: Optional[str] = None
 
 class JobPlan(JobPlanBase):
     plan_id: uuid.UUID
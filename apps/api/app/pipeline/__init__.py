@@ -1,6 +1,6 @@
 """
 Pipeline Module
 """
-from .orchestrator import PipelineOrchestrator, ProcessingResult, PipelineMetrics
+from .orchestrator import PipelineOrchestrator, ProcessingResult, PipelineMetrics, JobCancelled
 
-__all__ = ['PipelineOrchestrator', 'ProcessingResult', 'PipelineMetrics']
\ No newline at end of file
+__all__ = ['PipelineOrchestrator', 'ProcessingResult', 'PipelineMetrics', 'JobCancelled']
\ No newline at end of file
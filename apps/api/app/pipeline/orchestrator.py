@@ -7,6 +7,9 @@ import hashlib
 import json
 import traceback
 import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from pathlib import Path
@@ -14,14 +17,22 @@ from dataclasses import dataclass
 from supabase import create_client
 
 from ..models.extraction import ExtractionResult, ExtractedNode, ExtractedEdge, Evidence, Locator
-from ..models.planning import JobPlanStatus, RecommendedAction, Strategy
+from ..models.planning import JobPlanStatus, JobPlanMode, RecommendedAction, Strategy
 from ..router import get_model_router
 from ..audit import FileProcessingLogger
 from ..actions import ActionRunner, ActionResult
 from ..services.storage import StorageService
+from ..services.archive import ArchiveSource, DirectorySource
 from ..services.catalog import CatalogService
 from ..services.planner import PlannerService
+from ..services.manifest import ManifestService
+from ..services.column_lineage import ColumnLineageStore
+from ..services.graph import Neo4jGraphService, get_graph_service
+from ..services.graph_projector import GraphProjector
 from ..services.extractors.ssis import SSISParser
+from ..services.extractors.python_ast import PythonAstExtractor
+from ..services.extraction_cache import ExtractionCache
+from ..services import parallel_extract
 from ..config import settings
 
 @dataclass
@@ -42,6 +53,14 @@ class ProcessingResult:
     processing_time_ms: int = 0
     tokens_used: int = 0
     cost_estimate: float = 0.0
+    cache_hit: bool = False
+    # Solution manifest (incremental re-analysis)
+    content_hash: Optional[str] = None
+    size_bytes: Optional[int] = None
+    mtime: Optional[float] = None
+
+class JobCancelled(Exception):
+    """The worker lost the job lease: another worker owns the job, stop without writing its final status"""
 
 @dataclass
 class PipelineMetrics:
@@ -54,6 +73,8 @@ class PipelineMetrics:
     total_tokens: int = 0
     total_cost: float = 0.0
     total_processing_time_ms: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
     strategy_counts: Dict[str, int] = None
     model_usage: Dict[str, int] = None
     error_counts: Dict[str, int] = None
@@ -63,7 +84,7 @@ class PipelineOrchestrator:
     Orquesta el procesamiento basado en PLANES (v3).
     """
     
-    def __init__(self, supabase_client=None):
+    def __init__(self, supabase_client=None, cancelled: Optional[threading.Event] = None):
         self.router = get_model_router()
         self.logger = FileProcessingLogger(supabase_client)
         self.action_runner = ActionRunner(self.logger)
@@ -76,12 +97,17 @@ class PipelineOrchestrator:
             
         self.catalog = CatalogService(self.supabase)
         self.planner = PlannerService(self.supabase)
+        self.manifest = ManifestService(self.supabase)
+        self.column_lineage = ColumnLineageStore(self.supabase)
         
         # Métricas
         self.metrics = PipelineMetrics()
         self.metrics.strategy_counts = {}
         self.metrics.model_usage = {}
         self.metrics.error_counts = {}
+        self._lock = threading.Lock() # Protege métricas y progreso en ejecución paralela
+        self._progress_lock = threading.Lock() # Serializa las escrituras de progress_pct (monótonas)
+        self.cancelled = cancelled or threading.Event() # Set by the worker when the lease is lost
     
     def execute_pipeline(self, job_id: str, artifact_path: str) -> bool:
         """
@@ -94,16 +120,17 @@ class PipelineOrchestrator:
         """
         print(f"[PIPELINE v3] Starting pipeline for job {job_id}")
         
+        source = None
         try:
             # 1. Ingest
             ingest_result = self._execute_stage(job_id, "ingest", lambda: self._ingest_artifact(artifact_path))
             if not ingest_result.success:
                 raise Exception(f"Ingest failed: {ingest_result.error_message}")
             
-            local_artifact_path = ingest_result.data.get("local_path")
+            source = ingest_result.data.get("source")
             
             # 2. Check Plan Status
-            job_data = self.supabase.table("job_run").select("plan_id, requires_approval").eq("job_id", job_id).single().execute()
+            job_data = self.supabase.table("job_run").select("plan_id, requires_approval, analysis_mode").eq("job_id", job_id).single().execute()
             current_plan_id = job_data.data.get("plan_id")
             requires_approval = job_data.data.get("requires_approval")
             if requires_approval is None:
@@ -114,7 +141,8 @@ class PipelineOrchestrator:
                 print(f"[PIPELINE v3] No plan found. Entering Planning Phase.")
                 self._update_job_progress(job_id, "planning")
                 
-                plan_id = self.planner.create_plan(job_id, local_artifact_path)
+                plan_mode = JobPlanMode.INCREMENTAL if job_data.data.get("analysis_mode") == "incremental" else JobPlanMode.STANDARD
+                plan_id = self.planner.create_plan(job_id, source, mode=plan_mode)
                 print(f"[PIPELINE v3] Plan created: {plan_id}. Waiting for approval.")
                 
                 # If legacy mode (requires_approval=False), auto-approve immediately
@@ -138,17 +166,24 @@ class PipelineOrchestrator:
             print(f"[PIPELINE v3] Plan Approved. Starting Execution Phase.")
             self._update_job_progress(job_id, "execution")
             
-            return self._execute_plan(job_id, current_plan_id, local_artifact_path)
+            return self._execute_plan(job_id, current_plan_id, source)
             
+        except JobCancelled:
+            raise # The job belongs to another worker now: no status writes
         except Exception as e:
             error_msg = f"Pipeline failed for job {job_id}: {str(e)}"
             print(f"[PIPELINE] {error_msg}")
             traceback.print_exc()
             self._update_job_status(job_id, "ERROR", error_msg)
             return False
+        finally:
+            if source:
+                source.close()
 
-    def _execute_plan(self, job_id: str, plan_id: str, root_path: str) -> bool:
-        """Executes the approved items in the plan"""
+    def _execute_plan(self, job_id: str, plan_id: str, source: ArchiveSource) -> bool:
+        """Executes the approved items in the plan (files are read lazily from the source)"""
+        if not isinstance(source, ArchiveSource):
+            source = DirectorySource(source)
         
         # Fetch items ordered by Area and Order Index
         # We need to join with Area to sort by Area Order, but supabase-py join is tricky.
@@ -163,43 +198,82 @@ class PipelineOrchestrator:
         items.sort(key=lambda x: (area_order_map.get(x["area_id"], 999), x["order_index"]))
         
         total_items = len(items)
-        print(f"[PIPELINE v3] Executing {total_items} items from plan.")
+        max_workers = self._resolve_max_workers(plan_id)
+        print(f"[PIPELINE v3] Executing {total_items} items from plan (workers={max_workers}).")
         
         file_results = []
+        provenance = {}
+        persisted = True
+        progress = {"started": 0, "done": 0}
+        
+        # Incremental: unchanged files keep their catalog rows, nothing to run
+        reused = [i for i in items if i["strategy"] == Strategy.REUSE]
+        if reused:
+            items = [i for i in items if i["strategy"] != Strategy.REUSE]
+            self._mark_reused(reused)
+            progress["started"] = progress["done"] = len(reused)
+            print(f"[PIPELINE v3] Reusing {len(reused)} unchanged items.")
+        
+        # Graph projection (NEO4J): each area is projected while the next one is extracted
+        projector = self._start_graph_projector(job_id)
         
-        for i, item in enumerate(items):
-            print(f"[PIPELINE v3] Processing Item {i+1}/{total_items}: {item['path']} ({item['strategy']})")
+        # Areas act as dependency barriers (FOUNDATION -> PACKAGES -> AUX):
+        # items inside an area run concurrently, the next area starts only when
+        # every item of the previous one has finished.
+        for area_order, area_group in groupby(items, key=lambda x: area_order_map.get(x["area_id"], 999)):
+            area_items = list(area_group)
+            self._check_cancelled(job_id, projector)
+            print(f"[PIPELINE v3] Area {area_order}: {len(area_items)} items")
             
-            # Update Job Progress (Current Item)
-            self.supabase.table("job_run").update({
-                "current_item_id": item["item_id"],
-                "progress_pct": int(((i) / total_items) * 100)
-            }).eq("job_id", job_id).execute()
+            # CPU bound native parsing (PARSER_ONLY .dtsx/.sql/.py) goes to the process pool
+            area_results = {}
+            # Large packages inside an archive stay in this process: streamed from the archive, not shipped
+            native_items = [i for i in area_items if i["strategy"] == Strategy.PARSER_ONLY and parallel_extract.supports(i["path"])
+                            and (isinstance(source, DirectorySource) or not self._is_streamed(source, i))]
+            if len(native_items) > 1 and parallel_extract.resolve_processes() > 1:
+                area_results.update(self._run_native_items(job_id, native_items, source, progress, total_items))
+            thread_items = [i for i in area_items if i["item_id"] not in area_results]
             
-            # Read Content
-            full_path = os.path.join(root_path, item["path"])
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-            except Exception as e:
-                print(f"Error reading file {full_path}: {e}")
-                continue
-
-            # Execute based on Strategy
-            res = self._process_item_v3(job_id, item, content, full_path)
-            file_results.append(res)
-            self._update_metrics(res)
+            if max_workers <= 1 or len(thread_items) <= 1:
+                for item in thread_items:
+                    area_results[item["item_id"]] = self._run_plan_item(job_id, item, source, progress, total_items)
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"plan-{area_order}") as pool:
+                    futures = {
+                        item["item_id"]: pool.submit(self._run_plan_item, job_id, item, source, progress, total_items)
+                        for item in thread_items
+                    }
+                    for item_id, future in futures.items():
+                        area_results[item_id] = future.result()
             
-            # Update Item Status
-            status = "completed" if res.success else "failed"
-            self.supabase.table("job_plan_item").update({"status": status}).eq("item_id", item["item_id"]).execute()
-
-        # Persist Results
-        self._execute_stage(job_id, "persist_results", lambda: self._persist_results(job_id, file_results))
+            # A partial area is not persisted: the new owner of the job runs it again
+            self._check_cancelled(job_id, projector)
+            
+            # Collect in plan order so persistence stays deterministic
+            area_file_results = [area_results[i["item_id"]] for i in area_items if area_results.get(i["item_id"])]
+            file_results.extend(area_file_results)
+            
+            # Persist Results of the area (later areas see its assets, as in the per-job sync)
+            persist = self._execute_stage(job_id, "persist_results", lambda: self._persist_results(job_id, area_file_results))
+            persisted = persisted and persist.success
+            area_provenance = persist.data.get("provenance", {}) if persist.success else {}
+            provenance.update(area_provenance)
+            if projector and area_provenance:
+                projector.submit(area_provenance)
+        
+        # Solution manifest: record what each file produced, retract what is gone
+        manifest_update = {}
+        if persisted:
+            manifest_stage = self._execute_stage(job_id, "update_manifest", lambda: self._update_manifest(
+                job_id, plan_id, file_results, provenance))
+            manifest_update = manifest_stage.data if manifest_stage.success else {}
         
         # Update Graph
-        if settings.NEO4J_URI:
-             self._execute_stage(job_id, "update_graph", lambda: self._update_graph(job_id, file_results))
+        if projector:
+            graph_stage = self._execute_stage(job_id, "update_graph", lambda: self._update_graph(job_id, projector, manifest_update))
+            if not graph_stage.success:
+                # The checkpoint is per project: the next job of the solution projects what is missing
+                print(f"[PIPELINE] Graph projection failed, the next job of the project catches up: {graph_stage.error_message}")
              
         # Complete Job
         self.supabase.table("job_run").update({
@@ -212,6 +286,178 @@ class PipelineOrchestrator:
         print(f"[PIPELINE] Metrics: {self._get_metrics_summary()}")
         return True
 
+    def _check_cancelled(self, job_id: str, projector: Optional[GraphProjector] = None):
+        """Raises JobCancelled once the worker lost the lease (checked between items and areas)"""
+        if not self.cancelled.is_set():
+            return
+        print(f"[PIPELINE v3] Job {job_id} cancelled: lease lost, stopping without completing it")
+        if projector:
+            try:
+                projector.close() # Areas already persisted finish projecting (the next owner skips them)
+            except Exception as e:
+                print(f"[PIPELINE] Graph projection failed while cancelling: {e}")
+        raise JobCancelled(f"Lease lost for job {job_id}")
+
+    def _resolve_max_workers(self, plan_id: str) -> int:
+        """Worker count per job: plan user_overrides.max_workers > settings.PIPELINE_MAX_WORKERS"""
+        max_workers = settings.PIPELINE_MAX_WORKERS
+        try:
+            plan_res = self.supabase.table("job_plan").select("user_overrides").eq("plan_id", plan_id).single().execute()
+            overrides = (plan_res.data or {}).get("user_overrides") or {}
+            if overrides.get("max_workers"):
+                max_workers = int(overrides["max_workers"])
+        except Exception as e:
+            print(f"[PIPELINE v3] Could not read plan overrides ({e}). Using {max_workers} workers.")
+        return max(1, max_workers)
+
+    def _run_plan_item(self, job_id: str, item: Dict, source: ArchiveSource, progress: Dict[str, int], total_items: int) -> Optional[ProcessingResult]:
+        """Processes a single plan item. Safe to call from worker threads."""
+        if self.cancelled.is_set():
+            return None # Queued items of a cancelled job are skipped; the area check raises
+        with self._lock:
+            progress["started"] += 1
+            position = progress["started"]
+        print(f"[PIPELINE v3] Processing Item {position}/{total_items}: {item['path']} ({item['strategy']})")
+        
+        # Update Job Progress (Current Item)
+        self._safe_update("job_run", {"current_item_id": item["item_id"]}, "job_id", job_id)
+        self._safe_update("job_plan_item", {"status": "processing"}, "item_id", item["item_id"])
+        
+        res = None
+        full_path = source.full_path(item["path"])
+        if item["strategy"] == Strategy.PARSER_ONLY and self._is_streamed(source, item):
+            # Large package: parsed from the source stream, never decoded into a str
+            res = self._extract_streamed(item, source)
+        else:
+            # Read Content (lazily: from disk or straight from the archive)
+            try:
+                content = parallel_extract.read_source(source, item["path"])
+            except Exception as e:
+                print(f"Error reading file {full_path}: {e}")
+                content = None
+            
+            if content is not None:
+                # Execute based on Strategy
+                res = self._process_item_v3(job_id, item, content, full_path)
+        
+        if res is not None:
+            self._update_metrics(res)
+            self._stamp_file_meta(res, item, source)
+        
+        # Update Item Status
+        status = "completed" if res and res.success else "failed"
+        self._safe_update("job_plan_item", {"status": status}, "item_id", item["item_id"])
+        
+        with self._lock:
+            progress["done"] += 1
+        self._report_progress(job_id, progress, total_items)
+        return res
+
+    def _run_native_items(self, job_id: str, items: List[Dict], source: ArchiveSource, progress: Dict[str, int], total_items: int) -> Dict[str, ProcessingResult]:
+        """
+        PARSER_ONLY items with a native parser, sharded across processes
+        (ParallelExtractor). This thread stays the only writer: statuses,
+        metrics and the results handed to _persist_results.
+        """
+        by_path = {}
+        
+        def files():
+            for item in items:
+                if self.cancelled.is_set():
+                    return # Stop feeding the pool; the area check raises
+                full_path = source.full_path(item["path"])
+                by_path[full_path] = item
+                self._safe_update("job_plan_item", {"status": "processing"}, "item_id", item["item_id"])
+                if isinstance(source, DirectorySource):
+                    yield full_path, None # The worker reads it from disk
+                    continue
+                try:
+                    yield full_path, parallel_extract.read_source(source, item["path"])
+                except Exception as e:
+                    print(f"Error reading file {full_path}: {e}")
+        
+        results = {}
+        print(f"[PIPELINE v3] Native parsing of {len(items)} items in {parallel_extract.resolve_processes()} processes")
+        with parallel_extract.ParallelExtractor() as extractor:
+            for extraction in extractor.map(files()):
+                item = by_path[extraction.file_path]
+                with self._lock:
+                    progress["started"] += 1
+                    progress["done"] += 1
+                res = self._native_result(item, extraction)
+                self._update_metrics(res)
+                self._stamp_file_meta(res, item, source)
+                results[item["item_id"]] = res
+                self._safe_update("job_plan_item", {"status": "completed" if res.success else "failed"}, "item_id", item["item_id"])
+                self._report_progress(job_id, progress, total_items)
+        
+        if self.cancelled.is_set():
+            return results
+        # Unreadable files never reached the pool
+        for item in items:
+            if item["item_id"] not in results:
+                self._safe_update("job_plan_item", {"status": "failed"}, "item_id", item["item_id"])
+                with self._lock:
+                    progress["started"] += 1
+                    progress["done"] += 1
+        return results
+
+    def _is_streamed(self, source: ArchiveSource, item: Dict) -> bool:
+        entry = source.stat(item["path"])
+        return parallel_extract.is_streamed(item["path"], entry.size_bytes if entry else None)
+
+    def _extract_streamed(self, item: Dict, source: ArchiveSource) -> ProcessingResult:
+        start_time = time.time()
+        try:
+            with source.open(item["path"]) as stream:
+                extraction = parallel_extract.extract_native_stream(source.full_path(item["path"]), stream)
+        except Exception as e:
+            return ProcessingResult(False, item["path"], "PARSER_ONLY", "error", error_message=str(e),
+                                    processing_time_ms=int((time.time() - start_time) * 1000))
+        return self._native_result(item, extraction)
+
+    @staticmethod
+    def _native_result(item: Dict, extraction: parallel_extract.NativeExtraction) -> ProcessingResult:
+        if extraction.success:
+            return ProcessingResult(True, item["path"], "PARSER_ONLY", "extraction", data=extraction.data,
+                                    model_used=extraction.extractor, processing_time_ms=extraction.processing_time_ms)
+        return ProcessingResult(False, item["path"], "PARSER_ONLY", "error", error_message=extraction.error_message,
+                                processing_time_ms=extraction.processing_time_ms)
+
+    def _report_progress(self, job_id: str, progress: Dict[str, int], total_items: int):
+        """Writes progress_pct only when it grows: concurrent writers never move it backwards"""
+        with self._progress_lock:
+            with self._lock:
+                progress_pct = int((progress["done"] / total_items) * 100)
+            if progress_pct <= progress.get("written_pct", -1):
+                return
+            progress["written_pct"] = progress_pct
+            self._safe_update("job_run", {"progress_pct": progress_pct}, "job_id", job_id)
+
+    def _mark_reused(self, items: List[Dict], chunk_size: int = 200):
+        ids = [i["item_id"] for i in items]
+        for i in range(0, len(ids), chunk_size):
+            try:
+                self.supabase.table("job_plan_item").update({"status": "reused"}).in_("item_id", ids[i:i + chunk_size]).execute()
+            except Exception as e:
+                print(f"[PIPELINE v3] Failed to mark reused items: {e}")
+
+    def _stamp_file_meta(self, res: ProcessingResult, item: Dict, source: ArchiveSource):
+        """Size/mtime/content hash of the processed file, for the solution manifest"""
+        entry = source.stat(item["path"])
+        if entry is None:
+            return
+        res.size_bytes, res.mtime = entry.size_bytes, entry.mtime
+        # The planner already hashed it during the inventory
+        res.content_hash = item.get("file_hash") or source.hash(item["path"])
+
+    def _safe_update(self, table: str, data: Dict[str, Any], key: str, value: str):
+        # Status writes must not abort the item (or sibling threads) on a transient error
+        try:
+            self.supabase.table(table).update(data).eq(key, value).execute()
+        except Exception as e:
+            print(f"[PIPELINE v3] Failed to update {table} {value}: {e}")
+
     def _process_item_v3(self, job_id: str, item: Dict, content: str, full_path: str) -> ProcessingResult:
         start_time = time.time()
         strategy = item["strategy"]
@@ -230,7 +476,7 @@ class PipelineOrchestrator:
                 # Determine Action Profile based on file type / item type
                 action_name = self._determine_action_profile(item)
                 
-                res = self._extract_with_llm(job_id, full_path, content, action_name)
+                res = self._extract_with_llm(job_id, full_path, content, action_name, file_hash=item.get("file_hash"))
                 
                 if res.success:
                      return self._create_success_result(item["path"], strategy, res, start_time)
@@ -273,14 +519,20 @@ class PipelineOrchestrator:
             return ActionResult(success=False, error_message=str(e))
 
     def _ingest_artifact(self, artifact_path: str) -> Dict[str, Any]:
-        # Same as v2
-        print(f"[PIPELINE] Ingesting artifact: {artifact_path}")
-        local_path = self.storage.download_and_extract(artifact_path)
-        return {"local_path": local_path}
+        print(f"[PIPELINE] Ingesting artifact: {artifact_path} (mode={settings.INGEST_MODE})")
+        if settings.INGEST_MODE == "extract":
+            source = DirectorySource(self.storage.download_and_extract(artifact_path))
+        else:
+            source = self.storage.open_artifact(artifact_path)
+        return {"local_path": source.root, "source": source}
 
     def _extract_with_native_parser(self, job_id: str, file_path: str, content: str) -> ActionResult:
         # Same as v2
         extension = Path(file_path).suffix.lower()
+        if parallel_extract.supports(file_path):
+            extraction = parallel_extract.extract_native(file_path, content)
+            if extraction.success:
+                return ActionResult(success=True, data=extraction.data, model_used=extraction.extractor)
         if extension == ".sql":
             return self._extract_sql_native(file_path, content)
         # ... (rest of native parsers)
@@ -294,9 +546,14 @@ class PipelineOrchestrator:
          nodes = [{"node_id": t, "node_type": "table", "name": t, "system": "sql"} for t in tables]
          return ActionResult(success=True, data={"nodes": nodes, "edges": []})
 
-    def _extract_with_llm(self, job_id: str, file_path: str, content: str, action_name: str = "extract_strict") -> ActionResult:
+    def _extract_with_llm(self, job_id: str, file_path: str, content: str, action_name: str = "extract_strict",
+                          file_hash: Optional[str] = None) -> ActionResult:
         # Same as v2 but accepts action_name
         
+        # The log identifies the file itself (planner hash when known), not the augmented prompt below
+        file_hash = file_hash or ExtractionCache.content_hash(content)
+        file_size = len(content)
+        
         # Enhanced Logic for SSIS/Packages (Deep Inspection)
         if action_name == "extract_lineage_package" and (file_path.lower().endswith(".dtsx") or file_path.lower().endswith(".xml")):
             try:
@@ -306,6 +563,13 @@ class PipelineOrchestrator:
                 content = f"{content}\n\n=== AUTOMATICALLY EXTRACTED STRUCTURE ===\n{json.dumps(structure, indent=2)}"
             except Exception as e:
                 print(f"[PIPELINE v3] SSIS Parser failed (falling back to raw LLM): {e}")
+        elif file_path.lower().endswith(".py"):
+            try:
+                structure = PythonAstExtractor().structure(content)
+                if structure["parser_confidence"] > 0:
+                    content = f"{content}\n\n=== AUTOMATICALLY EXTRACTED STRUCTURE ===\n{json.dumps(structure, indent=2)}"
+            except Exception as e:
+                print(f"[PIPELINE v3] Python AST parser failed (falling back to raw LLM): {e}")
 
         llm_input = {
             "file_path": file_path,
@@ -319,11 +583,24 @@ class PipelineOrchestrator:
         if action_name == "extract_lineage_package":
             log_action_name = "extract_strict"
             
-        log_id = self.logger.start_file_processing(job_id, file_path, log_action_name, len(content))
+        log_id = self.logger.start_file_processing(job_id, file_path, log_action_name, file_size, file_hash=file_hash)
         
         result = self.action_runner.run_action(action_name, llm_input, context, log_id)
         
+        if self.action_runner.cache:
+            with self._lock:
+                if result.cache_hit: self.metrics.cache_hits += 1
+                else: self.metrics.cache_misses += 1
+        
         if result.success:
+            data = result.data or {}
+            self.logger.update_processing_results(
+                log_id,
+                nodes_extracted=len(data.get("nodes", []) or []),
+                edges_extracted=len(data.get("edges", []) or []),
+                evidences_extracted=len(data.get("evidences", []) or []),
+                result_data=data
+            )
             self.logger.complete_file_processing(log_id, "success", "llm")
         else:
              self.logger.log_file_error(log_id, "llm_error", result.error_message)
@@ -331,57 +608,132 @@ class PipelineOrchestrator:
 
     def _persist_results(self, job_id: str, file_results: List[ProcessingResult]):
         count = 0
+        provenance = {} # Map<file path, {"asset_ids", "edge_ids"}>
         try:
             job_data = self.supabase.table("job_run").select("project_id").eq("job_id", job_id).single().execute()
             project_id = job_data.data.get("project_id")
             
+            extraction_results = []
             for res in file_results:
                 if res.success and res.data:
                     # Convert raw dict to ExtractionResult object
                     try:
-                        # Ensure 'nodes' and 'edges' exist
-                        if "nodes" not in res.data: res.data["nodes"] = []
-                        if "edges" not in res.data: res.data["edges"] = []
-                        if "evidences" not in res.data: res.data["evidences"] = []
-                        
-                        # Pre-process data to handle missing fields leniently
-                        import uuid
-                        
-                        # Fix Nodes
-                        for node in res.data.get("nodes", []):
-                            if "name" not in node and "node_id" in node:
-                                node["name"] = node["node_id"].split('.')[-1]
-                            if "system" not in node:
-                                node["system"] = "unknown"
-                        
-                        # Fix Edges
-                        for edge in res.data.get("edges", []):
-                            if "edge_id" not in edge:
-                                edge["edge_id"] = str(uuid.uuid4())
-                            if "rationale" not in edge:
-                                edge["rationale"] = "Extracted by LLM"
-                            if "confidence" not in edge:
-                                edge["confidence"] = 1.0
-                        
-                        # Add meta info
-                        res.data["meta"] = {
-                            "source_file": res.file_path,
-                            "extractor_id": res.model_used or res.strategy_used
-                        }
-                        
-                        # Use Pydantic models for validation/conversion
-                        extraction_result = ExtractionResult(**res.data)
-                        
-                        # Sync to Catalog
-                        self.catalog.sync_extraction_result(extraction_result, project_id, artifact_id=job_id)
-                        count += 1
+                        extraction_results.append(self._to_extraction_result(res))
                     except Exception as parse_e:
-                        print(f"[PIPELINE] Error converting/persisting result for {res.file_path}: {parse_e}")
+                        print(f"[PIPELINE] Error converting result for {res.file_path}: {parse_e}")
+            
+            # Sync to Catalog (one batched sync per call: the files of one area)
+            self.catalog.reset_round_trips()
+            try:
+                synced = self.catalog.sync_with_provenance(extraction_results, project_id, artifact_id=job_id)
+                for extraction_result, prov in zip(extraction_results, synced):
+                    provenance[extraction_result.meta.get("source_file")] = prov
+                count = len(extraction_results)
+            except Exception as batch_e:
+                # Isolate the offending result: fall back to one sync per file
+                print(f"[PIPELINE] Batched catalog sync failed ({batch_e}). Retrying per file.")
+                for extraction_result in extraction_results:
+                    try:
+                        prov = self.catalog.sync_with_provenance([extraction_result], project_id, artifact_id=job_id)[0]
+                        provenance[extraction_result.meta.get("source_file")] = prov
+                        count += 1
+                    except Exception as file_e:
+                        print(f"[PIPELINE] Error persisting result for {extraction_result.meta.get('source_file')}: {file_e}")
+            print(f"[PIPELINE] Catalog sync: {count} results in {self.catalog.round_trips} round trips")
+            
+            # Column lineage of the persisted SSIS/DataStage packages (one row per file)
+            lineage = {res.file_path: res.data["column_lineage"] for res in file_results
+                       if res.success and res.data and res.data.get("column_lineage") and res.file_path in provenance}
+            if lineage:
+                try:
+                    self.column_lineage.save(project_id, job_id, lineage)
+                except Exception as lineage_e:
+                    print(f"[PIPELINE] Error persisting column lineage: {lineage_e}")
                         
         except Exception as e:
             print(f"Persist error: {e}")
             traceback.print_exc()
-        return {"persisted_count": count}
+        return {"persisted_count": count, "catalog_round_trips": self.catalog.round_trips, "provenance": provenance}
+
+    def _update_manifest(self, job_id: str, plan_id: str, file_results: List[ProcessingResult], provenance: Dict[str, Dict]):
+        """
+        Records path/size/mtime/hash + produced assets/edges of every successfully processed
+        file, then retracts catalog rows of deleted files and rows a changed file no longer produces.
+        Failed files keep their previous entry (or none) so the next incremental run retries them.
+        """
+        job_data = self.supabase.table("job_run").select("project_id").eq("job_id", job_id).single().execute()
+        project_id = job_data.data.get("project_id")
+        
+        plan_res = self.supabase.table("job_plan").select("mode, summary").eq("plan_id", plan_id).single().execute()
+        plan = plan_res.data or {}
+        incremental = plan.get("mode") == JobPlanMode.INCREMENTAL
+        previous = self.manifest.load(project_id) if incremental else {}
+        
+        entries, stale = [], {}
+        for res in file_results:
+            if not res.success or not res.content_hash:
+                continue
+            if res.data and res.file_path not in provenance:
+                continue # Extracted but not persisted: do not claim it as done
+            prov = provenance.get(res.file_path, {})
+            entry = {
+                "path": res.file_path,
+                "size_bytes": res.size_bytes,
+                "mtime": res.mtime,
+                "content_hash": res.content_hash,
+                "asset_ids": prov.get("asset_ids", []),
+                "edge_ids": prov.get("edge_ids", [])
+            }
+            entries.append(entry)
+            
+            old = previous.get(res.file_path)
+            if old:
+                stale[res.file_path] = {
+                    "asset_ids": sorted(set(old.get("asset_ids") or []) - set(entry["asset_ids"])),
+                    "edge_ids": sorted(set(old.get("edge_ids") or []) - set(entry["edge_ids"]))
+                }
+        
+        # Save first: retraction keeps everything still claimed by a manifest entry
+        self.manifest.save_entries(project_id, job_id, entries)
+        
+        deleted_paths = (plan.get("summary") or {}).get("deleted_paths", []) if incremental else []
+        retracted = self.manifest.retract(project_id, deleted_paths, stale)
+        print(f"[PIPELINE] Manifest: {len(entries)} entries saved, {len(deleted_paths)} deleted paths, retracted "
+              f"{retracted['assets']} assets, {retracted['edges']} edges, {retracted['evidences']} evidences")
+        return {"manifest_entries": len(entries), "retracted": retracted, "deleted_paths": deleted_paths}
+
+    def _to_extraction_result(self, res: ProcessingResult) -> ExtractionResult:
+        # Ensure 'nodes' and 'edges' exist
+        if "nodes" not in res.data: res.data["nodes"] = []
+        if "edges" not in res.data: res.data["edges"] = []
+        if "evidences" not in res.data: res.data["evidences"] = []
+        
+        # Pre-process data to handle missing fields leniently
+        
+        # Fix Nodes
+        for node in res.data.get("nodes", []):
+            if "name" not in node and "node_id" in node:
+                node["name"] = node["node_id"].split('.')[-1]
+            if "system" not in node:
+                node["system"] = "unknown"
+        
+        # Fix Edges
+        for edge in res.data.get("edges", []):
+            if "edge_id" not in edge:
+                edge["edge_id"] = str(uuid.uuid4())
+            if "rationale" not in edge:
+                edge["rationale"] = "Extracted by LLM"
+            if "confidence" not in edge:
+                edge["confidence"] = 1.0
+        
+        # Add meta info
+        res.data["meta"] = {
+            "source_file": res.file_path,
+            "extractor_id": res.model_used or res.strategy_used
+        }
+        
+        # Use Pydantic models for validation/conversion
+        return ExtractionResult(**res.data)
 
     def _update_job_progress(self, job_id: str, stage: str):
         try:
@@ -396,18 +748,60 @@ class PipelineOrchestrator:
         except: pass
 
     def _create_success_result(self, file_path, strategy, res, start_time):
-        return ProcessingResult(True, file_path, strategy, "extraction", data=res.data, processing_time_ms=int((time.time()-start_time)*1000))
+        return ProcessingResult(True, file_path, strategy, "extraction", data=res.data,
+                                processing_time_ms=int((time.time()-start_time)*1000), cache_hit=res.cache_hit)
 
     def _create_error_result(self, file_path, strategy, res, start_time):
          return ProcessingResult(False, file_path, strategy, "extraction", error_message=res.error_message, processing_time_ms=int((time.time()-start_time)*1000))
 
     def _update_metrics(self, res):
-        self.metrics.total_files += 1
-        if res.success: self.metrics.successful_files += 1
-        else: self.metrics.failed_files += 1
+        with self._lock:
+            self.metrics.total_files += 1
+            if res.success: self.metrics.successful_files += 1
+            else: self.metrics.failed_files += 1
 
     def _get_metrics_summary(self):
-        return f"Files: {self.metrics.successful_files}/{self.metrics.total_files}"
+        return (f"Files: {self.metrics.successful_files}/{self.metrics.total_files} | "
+                f"Cache: {self.metrics.cache_hits} hits / {self.metrics.cache_misses} misses")
+
+    def _start_graph_projector(self, job_id: str) -> Optional[GraphProjector]:
+        """Projector of this job's catalog deltas into Neo4j; None when the graph reads the catalog directly"""
+        if settings.GRAPH_MODE != "NEO4J":
+            return None # SUPABASE/MEMORY serve the catalog itself, MOCK keeps nothing
+        try:
+            graph_service = get_graph_service()
+            if not isinstance(graph_service, Neo4jGraphService):
+                return None # Neo4j unreachable, fell back to the catalog
+            job_data = self.supabase.table("job_run").select("project_id").eq("job_id", job_id).single().execute()
+            projector = GraphProjector(self.supabase, graph_service, job_id, job_data.data.get("project_id"),
+                                       batch_size=settings.GRAPH_PROJECTION_BATCH_SIZE)
+        except Exception as e:
+            print(f"[PIPELINE] Graph projection disabled: {e}")
+            return None
+        if settings.GRAPH_PROJECTION_BACKGROUND:
+            projector.start()
+        return projector
 
-    def _update_graph(self, job_id, results):
-        pass
+    def _update_graph(self, job_id: str, projector: GraphProjector, manifest_update: Dict[str, Any]):
+        """
+        Waits for the projection of every persisted area, removes what the manifest retracted and
+        projects every manifest entry the graph is missing (REUSEd files, earlier failed projections)
+        """
+        try:
+            area_error = None
+            try:
+                projector.close()
+            except Exception as e:
+                area_error = e # Retried right below by catch_up (the failed files have no checkpoint)
+                print(f"[PIPELINE] Graph projection of the areas failed ({e}), catching up from the manifest")
+            retracted = manifest_update.get("retracted") or {}
+            projector.retract(retracted.get("asset_ids") or [], retracted.get("edge_ids") or [], manifest_update.get("deleted_paths") or [])
+            projector.catch_up(self.manifest.load(projector.project_id))
+        finally:
+            close = getattr(projector.graph, "close", None)
+            if close: close()
+        stats = projector.stats
+        print(f"[PIPELINE] Graph projection: {stats['files']} files ({stats['resumed_files']} from checkpoint), "
+              f"{stats['assets']} assets, {stats['edges']} edges in {stats['batches']} batches, {stats['retracted']} retracted"
+              f"{' after a failure' if area_error else ''}")
+        return stats
@@ -16,6 +16,7 @@ class ModelConfig:
     max_tokens: int = 1800
     timeout_ms: int = 60000
     provider: Optional[str] = None
+    context_tokens: int = 64000 # Ventana de contexto del modelo (presupuesto de chunking)
     
 @dataclass
 class ActionConfig:
@@ -150,7 +151,8 @@ class ModelRouter:
             temperature=action_config.get("temperature", defaults.get("temperature", 0.1)),
             max_tokens=action_config.get("max_tokens", defaults.get("max_tokens", 1800)),
             timeout_ms=action_config.get("timeout_ms", defaults.get("timeout_ms", 60000)),
-            provider=action_config.get("provider", defaults.get("provider"))
+            provider=action_config.get("provider", defaults.get("provider")),
+            context_tokens=action_config.get("context_tokens", defaults.get("context_tokens", 64000))
         )
         
         # Crear lista de fallbacks
@@ -163,7 +165,8 @@ class ModelRouter:
                     temperature=fallback_config.get("temperature", defaults.get("temperature", 0.1)),
                     max_tokens=fallback_config.get("max_tokens", defaults.get("max_tokens", 1800)),
                     timeout_ms=fallback_config.get("timeout_ms", defaults.get("timeout_ms", 60000)),
-                    provider=fallback_config.get("provider", defaults.get("provider"))
+                    provider=fallback_config.get("provider", defaults.get("provider")),
+                    context_tokens=fallback_config.get("context_tokens", defaults.get("context_tokens", 64000))
                 )
                 fallbacks.append(fallback_model)
         
@@ -5,7 +5,7 @@ from ..services.planner import PlannerService
 from ..models.planning import (
     JobPlan, JobPlanStatus, CreatePlanRequest, UpdatePlanItemRequest
 )
-from ..services.queue import SQLJobQueue
+from ..services.queue import get_job_queue
 
 router = APIRouter()
 
@@ -111,7 +111,7 @@ async def approve_plan(plan_id: str, supabase: Client = Depends(get_supabase)):
     }).eq("job_id", job_id).execute()
     
     # 3. Enqueue for Worker
-    queue = SQLJobQueue()
+    queue = get_job_queue()
     queue.enqueue_job(job_id)
     
     return {"status": "approved", "job_id": job_id}
@@ -0,0 +1,158 @@
+"""
+Archive Sources - Acceso uniforme a los archivos de un artefacto (directorio o ZIP)
+
+El planner inventaría el artefacto con entries() (ruta, tamaño, mtime: en un ZIP
+sale del directorio central, sin descomprimir nada) y el orquestador lee solo los
+items PROCESS bajo demanda con read_text(). Así un ZIP de varios GB no se extrae
+a disco ni se recorre dos veces.
+"""
+import os
+import time
+import hashlib
+import zipfile
+import posixpath
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, BinaryIO
+
+from .inventory import scan_tree
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+@dataclass
+class ArchiveEntry:
+    """Archivo del artefacto; path relativo con separador '/'"""
+    path: str
+    size_bytes: int
+    mtime: Optional[float] = None
+
+def sha256_stream(stream: BinaryIO, block_size: int = HASH_BLOCK_SIZE) -> str:
+    digest = hashlib.sha256()
+    for block in iter(lambda: stream.read(block_size), b""):
+        digest.update(block)
+    return digest.hexdigest()
+
+class ArchiveSource(ABC):
+    """Árbol de archivos de un artefacto. root: directorio al que son relativas las rutas."""
+
+    root: str
+
+    @abstractmethod
+    def entries(self, should_descend: Optional[Callable[[str], bool]] = None) -> Iterator[ArchiveEntry]:
+        """Todos los archivos (sin directorios); should_descend(rel_dir) -> False excluye ese subárbol"""
+
+    @abstractmethod
+    def stat(self, path: str) -> Optional[ArchiveEntry]:
+        pass
+
+    @abstractmethod
+    def open(self, path: str) -> BinaryIO:
+        pass
+
+    def read_text(self, path: str) -> str:
+        with self.open(path) as f:
+            return f.read().decode("utf-8", errors="ignore")
+
+    def hash(self, path: str) -> Optional[str]:
+        """sha256 del contenido (streamed); None si no se puede leer"""
+        try:
+            with self.open(path) as f:
+                return sha256_stream(f)
+        except (OSError, KeyError, zipfile.BadZipFile) as e:
+            print(f"[ARCHIVE] Could not hash {path}: {e}")
+            return None
+
+    def full_path(self, path: str) -> str:
+        """Ruta "de disco" del archivo (la que tendría extraído); se usa como file_path en extractores"""
+        return os.path.join(self.root, path)
+
+    def close(self):
+        pass
+
+class DirectorySource(ArchiveSource):
+    """Directorio ya presente en disco (clone git, ZIP extraído)"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def entries(self, should_descend: Optional[Callable[[str], bool]] = None) -> Iterator[ArchiveEntry]:
+        # Los directorios podados no se llegan a listar
+        for rel_path, size_bytes, mtime in scan_tree(self.root, should_descend):
+            yield ArchiveEntry(rel_path, size_bytes, mtime)
+
+    def stat(self, path: str) -> Optional[ArchiveEntry]:
+        try:
+            st = os.stat(self.full_path(path))
+        except OSError:
+            return None
+        return ArchiveEntry(path, st.st_size, st.st_mtime)
+
+    def open(self, path: str) -> BinaryIO:
+        return open(self.full_path(path), "rb")
+
+class ZipArchiveSource(ArchiveSource):
+    """
+    ZIP leído en sitio: el inventario sale del directorio central y cada miembro
+    se descomprime en streaming al leerlo. Lecturas concurrentes desde varios
+    threads son seguras (zipfile serializa el acceso al archivo subyacente).
+    """
+
+    def __init__(self, zip_path: str, root: Optional[str] = None, delete_on_close: bool = False):
+        self.zip_path = zip_path
+        self.root = root or os.path.splitext(zip_path)[0]
+        self.delete_on_close = delete_on_close
+        try:
+            self._zip = zipfile.ZipFile(zip_path, "r")
+        except zipfile.BadZipFile:
+            print("Error: The downloaded file is not a valid ZIP.")
+            raise Exception("Invalid ZIP file")
+        self._members = {}
+        for info in self._zip.infolist():
+            path = self._normalize(info.filename)
+            if path and not info.is_dir():
+                self._members[path] = info
+
+    @staticmethod
+    def _normalize(name: str) -> Optional[str]:
+        # Rutas relativas seguras (sin '..' ni absolutas), con '/'
+        path = posixpath.normpath(name.replace("\\", "/")).lstrip("/")
+        if path in ("", ".") or path.startswith("../"):
+            return None
+        return path
+
+    @staticmethod
+    def _entry(path: str, info: zipfile.ZipInfo) -> ArchiveEntry:
+        try:
+            mtime = time.mktime(info.date_time + (0, 0, -1))
+        except (OverflowError, ValueError):
+            mtime = None
+        return ArchiveEntry(path, info.file_size, mtime)
+
+    def entries(self, should_descend: Optional[Callable[[str], bool]] = None) -> Iterator[ArchiveEntry]:
+        # El ZIP no tiene árbol que recorrer: se filtra por directorio, decidiendo una sola vez cada uno
+        allowed: Dict[str, bool] = {"": True}
+
+        def dir_allowed(d: str) -> bool:
+            if d not in allowed:
+                parent = posixpath.dirname(d)
+                allowed[d] = dir_allowed(parent) and should_descend(d)
+            return allowed[d]
+
+        for path, info in self._members.items():
+            if should_descend is None or dir_allowed(posixpath.dirname(path)):
+                yield self._entry(path, info)
+
+    def stat(self, path: str) -> Optional[ArchiveEntry]:
+        info = self._members.get(path)
+        return self._entry(path, info) if info else None
+
+    def open(self, path: str) -> BinaryIO:
+        return self._zip.open(self._members[path], "r")
+
+    def close(self):
+        self._zip.close()
+        if self.delete_on_close:
+            try:
+                os.remove(self.zip_path)
+            except OSError:
+                pass
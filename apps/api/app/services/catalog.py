@@ -1,123 +1,220 @@
 from supabase import Client
+from typing import Dict, List, Optional, Tuple
 from ..models.extraction import ExtractionResult, ExtractedNode, ExtractedEdge, Evidence
 import uuid
 
 class CatalogService:
+    """
+    Writes extraction results into the SQL Catalog (asset, edge_index, evidence, edge_evidence).
+
+    The sync is set-based: existing rows for a whole batch of results are resolved
+    with a few chunked IN lookups, then written in bulk keyed on the natural keys
+    (project_id, name_display, asset_type) and (project_id, from_asset_id, to_asset_id, edge_type).
+
+    Primary keys are never rewritten: new rows are inserted with ignore_duplicates
+    (a row inserted concurrently by another job wins and its id is re-read), and
+    only rows whose id is known to be the stored one are upserted to refresh their
+    other columns. Parents are resolved in memory once every id is final.
+    """
+
+    LOOKUP_CHUNK_SIZE = 200 # Valores por filtro IN (limita el largo de la URL de PostgREST)
+    WRITE_CHUNK_SIZE = 500 # Filas por upsert
+
+    ASSET_CONFLICT_KEYS = "project_id,name_display,asset_type"
+    EDGE_CONFLICT_KEYS = "project_id,from_asset_id,to_asset_id,edge_type"
+
     def __init__(self, supabase: Client):
         self.supabase = supabase
+        self.round_trips = 0
+
+    def reset_round_trips(self):
+        self.round_trips = 0
+
+    def _execute(self, query):
+        """Executes a PostgREST query counting it as one round trip."""
+        self.round_trips += 1
+        return query.execute()
 
     def sync_extraction_result(self, result: ExtractionResult, project_id: str, artifact_id: str = None):
         """
         Writes nodes, edges, and evidences to the SQL Catalog.
+        Returns Map<local node_id, asset_id>.
+        """
+        return self.sync_extraction_results([result], project_id, artifact_id)[0]
+
+    def sync_extraction_results(self, results: List[ExtractionResult], project_id: str, artifact_id: str = None) -> List[Dict[str, str]]:
+        """
+        Batched sync for several ExtractionResults (e.g. a whole job).
+        Returns one Map<local node_id, asset_id> per result, in the same order.
+        """
+        return [p["node_id_map"] for p in self.sync_with_provenance(results, project_id, artifact_id)]
+
+    def sync_with_provenance(self, results: List[ExtractionResult], project_id: str, artifact_id: str = None) -> List[Dict]:
+        """
+        Same as sync_extraction_results, but returns per result what it produced:
+        {"node_id_map": {...}, "asset_ids": [...], "edge_ids": [...]} (used by the solution manifest).
         """
-        
+        if not results:
+            return []
+
         # 1. Assets (Nodes)
-        node_id_map = {} # Map local node_id to UUID
-        
-        for node in result.nodes:
-            # Let's try to find existing asset
-            existing = self.supabase.table("asset")\
-                .select("asset_id")\
-                .eq("project_id", project_id)\
-                .eq("name_display", node.name)\
-                .eq("asset_type", node.node_type)\
-                .execute()
-                
-            if existing.data:
-                asset_id = existing.data[0]["asset_id"]
-                # Update existing asset (Upsert logic)
-                self.supabase.table("asset").update({
-                    "tags": node.attributes,
-                    "updated_at": "now()",
-                    "system": node.system
-                }).eq("asset_id", asset_id).execute()
-            else:
-                asset_id = str(uuid.uuid4())
-                asset_data = {
-                    "asset_id": asset_id,
+        node_id_maps = self._sync_assets(results, project_id)
+
+        # 2. Evidences
+        evidence_id_maps = self._sync_evidences(results, project_id, artifact_id)
+
+        # 3. Edges + Edge Evidence Links
+        edge_id_lists = self._sync_edges(results, project_id, node_id_maps, evidence_id_maps)
+
+        return [
+            {"node_id_map": node_map, "asset_ids": sorted(set(node_map.values())), "edge_ids": edge_ids}
+            for node_map, edge_ids in zip(node_id_maps, edge_id_lists)
+        ]
+
+    # --- Assets ---
+
+    def _sync_assets(self, results: List[ExtractionResult], project_id: str) -> List[Dict[str, str]]:
+        # Dedupe by natural key across the whole batch (last writer wins, as the serial sync did)
+        rows_by_key: Dict[Tuple[str, str], Dict] = {}
+        parent_by_key: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        for idx, result in enumerate(results):
+            for node in result.nodes:
+                key = (node.name, node.node_type)
+                rows_by_key[key] = {
                     "project_id": project_id,
                     "asset_type": node.node_type,
                     "name_display": node.name,
                     "canonical_name": node.name, # logic to canonicalize?
                     "system": node.system,
                     "tags": node.attributes,
-                    "created_at": "now()",
                     "updated_at": "now()"
                 }
-                self.supabase.table("asset").insert(asset_data).execute()
-                
-            node_id_map[node.node_id] = asset_id
-            
-        # 1.5. Resolve Parent IDs to UUIDs (Second Pass)
-        for node in result.nodes:
-            if node.parent_node_id and node.parent_node_id in node_id_map:
-                parent_uuid = node_id_map[node.parent_node_id]
-                asset_id = node_id_map[node.node_id]
-                
-                # Update the actual parent_asset_id column for true hierarchy
-                self.supabase.table("asset").update({
-                    "parent_asset_id": parent_uuid
-                }).eq("asset_id", asset_id).execute()
+                if node.parent_node_id:
+                    parent_by_key[key] = (idx, node.parent_node_id)
 
-        # 2. Evidences
-        evidence_id_map = {}
-        for ev in result.evidences:
-            existing_ev = None
-            if ev.hash:
-                existing_ev = self.supabase.table("evidence")\
-                    .select("evidence_id")\
-                    .eq("project_id", project_id)\
-                    .eq("hash", ev.hash)\
-                    .eq("file_path", result.meta.get("source_file"))\
-                    .execute()
-            
-            if existing_ev and existing_ev.data:
-                ev_uuid = existing_ev.data[0]["evidence_id"]
-            else:
-                ev_uuid = str(uuid.uuid4())
-                evidence_data = {
-                    "evidence_id": ev_uuid,
-                    "project_id": project_id,
-                    "artifact_id": artifact_id,
-                    "file_path": result.meta.get("source_file"),
-                    "kind": ev.kind,
-                    "locator": ev.locator.model_dump(),
-                    "snippet": ev.snippet,
-                    "hash": ev.hash
-                }
-                self.supabase.table("evidence").insert(evidence_data).execute()
-            
-            evidence_id_map[ev.evidence_id] = ev_uuid
-
-        # 3. Edges
-        for edge in result.edges:
-            from_uuid = node_id_map.get(edge.from_node_id)
-            to_uuid = node_id_map.get(edge.to_node_id)
-            
-            if not from_uuid or not to_uuid:
-                continue # Skip if nodes not found
-                
-            # Check existing edge
-            existing_edge = self.supabase.table("edge_index")\
-                .select("edge_id")\
-                .eq("project_id", project_id)\
-                .eq("from_asset_id", from_uuid)\
-                .eq("to_asset_id", to_uuid)\
-                .eq("edge_type", edge.edge_type)\
-                .execute()
-            
-            if existing_edge.data:
-                edge_uuid = existing_edge.data[0]["edge_id"]
-                # Update confidence/metadata
-                self.supabase.table("edge_index").update({
-                    "confidence": edge.confidence,
-                    "is_hypothesis": edge.is_hypothesis,
-                    "extractor_id": result.meta.get("extractor_id")
-                }).eq("edge_id", edge_uuid).execute()
-            else:
-                edge_uuid = str(uuid.uuid4())
-                edge_data = {
-                    "edge_id": edge_uuid,
+        existing = self._lookup_assets(project_id, {name for name, _ in rows_by_key})
+        new_keys = [key for key in rows_by_key if key not in existing]
+        inserted = self._insert_new(
+            "asset",
+            [{**rows_by_key[key], "asset_id": str(uuid.uuid4())} for key in new_keys],
+            self.ASSET_CONFLICT_KEYS,
+            lambda row: ((row["name_display"], row["asset_type"]), row["asset_id"])
+        )
+        lost = [key for key in new_keys if key not in inserted]
+        if lost:
+            existing.update(self._lookup_assets(project_id, {name for name, _ in lost}))
+
+        asset_ids: Dict[Tuple[str, str], str] = {**existing, **inserted}
+        for key, row in rows_by_key.items():
+            row["asset_id"] = asset_ids[key]
+
+        # Local node_id -> asset UUID, per result
+        node_id_maps = []
+        for result in results:
+            node_id_maps.append({node.node_id: asset_ids[(node.name, node.node_type)] for node in result.nodes})
+
+        # Resolve Parent IDs to UUIDs in memory
+        for key, (idx, parent_node_id) in parent_by_key.items():
+            parent_uuid = node_id_maps[idx].get(parent_node_id)
+            if parent_uuid and parent_uuid != asset_ids[key]:
+                rows_by_key[key]["parent_asset_id"] = parent_uuid
+
+        # Every asset exists now (the FK holds): refresh the rows that were already there and set
+        # parents. Rows with and without parent are written separately so an upsert never
+        # clears a parent_asset_id set by another file.
+        refresh = [r for key, r in rows_by_key.items() if key not in inserted or "parent_asset_id" in r]
+        self._bulk_upsert("asset", [r for r in refresh if "parent_asset_id" not in r], self.ASSET_CONFLICT_KEYS)
+        self._bulk_upsert("asset", [r for r in refresh if "parent_asset_id" in r], self.ASSET_CONFLICT_KEYS)
+
+        return node_id_maps
+
+    def _lookup_assets(self, project_id: str, names: set) -> Dict[Tuple[str, str], str]:
+        found = {}
+        for chunk in self._chunks(sorted(names), self.LOOKUP_CHUNK_SIZE):
+            res = self._execute(
+                self.supabase.table("asset")
+                .select("asset_id, name_display, asset_type")
+                .eq("project_id", project_id)
+                .in_("name_display", chunk)
+            )
+            for row in res.data or []:
+                found.setdefault((row["name_display"], row["asset_type"]), row["asset_id"])
+        return found
+
+    # --- Evidences ---
+
+    def _sync_evidences(self, results: List[ExtractionResult], project_id: str, artifact_id: str = None) -> List[Dict[str, str]]:
+        hashed = {(r.meta.get("source_file"), ev.hash) for r in results for ev in r.evidences if ev.hash}
+        existing = self._lookup_evidences(project_id, hashed)
+
+        evidence_id_maps = []
+        new_rows = []
+        for result in results:
+            source_file = result.meta.get("source_file")
+            ev_map = {}
+            for ev in result.evidences:
+                key = (source_file, ev.hash)
+                ev_uuid = existing.get(key) if ev.hash else None
+                if not ev_uuid:
+                    ev_uuid = str(uuid.uuid4())
+                    if ev.hash:
+                        existing[key] = ev_uuid # same hash twice in the batch -> one row
+                    new_rows.append({
+                        "evidence_id": ev_uuid,
+                        "project_id": project_id,
+                        "artifact_id": artifact_id,
+                        "file_path": source_file,
+                        "kind": ev.kind,
+                        "locator": ev.locator.model_dump(),
+                        "snippet": ev.snippet,
+                        "hash": ev.hash
+                    })
+                ev_map[ev.evidence_id] = ev_uuid
+            evidence_id_maps.append(ev_map)
+
+        for chunk in self._chunks(new_rows, self.WRITE_CHUNK_SIZE):
+            self._execute(self.supabase.table("evidence").insert(chunk))
+        return evidence_id_maps
+
+    def _lookup_evidences(self, project_id: str, keys: set) -> Dict[Tuple[str, str], str]:
+        found = {}
+        if not keys:
+            return found
+        wanted_hashes = sorted({h for _, h in keys})
+        for chunk in self._chunks(wanted_hashes, self.LOOKUP_CHUNK_SIZE):
+            res = self._execute(
+                self.supabase.table("evidence")
+                .select("evidence_id, hash, file_path")
+                .eq("project_id", project_id)
+                .in_("hash", chunk)
+            )
+            for row in res.data or []:
+                key = (row["file_path"], row["hash"])
+                if key in keys:
+                    found.setdefault(key, row["evidence_id"])
+        return found
+
+    # --- Edges ---
+
+    def _sync_edges(self, results: List[ExtractionResult], project_id: str, node_id_maps: List[Dict[str, str]], evidence_id_maps: List[Dict[str, str]]) -> List[List[str]]:
+        rows_by_key: Dict[Tuple[str, str, str], Dict] = {}
+        evidence_links = set()
+        pending_links = []
+        keys_per_result: List[List[Tuple[str, str, str]]] = []
+
+        for result, node_map, ev_map in zip(results, node_id_maps, evidence_id_maps):
+            result_keys = []
+            keys_per_result.append(result_keys)
+            for edge in result.edges:
+                from_uuid = node_map.get(edge.from_node_id)
+                to_uuid = node_map.get(edge.to_node_id)
+
+                if not from_uuid or not to_uuid:
+                    continue # Skip if nodes not found
+
+                key = (from_uuid, to_uuid, edge.edge_type)
+                result_keys.append(key)
+                rows_by_key[key] = {
                     "project_id": project_id,
                     "from_asset_id": from_uuid,
                     "to_asset_id": to_uuid,
@@ -126,18 +223,73 @@ class CatalogService:
                     "extractor_id": result.meta.get("extractor_id"),
                     "is_hypothesis": edge.is_hypothesis
                 }
-                self.supabase.table("edge_index").insert(edge_data).execute()
-            
-            # Edge Evidence Link
-            for ref in edge.evidence_refs:
-                if ref in evidence_id_map:
-                    ev_uuid = evidence_id_map[ref]
-                    try:
-                        self.supabase.table("edge_evidence").insert({
-                            "edge_id": edge_uuid,
-                            "evidence_id": ev_uuid
-                        }).execute()
-                    except:
-                        pass # Ignore duplicate link error
-                    
-        return node_id_map
+                for ref in edge.evidence_refs:
+                    if ref in ev_map:
+                        pending_links.append((key, ev_map[ref]))
+
+        existing = self._lookup_edges(project_id, {k[0] for k in rows_by_key})
+        new_keys = [key for key in rows_by_key if key not in existing]
+        inserted = self._insert_new(
+            "edge_index",
+            [{**rows_by_key[key], "edge_id": str(uuid.uuid4())} for key in new_keys],
+            self.EDGE_CONFLICT_KEYS,
+            lambda row: ((row["from_asset_id"], row["to_asset_id"], row["edge_type"]), row["edge_id"])
+        )
+        lost = [key for key in new_keys if key not in inserted]
+        if lost:
+            existing.update(self._lookup_edges(project_id, {k[0] for k in lost}))
+        for key, row in rows_by_key.items():
+            row["edge_id"] = inserted.get(key) or existing[key]
+
+        self._bulk_upsert("edge_index", [r for key, r in rows_by_key.items() if key not in inserted], self.EDGE_CONFLICT_KEYS)
+
+        # Edge Evidence Links
+        for key, ev_uuid in pending_links:
+            evidence_links.add((rows_by_key[key]["edge_id"], ev_uuid))
+        link_rows = [{"edge_id": e, "evidence_id": ev} for e, ev in sorted(evidence_links)]
+        for chunk in self._chunks(link_rows, self.WRITE_CHUNK_SIZE):
+            try:
+                self._execute(
+                    self.supabase.table("edge_evidence")
+                    .upsert(chunk, on_conflict="edge_id,evidence_id", ignore_duplicates=True)
+                )
+            except Exception as e:
+                print(f"[CATALOG] Error linking edge evidences: {e}")
+
+        return [sorted({rows_by_key[k]["edge_id"] for k in keys}) for keys in keys_per_result]
+
+    def _lookup_edges(self, project_id: str, from_ids: set) -> Dict[Tuple[str, str, str], str]:
+        found = {}
+        for chunk in self._chunks(sorted(from_ids), self.LOOKUP_CHUNK_SIZE):
+            res = self._execute(
+                self.supabase.table("edge_index")
+                .select("edge_id, from_asset_id, to_asset_id, edge_type")
+                .eq("project_id", project_id)
+                .in_("from_asset_id", chunk)
+            )
+            for row in res.data or []:
+                found.setdefault((row["from_asset_id"], row["to_asset_id"], row["edge_type"]), row["edge_id"])
+        return found
+
+    # --- Helpers ---
+
+    def _insert_new(self, table: str, rows: List[Dict], on_conflict: str, key_of) -> Dict[tuple, str]:
+        """
+        Inserts rows that did not exist at lookup time, leaving any row inserted meanwhile
+        untouched. Returns {natural key: id} for the rows actually inserted (PostgREST only
+        returns those with ignore_duplicates); the rest must be re-read.
+        """
+        inserted = {}
+        for chunk in self._chunks(rows, self.WRITE_CHUNK_SIZE):
+            res = self._execute(self.supabase.table(table).upsert(chunk, on_conflict=on_conflict, ignore_duplicates=True))
+            inserted.update(key_of(row) for row in res.data or [])
+        return inserted
+
+    def _bulk_upsert(self, table: str, rows: List[Dict], on_conflict: str):
+        for chunk in self._chunks(rows, self.WRITE_CHUNK_SIZE):
+            self._execute(self.supabase.table(table).upsert(chunk, on_conflict=on_conflict))
+
+    @staticmethod
+    def _chunks(items: list, size: int):
+        for i in range(0, len(items), size):
+            yield items[i:i + size]
@@ -0,0 +1,329 @@
+"""
+Chunking - División estructural de entradas grandes para el LLM
+
+En lugar de recortar cabeza/cola, el contenido se parte por fronteras
+estructurales y cada trozo se extrae por separado con la misma acción:
+
+- SQL: lotes separados por GO; un lote demasiado grande se parte por sentencias (;)
+- DTSX: Executables hijos del paquete raíz; la cabecera del paquete (connection
+  managers, variables) se repite como contexto en cada trozo
+- Python: definiciones de nivel superior (ast); los imports se repiten en cada trozo
+- Resto: bloques separados por líneas en blanco
+
+Los trozos se empaquetan hasta un presupuesto de tokens (estimación chars/4,
+la misma que usa el rate limiter). merge_extractions une los resultados
+parciales deduplicando nodos por node_id; las evidencias de cada trozo se
+renombran (c{trozo}_...) y sus líneas se trasladan al archivo original.
+
+Configuración en config/models.yml, sección `chunking`:
+
+    chunking:
+      enabled: true
+      max_chunk_tokens: 48000   # tope por trozo aunque el modelo admita más
+      max_parallel: 4           # trozos del mismo archivo en paralelo
+      safety_margin: 0.1        # fracción del contexto reservada (estimación imprecisa)
+"""
+import ast
+import re
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
+
+DEFAULTS = {
+    "enabled": True,
+    "max_chunk_tokens": 48000,
+    "max_parallel": 4,
+    "safety_margin": 0.1,
+    "context_tokens": 64000 # Contexto por defecto si el modelo no declara context_tokens
+}
+
+CHARS_PER_TOKEN = 4
+
+_GO_RE = re.compile(r"^[ \t]*GO[ \t]*(?:--[^\n]*)?(?:\n|\Z)", re.IGNORECASE | re.MULTILINE)
+_EXEC_TAG_RE = re.compile(r"<(/?)DTS:Executable\b([^>]*?)(/?)>", re.IGNORECASE)
+
+@dataclass
+class Chunk:
+    """Trozo de un archivo: texto (con el contexto repetido) y rango de líneas original"""
+    index: int
+    text: str
+    start_line: int
+    end_line: int
+    label: str = ""
+    context_lines: int = 0 # Líneas del preámbulo repetido al inicio de text (cabecera del archivo)
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def input_token_budget(context_tokens: int, max_output_tokens: int, prompt_tokens: int, config: Optional[Dict[str, Any]] = None) -> int:
+    """Tokens disponibles para el contenido de un trozo en un modelo"""
+    config = {**DEFAULTS, **(config or {})}
+    usable = int(context_tokens * (1 - float(config["safety_margin"]))) - max_output_tokens - prompt_tokens
+    return max(1000, min(int(config["max_chunk_tokens"]), usable))
+
+def chunk_content(file_path: str, content: str, max_tokens: int) -> List[Chunk]:
+    """
+    Divide content en trozos de como máximo ~max_tokens. Devuelve un solo trozo si ya cabe.
+    """
+    if estimate_tokens(content) <= max_tokens:
+        return [Chunk(0, content, 1, content.count("\n") + 1)]
+
+    lower = file_path.lower()
+    if lower.endswith(".sql"):
+        preamble, segments = "", _split_sql(content)
+    elif lower.endswith(".dtsx") or (lower.endswith(".xml") and "DTS:Executable" in content):
+        preamble, segments = _split_dtsx(content)
+    elif lower.endswith(".py"):
+        preamble, segments = _split_python(content)
+    else:
+        preamble, segments = "", _split_blocks(content)
+
+    # El contexto repetido no puede comerse el presupuesto entero
+    if estimate_tokens(preamble) > max_tokens // 4:
+        preamble = preamble[:(max_tokens // 4) * CHARS_PER_TOKEN]
+    budget = max_tokens - estimate_tokens(preamble)
+
+    chunks = []
+    for start_line, end_line, text, label in _pack(segments, budget):
+        chunks.append(Chunk(len(chunks), preamble + text, start_line, end_line, label, preamble.count("\n")))
+    return chunks
+
+# --- Splitters: devuelven segmentos (start_line, end_line, text, label) en orden ---
+
+Segment = Tuple[int, int, str, str]
+
+def _segments_from_offsets(content: str, cuts: List[int], label: str = "", first_line: int = 1) -> List[Segment]:
+    """Corta content en los offsets dados (ordenados) conservando los números de línea"""
+    segments = []
+    bounds = [0] + [c for c in cuts if 0 < c < len(content)] + [len(content)]
+    line = first_line
+    for start, end in zip(bounds, bounds[1:]):
+        text = content[start:end]
+        lines = text.count("\n")
+        if text.strip():
+            segments.append((line, line + max(lines - (1 if text.endswith("\n") else 0), 0), text, label))
+        line += lines
+    return segments
+
+def _split_sql(content: str) -> List[Segment]:
+    # Lotes GO (el separador queda al final del lote anterior)
+    cuts = [m.end() for m in _GO_RE.finditer(content)]
+    segments = []
+    for start_line, end_line, text, _ in _segments_from_offsets(content, cuts, "batch"):
+        # Sentencias: ';' a final de línea (no parte literales ni comentarios en casos normales)
+        stmt_cuts = [m.end() for m in re.finditer(r";[ \t]*(?:--[^\n]*)?\n", text)]
+        for s_line, e_line, s_text, _ in _segments_from_offsets(text, stmt_cuts, "statement"):
+            segments.append((start_line + s_line - 1, start_line + e_line - 1, s_text, "batch"))
+    return segments
+
+def _split_dtsx(content: str) -> Tuple[str, List[Segment]]:
+    """Executables hijos del paquete raíz; cabecera como preámbulo, el resto al último segmento"""
+    depth = 0
+    children = [] # (start, end)
+    child_start = None
+    for m in _EXEC_TAG_RE.finditer(content):
+        closing, self_closing = m.group(1) == "/", m.group(3) == "/"
+        if closing:
+            depth -= 1
+            if depth == 1 and child_start is not None:
+                children.append((child_start, m.end()))
+                child_start = None
+        else:
+            if depth == 1 and child_start is None:
+                child_start = m.start()
+                if self_closing:
+                    children.append((child_start, m.end()))
+                    child_start = None
+            if not self_closing:
+                depth += 1
+
+    if not children:
+        return "", _split_blocks(content)
+
+    # Cabecera (hasta el primer hijo) como preámbulo; lo que sigue al último hijo
+    # (precedence constraints, cierre del paquete) va en el último segmento
+    base = children[0][0]
+    cuts = [start - base for start, _ in children[1:]] + [children[-1][1] - base]
+    segments = _segments_from_offsets(content[base:], cuts, "executable", content.count("\n", 0, base) + 1)
+    if len(segments) > 1 and not segments[-1][2].strip().startswith("<DTS:Executable"):
+        tail = segments.pop()
+        last = segments.pop()
+        segments.append((last[0], tail[1], last[2] + tail[2], last[3]))
+    preamble = f"{content[:base].rstrip()}\n<!-- ... package executables split across chunks ... -->\n"
+    return preamble, segments
+
+def _split_python(content: str) -> Tuple[str, List[Segment]]:
+    try:
+        tree = ast.parse(content)
+    except SyntaxError:
+        return "", _split_blocks(content)
+    if not tree.body:
+        return "", _split_blocks(content)
+
+    line_offsets = [0]
+    for line in content.splitlines(keepends=True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    def start_of(node) -> int:
+        lineno = min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        return line_offsets[lineno - 1]
+
+    # Imports iniciales: contexto repetido en cada trozo
+    header_end = 0
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)) or (isinstance(node, ast.Expr) and isinstance(getattr(node, "value", None), ast.Constant)):
+            header_end = line_offsets[node.end_lineno]
+        else:
+            break
+    preamble = content[:header_end]
+    cuts = [start_of(node) - header_end for node in tree.body if start_of(node) > header_end]
+    return preamble, _segments_from_offsets(content[header_end:], cuts, "def", content.count("\n", 0, header_end) + 1)
+
+def _split_blocks(content: str) -> List[Segment]:
+    cuts = [m.end() for m in re.finditer(r"\n[ \t]*\n", content)]
+    return _segments_from_offsets(content, cuts, "block")
+
+def _split_lines(segment: Segment, budget: int) -> List[Segment]:
+    """Último recurso para un segmento que no cabe solo: corta por líneas"""
+    start_line, _, text, label = segment
+    pieces, current, current_start, line = [], [], start_line, start_line
+    size = 0
+    for raw in text.splitlines(keepends=True):
+        # Una línea gigante (XML minificado) se corta a trozos de tamaño fijo
+        for part in [raw[i:i + budget * CHARS_PER_TOKEN] for i in range(0, len(raw), budget * CHARS_PER_TOKEN)] or [raw]:
+            tokens = estimate_tokens(part)
+            if current and size + tokens > budget:
+                pieces.append((current_start, line, "".join(current), label))
+                current, size, current_start = [], 0, line
+            current.append(part)
+            size += tokens
+        line += 1
+    if current:
+        pieces.append((current_start, line - 1, "".join(current), label))
+    return pieces
+
+def _pack(segments: List[Segment], budget: int) -> List[Segment]:
+    """Agrupa segmentos consecutivos mientras quepan en el presupuesto"""
+    packed = []
+    current: List[Segment] = []
+    size = 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            labels = {s[3] for s in current}
+            packed.append((current[0][0], current[-1][1], "".join(s[2] for s in current), labels.pop() if len(labels) == 1 else "mixed"))
+        current, size = [], 0
+
+    for segment in segments:
+        tokens = estimate_tokens(segment[2])
+        if tokens > budget:
+            flush()
+            packed.extend(_split_lines(segment, budget))
+            continue
+        if current and size + tokens > budget:
+            flush()
+        current.append(segment)
+        size += tokens
+    flush()
+    return packed
+
+# --- Merge ---
+
+def merge_extractions(partials: List[Dict[str, Any]], chunks: Optional[List[Chunk]] = None) -> Dict[str, Any]:
+    """
+    Une resultados parciales {nodes, edges, evidences, assumptions, ...} de los trozos de un archivo.
+    Nodos: dedupe por node_id (atributos y columnas se completan con los de otros trozos).
+    Edges: dedupe por (from, to, tipo); un edge_id repetido de otro edge se renombra.
+    Evidencias: el LLM numera las suyas por trozo ("ev1" en todos), así que se prefijan
+    con c{trozo}_ junto con los evidence_refs de los edges de ese trozo. Con chunks
+    (mismo orden que partials) las líneas relativas al trozo pasan a líneas del archivo.
+    """
+    merged: Dict[str, Any] = {}
+    nodes: Dict[str, Dict[str, Any]] = {}
+    edges: Dict[tuple, Dict[str, Any]] = {}
+    edge_ids, evidences, assumptions = set(), {}, []
+
+    for index, partial in enumerate(partials):
+        chunk = chunks[index] if chunks and index < len(chunks) else None
+        prefix = f"c{index}_"
+        for key, value in partial.items():
+            if key not in ("nodes", "edges", "evidences", "assumptions"):
+                merged.setdefault(key, value)
+
+        for node in partial.get("nodes") or []:
+            node_id = node.get("node_id")
+            if node_id not in nodes:
+                nodes[node_id] = dict(node)
+            else:
+                _merge_node(nodes[node_id], node)
+
+        for edge in partial.get("edges") or []:
+            edge = {**edge, "evidence_refs": [f"{prefix}{ref}" for ref in edge.get("evidence_refs") or []]}
+            key = (edge.get("from_node_id"), edge.get("to_node_id"), edge.get("edge_type"))
+            if key in edges:
+                existing = edges[key]
+                existing["confidence"] = max(existing.get("confidence") or 0, edge.get("confidence") or 0)
+                existing["evidence_refs"] = _union(existing.get("evidence_refs"), edge.get("evidence_refs"))
+                continue
+            if edge.get("edge_id") in edge_ids:
+                edge["edge_id"] = f"{edge['edge_id']}_c{index}"
+            edge_ids.add(edge.get("edge_id"))
+            edges[key] = edge
+
+        for position, evidence in enumerate(partial.get("evidences") or []):
+            evidence = {**evidence, "evidence_id": f"{prefix}{evidence.get('evidence_id') or f'ev{position}'}"}
+            if chunk is not None and isinstance(evidence.get("locator"), dict):
+                locator = dict(evidence["locator"])
+                for field in ("line_start", "line_end"):
+                    locator[field] = _file_line(locator.get(field), chunk)
+                evidence["locator"] = locator
+            evidences.setdefault(evidence["evidence_id"], evidence)
+
+        assumptions = _union(assumptions, partial.get("assumptions"))
+
+    merged["nodes"] = list(nodes.values())
+    merged["edges"] = list(edges.values())
+    if evidences or any("evidences" in p for p in partials):
+        merged["evidences"] = list(evidences.values())
+    if assumptions or any("assumptions" in p for p in partials):
+        merged["assumptions"] = assumptions
+    return merged
+
+def _file_line(line: Any, chunk: Chunk) -> Any:
+    """Línea del texto del trozo -> línea del archivo (el preámbulo es la cabecera del archivo)"""
+    if not isinstance(line, int) or line <= chunk.context_lines:
+        return line
+    return line - chunk.context_lines + chunk.start_line - 1
+
+def _merge_node(target: Dict[str, Any], other: Dict[str, Any]):
+    for key, value in other.items():
+        if target.get(key) in (None, "", [], {}):
+            target[key] = value
+    if isinstance(target.get("attributes"), dict) and isinstance(other.get("attributes"), dict):
+        target["attributes"] = {**other["attributes"], **target["attributes"]}
+    if isinstance(target.get("columns_metadata"), list) and isinstance(other.get("columns_metadata"), list):
+        seen = {c.get("name") for c in target["columns_metadata"] if isinstance(c, dict)}
+        target["columns_metadata"] = target["columns_metadata"] + [
+            c for c in other["columns_metadata"] if isinstance(c, dict) and c.get("name") not in seen
+        ]
+
+def _union(first: Optional[list], second: Optional[list]) -> list:
+    result = list(first or [])
+    for item in second or []:
+        if item not in result:
+            result.append(item)
+    return result
+
+# Singleton de configuración
+_chunking_config = None
+_chunking_config_lock = threading.Lock()
+
+def get_chunking_config() -> Dict[str, Any]:
+    """Sección chunking de models.yml con los valores por defecto"""
+    global _chunking_config
+    with _chunking_config_lock:
+        if _chunking_config is None:
+            from ..router import get_model_router
+            _chunking_config = {**DEFAULTS, **(get_model_router().config.get("chunking") or {})}
+    return _chunking_config
@@ -0,0 +1,229 @@
+from array import array
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from supabase import Client
+
+from ..models.cir import CIRPackage
+
+# Edge kinds (array('b') codes)
+READ = 0    # table column -> source output column
+DERIVE = 1  # column -> output column computed from it (Derived Column, Lookup...)
+MAP = 2     # upstream column -> column that takes it as input (Union All, Merge...)
+WRITE = 3   # input column -> destination table column
+EDGE_KINDS = ("read", "derive", "map", "write")
+
+def table_key(table: str, column: str) -> str:
+    """Key of a physical column: [dbo].[Customers] + Name -> table|dbo.customers.name"""
+    table = table.replace("[", "").replace("]", "").replace('"', "").strip().lower()
+    return f"table|{table}.{column.strip().lower()}"
+
+class ColumnLineageGraph:
+    """
+    Column-level lineage built from the lineage ids kept in the CIRPackage
+    (SSIS lineageIds, DataStage <job>.<link>.<column>).
+
+    Every column (package column keyed by file + lineageId, or physical table
+    column) is interned to an int; edges are three parallel arrays
+    (src, dst, kind), so a package with 100k columns costs a few MB instead of
+    a dict per edge. Upstream queries use a CSR reverse adjacency built on demand.
+    """
+
+    def __init__(self):
+        self.keys: List[str] = []
+        self.labels: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self.src = array("i")
+        self.dst = array("i")
+        self.kind = array("b")
+        self._seen: set = set()
+        self._csr: Optional[Tuple[array, array]] = None
+
+    def __len__(self):
+        return len(self.src)
+
+    def intern(self, key: str, label: Optional[str] = None) -> int:
+        col_id = self._ids.get(key)
+        if col_id is None:
+            col_id = self._ids[key] = len(self.keys)
+            self.keys.append(key)
+            self.labels.append(label or key)
+        elif label and self.labels[col_id] == key:
+            self.labels[col_id] = label
+        return col_id
+
+    def add_edge(self, src: int, dst: int, kind: int):
+        if src == dst:
+            return
+        pair = (src << 32) | dst
+        if pair in self._seen:
+            return
+        self._seen.add(pair)
+        self.src.append(src)
+        self.dst.append(dst)
+        self.kind.append(kind)
+        self._csr = None
+
+    def add_package(self, package: CIRPackage):
+        """Adds the column edges of one SSIS/DataStage package"""
+        prefix = package.metadata.get("file_path") or package.package_id
+
+        def col(lineage_id: str, label: Optional[str] = None) -> int:
+            return self.intern(f"{prefix}|{lineage_id}", label)
+
+        outputs: Dict[Tuple[str, str], int] = {}  # (node_id, column name) -> output column id
+        for node in package.nodes:
+            if not node.columns_metadata:
+                continue
+            table = node.properties.get("OpenRowset") or node.properties.get("table_name") # SSIS / DataStage
+            external = {c.get("ref_id"): c["name"] for c in node.columns_metadata if c.get("kind") == "externalMetadataColumn"}
+
+            for c in node.columns_metadata:
+                kind, name, lineage_id = c.get("kind"), c.get("name"), c.get("lineage_id")
+                # Columns without lineageId (hand-written/old packages) are identified by refId
+                identity = lineage_id or c.get("ref_id")
+                if kind == "outputColumn" and identity:
+                    dst = outputs[(node.id, name)] = col(identity, f"{node.name}.{name}")
+                    if table and c.get("external_id"):
+                        # Source: physical column -> output column
+                        self.add_edge(self.intern(table_key(table, external.get(c["external_id"], name))), dst, READ)
+                    for ref in c.get("refs") or []:
+                        self.add_edge(col(ref), dst, DERIVE)
+                elif kind == "inputColumn":
+                    if not identity:
+                        continue
+                    src = col(identity) if lineage_id else col(identity, f"{node.name}.{name}")
+                    if table and c.get("external_id"):
+                        # Destination: input column -> physical column
+                        self.add_edge(src, self.intern(table_key(table, external.get(c["external_id"], name))), WRITE)
+                    for ref in c.get("refs") or []:
+                        # Union All / Merge: the input feeds the output column it references
+                        self.add_edge(src, col(ref), MAP)
+
+        for t in package.transformations:
+            dst = col(t.lineage_id) if t.lineage_id else outputs.get((t.node_id, t.column_name))
+            if dst is not None:
+                for lineage_id in t.input_column_lineage_ids:
+                    self.add_edge(col(lineage_id), dst, DERIVE)
+
+    def _reverse(self) -> Tuple[array, array]:
+        # CSR by target: sources of column i are srcs[offsets[i]:offsets[i + 1]]
+        if self._csr is None:
+            n = len(self.keys)
+            offsets = array("i", [0]) * (n + 1)
+            for d in self.dst:
+                offsets[d + 1] += 1
+            for i in range(n):
+                offsets[i + 1] += offsets[i]
+            cursor = array("i", offsets)
+            srcs = array("i", [0]) * len(self.src)
+            for s, d in zip(self.src, self.dst):
+                srcs[cursor[d]] = s
+                cursor[d] += 1
+            self._csr = (offsets, srcs)
+        return self._csr
+
+    def upstream(self, col_id: int, max_depth: Optional[int] = None) -> List[Tuple[int, int]]:
+        """Columns the given one is computed from: [(column_id, depth)], breadth first"""
+        offsets, srcs = self._reverse()
+        seen = {col_id}
+        frontier = [col_id]
+        out = []
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            following = []
+            for current in frontier:
+                for s in srcs[offsets[current]:offsets[current + 1]]:
+                    if s not in seen:
+                        seen.add(s)
+                        following.append(s)
+                        out.append((s, depth))
+            frontier = following
+        return out
+
+    def origins(self, col_id: int) -> List[int]:
+        """Upstream columns nothing flows into (source tables/columns)"""
+        offsets, _ = self._reverse()
+        return [s for s, _ in self.upstream(col_id) if offsets[s] == offsets[s + 1]]
+
+    def find(self, name: str) -> List[int]:
+        """Column ids whose label is name or ends in .name (case insensitive)"""
+        name = name.lower()
+        suffix = "." + name
+        return [i for i, label in enumerate(self.labels) if label.lower() == name or label.lower().endswith(suffix)]
+
+    def to_dict(self) -> dict:
+        return {
+            "columns": self.keys,
+            "labels": self.labels,
+            "edges": {"src": self.src.tolist(), "dst": self.dst.tolist(), "kind": self.kind.tolist()},
+            "edge_kinds": list(EDGE_KINDS),
+        }
+
+    def merge(self, data: dict):
+        """Adds a graph serialized with to_dict (e.g. another package); physical table columns are shared"""
+        remap = [self.intern(key, label) for key, label in zip(data["columns"], data["labels"])]
+        edges = data["edges"]
+        for s, d, k in zip(edges["src"], edges["dst"], edges["kind"]):
+            self.add_edge(remap[s], remap[d], k)
+
+    @classmethod
+    def from_package(cls, package: CIRPackage) -> "ColumnLineageGraph":
+        graph = cls()
+        graph.add_package(package)
+        return graph
+
+class ColumnLineageStore:
+    """
+    Persists one ColumnLineageGraph per file in column_lineage (migration 16) and
+    rebuilds the graph of a whole solution by merging them: physical table columns
+    have the same key in every package, so lineage joins across files.
+    """
+
+    CHUNK_SIZE = 200
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    def save(self, project_id: str, job_id: str, graphs: Dict[str, dict]):
+        """graphs: Map<relative path, ColumnLineageGraph.to_dict()>"""
+        rows = [
+            {
+                "project_id": project_id,
+                "path": path,
+                "job_id": job_id,
+                "graph": graph,
+                "column_count": len(graph["columns"]),
+                "edge_count": len(graph["edges"]["src"]),
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }
+            for path, graph in sorted(graphs.items())
+        ]
+        for start in range(0, len(rows), self.CHUNK_SIZE):
+            self.supabase.table("column_lineage").upsert(rows[start:start + self.CHUNK_SIZE], on_conflict="project_id,path").execute()
+
+    def delete(self, project_id: str, paths: List[str]):
+        paths = sorted(paths)
+        for start in range(0, len(paths), self.CHUNK_SIZE):
+            self.supabase.table("column_lineage").delete()\
+                .eq("project_id", project_id).in_("path", paths[start:start + self.CHUNK_SIZE]).execute()
+
+    def load(self, project_id: str) -> ColumnLineageGraph:
+        """Column lineage of every file of the solution in one graph (paged)"""
+        graph = ColumnLineageGraph()
+        page_size = 100 # Rows carry whole package graphs
+        offset = 0
+        while True:
+            res = self.supabase.table("column_lineage")\
+                .select("path, graph")\
+                .eq("project_id", project_id)\
+                .order("path")\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+            rows = res.data or []
+            for row in rows:
+                graph.merge(row["graph"])
+            if len(rows) < page_size:
+                break
+            offset += page_size
+        return graph
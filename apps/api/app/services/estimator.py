@@ -24,7 +24,7 @@ class Estimator:
             "time_seconds": float
         }
         """
-        if strategy == Strategy.SKIP:
+        if strategy in (Strategy.SKIP, Strategy.REUSE):
             return {"tokens": 0, "cost_usd": 0.0, "time_seconds": 0.0}
             
         # Estimate Tokens (4 chars per token approx)
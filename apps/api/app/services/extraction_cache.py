@@ -0,0 +1,147 @@
+"""
+Extraction Cache - Cache persistente de resultados de extracción (SQLite local)
+
+Clave: sha256(content) + action_name + model + hash del prompt.
+Un hit devuelve el `data` del ActionResult almacenado sin llamar al LLM.
+El tamaño total está acotado; al superarlo se expulsan las entradas menos
+usadas recientemente (LRU por last_access).
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+from ..config import settings
+
+class ExtractionCache:
+    """Cache LRU acotado por bytes sobre SQLite. Thread-safe."""
+
+    EVICTION_BATCH = 64
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS extraction_cache (
+                cache_key TEXT PRIMARY KEY,
+                action_name TEXT NOT NULL,
+                model TEXT NOT NULL,
+                model_used TEXT,
+                data TEXT NOT NULL,
+                size_bytes INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_extraction_cache_access ON extraction_cache(last_access)")
+        row = self._conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM extraction_cache").fetchone()
+        self._total_bytes = row[0]
+
+    @staticmethod
+    def content_hash(content: str) -> str:
+        return hashlib.sha256(content.encode("utf-8", errors="ignore")).hexdigest()
+
+    @staticmethod
+    def make_key(content_hash: str, action_name: str, model: str, prompt_hash: str) -> str:
+        return hashlib.sha256(f"{content_hash}|{action_name}|{model}|{prompt_hash}".encode()).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Devuelve {"data": ..., "model_used": ...} o None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, model_used FROM extraction_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE extraction_cache SET last_access = ? WHERE cache_key = ?", (time.time(), cache_key)
+            )
+            self.hits += 1
+        return {"data": json.loads(row[0]), "model_used": row[1]}
+
+    def put(self, cache_key: str, action_name: str, model: str, data: Dict[str, Any], model_used: Optional[str] = None):
+        payload = json.dumps(data)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return # Nunca cabría; no vaciamos el cache por una sola entrada
+
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size_bytes FROM extraction_cache WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO extraction_cache "
+                "(cache_key, action_name, model, model_used, data, size_bytes, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, action_name, model, model_used, payload, size, now, now)
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        while self._total_bytes > self.max_bytes:
+            victims = self._conn.execute(
+                "SELECT cache_key, size_bytes FROM extraction_cache ORDER BY last_access LIMIT ?",
+                (self.EVICTION_BATCH,)
+            ).fetchall()
+            if not victims:
+                self._total_bytes = 0
+                return
+            for key, size in victims:
+                self._conn.execute("DELETE FROM extraction_cache WHERE cache_key = ?", (key,))
+                self._total_bytes -= size
+                self.evictions += 1
+                if self._total_bytes <= self.max_bytes:
+                    return
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM extraction_cache")
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM extraction_cache").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes
+        }
+
+# Singleton
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Obtiene el cache global, o None si está deshabilitado"""
+    global _extraction_cache
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return None
+    with _extraction_cache_lock:
+        if _extraction_cache is None:
+            try:
+                _extraction_cache = ExtractionCache(
+                    os.path.join(settings.CACHE_DIR, "extraction_cache.sqlite"),
+                    settings.EXTRACTION_CACHE_MAX_BYTES
+                )
+            except Exception as e:
+                print(f"[EXTRACTION CACHE] Disabled, could not open cache: {e}")
+                return None
+    return _extraction_cache
@@ -0,0 +1,59 @@
+from array import array
+from bisect import bisect_left
+from typing import Optional
+
+from app.models.extraction import Locator
+
+class LineIndex:
+    """
+    Newline offsets of a file, computed once, for Locator line/byte positions.
+    line_of() is a bisect (O(log lines)) instead of content.count('\\n', 0, pos)
+    per match. Byte offsets are UTF-8 offsets into the decoded content, i.e. into
+    the file as read by ArchiveSource.read_text (no newline translation).
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self._newlines = array("q")
+        pos = content.find("\n")
+        while pos != -1:
+            self._newlines.append(pos)
+            pos = content.find("\n", pos + 1)
+        self._ascii = content.isascii()
+        self._line_bytes: Optional[array] = None # UTF-8 offset of each line start (non-ASCII only)
+
+    @property
+    def line_count(self) -> int:
+        return len(self._newlines) + 1
+
+    def line_of(self, offset: int) -> int:
+        """1-based line of a character offset (same as content.count('\\n', 0, offset) + 1)"""
+        return bisect_left(self._newlines, offset) + 1
+
+    def line_start(self, line: int) -> int:
+        """Character offset where a 1-based line starts"""
+        return 0 if line <= 1 else self._newlines[line - 2] + 1
+
+    def byte_offset(self, offset: int) -> int:
+        if self._ascii:
+            return offset
+        if self._line_bytes is None:
+            line_bytes = array("q", [0])
+            start = 0
+            for nl in self._newlines:
+                line_bytes.append(line_bytes[-1] + len(self.content[start:nl + 1].encode("utf-8", errors="ignore")))
+                start = nl + 1
+            self._line_bytes = line_bytes
+        line = self.line_of(offset)
+        start = self.line_start(line)
+        return self._line_bytes[line - 1] + len(self.content[start:offset].encode("utf-8", errors="ignore"))
+
+    def locator(self, file_path: str, start: int, end: int) -> Locator:
+        """Locator for content[start:end] (lines 1-based, bytes end-exclusive)"""
+        return Locator(
+            file=file_path,
+            line_start=self.line_of(start),
+            line_end=self.line_of(end),
+            byte_start=self.byte_offset(start),
+            byte_end=self.byte_offset(end)
+        )
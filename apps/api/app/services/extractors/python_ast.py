@@ -0,0 +1,470 @@
+import ast
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .base import BaseExtractor
+from .line_index import LineIndex
+from .sql_glot import SqlGlotExtractor, SQLGLOT_AVAILABLE
+from app.models.extraction import ExtractionResult, ExtractedNode, ExtractedEdge, Evidence, Locator
+
+# String literals handed to SqlGlotExtractor: DML/DDL keyword first, plus a second SQL keyword
+SQL_START_RE = re.compile(r"^\s*(?:select|insert|update|delete|merge|create|with|truncate|drop|alter)\b", re.IGNORECASE)
+SQL_BODY_RE = re.compile(r"\b(?:from|into|table|set|view|join)\b", re.IGNORECASE)
+
+# Call name -> (relation, argument position, keyword) of the table name / query argument
+READ_CALLS = {
+    "read_sql": (0, "sql"), "read_sql_query": (0, "sql"), "read_sql_table": (0, "table_name"),
+    "read_gbq": (0, "query"), "table": (0, "tableName"),
+}
+WRITE_CALLS = {
+    "to_sql": (0, "name"), "saveAsTable": (0, "name"), "insertInto": (0, "tableName"), "to_gbq": (0, "destination_table"),
+}
+QUERY_CALLS = {"sql": (0, "sqlQuery"), "execute": (0, "statement"), "executemany": (0, "statement"), "run": (0, "sql")}
+# File readers/writers (pandas, Spark DataFrameReader/Writer): path argument -> file node, or unresolved site
+FILE_READ_CALLS = {
+    name: (0, "filepath_or_buffer") for name in
+    ("read_csv", "read_parquet", "read_json", "read_excel", "read_feather", "read_orc", "read_pickle", "read_fwf", "read_xml")
+}
+FILE_WRITE_CALLS = {
+    name: (0, "path_or_buf") for name in
+    ("to_csv", "to_parquet", "to_json", "to_excel", "to_feather", "to_orc", "to_pickle", "to_xml")
+}
+SPARK_IO_CALLS = {"parquet", "csv", "json", "orc", "text", "avro", "load", "save", "delta"} # after .read / .write
+# Object storage / opaque I/O: always unresolved (the LLM has to look at them)
+OPAQUE_IO_CALLS = {"download_file", "upload_file", "get_object", "put_object", "download_fileobj", "upload_fileobj", "open_dataset"}
+# Data libraries: importing one without any recognised access site means the parser missed the I/O
+DATA_LIBRARIES = {"pandas", "pyspark", "sqlalchemy", "boto3", "polars", "dask", "psycopg2", "pyodbc", "cx_Oracle", "pymssql", "snowflake", "google.cloud.bigquery", "s3fs"}
+UNKNOWN_IO_CONFIDENCE = 0.3
+DYNAMIC_CALLS = {"exec", "eval", "__import__", "import_module"}
+SQL_PLACEHOLDER = "__param__"
+
+@dataclass
+class PythonAnalysis:
+    """What the AST pass found; confidence = share of data access sites resolved statically"""
+    parsed: bool = False
+    imports: List[Tuple[str, ast.AST]] = field(default_factory=list)
+    table_refs: List[Tuple[str, str, ast.AST]] = field(default_factory=list) # (table, READS_FROM|WRITES_TO, node)
+    file_refs: List[Tuple[str, str, ast.AST]] = field(default_factory=list) # (path, READS_FROM|WRITES_TO, node)
+    sql_literals: List[Tuple[str, ast.AST]] = field(default_factory=list)
+    dags: Dict[str, ast.AST] = field(default_factory=dict)
+    tasks: Dict[str, Tuple[str, Optional[str], ast.AST]] = field(default_factory=dict) # var -> (task_id, dag_id, node)
+    task_deps: List[Tuple[str, str, ast.AST]] = field(default_factory=list) # (upstream var, downstream var, node)
+    access_sites: int = 0
+    resolved_sites: float = 0.0
+    dynamic: bool = False
+
+    @property
+    def confidence(self) -> float:
+        if not self.parsed:
+            return 0.0
+        if self.access_sites:
+            confidence = self.resolved_sites / self.access_sites
+        elif self.uses_data_library:
+            confidence = UNKNOWN_IO_CONFIDENCE # pandas/boto3/... imported but no I/O recognised
+        else:
+            confidence = 1.0
+        return round(confidence * (0.5 if self.dynamic else 1.0), 2)
+
+    @property
+    def uses_data_library(self) -> bool:
+        return any(name in DATA_LIBRARIES or name.split(".")[0] in DATA_LIBRARIES for name, _ in self.imports)
+
+def _call_name(func: ast.AST) -> Optional[str]:
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return None
+
+def _looks_like_sql(text: str) -> bool:
+    return bool(SQL_START_RE.match(text)) and bool(SQL_BODY_RE.search(text))
+
+class _Visitor(ast.NodeVisitor):
+    def __init__(self, analysis: PythonAnalysis, constants: Dict[str, str]):
+        self.a = analysis
+        self.constants = constants # module-level NAME = "string"
+        self.dag_stack: List[str] = []
+        self.dag_vars: Dict[str, str] = {} # variable -> dag_id
+        self.seen_sql = set()
+
+    # --- Imports ---
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.a.imports.append((alias.name, node))
+
+    def visit_ImportFrom(self, node):
+        if node.module and not node.level:
+            self.a.imports.append((node.module, node))
+
+    # --- DAG context ---
+    def visit_With(self, node):
+        pushed = 0
+        for item in node.items:
+            dag_id = self._dag_id(item.context_expr)
+            if dag_id:
+                self.dag_stack.append(dag_id)
+                pushed += 1
+                if isinstance(item.optional_vars, ast.Name):
+                    self.dag_vars[item.optional_vars.id] = dag_id
+        self.generic_visit(node)
+        for _ in range(pushed):
+            self.dag_stack.pop()
+
+    def visit_Assign(self, node):
+        value = node.value
+        targets = [t.id for t in node.targets if isinstance(t, ast.Name)]
+        dag_id = self._dag_id(value)
+        if dag_id:
+            for t in targets:
+                self.dag_vars[t] = dag_id
+        elif isinstance(value, ast.Call) and self._is_operator(value):
+            for t in targets:
+                self._add_task(t, value)
+        self.generic_visit(node)
+
+    def _dag_id(self, expr) -> Optional[str]:
+        if isinstance(expr, ast.Call) and _call_name(expr.func) == "DAG":
+            dag_id = self._string_arg(expr, 0, "dag_id")
+            dag_id = dag_id or "dag"
+            self.a.dags.setdefault(dag_id, expr)
+            return dag_id
+        return None
+
+    def _is_operator(self, call: ast.Call) -> bool:
+        name = _call_name(call.func) or ""
+        return (name.endswith("Operator") or name.endswith("Sensor")) and any(k.arg == "task_id" for k in call.keywords)
+
+    def _add_task(self, var: Optional[str], call: ast.Call):
+        task_id = self._string_arg(call, None, "task_id") or var or "task"
+        dag_id = None
+        for k in call.keywords:
+            if k.arg == "dag" and isinstance(k.value, ast.Name):
+                dag_id = self.dag_vars.get(k.value.id)
+        dag_id = dag_id or (self.dag_stack[-1] if self.dag_stack else None)
+        self.a.tasks[var or f"{task_id}@{call.lineno}"] = (task_id, dag_id, call)
+
+    # --- Calls: data access, operators, wiring ---
+    def visit_Call(self, node):
+        name = _call_name(node.func)
+        if name in DYNAMIC_CALLS:
+            self.a.dynamic = True
+        elif name in READ_CALLS or name in WRITE_CALLS or name in QUERY_CALLS:
+            self._data_access(node, name)
+        elif name in FILE_READ_CALLS or name in FILE_WRITE_CALLS or name in SPARK_IO_CALLS:
+            self._file_access(node, name)
+        elif name in OPAQUE_IO_CALLS:
+            self.a.access_sites += 1 # s3.download_file(...) etc.: never resolved statically
+        elif name in ("set_downstream", "set_upstream") and isinstance(node.func, ast.Attribute) and node.args:
+            left = self._task_vars(node.func.value)
+            right = self._task_vars(node.args[0])
+            pairs = [(l, r) for l in left for r in right]
+            for up, down in pairs if name == "set_downstream" else [(r, l) for l, r in pairs]:
+                self.a.task_deps.append((up, down, node))
+        elif name in ("chain", "chain_linear"):
+            groups = [self._task_vars(arg) for arg in node.args]
+            for ups, downs in zip(groups, groups[1:]):
+                self.a.task_deps.extend((u, d, node) for u in ups for d in downs)
+        elif self._is_operator(node) and not self._assigned(node):
+            self._add_task(None, node)
+        self.generic_visit(node)
+
+    def _assigned(self, call) -> bool:
+        return any(v[2] is call for v in self.a.tasks.values())
+
+    def visit_BinOp(self, node):
+        # t1 >> t2 >> [t3, t4]  /  t2 << t1
+        if isinstance(node.op, (ast.RShift, ast.LShift)):
+            left = self._task_vars(node.left, rightmost=True)
+            right = self._task_vars(node.right, leftmost=True)
+            for l in left:
+                for r in right:
+                    up, down = (l, r) if isinstance(node.op, ast.RShift) else (r, l)
+                    self.a.task_deps.append((up, down, node))
+        self.generic_visit(node)
+
+    def _task_vars(self, expr, leftmost: bool = False, rightmost: bool = False) -> List[str]:
+        if isinstance(expr, ast.Name):
+            return [expr.id]
+        if isinstance(expr, (ast.List, ast.Tuple)):
+            return [v for e in expr.elts for v in self._task_vars(e)]
+        if isinstance(expr, ast.BinOp) and isinstance(expr.op, (ast.RShift, ast.LShift)):
+            # a >> b >> c: the edge to the next operand starts from the side facing it
+            if rightmost:
+                return self._task_vars(expr.right if isinstance(expr.op, ast.RShift) else expr.left, rightmost=True)
+            if leftmost:
+                return self._task_vars(expr.left if isinstance(expr.op, ast.RShift) else expr.right, leftmost=True)
+        return []
+
+    def _data_access(self, node: ast.Call, name: str):
+        position, keyword = (READ_CALLS.get(name) or WRITE_CALLS.get(name) or QUERY_CALLS.get(name))
+        arg = node.args[position] if len(node.args) > position else None
+        for k in node.keywords:
+            if k.arg == keyword:
+                arg = k.value
+        if arg is None:
+            return
+        if name == "table" and not self._spark_chain(node.func):
+            return # e.g. sqlalchemy.table(...): not a read
+        if name == "run" and not any(k.arg == "sql" for k in node.keywords):
+            return # Airflow hooks: hook.run(sql=...)
+        self.a.access_sites += 1
+
+        text, partial = self._resolve(arg)
+        if text is None:
+            return
+        if _looks_like_sql(text):
+            self.a.resolved_sites += 0.5 if partial else 1.0
+            self._add_sql(text, arg)
+        elif name in QUERY_CALLS:
+            return # execute(<not SQL>): unresolved
+        elif not partial:
+            self.a.resolved_sites += 1.0
+            schema = self._string_arg(node, None, "schema") if name == "to_sql" else None
+            table = f"{schema}.{text}" if schema else text
+            self.a.table_refs.append((table, "WRITES_TO" if name in WRITE_CALLS else "READS_FROM", node))
+
+    def _file_access(self, node: ast.Call, name: str):
+        if name in SPARK_IO_CALLS:
+            # spark.read.parquet(p), spark.read.format("x").load(p), df.write.mode("overwrite").parquet(p)
+            chain = self._chain_attrs(node.func)
+            if {"read", "readStream"} & chain:
+                relation = "READS_FROM"
+            elif {"write", "writeStream"} & chain:
+                relation = "WRITES_TO"
+            else:
+                return
+            position, keyword = 0, "path"
+        else:
+            relation = "READS_FROM" if name in FILE_READ_CALLS else "WRITES_TO"
+            position, keyword = (FILE_READ_CALLS.get(name) or FILE_WRITE_CALLS.get(name))
+        self.a.access_sites += 1
+        arg = node.args[position] if len(node.args) > position else None
+        for k in node.keywords:
+            if k.arg in (keyword, "path"):
+                arg = k.value
+        text, partial = self._resolve(arg) if arg is not None else (None, False)
+        if text and not partial:
+            self.a.resolved_sites += 1.0
+            self.a.file_refs.append((text, relation, node))
+
+    @staticmethod
+    def _chain_attrs(func) -> set:
+        """Attribute names along a call chain: a.read.format(x).load -> {read, format, load}"""
+        names = set()
+        value = func
+        while isinstance(value, (ast.Attribute, ast.Call)):
+            if isinstance(value, ast.Call):
+                value = value.func
+                continue
+            names.add(value.attr)
+            value = value.value
+        return names
+
+    def _spark_chain(self, func) -> bool:
+        # spark.table(...), spark.read.table(...), self.spark.read.table(...)
+        value = func.value if isinstance(func, ast.Attribute) else None
+        while isinstance(value, ast.Attribute):
+            if value.attr in ("read", "spark", "sparkSession"):
+                return True
+            value = value.value
+        return isinstance(value, ast.Name) and value.id in ("spark", "session", "ss")
+
+    def _resolve(self, expr) -> Tuple[Optional[str], bool]:
+        """Static string of an argument: (text, partial). f-strings keep their literal parts."""
+        if isinstance(expr, ast.Constant) and isinstance(expr.value, str):
+            return expr.value, False
+        if isinstance(expr, ast.Name) and expr.id in self.constants:
+            return self.constants[expr.id], False
+        if isinstance(expr, ast.JoinedStr):
+            parts = [v.value if isinstance(v, ast.Constant) else SQL_PLACEHOLDER for v in expr.values]
+            return "".join(str(p) for p in parts), True
+        if isinstance(expr, ast.Call) and _call_name(expr.func) == "text" and expr.args:
+            return self._resolve(expr.args[0]) # sqlalchemy.text("...")
+        return None, False
+
+    def _add_sql(self, text: str, node: ast.AST):
+        # By normalized text: QUERY = "..." passed to read_sql(QUERY) is reached through the
+        # constant and through the call argument, and must yield its edges once
+        key = " ".join(text.split()).lower()
+        if key not in self.seen_sql:
+            self.seen_sql.add(key)
+            self.a.sql_literals.append((text, node))
+
+    # --- Any other SQL looking literal (operator sql=..., module constants) ---
+    def visit_Constant(self, node):
+        if isinstance(node.value, str) and _looks_like_sql(node.value):
+            self._add_sql(node.value, node)
+
+    def visit_JoinedStr(self, node):
+        # Literal fragments of an f-string are not statements on their own
+        for value in node.values:
+            if isinstance(value, ast.FormattedValue):
+                self.visit(value)
+
+    def _string_arg(self, call: ast.Call, position: Optional[int], keyword: str) -> Optional[str]:
+        arg = call.args[position] if position is not None and len(call.args) > position else None
+        for k in call.keywords:
+            if k.arg == keyword:
+                arg = k.value
+        text, partial = self._resolve(arg) if arg is not None else (None, False)
+        return None if partial else text
+
+class PythonAstExtractor(BaseExtractor):
+    """
+    Native extractor for Python scripts (pandas/Spark jobs, Airflow DAGs), using ast:
+    imports, read_sql/to_sql/spark.read.table/saveAsTable/insertInto calls,
+    pandas/Spark file readers and writers (read_csv, spark.read.parquet, to_parquet...),
+    SQL string literals (parsed by SqlGlotExtractor) and Airflow DAG/operator wiring.
+    analyze().confidence tells the planner whether the LLM is still needed.
+    """
+
+    def __init__(self):
+        self.sql_extractor = SqlGlotExtractor()
+
+    def analyze(self, content: str) -> PythonAnalysis:
+        analysis = PythonAnalysis()
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return analysis
+        analysis.parsed = True
+        constants = {}
+        for stmt in tree.body:
+            if isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
+                for t in stmt.targets:
+                    if isinstance(t, ast.Name):
+                        constants[t.id] = stmt.value.value
+        _Visitor(analysis, constants).visit(tree)
+        return analysis
+
+    def extract(self, file_path: str, content: str) -> ExtractionResult:
+        analysis = self.analyze(content)
+        index = LineIndex(content)
+        nodes, edges, evidences = [], [], []
+
+        file_node_id = f"file::{file_path}"
+        nodes.append(ExtractedNode(
+            node_id=file_node_id,
+            node_type="FILE",
+            name=os.path.basename(file_path),
+            system="files",
+            attributes={"path": file_path, "extension": os.path.splitext(file_path)[1].lower(),
+                        "parser_confidence": analysis.confidence}
+        ))
+
+        def locate(node: ast.AST) -> Locator:
+            start = index.line_start(node.lineno)
+            byte_line = index.byte_offset(start)
+            end_line = getattr(node, "end_lineno", None) or node.lineno
+            return Locator(
+                file=file_path,
+                line_start=node.lineno,
+                line_end=end_line,
+                byte_start=byte_line + node.col_offset, # ast columns are UTF-8 byte offsets
+                byte_end=index.byte_offset(index.line_start(end_line)) + (getattr(node, "end_col_offset", None) or node.col_offset)
+            )
+
+        def add_edge(from_id, to_id, edge_type, node, confidence, rationale):
+            ev_id = str(uuid.uuid4())
+            locator = locate(node)
+            evidences.append(Evidence(
+                evidence_id=ev_id,
+                kind="code",
+                locator=locator,
+                snippet=(ast.get_source_segment(content, node) or "")[:200]
+            ))
+            edges.append(ExtractedEdge(
+                edge_id=str(uuid.uuid4()),
+                edge_type=edge_type,
+                from_node_id=from_id,
+                to_node_id=to_id,
+                confidence=confidence,
+                rationale=rationale,
+                evidence_refs=[ev_id],
+                is_hypothesis=False
+            ))
+
+        # 1. Imports
+        for lib_name, node in analysis.imports:
+            target_id = f"lib::{lib_name}"
+            nodes.append(ExtractedNode(node_id=target_id, node_type="PACKAGE", name=lib_name, system="python", attributes={}))
+            add_edge(file_node_id, target_id, "DEPENDS_ON", node, 1.0, f"Imported library {lib_name}")
+
+        # 2. Table names passed to read/write calls
+        for table, relation, node in analysis.table_refs:
+            target_id = f"table::{table}"
+            nodes.append(ExtractedNode(node_id=target_id, node_type="TABLE", name=table, system="sql",
+                                       attributes={"pure_name": table.split(".")[-1]}))
+            add_edge(file_node_id, target_id, relation, node, 0.95, f"{_call_name(node.func)}() {'writes' if relation == 'WRITES_TO' else 'reads'} {table}")
+
+        # 2b. Data files read/written by pandas / Spark
+        for path, relation, node in analysis.file_refs:
+            target_id = f"datafile::{path}"
+            nodes.append(ExtractedNode(node_id=target_id, node_type="FILE", name=os.path.basename(path.rstrip("/")) or path,
+                                       system="files", attributes={"path": path}))
+            add_edge(file_node_id, target_id, relation, node, 0.9, f"{_call_name(node.func)}() {'writes' if relation == 'WRITES_TO' else 'reads'} {path}")
+
+        # 3. SQL literals -> SqlGlotExtractor, evidences re-anchored on the literal
+        if SQLGLOT_AVAILABLE:
+            for text, node in analysis.sql_literals:
+                sql_result = self.sql_extractor.extract(file_path, text)
+                locator = locate(node)
+                for n in sql_result.nodes:
+                    if n.node_id != file_node_id and SQL_PLACEHOLDER not in n.name:
+                        nodes.append(n)
+                valid = {n.node_id for n in sql_result.nodes if SQL_PLACEHOLDER not in n.name}
+                kept = {e.evidence_refs[0] for e in sql_result.edges if e.to_node_id in valid and e.evidence_refs}
+                for e in sql_result.edges:
+                    if e.to_node_id in valid:
+                        e.confidence = 0.9
+                        e.rationale = f"SQL string in Python code ({e.edge_type})"
+                        edges.append(e)
+                for ev in sql_result.evidences:
+                    if ev.evidence_id in kept:
+                        ev.kind = "code"
+                        ev.locator = locator
+                        evidences.append(ev)
+
+        # 4. Airflow: DAG -> tasks, task dependencies
+        for dag_id, node in analysis.dags.items():
+            dag_node_id = f"dag::{dag_id}"
+            nodes.append(ExtractedNode(node_id=dag_node_id, node_type="PROCESS", name=dag_id, system="airflow",
+                                       parent_node_id=file_node_id, attributes={}))
+            add_edge(file_node_id, dag_node_id, "CONTAINS", node, 1.0, f"Defines Airflow DAG {dag_id}")
+        task_ids = {}
+        for var, (task_id, dag_id, node) in analysis.tasks.items():
+            task_node_id = f"task::{dag_id or os.path.basename(file_path)}.{task_id}"
+            task_ids[var] = task_node_id
+            nodes.append(ExtractedNode(node_id=task_node_id, node_type="TASK", name=task_id, system="airflow",
+                                       parent_node_id=f"dag::{dag_id}" if dag_id else file_node_id,
+                                       attributes={"operator": _call_name(node.func), "dag_id": dag_id}))
+            add_edge(f"dag::{dag_id}" if dag_id else file_node_id, task_node_id, "CONTAINS", node, 1.0, f"Airflow task {task_id}")
+        for up, down, node in analysis.task_deps:
+            if up in task_ids and down in task_ids:
+                add_edge(task_ids[down], task_ids[up], "DEPENDS_ON", node, 1.0, "Airflow task dependency (upstream >> downstream)")
+
+        unique_nodes = {n.node_id: n for n in nodes}.values()
+        return ExtractionResult(
+            meta={"source_file": file_path, "extractor": "python_ast_v1", "parser_confidence": analysis.confidence},
+            nodes=list(unique_nodes),
+            edges=edges,
+            evidences=evidences,
+            assumptions=[] if analysis.parsed else ["Python file could not be parsed (syntax error)"]
+        )
+
+    def structure(self, content: str) -> Dict:
+        """Short summary for the LLM prompt (PARSER_PLUS_LLM)"""
+        a = self.analyze(content)
+        return {
+            "imports": sorted({name for name, _ in a.imports}),
+            "tables": sorted({f"{rel} {t}" for t, rel, _ in a.table_refs}),
+            "files": sorted({f"{rel} {p}" for p, rel, _ in a.file_refs}),
+            "unresolved_io_sites": max(0, round(a.access_sites - a.resolved_sites)),
+            "sql_statements": len(a.sql_literals),
+            "airflow_dags": sorted(a.dags),
+            "airflow_tasks": sorted({task_id for task_id, _, _ in a.tasks.values()}),
+            "parser_confidence": a.confidence,
+        }
@@ -2,7 +2,8 @@ import re
 import os
 import uuid
 from .base import BaseExtractor
-from ...models.extraction import ExtractionResult, ExtractedNode, ExtractedEdge, Evidence, Locator
+from .line_index import LineIndex
+from ...models.extraction import ExtractionResult, ExtractedNode, ExtractedEdge, Evidence
 
 class RegexExtractor(BaseExtractor):
     def extract(self, file_path: str, content: str) -> ExtractionResult:
@@ -24,10 +25,12 @@ class RegexExtractor(BaseExtractor):
             attributes={"path": file_path, "extension": ext}
         ))
         
+        # Line/byte positions of every match from one newline index
+        index = LineIndex(content)
         if ext == '.py':
-            self._extract_python(file_path, content, file_node_id, nodes, edges, evidences)
+            self._extract_python(file_path, content, file_node_id, nodes, edges, evidences, index)
         elif ext in ['.sql', '.hql']:
-            self._extract_sql(file_path, content, file_node_id, nodes, edges, evidences)
+            self._extract_sql(file_path, content, file_node_id, nodes, edges, evidences, index)
             
         # Deduplicate nodes by ID just in case
         unique_nodes = {n.node_id: n for n in nodes}.values()
@@ -40,7 +43,7 @@ class RegexExtractor(BaseExtractor):
             assumptions=[]
         )
 
-    def _extract_python(self, file_path, content, from_id, nodes, edges, evidences):
+    def _extract_python(self, file_path, content, from_id, nodes, edges, evidences, index: LineIndex):
         # Imports: from x import y OR import x
         import_pattern = re.compile(r'^\s*(?:from|import)\s+([\w\.]+)', re.MULTILINE)
         
@@ -50,11 +53,7 @@ class RegexExtractor(BaseExtractor):
             
             # Evidence
             ev_id = str(uuid.uuid4())
-            locator = Locator(
-                file=file_path,
-                line_start=content.count('\n', 0, match.start()) + 1,
-                line_end=content.count('\n', 0, match.end()) + 1
-            )
+            locator = index.locator(file_path, match.start(), match.end())
             evidences.append(Evidence(
                 evidence_id=ev_id,
                 kind="regex_match",
@@ -83,7 +82,7 @@ class RegexExtractor(BaseExtractor):
                 attributes={}
             ))
 
-    def _extract_sql(self, file_path, content, from_id, nodes, edges, evidences):
+    def _extract_sql(self, file_path, content, from_id, nodes, edges, evidences, index: LineIndex):
         # Tables (Simple FROM/JOIN)
         # Matches: FROM table_name, JOIN table_name
         table_pattern = re.compile(r'(?:FROM|JOIN)\s+([a-zA-Z0-9_]+(?:\.[a-zA-Z0-9_]+)?)', re.IGNORECASE)
@@ -93,11 +92,7 @@ class RegexExtractor(BaseExtractor):
             target_id = f"table::{table_name}"
             
             ev_id = str(uuid.uuid4())
-            locator = Locator(
-                file=file_path,
-                line_start=content.count('\n', 0, match.start()) + 1,
-                line_end=content.count('\n', 0, match.end()) + 1
-            )
+            locator = index.locator(file_path, match.start(), match.end())
             evidences.append(Evidence(
                 evidence_id=ev_id,
                 kind="regex_match",
@@ -3,14 +3,18 @@ from .base import BaseExtractor
 from .llm import LLMExtractor
 from .regex import RegexExtractor
 from .sql_glot import SqlGlotExtractor
-from .ssis_deep import SSISDeepExtractor
+from .ssis_stream import SSISStreamingExtractor
+from .python_ast import PythonAstExtractor
+from .datastage import DataStageExtractor
 
 class ExtractorRegistry:
     def __init__(self):
         self.llm_extractor = LLMExtractor()
         self.regex_extractor = RegexExtractor()
         self.sql_extractor = SqlGlotExtractor()
-        self.ssis_extractor = SSISDeepExtractor()
+        self.ssis_extractor = SSISStreamingExtractor() # Single pass, no full tree (same CIR as SSISDeepExtractor)
+        self.python_extractor = PythonAstExtractor()
+        self.datastage_extractor = DataStageExtractor() # .dsx / XML export / .isx
         
     def get_extractor(self, file_path: str) -> BaseExtractor:
         """
@@ -22,9 +26,12 @@ class ExtractorRegistry:
             return self.sql_extractor
         elif ext == '.dtsx':
             return self.ssis_extractor
+        elif ext in ('.dsx', '.isx'):
+            return self.datastage_extractor
+        elif ext == '.py':
+            return self.python_extractor
             
-        # For other files (py, xml, etc), we still use LLM for now as it's more versatile 
-        # until we implement AST parsers for Python.
+        # For other files (xml, etc), we still use LLM for now as it's more versatile
         return self.llm_extractor
 
     def extract(self, file_path: str, content: str):
@@ -12,7 +12,51 @@ except ImportError:
     exp = None
 
 from .base import BaseExtractor
+from .line_index import LineIndex
 from app.models.extraction import ExtractionResult, ExtractedNode, ExtractedEdge, Evidence, Locator
+from app.services.sql_parse_cache import get_sql_parse_cache, split_statements
+
+DEFAULT_DIALECT = "tsql"
+
+# Cheap lexical signals per sqlglot dialect, matched on the lowercased text: (pattern, weight).
+# Patterns start with a literal (no leading \b) so re can search for it at C speed.
+# Each signal counts at most 5 times.
+DIALECT_SIGNALS = {
+    "tsql": [
+        (r"^[ \t]*go[ \t]*$", 3), (r"set\s+nocount", 3), (r"identity\s*\(", 3), (r"dbo\.", 2), (r"nvarchar", 2),
+        (r"datetime2", 2), (r"uniqueidentifier", 2), (r"top\s*\(?\d", 2), (r"\[\w[^\]\n]*\]", 1), (r"@\w", 1),
+    ],
+    "postgres": [
+        (r"\$\$", 3), (r"language\s+plpgsql", 3), (r"on\s+conflict", 3), (r"serial\b", 3), (r"jsonb", 3),
+        (r"timestamptz", 3), (r"ilike\b", 3), (r"create\s+extension", 3), (r"::\s*[a-z_]", 2),
+    ],
+    "mysql": [
+        (r"auto_increment", 3), (r"engine\s*=", 3), (r"^[ \t]*delimiter\b", 3), (r"unsigned\b", 2), (r"`\w+`", 2),
+    ],
+    "oracle": [
+        (r"varchar2", 3), (r"from\s+dual\b", 3), (r"connect\s+by\b", 3), (r"number\s*\(", 2), (r"nvl\s*\(", 2), (r"sysdate", 2),
+    ],
+}
+_DIALECT_RES = {d: [(re.compile(p, re.MULTILINE), w) for p, w in signals] for d, signals in DIALECT_SIGNALS.items()}
+# Batches where ';' does not end the batch (procedure/function bodies): parsed whole
+_BLOCK_RE = re.compile(r"\bBEGIN\b|\$\$", re.IGNORECASE)
+
+def detect_dialect(content: str, sample_chars: int = 256 * 1024) -> str:
+    """Dialect with the highest lexical score over the head of the file (tsql on ties/no signal)"""
+    sample = content[:sample_chars].lower()
+    best, best_score = DEFAULT_DIALECT, 0
+    for dialect, signals in _DIALECT_RES.items():
+        score = 0
+        for pattern, weight in signals:
+            hits = 0
+            for _ in pattern.finditer(sample):
+                hits += 1
+                if hits == 5:
+                    break
+            score += hits * weight
+        if score > best_score:
+            best, best_score = dialect, score
+    return best
 
 class SqlGlotExtractor(BaseExtractor):
     def extract(self, file_path: str, content: str) -> ExtractionResult:
@@ -45,45 +89,63 @@ class SqlGlotExtractor(BaseExtractor):
         
         # Clean up potential non-standard comments (like # in some T-SQL scripts if exported weirdly)
         # Standard SQL uses --, but let's be safe if we see # at start of line
-        clean_content = re.sub(r'^\s*#.*$', '', content, flags=re.MULTILINE)
+        # (blanked, not removed: offsets must keep matching the original content)
+        clean_content = re.sub(r'^[ \t]*#.*$', lambda m: " " * len(m.group()), content, flags=re.MULTILINE)
         
-        batches = re.split(r'^\s*GO\s*$', clean_content, flags=re.MULTILINE | re.IGNORECASE)
+        # Batches with their offsets, for the evidence locators
+        batches = []
+        batch_start = 0
+        for go in re.finditer(r'^\s*GO\s*$', clean_content, flags=re.MULTILINE | re.IGNORECASE):
+            batches.append((batch_start, clean_content[batch_start:go.start()]))
+            batch_start = go.end()
+        batches.append((batch_start, clean_content[batch_start:]))
+        index = LineIndex(content)
         
-        dialect = "tsql" 
-        
-        for batch in batches:
+        # Dialect picked once per file from lexical signals (no per-batch retry);
+        # each statement is parsed once per (dialect, normalized text) thanks to the cache
+        dialect = detect_dialect(clean_content)
+        cache = get_sql_parse_cache()
+
+        for batch_start, batch in batches:
             if not batch.strip():
                 continue
-                
-            try:
-                # parse returns a list of expressions
-                # We strictly ask for T-SQL dialect
-                parsed_statements = sqlglot.parse(batch, read=dialect)
-                for stmt in parsed_statements:
-                    self._analyze_statement(stmt, file_path, content, file_node_id, nodes, edges, evidences)
-            except Exception as e:
-                # Try fallback to "postgres" if tsql fails, sometimes it helps with generic SQL
-                try:
-                     parsed_statements = sqlglot.parse(batch, read="postgres")
-                     for stmt in parsed_statements:
-                        self._analyze_statement(stmt, file_path, content, file_node_id, nodes, edges, evidences)
-                except:
-                    print(f"SqlGlot parse error in {file_path}: {e}")
-                    # We continue with next batch/statement
+
+            for statement, normalized, offset in split_statements(batch, split=not _BLOCK_RE.search(batch)):
+                if cache:
+                    summary = cache.get_or_parse(dialect, normalized, lambda: self._summarize(statement, dialect))
+                else:
+                    summary = self._summarize(statement, dialect)
+                if isinstance(summary, dict):
+                    print(f"SqlGlot parse error in {file_path}: {summary['error']}")
+                    # We continue with next statement
                     continue
+                self._emit_refs(summary, file_path, file_node_id, nodes, edges, evidences,
+                                lambda name: self._locate(index, file_path, statement, batch_start + offset, name))
 
         # Deduplicate
         unique_nodes = {n.node_id: n for n in nodes}.values()
         
         return ExtractionResult(
-            meta={"source_file": file_path, "extractor": "sqlglot_v1"},
+            meta={"source_file": file_path, "extractor": "sqlglot_v1", "dialect": dialect},
             nodes=list(unique_nodes),
             edges=edges,
             evidences=evidences,
             assumptions=[]
         )
 
-    def _analyze_statement(self, stmt, file_path, content, from_id, nodes, edges, evidences):
+    def _summarize(self, statement: str, dialect: str):
+        """Parses one statement: [[schema, table, rel_type, snippet], ...] or {"error": ...}"""
+        try:
+            parsed_statements = sqlglot.parse(statement, read=dialect)
+        except Exception as e:
+            return {"error": str(e)[:500]}
+        refs = []
+        for stmt in parsed_statements:
+            if stmt is not None:
+                refs.extend(self._statement_refs(stmt))
+        return refs
+
+    def _statement_refs(self, stmt) -> list:
         # 1. Tables (Inputs)
         # sqlglot finds all tables. We need to filter out CTEs defined in this query.
         
@@ -92,16 +154,43 @@ class SqlGlotExtractor(BaseExtractor):
         for cte in stmt.find_all(exp.CTE):
             ctes.add(cte.alias_or_name.upper())
 
+        refs = []
         # Find all tables
         for table in stmt.find_all(exp.Table):
             table_name = table.name
             schema_name = table.db # db is often used as schema in sqlglot (table.db = schema, table.catalog = db)
-            full_name = f"{schema_name}.{table_name}" if schema_name else table_name
             
             # Skip if it is a CTE defined in this statement
             if table_name.upper() in ctes:
                 continue
-                
+            
+            # Is it a READ or WRITE?
+            # If table is in FROM or JOIN, it's READ.
+            # If table is in INSERT INTO or UPDATE, it's WRITE.
+            rel_type = "READS_FROM"
+            parent = table.find_ancestor(exp.Insert, exp.Update, exp.Create, exp.Merge)
+            if parent and parent.this == table:
+                # It might be the target: this of Insert/Update/Create
+                if isinstance(parent, (exp.Insert, exp.Update)):
+                    rel_type = "WRITES_TO"
+                elif isinstance(parent, exp.Create):
+                    rel_type = "CREATES"
+            
+            refs.append([schema_name, table_name, rel_type, table.sql()[:200]]) # Truncate snippet
+        return refs
+
+    def _locate(self, index: LineIndex, file_path: str, statement: str, statement_start: int, table_name: str) -> Locator:
+        # The summary is cached per normalized text, so positions are resolved here:
+        # first occurrence of the table name in its statement (whole statement if not found)
+        m = re.search(r"(?<![\w$])" + re.escape(table_name) + r"(?![\w$])", statement, re.IGNORECASE) if table_name else None
+        if m:
+            return index.locator(file_path, statement_start + m.start(), statement_start + m.end())
+        return index.locator(file_path, statement_start, statement_start + len(statement))
+
+    def _emit_refs(self, refs, file_path, from_id, nodes, edges, evidences, locate=None):
+        for schema_name, table_name, rel_type, snippet in refs:
+            full_name = f"{schema_name}.{table_name}" if schema_name else table_name
+            
             # Node for Table
             table_node_id = f"table::{full_name}"
             nodes.append(ExtractedNode(
@@ -111,49 +200,19 @@ class SqlGlotExtractor(BaseExtractor):
                 system="sql",
                 attributes={"schema": schema_name or "dbo", "pure_name": table_name}
             ))
-            
-            # Edge: File READS_FROM Table
-            # But wait, is it a READ or WRITE?
-            # If table is in FROM or JOIN, it's READ.
-            # If table is in INSERT INTO or UPDATE, it's WRITE.
-            
-            parent = table.find_ancestor(exp.Insert, exp.Update, exp.Create, exp.Merge)
-            if parent:
-                # It might be the target.
-                # For Insert, this_table is the target.
-                if isinstance(parent, exp.Insert) and parent.this == table:
-                     self._add_edge(from_id, table_node_id, "WRITES_TO", nodes, edges, evidences, file_path, table)
-                     continue
-                # For Update, this is the target
-                if isinstance(parent, exp.Update) and parent.this == table:
-                     self._add_edge(from_id, table_node_id, "WRITES_TO", nodes, edges, evidences, file_path, table)
-                     continue
-                # For Create, this is the target
-                if isinstance(parent, exp.Create) and parent.this == table:
-                     self._add_edge(from_id, table_node_id, "CREATES", nodes, edges, evidences, file_path, table)
-                     continue
-            
-            # Default to READS_FROM
-            self._add_edge(from_id, table_node_id, "READS_FROM", nodes, edges, evidences, file_path, table)
+            locator = locate(table_name) if locate else Locator(file=file_path, line_start=1, line_end=1)
+            self._add_edge(from_id, table_node_id, rel_type, edges, evidences, locator, snippet)
 
-    def _add_edge(self, source_id, target_id, rel_type, nodes, edges, evidences, file_path, token):
+    def _add_edge(self, source_id, target_id, rel_type, edges, evidences, locator, snippet):
         edge_id = str(uuid.uuid4())
         
         # Evidence
-        # sqlglot tokens usually have line info if track_locations=True (default in some versions?)
-        # Safely access lineno
-        line = 1
-        if hasattr(token, 'lineno') and token.lineno:
-             line = token.lineno
-        elif hasattr(token, 'this') and hasattr(token.this, 'lineno') and token.this.lineno:
-             line = token.this.lineno
-        
         ev_id = str(uuid.uuid4())
         evidences.append(Evidence(
             evidence_id=ev_id,
             kind="sqlglot_parse",
-            locator=Locator(file=file_path, line_start=line, line_end=line),
-            snippet=token.sql()[:200] # Truncate snippet
+            locator=locator,
+            snippet=snippet
         ))
 
         edges.append(ExtractedEdge(
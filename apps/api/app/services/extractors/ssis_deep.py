@@ -2,13 +2,96 @@ import xml.etree.ElementTree as ET
 import re
 import uuid
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 from app.models.cir import CIRPackage, CIRNode, CIRDataFlow, CIRTransformation
 from app.services.extractors.base import BaseExtractor
 
 logger = logging.getLogger(__name__)
 
+# "Package\DFT\Source.Outputs[OLE DB Source Output]" -> "Package\DFT\Source"
+PORT_REF_RE = re.compile(r"\.(?:Inputs|Outputs)\[")
+# Column references in expressions/properties: #{<lineageId>} (2012+) or #<id> (2008)
+LINEAGE_REF_RE = re.compile(r"#\{([^}]+)\}|#(\d+)\b")
+IDENTIFIER_RE = re.compile(r"\[([^\]]+)\]|([A-Za-z_]\w*)")
+
+def lineage_refs(text: Optional[str]) -> List[str]:
+    if not text or "#" not in text:
+        return []
+    return [a or b for a, b in LINEAGE_REF_RE.findall(text)]
+
+def _local_tag(tag):
+    return tag.split('}')[-1] if '}' in tag else tag
+
+class PipelineIndex:
+    """
+    Lookups of one Data Flow <pipeline>, built once as components are parsed:
+    component refId -> CIR node, input/output refId (or numeric id) -> CIR node
+    and its columns, lineageId -> column name.
+    """
+
+    def __init__(self):
+        self.components: Dict[str, str] = {} # component refId -> node_id
+        self.ports: Dict[str, str] = {} # input/output refId or id -> node_id
+        self.port_columns: Dict[str, List[Tuple[str, Optional[str]]]] = {} # port -> [(column name, lineageId)]
+        self.columns: Dict[str, str] = {} # lineageId -> column name
+        self._by_length: Optional[List[str]] = None
+
+    def add_component(self, component_elem, ref_id: Optional[str], node_id: str):
+        if ref_id:
+            self.components[ref_id] = node_id
+            self._by_length = None
+        for collection in component_elem:
+            if _local_tag(collection.tag) not in ("inputs", "outputs"):
+                continue
+            for port in collection:
+                if _local_tag(port.tag) not in ("input", "output"):
+                    continue
+                columns = []
+                for port_child in port:
+                    if _local_tag(port_child.tag) not in ("inputColumns", "outputColumns"):
+                        continue
+                    for col in port_child:
+                        name = col.attrib.get("name")
+                        lineage_id = col.attrib.get("lineageId")
+                        if not name:
+                            continue
+                        columns.append((name, lineage_id))
+                        # Output columns define the lineageId; input columns only reference it
+                        if lineage_id and _local_tag(col.tag) == "outputColumn":
+                            self.columns[lineage_id] = name
+                for key in (port.attrib.get("refId"), port.attrib.get("id")):
+                    if key:
+                        self.ports[key] = node_id
+                        self.port_columns[key] = columns
+
+    def resolve(self, path_ref: Optional[str]) -> Optional[str]:
+        """CIR node owning a path's startId/endId"""
+        if not path_ref:
+            return None
+        node_id = self.ports.get(path_ref) or self.components.get(PORT_REF_RE.split(path_ref, 1)[0])
+        if node_id:
+            return node_id
+        # Unusual refIds: longest component refId contained in the path ref (keys sorted once)
+        if self._by_length is None:
+            self._by_length = sorted(self.components, key=len, reverse=True)
+        for ref_id in self._by_length:
+            if ref_id in path_ref:
+                return self.components[ref_id]
+        return None
+
+    def flow_columns(self, start_ref: Optional[str], end_ref: Optional[str]) -> Tuple[List[str], Optional[Dict[str, str]]]:
+        """
+        Columns crossing a path and upstream -> downstream name map: the input
+        columns of the target input (lineageId resolved to the upstream output
+        column), or else the output columns of the source output.
+        """
+        inputs = self.port_columns.get(end_ref) or []
+        if inputs:
+            column_map = {self.columns[lin]: name for name, lin in inputs if lin and lin in self.columns}
+            return [name for name, _ in inputs], column_map or None
+        return [name for name, _ in self.port_columns.get(start_ref) or []], None
+
 class SSISDeepExtractor(BaseExtractor):
     """
     Deep extractor for SSIS packages (.dtsx).
@@ -102,7 +185,7 @@ class SSISDeepExtractor(BaseExtractor):
                 self._traverse_executables(child, parent_id, nodes, flows, transforms)
 
     def _local_tag(self, tag):
-        return tag.split('}')[-1] if '}' in tag else tag
+        return _local_tag(tag)
 
     def _parse_pipeline(self, pipeline_elem, nodes: List[CIRNode], flows: List[CIRDataFlow], transforms: List[CIRTransformation], parent_node_id: str = None):
         
@@ -113,64 +196,13 @@ class SSISDeepExtractor(BaseExtractor):
                 components_node = child
                 break
         
-        comp_id_map = {} # Map refId (internal) -> guid (CIR)
+        index = PipelineIndex() # refId/lineageId lookups (internal -> CIR)
 
         if components_node is not None:
             for component in components_node:
                 if self._local_tag(component.tag) == "component":
-                    # Get Attributes
-                    ref_id = component.attrib.get("refId")
-                    name = component.attrib.get("name") or ref_id
-                    comp_class = component.attrib.get("componentClassID", "")
-                    
-                    node_id = str(uuid.uuid4())
-                    comp_id_map[ref_id] = node_id # Map internal ID to CIR ID
-
-                    # Determine Type
-                    node_type = "TRANSFORM"
-                    if "Source" in comp_class or "Source" in name: node_type = "SOURCE"
-                    elif "Destination" in comp_class or "Destination" in name: node_type = "SINK"
-                    
-                    # Extract Properties
-                    properties = {}
-                    for child in component:
-                        if self._local_tag(child.tag) == "properties":
-                            for prop in child:
-                                if self._local_tag(prop.tag) == "property":
-                                    p_name = prop.attrib.get("name")
-                                    p_val = prop.text
-                                    if p_name and p_val:
-                                        properties[p_name] = p_val
-                                        
-                                        # Capture Transformation Logic
-                                        if p_name == "SqlCommand":
-                                            transforms.append(CIRTransformation(
-                                                node_id=node_id,
-                                                expression_raw=p_val,
-                                                expression_standard=None, # To be filled by LLM later
-                                                confidence=1.0
-                                            ))
-                    
-                    # Check for all columns (schema metadata)
-                    column_list = self._extract_all_columns(component)
-                    if column_list:
-                        if "columns" not in properties: properties["columns"] = []
-                        properties["columns"].extend(column_list)
-
-                    # Create CIR Node
-                    nodes.append(CIRNode(
-                        id=node_id,
-                        name=name,
-                        type=node_type,
-                        original_type=comp_class,
-                        description=component.attrib.get("description"),
-                        parent_id=parent_node_id,
-                        properties=properties,
-                        columns_metadata=column_list if isinstance(column_list, list) else []
-                    ))
-                    
-                    # Check Output Columns for Derived Column expressions
-                    self._extract_column_formulas(component, node_id, transforms)
+                    ref_id, node_id = self._parse_component(component, nodes, transforms, parent_node_id)
+                    index.add_component(component, ref_id, node_id)
 
         # 2. Extract Data Flows (Paths)
         paths_node = None
@@ -182,24 +214,102 @@ class SSISDeepExtractor(BaseExtractor):
         if paths_node is not None:
             for path in paths_node:
                 if self._local_tag(path.tag) == "path":
-                    start_id_raw = path.attrib.get("startId")
-                    end_id_raw = path.attrib.get("endId")
-                    
-                    # startId looks like "Package\Task\Component.Outputs[Out]"
-                    # We need to match it to the component.
-                    # Heuristic: verify which component refId is a substring of path ID
-                    
-                    source_node_id = self._find_node_id_by_ref(start_id_raw, comp_id_map)
-                    target_node_id = self._find_node_id_by_ref(end_id_raw, comp_id_map)
-                    
-                    if source_node_id and target_node_id:
-                        flows.append(CIRDataFlow(
-                            source_id=source_node_id,
-                            target_id=target_node_id,
-                            columns=[] # Hard to extract without deeper parsing of lineage IDs
-                        ))
+                    flow = self._path_flow(index, path.attrib.get("startId"), path.attrib.get("endId"))
+                    if flow:
+                        flows.append(flow)
+
+    def _path_flow(self, index: PipelineIndex, start_id_raw: Optional[str], end_id_raw: Optional[str]) -> Optional[CIRDataFlow]:
+        # startId looks like "Package\Task\Component.Outputs[Out]", endId like "...Component.Inputs[In]"
+        source_node_id = index.resolve(start_id_raw)
+        target_node_id = index.resolve(end_id_raw)
+        if not (source_node_id and target_node_id):
+            return None
+        columns, column_map = index.flow_columns(start_id_raw, end_id_raw)
+        return CIRDataFlow(
+            source_id=source_node_id,
+            target_id=target_node_id,
+            columns=columns,
+            column_map=column_map
+        )
+
+    def _parse_component(self, component, nodes: List[CIRNode], transforms: List[CIRTransformation], parent_node_id: str = None):
+        """Builds the CIRNode (+ SqlCommand/Expression transformations) of one pipeline component. Returns (refId, node_id)."""
+        # Get Attributes
+        ref_id = component.attrib.get("refId")
+        name = component.attrib.get("name") or ref_id
+        comp_class = component.attrib.get("componentClassID", "")
+
+        node_id = str(uuid.uuid4())
+
+        # Determine Type
+        node_type = "TRANSFORM"
+        if "Source" in comp_class or "Source" in name: node_type = "SOURCE"
+        elif "Destination" in comp_class or "Destination" in name: node_type = "SINK"
+
+        # Extract Properties
+        properties = {}
+        for child in component:
+            if self._local_tag(child.tag) == "properties":
+                for prop in child:
+                    if self._local_tag(prop.tag) == "property":
+                        p_name = prop.attrib.get("name")
+                        p_val = prop.text
+                        if p_name and p_val:
+                            properties[p_name] = p_val
+
+                            # Capture Transformation Logic
+                            if p_name == "SqlCommand":
+                                transforms.append(CIRTransformation(
+                                    node_id=node_id,
+                                    expression_raw=p_val,
+                                    expression_standard=None, # To be filled by LLM later
+                                    confidence=1.0
+                                ))
+
+        # Check for all columns (schema metadata)
+        column_list = self._extract_all_columns(component)
+        if column_list:
+            if "columns" not in properties: properties["columns"] = []
+            properties["columns"].extend(column_list)
+
+        # Create CIR Node
+        nodes.append(CIRNode(
+            id=node_id,
+            name=name,
+            type=node_type,
+            original_type=comp_class,
+            description=component.attrib.get("description"),
+            parent_id=parent_node_id,
+            properties=properties,
+            columns_metadata=column_list if isinstance(column_list, list) else []
+        ))
+
+        # Check Output Columns for Derived Column expressions
+        self._extract_column_formulas(component, node_id, transforms)
+        
+        return ref_id, node_id
+
+    def _expression_inputs(self, expression: Optional[str], input_columns: Dict[str, str]) -> List[str]:
+        """Lineage ids an expression reads: #{...} references, or input column names used as identifiers"""
+        refs = lineage_refs(expression)
+        if refs or not expression:
+            return refs
+        used = []
+        for bracketed, bare in IDENTIFIER_RE.findall(expression):
+            lin = input_columns.get((bracketed or bare).strip())
+            if lin and lin not in used:
+                used.append(lin)
+        return used
 
     def _extract_column_formulas(self, component_elem, node_id, transforms):
+        # Input columns of the component: name -> lineageId (refId when there is none)
+        input_columns = {}
+        for child in component_elem:
+            if self._local_tag(child.tag) == "inputs":
+                for col in child.iter():
+                    if self._local_tag(col.tag) == "inputColumn" and col.attrib.get("name"):
+                        input_columns[col.attrib["name"]] = col.attrib.get("lineageId") or col.attrib.get("refId")
+
         # Look for output columns with "Expression" properties
         for child in component_elem:
             if self._local_tag(child.tag) == "outputs":
@@ -223,6 +333,7 @@ class SSISDeepExtractor(BaseExtractor):
                                                                 column_name=col_name,
                                                                 lineage_id=lin_id,
                                                                 expression_raw=prop.text,
+                                                                input_column_lineage_ids=self._expression_inputs(prop.text, input_columns),
                                                                 confidence=1.0
                                                             ))
                                             # Also check direct children properties (sometimes formatting varies)
@@ -232,23 +343,17 @@ class SSISDeepExtractor(BaseExtractor):
                                                     column_name=col_name,
                                                     lineage_id=lin_id,
                                                     expression_raw=prop_container.text,
+                                                    input_column_lineage_ids=self._expression_inputs(prop_container.text, input_columns),
                                                     confidence=1.0
                                                 ))
 
-    def _find_node_id_by_ref(self, path_ref: str, comp_map: Dict[str, str]) -> Optional[str]:
-        # Tries to find which component refId matches the path_ref prefix
-        if not path_ref: return None
-        
-        # Sort keys by length desc to match longest prefix first
-        sorted_keys = sorted(comp_map.keys(), key=len, reverse=True)
-        
-        for ref_id in sorted_keys:
-            if ref_id in path_ref:
-                return comp_map[ref_id]
-        return None
-
     def _extract_all_columns(self, component_elem) -> List[Dict[str, Any]]:
-        """Extracts a list of column metadata for any component."""
+        """
+        Extracts a list of column metadata for any component.
+        Also keeps what column lineage needs: external_id (externalMetadataColumnId),
+        ref_id (external columns, columns without lineageId) and refs
+        (#{lineageId} references in the column's properties).
+        """
         cols = []
         for child in component_elem.iter():
             tag = self._local_tag(child.tag)
@@ -256,9 +361,17 @@ class SSISDeepExtractor(BaseExtractor):
                 name = child.attrib.get("name")
                 lin_id = child.attrib.get("lineageId")
                 if name:
-                    cols.append({
+                    col = {
                         "name": name,
                         "lineage_id": lin_id,
                         "kind": tag
-                    })
+                    }
+                    if child.attrib.get("externalMetadataColumnId"):
+                        col["external_id"] = child.attrib["externalMetadataColumnId"]
+                    if tag == "externalMetadataColumn" or not lin_id:
+                        col["ref_id"] = child.attrib.get("refId") or child.attrib.get("id")
+                    refs = [r for prop in child.iter() if prop is not child for r in lineage_refs(prop.text)]
+                    if refs:
+                        col["refs"] = refs
+                    cols.append(col)
         return cols
@@ -0,0 +1,185 @@
+import xml.etree.ElementTree as ET
+import uuid
+import logging
+from typing import Optional, List, BinaryIO, Iterable, Tuple
+
+from app.models.cir import CIRPackage, CIRNode, CIRDataFlow
+from app.services.extractors.ssis_deep import SSISDeepExtractor, PipelineIndex
+
+logger = logging.getLogger(__name__)
+
+DTS_NS = "{www.microsoft.com/SqlServer/Dts}"
+FEED_CHUNK_CHARS = 1024 * 1024
+# Below this size the full tree is cheap and a bit faster (C tree build vs Python per event)
+STREAMING_MIN_CHARS = 16 * 1024 * 1024
+
+# Roles of the open elements (stack frames)
+CHAIN = "chain"          # package root, task/container Executables and their Executables collections
+DATA_FLOW = "data_flow"  # Pipeline Executable (or anything below it)
+OBJECT_DATA = "object_data"  # ObjectData of a Data Flow (or anything below it)
+PIPELINE = "pipeline"
+COMPONENTS = "components"
+COMPONENT = "component"  # subtree kept until its end event, then parsed and dropped
+RETAINED = "retained"    # inside a component
+PATHS = "paths"
+OTHER = "other"          # irrelevant subtree: cleared as a whole when it closes
+IGNORED = "ignored"      # inside an OTHER subtree
+
+class _Frame:
+    __slots__ = ("elem", "role", "node_id", "pipeline", "index", "paths", "seen")
+
+    def __init__(self, elem, role: str, node_id: Optional[str] = None, pipeline: Optional["_Frame"] = None):
+        self.elem = elem
+        self.role = role
+        self.node_id = node_id
+        self.pipeline = pipeline # enclosing <pipeline> frame (components/paths)
+        self.index: Optional[PipelineIndex] = None
+        self.paths: Optional[List[Tuple[str, str]]] = None
+        self.seen: Optional[set] = None
+
+_IGNORED_FRAME = _Frame(None, IGNORED)
+_RETAINED_FRAME = _Frame(None, RETAINED)
+
+class SSISStreamingExtractor(SSISDeepExtractor):
+    """
+    Single-pass SSIS deep extractor built on iterparse events.
+    Produces the same CIRPackage as SSISDeepExtractor.extract_deep, but never
+    holds the whole tree: every element is cleared and detached at its end
+    event, except a pipeline component, which is kept only until it closes
+    (its columns/properties are parsed with the shared helpers).
+    """
+
+    def extract_deep(self, file_path: str, content: str) -> Optional[CIRPackage]:
+        if len(content) < STREAMING_MIN_CHARS:
+            return super().extract_deep(file_path, content)
+
+        def events():
+            parser = ET.XMLPullParser(events=("start", "end"))
+            for i in range(0, len(content), FEED_CHUNK_CHARS):
+                parser.feed(content[i:i + FEED_CHUNK_CHARS])
+                yield from parser.read_events()
+            parser.close()
+            yield from parser.read_events()
+
+        return self._extract_events(file_path, events())
+
+    def extract_deep_stream(self, file_path: str, stream: BinaryIO) -> Optional[CIRPackage]:
+        """Same as extract_deep, reading the package from a binary stream (e.g. ArchiveSource.open)"""
+        return self._extract_events(file_path, ET.iterparse(stream, events=("start", "end")))
+
+    def _extract_events(self, file_path: str, events: Iterable) -> Optional[CIRPackage]:
+        try:
+            return self._build_package(file_path, events)
+        except Exception as e:
+            logger.error(f"Error in SSISStreamingExtractor: {e}")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def _build_package(self, file_path: str, events: Iterable) -> CIRPackage:
+        package_id = str(uuid.uuid4())
+        package_node = CIRNode(id=package_id, name="Unknown", type="CONTAINER", original_type="SSIS::Package")
+        nodes = [package_node]
+        flows: List[CIRDataFlow] = []
+        transforms = []
+        stack: List[_Frame] = []
+        package_name = None
+
+        for event, elem in events:
+            if event == "start":
+                if not stack:
+                    if self._local_tag(elem.tag) == "Executable":
+                        package_name = self._object_name(elem) or "Package"
+                    stack.append(_Frame(elem, CHAIN, package_id))
+                    continue
+                parent = stack[-1]
+                if parent.role in (OTHER, IGNORED, COMPONENT, RETAINED):
+                    # Nothing to decide below these: share one frame
+                    stack.append(_IGNORED_FRAME if parent.role in (OTHER, IGNORED) else _RETAINED_FRAME)
+                    continue
+                tag = self._local_tag(elem.tag)
+                if package_name is None and tag == "Executable":
+                    package_name = self._object_name(elem) or "Package"
+                stack.append(self._open(parent, elem, tag, nodes))
+                continue
+
+            frame = stack.pop()
+            if frame.role in (IGNORED, RETAINED):
+                continue
+            if frame.role == COMPONENT:
+                pipeline = frame.pipeline
+                ref_id, node_id = self._parse_component(elem, nodes, transforms, parent_node_id=pipeline.node_id)
+                pipeline.index.add_component(elem, ref_id, node_id)
+            elif frame.role == PIPELINE:
+                self._resolve_paths(frame, flows)
+            # Done with this subtree
+            elem.clear()
+            if stack:
+                parent = stack[-1].elem
+                if len(parent) and parent[0] is elem:
+                    del parent[0]
+                else:
+                    parent.remove(elem)
+
+        package_node.name = package_name or "Unknown"
+        return CIRPackage(
+            package_id=package_id,
+            name=package_node.name,
+            source_system="SSIS",
+            nodes=nodes,
+            data_flows=flows,
+            transformations=transforms,
+            metadata={"file_path": file_path}
+        )
+
+    def _open(self, parent: _Frame, elem, tag: str, nodes: List[CIRNode]) -> _Frame:
+        """Role of a just-opened element, given its parent (same walk as _traverse_executables/_parse_pipeline)"""
+        role = parent.role
+        if role == CHAIN:
+            if tag == "Executable":
+                exe_name = self._object_name(elem)
+                exe_type = elem.attrib.get(f"{DTS_NS}ExecutableType") or elem.attrib.get("DTS:ExecutableType")
+                is_data_flow = "Pipeline" in (exe_type or "")
+                node_id = str(uuid.uuid4())
+                nodes.append(CIRNode(
+                    id=node_id,
+                    name=exe_name or "Task",
+                    type="CONTAINER" if not is_data_flow else "TRANSFORM",
+                    original_type=f"SSIS::{exe_type.split('.')[-1]}" if exe_type else "SSIS::Task",
+                    parent_id=parent.node_id
+                ))
+                return _Frame(elem, DATA_FLOW if is_data_flow else CHAIN, node_id)
+            if tag == "Executables":
+                return _Frame(elem, CHAIN, parent.node_id)
+            return _Frame(elem, OTHER)
+        if role == DATA_FLOW:
+            return _Frame(elem, OBJECT_DATA if tag == "ObjectData" else DATA_FLOW, parent.node_id)
+        if role == OBJECT_DATA:
+            if tag == "pipeline":
+                frame = _Frame(elem, PIPELINE, parent.node_id)
+                frame.index, frame.paths, frame.seen = PipelineIndex(), [], set()
+                return frame
+            return _Frame(elem, OBJECT_DATA, parent.node_id)
+        if role == PIPELINE:
+            # Only the first <components>/<paths> child counts
+            if tag in (COMPONENTS, PATHS) and tag not in parent.seen:
+                parent.seen.add(tag)
+                return _Frame(elem, tag, pipeline=parent)
+            return _Frame(elem, OTHER)
+        if role == COMPONENTS:
+            return _Frame(elem, COMPONENT, pipeline=parent.pipeline) if tag == "component" else _Frame(elem, OTHER)
+        if role == PATHS:
+            if tag == "path":
+                # Resolved when the pipeline closes (components may come later in the document)
+                parent.pipeline.paths.append((elem.attrib.get("startId"), elem.attrib.get("endId")))
+            return _Frame(elem, OTHER)
+        return _Frame(elem, OTHER)
+
+    def _resolve_paths(self, pipeline: _Frame, flows: List[CIRDataFlow]):
+        for start_id_raw, end_id_raw in pipeline.paths:
+            flow = self._path_flow(pipeline.index, start_id_raw, end_id_raw)
+            if flow:
+                flows.append(flow)
+
+    def _object_name(self, elem) -> Optional[str]:
+        return elem.attrib.get(f"{DTS_NS}ObjectName") or elem.attrib.get("DTS:ObjectName")
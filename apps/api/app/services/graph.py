@@ -1,9 +1,39 @@
 from abc import ABC, abstractmethod
 from ..config import settings
+import base64
 import json
+import re
 import time
+import threading
+from typing import List, Optional, Tuple
 from neo4j.exceptions import ServiceUnavailable, SessionExpired
 
+# Fields of node["data"] in the frontend shape (graph_node_json in migration 14)
+NODE_FIELDS = ("label", "type", "system", "tags", "schema", "columns", "summary", "parentId")
+# Served when no fields are asked for: the whole tags JSONB is opt-in (?fields=...,tags)
+DEFAULT_NODE_FIELDS = tuple(f for f in NODE_FIELDS if f != "tags")
+
+def encode_graph_cursor(kind: str, after: str) -> str:
+    """Opaque page cursor: nodes are paged first (by id), then edges (by id)"""
+    return base64.urlsafe_b64encode(json.dumps([kind, after]).encode()).decode().rstrip("=")
+
+def decode_graph_cursor(cursor: Optional[str]) -> Tuple[str, Optional[str]]:
+    if not cursor:
+        return "nodes", None
+    try:
+        kind, after = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if kind not in ("nodes", "edges"):
+        raise ValueError("Invalid cursor")
+    return kind, after
+
+def project_node(node: dict, fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return node
+    data = node.get("data") or {}
+    return {"id": node.get("id"), "data": {f: data[f] for f in fields if f in data}}
+
 class GraphService(ABC):
     @abstractmethod
     def upsert_node(self, label: str, properties: dict):
@@ -29,6 +59,68 @@ class GraphService(ABC):
     def find_paths(self, from_id: str, to_id: str, max_hops: int):
         pass
 
+    @abstractmethod
+    def get_impact(self, asset_id: str, direction: str, max_depth: Optional[int], limit: int):
+        # direction: "downstream" (what this asset feeds) or "upstream" (what it is built from)
+        # -> {"asset_id", "direction", "assets": [{"id", "depth", "data"}]} closest first
+        pass
+
+    def upsert_nodes_bulk(self, label: str, rows: List[dict]):
+        for properties in rows:
+            self.upsert_node(label, properties)
+
+    def upsert_relationships_bulk(self, rel_type: str, rows: List[dict]):
+        # rows: {"source_id", "target_id", **relationship properties}
+        for row in rows:
+            self.upsert_relationship({"id": row["source_id"], "name": row["source_id"]},
+                                     {"id": row["target_id"], "name": row["target_id"]}, rel_type)
+
+    def delete_nodes_bulk(self, ids: List[str]):
+        # Catalog-backed services see the catalog deletions directly
+        pass
+
+    def delete_relationships_bulk(self, solution_id: str, ids: List[str]):
+        pass
+
+    def list_nodes(self, solution_id: str, after: Optional[str], limit: int, fields: Optional[List[str]] = None) -> List[dict]:
+        """Nodes with id > after ordered by id (keyset page). Default: slices get_graph_data"""
+        nodes = sorted(self.get_graph_data(solution_id).get("nodes", []), key=lambda n: str(n.get("id")))
+        return [project_node(n, fields) for n in nodes if after is None or str(n.get("id")) > after][:limit]
+
+    def list_edges(self, solution_id: str, after: Optional[str], limit: int) -> List[dict]:
+        """Edges with id > after ordered by id (keyset page). Default: slices get_graph_data"""
+        edges = sorted(self.get_graph_data(solution_id).get("edges", []), key=lambda e: str(e.get("id")))
+        return [e for e in edges if after is None or str(e.get("id")) > after][:limit]
+
+    def get_nodes(self, solution_id: str, ids: List[str], fields: Optional[List[str]] = None) -> List[dict]:
+        """Details of some nodes (e.g. after loading a page with fields=label,type). Default: filters get_graph_data"""
+        wanted = set(ids)
+        return [project_node(n, fields) for n in self.get_graph_data(solution_id).get("nodes", []) if n.get("id") in wanted]
+
+    def edge_cursor(self, edge: dict) -> str:
+        """Keyset position of an edge for list_edges(after=...)"""
+        return str(edge["id"])
+
+    def data_version(self, solution_id: str) -> Optional[str]:
+        """Version of the data this service serves right now; None = the catalog's last completed job"""
+        return None
+
+    def get_graph_page(self, solution_id: str, cursor: Optional[str], limit: int, fields: Optional[List[str]] = None) -> dict:
+        """
+        One page of at most limit items: nodes first, then edges, both by id.
+        next_cursor is None on the last page. Edges may reference nodes of any page.
+        """
+        kind, after = decode_graph_cursor(cursor)
+        nodes, edges = [], []
+        if kind == "nodes":
+            nodes = self.list_nodes(solution_id, after, limit, fields)
+            if len(nodes) == limit:
+                return {"nodes": nodes, "edges": [], "next_cursor": encode_graph_cursor("nodes", str(nodes[-1]["id"]))}
+            after = None # Nodes exhausted: fill the page with the first edges
+        edges = self.list_edges(solution_id, after, limit - len(nodes))
+        next_cursor = encode_graph_cursor("edges", self.edge_cursor(edges[-1])) if edges and len(edges) == limit - len(nodes) else None
+        return {"nodes": nodes, "edges": edges, "next_cursor": next_cursor}
+
 class MockGraphService(GraphService):
     def __init__(self):
         print("Initialized Mock Graph Service (In-Memory)")
@@ -56,6 +148,29 @@ class MockGraphService(GraphService):
     def find_paths(self, from_id: str, to_id: str, max_hops: int):
         return [] # Mock returns empty
 
+    def get_impact(self, asset_id: str, direction: str, max_depth: Optional[int], limit: int):
+        return {"asset_id": asset_id, "direction": direction, "assets": []} # Mock returns empty
+
+# Labels / relationship types are interpolated into Cypher (they cannot be parameters)
+CYPHER_IDENTIFIER_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Base label of every node written by Neo4jGraphService: the id constraint and the
+# solution_id index live on it, so lookups by id never scan all nodes
+BASE_LABEL = "Asset"
+
+NEO4J_SCHEMA = [
+    f"CREATE CONSTRAINT asset_id_unique IF NOT EXISTS FOR (n:{BASE_LABEL}) REQUIRE n.id IS UNIQUE",
+    f"CREATE INDEX asset_solution_id IF NOT EXISTS FOR (n:{BASE_LABEL}) ON (n.solution_id)",
+]
+
+_neo4j_schema_ready = False
+_neo4j_schema_lock = threading.Lock()
+
+def _cypher_identifier(name: str) -> str:
+    if not CYPHER_IDENTIFIER_RE.match(name or ""):
+        raise ValueError(f"Invalid Neo4j label/relationship type: {name!r}")
+    return name
+
 class Neo4jGraphService(GraphService):
     def __init__(self):
         from neo4j import GraphDatabase
@@ -63,10 +178,22 @@ class Neo4jGraphService(GraphService):
             settings.NEO4J_URI, 
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
         )
+        self.ensure_schema()
     
     def close(self):
         self.driver.close()
 
+    def ensure_schema(self):
+        """Uniqueness constraint on id and index on solution_id (once per process, idempotent)"""
+        global _neo4j_schema_ready
+        with _neo4j_schema_lock:
+            if _neo4j_schema_ready:
+                return
+            for statement in NEO4J_SCHEMA:
+                self._run_query_with_retry(statement)
+            _neo4j_schema_ready = True
+            print("[NEO4J] Schema ready (constraints and indexes)")
+
     def _run_query_with_retry(self, query, params=None, max_retries=3):
         for attempt in range(max_retries):
             try:
@@ -82,31 +209,71 @@ class Neo4jGraphService(GraphService):
                 print(f"[NEO4J ERROR] Unexpected error: {e}")
                 raise e
 
+    def _write_batches(self, query: str, rows: list, **params):
+        # One managed write transaction per batch: execute_write retries transient errors
+        # (leader switch, deadlock) and the whole batch is one round trip
+        size = max(1, settings.NEO4J_BATCH_SIZE)
+        with self.driver.session() as session:
+            for start in range(0, len(rows), size):
+                batch = rows[start:start + size]
+                session.execute_write(lambda tx: tx.run(query, rows=batch, **params).consume())
+
     def upsert_node(self, label: str, properties: dict):
-        # Simplified upsert logic
-        # Ensure 'solution_id' is stored if available
-        query = f"MERGE (n:{label} {{id: $id}}) SET n += $props"
-        # Assuming 'id' is always in properties for uniqueness
-        if 'id' not in properties:
-             properties['id'] = properties.get('name', 'unknown')
-             
-        self._run_query_with_retry(query, params={"id": properties['id'], "props": properties})
+        self.upsert_nodes_bulk(label, [properties])
 
     def upsert_relationship(self, source_props: dict, target_props: dict, rel_type: str):
-        # This assumes nodes exist or uses merge
+        self.upsert_relationships_bulk(rel_type, [{
+            "source_id": source_props.get('id', source_props.get('name')),
+            "target_id": target_props.get('id', target_props.get('name'))
+        }])
+
+    def upsert_nodes_bulk(self, label: str, rows: List[dict]):
+        """MERGE by id on the base label (indexed), rows sent in batches with UNWIND"""
+        if not rows:
+            return
+        extra_label = "" if label == BASE_LABEL else f" SET n:{_cypher_identifier(label)}"
+        query = f"UNWIND $rows AS row MERGE (n:{BASE_LABEL} {{id: row.id}}) SET n += row{extra_label}"
+        payload = []
+        for properties in rows:
+            # Assuming 'id' is always in properties for uniqueness
+            if 'id' not in properties:
+                properties = {**properties, 'id': properties.get('name', 'unknown')}
+            payload.append(properties)
+        self._write_batches(query, payload)
+
+    def upsert_relationships_bulk(self, rel_type: str, rows: List[dict]):
+        """rows: {"source_id", "target_id", **relationship properties}; endpoints matched by indexed id"""
+        if not rows:
+            return
         query = f"""
-        MATCH (a), (b)
-        WHERE a.id = $source_id AND b.id = $target_id
-        MERGE (a)-[r:{rel_type}]->(b)
+        UNWIND $rows AS row
+        MATCH (a:{BASE_LABEL} {{id: row.source_id}})
+        MATCH (b:{BASE_LABEL} {{id: row.target_id}})
+        MERGE (a)-[r:{_cypher_identifier(rel_type)}]->(b)
+        SET r += row.props
         """
-        source_id = source_props.get('id', source_props.get('name'))
-        target_id = target_props.get('id', target_props.get('name'))
-        
-        self._run_query_with_retry(query, params={"source_id": source_id, "target_id": target_id})
+        payload = []
+        for row in rows:
+            props = {k: v for k, v in row.items() if k not in ("source_id", "target_id")}
+            payload.append({"source_id": row["source_id"], "target_id": row["target_id"], "props": props})
+        self._write_batches(query, payload)
+
+    def delete_nodes_bulk(self, ids: List[str]):
+        """DETACH DELETE by indexed id (relationships of other nodes to them go too)"""
+        self._write_batches(f"UNWIND $rows AS id MATCH (n:{BASE_LABEL} {{id: id}}) DETACH DELETE n", list(ids))
+
+    def delete_relationships_bulk(self, solution_id: str, ids: List[str]):
+        """Relationships by their catalog edge_id (no relationship index: one pass over the solution per batch)"""
+        query = f"""
+        MATCH (a:{BASE_LABEL})-[r]->()
+        WHERE a.solution_id = $solution_id AND r.id IN $rows
+        DELETE r
+        """
+        self._write_batches(query, list(ids), solution_id=solution_id)
 
     def delete_solution_nodes(self, solution_id: str):
-        query = """
-        MATCH (n)
+        query = f"""
+        MATCH (n:{BASE_LABEL})
         WHERE n.solution_id = $solution_id
         DETACH DELETE n
         """
@@ -179,6 +346,68 @@ class Neo4jGraphService(GraphService):
                 
         return {"nodes": list(nodes.values()), "edges": edges}
 
+    def list_nodes(self, solution_id: str, after: Optional[str], limit: int, fields: Optional[List[str]] = None) -> List[dict]:
+        # Index on Asset.solution_id; keyset on id instead of one capped MATCH over the whole solution
+        query = f"""
+        MATCH (n:{BASE_LABEL})
+        WHERE n.solution_id = $solution_id AND ($after IS NULL OR n.id > $after)
+        RETURN n
+        ORDER BY n.id
+        LIMIT $limit
+        """
+        records = self._run_query_with_retry(query, params={"solution_id": solution_id, "after": after, "limit": limit})
+        return [self._node_from_props(dict(record["n"]), fields) for record in records]
+
+    def get_nodes(self, solution_id: str, ids: List[str], fields: Optional[List[str]] = None) -> List[dict]:
+        query = f"MATCH (n:{BASE_LABEL}) WHERE n.id IN $ids AND n.solution_id = $solution_id RETURN n"
+        records = self._run_query_with_retry(query, params={"ids": ids, "solution_id": solution_id})
+        return [self._node_from_props(dict(record["n"]), fields) for record in records]
+
+    @staticmethod
+    def _node_from_props(props: dict, fields: Optional[List[str]]) -> dict:
+        return project_node({
+            "id": props["id"],
+            "data": {
+                "label": props.get("name", props["id"]),
+                "type": props.get("type", BASE_LABEL),
+                "system": props.get("system", "unknown"),
+                "schema": props.get("schema_name", ""),
+                "columns": props.get("columns", []),
+                "summary": props.get("summary", ""),
+                "parentId": props.get("parent_id")
+            }
+        }, fields)
+
+    def edge_cursor(self, edge: dict) -> str:
+        return json.dumps([edge["source"], edge["id"]])
+
+    def list_edges(self, solution_id: str, after: Optional[str], limit: int) -> List[dict]:
+        # Keyset on (source id, relationship id): the source nodes come in id order from the
+        # Asset(id) index, so ORDER BY ... LIMIT is a partial top-k that stops after the page
+        # instead of sorting every relationship of the solution. Relationships written by the
+        # projector carry the catalog edge_id; older ones use elementId.
+        after_source, after_rid = "", ""
+        if after:
+            try:
+                after_source, after_rid = json.loads(after)
+            except (ValueError, TypeError):
+                raise ValueError("Invalid cursor")
+        query = f"""
+        MATCH (a:{BASE_LABEL})
+        USING INDEX a:{BASE_LABEL}(id)
+        WHERE a.id >= $after_source AND a.solution_id = $solution_id
+        MATCH (a)-[r]->(b)
+        WITH a, r, b, coalesce(r.id, elementId(r)) AS rid
+        WHERE a.id > $after_source OR rid > $after_rid
+        RETURN a.id AS source, rid, b.id AS target, type(r) AS label
+        ORDER BY source, rid
+        LIMIT $limit
+        """
+        records = self._run_query_with_retry(query, params={
+            "solution_id": solution_id, "after_source": after_source, "after_rid": after_rid, "limit": limit
+        })
+        return [{"id": r["rid"], "source": r["source"], "target": r["target"], "label": r["label"]} for r in records]
+
     def get_graph_data(self, solution_id: str):
         query = """
         MATCH (n)-[r]->(m)
@@ -207,6 +436,33 @@ class Neo4jGraphService(GraphService):
         """
         return self._process_graph_query(query, params={"from_id": from_id, "to_id": to_id})
 
+    def get_impact(self, asset_id: str, direction: str, max_depth: Optional[int], limit: int):
+        # One query per BFS level with the reached ids as a parameter: each node is expanded once,
+        # instead of a variable-length pattern that enumerates every path
+        step = "(a)-->(b)" if direction == "downstream" else "(a)<--(b)"
+        query = f"""
+        MATCH (a:{BASE_LABEL})
+        WHERE a.id IN $frontier
+        MATCH {step}
+        WHERE NOT b.id IN $seen
+        RETURN DISTINCT b
+        ORDER BY b.id
+        LIMIT $limit
+        """
+        seen, frontier, assets, depth = {asset_id}, [asset_id], [], 0
+        while frontier and len(assets) < limit and (max_depth is None or depth < max_depth):
+            depth += 1
+            records = self._run_query_with_retry(query, params={
+                "frontier": frontier, "seen": list(seen), "limit": limit - len(assets)
+            })
+            frontier = []
+            for record in records:
+                node = self._node_from_props(dict(record["b"]), None)
+                seen.add(node["id"])
+                frontier.append(node["id"])
+                assets.append({"id": node["id"], "depth": depth, "data": node["data"]})
+        return {"asset_id": asset_id, "direction": direction, "assets": assets}
+
 class SupabaseGraphService(GraphService):
     def __init__(self):
         from supabase import create_client
@@ -226,88 +482,203 @@ class SupabaseGraphService(GraphService):
         # Managed by Cascade in DB or manual clean endpoint
         pass
 
+    def _rpc_graph(self, function: str, params: dict) -> dict:
+        # Migration 14_graph_rpc.sql: the graph is assembled and projected in Postgres
+        # and comes back as one JSONB value {nodes, edges} in the frontend format
+        data = self.client.rpc(function, params).execute().data
+        if isinstance(data, list): # Some PostgREST versions wrap scalar results
+            data = data[0] if data else None
+        return data or {"nodes": [], "edges": []}
+
     def get_graph_data(self, solution_id: str):
         print(f"[SUPABASE GRAPH] Fetching graph for {solution_id}")
-        print(f"[SUPABASE GRAPH] Client URL: {settings.SUPABASE_URL}")
-        # print(f"[SUPABASE GRAPH] Key Used: {settings.SUPABASE_SERVICE_ROLE_KEY[:5]}...") 
-        
-        # 1. Fetch Assets (Nodes)
-        assets_res = self.client.table("asset").select("*").eq("project_id", solution_id).execute()
-        assets = assets_res.data if assets_res.data else []
-        print(f"[SUPABASE GRAPH] Raw Assets Count: {len(assets)}")
-        
-        # 2. Fetch Edges
-        edges_res = self.client.table("edge_index").select("*").eq("project_id", solution_id).execute()
-        edges = edges_res.data if edges_res.data else []
-        print(f"[SUPABASE GRAPH] Raw Edges Count: {len(edges)}")
-        
-        print(f"[SUPABASE GRAPH] Found {len(assets)} assets and {len(edges)} edges")
-        
-        # 3. Transform to Frontend Format
-        # Format: { nodes: [{id, data: {label, type...}}], edges: [{id, source, target, label}] }
-        
-        nodes_list = []
-        for a in assets:
-            # Los atributos extraídos (schema, columns, etc) están en 'tags'
-            tags = a.get("tags", {}) or {}
-            
-            nodes_list.append({
-                "id": a["asset_id"],
-                "data": {
-                    "label": a["name_display"],
-                    "type": a["asset_type"],
-                    "system": a.get("system", "unknown"),
-                    "tags": tags,
-                    # Mapear explícitamente propiedades clave para el frontend
-                    "schema": tags.get("schema", ""),
-                    "columns": tags.get("columns", []),
-                    "summary": tags.get("description", "") or tags.get("summary", ""),
-                    "parentId": a.get("parent_asset_id") or tags.get("parent_node_id")
-                }
-            })
-            
-        edges_list = []
-        for e in edges:
-            edges_list.append({
-                "id": e["edge_id"],
-                "source": e["from_asset_id"],
-                "target": e["to_asset_id"],
-                "label": e["edge_type"]
-            })
-            
-        return {"nodes": nodes_list, "edges": edges_list}
+        graph = self._rpc_graph("graph_project", {"p_project_id": solution_id})
+        print(f"[SUPABASE GRAPH] Found {len(graph['nodes'])} assets and {len(graph['edges'])} edges")
+        return graph
+
+    PAGE_SIZE = 1000 # Filas por request en las páginas del grafo (max-rows de PostgREST)
+
+    # Asset columns per node field; tag keys come as aliases (tags->>key) unless the whole tags JSONB is asked for
+    NODE_FIELD_COLUMNS = {
+        "label": ["name_display"],
+        "type": ["asset_type"],
+        "system": ["system"],
+        "tags": ["tags"],
+        "schema": ["schema:tags->>schema"],
+        "columns": ["columns:tags->columns"],
+        "summary": ["description:tags->>description", "summary:tags->>summary"],
+        "parentId": ["parent_asset_id", "parent_node_id:tags->>parent_node_id"],
+    }
+
+    @staticmethod
+    def _node_from_asset(row: dict, fields: List[str]) -> dict:
+        # Same shape as graph_node_json (migration 14), restricted to fields
+        tags = row.get("tags") or {}
+        tag = lambda key: row[key] if key in row else tags.get(key)
+        values = {
+            "label": lambda: row.get("name_display"),
+            "type": lambda: row.get("asset_type"),
+            "system": lambda: row.get("system") or "unknown",
+            "tags": lambda: tags,
+            "schema": lambda: tag("schema") or "",
+            "columns": lambda: tag("columns") or [],
+            "summary": lambda: tag("description") or tag("summary") or "",
+            "parentId": lambda: row.get("parent_asset_id") or tag("parent_node_id"),
+        }
+        return {"id": row["asset_id"], "data": {f: values[f]() for f in fields}}
+
+    def _asset_columns(self, fields: List[str]) -> str:
+        columns = ["asset_id"]
+        for f in fields:
+            columns.extend(c for c in self.NODE_FIELD_COLUMNS[f] if c not in columns)
+        if "tags" in fields: # Whole JSONB already selected, no aliases needed
+            columns = [c for c in columns if ":tags" not in c]
+        return ", ".join(columns)
+
+    def list_nodes(self, solution_id: str, after: Optional[str], limit: int, fields: Optional[List[str]] = None) -> List[dict]:
+        fields = list(fields) if fields is not None else list(DEFAULT_NODE_FIELDS)
+        rows = self._keyset_rows("asset", self._asset_columns(fields), "asset_id", solution_id, after, limit)
+        return [self._node_from_asset(row, fields) for row in rows]
+
+    def get_nodes(self, solution_id: str, ids: List[str], fields: Optional[List[str]] = None) -> List[dict]:
+        fields = list(fields) if fields is not None else list(DEFAULT_NODE_FIELDS)
+        rows = []
+        for start in range(0, len(ids), 200): # IN filter per request (URL length)
+            rows.extend(self.client.table("asset").select(self._asset_columns(fields))
+                        .eq("project_id", solution_id).in_("asset_id", ids[start:start + 200]).execute().data or [])
+        return [self._node_from_asset(row, fields) for row in rows]
+
+    def list_edges(self, solution_id: str, after: Optional[str], limit: int) -> List[dict]:
+        rows = self._keyset_rows("edge_index", "edge_id, from_asset_id, to_asset_id, edge_type", "edge_id", solution_id, after, limit)
+        return [
+            {"id": e["edge_id"], "source": e["from_asset_id"], "target": e["to_asset_id"], "label": e["edge_type"]}
+            for e in rows
+        ]
+
+    def _keyset_rows(self, table: str, columns: str, key: str, solution_id: str, after: Optional[str], limit: int) -> List[dict]:
+        # PostgREST caps each response at max-rows (1000 by default): a short response must not end the page early
+        rows = []
+        while len(rows) < limit:
+            request = min(self.PAGE_SIZE, limit - len(rows))
+            query = self.client.table(table).select(columns).eq("project_id", solution_id)
+            if after:
+                query = query.gt(key, after)
+            chunk = query.order(key).limit(request).execute().data or []
+            rows.extend(chunk)
+            if len(chunk) < request:
+                break
+            after = chunk[-1][key]
+        return rows
 
     def get_subgraph(self, center_id: str, depth: int, limit: int):
-        # Basic implementation for depth=1 (common case)
-        # For deeper graphs, recursive CTEs or multiple queries needed.
-        # MVP: Return neighbors
-        
-        # Outgoing
-        out_edges = self.client.table("edge_index").select("*").eq("from_asset_id", center_id).execute().data
-        
-        # Incoming
-        in_edges = self.client.table("edge_index").select("*").eq("to_asset_id", center_id).execute().data
-        
-        all_edges = out_edges + in_edges
-        
-        # Collect Node IDs
-        node_ids = set([center_id])
-        for e in all_edges:
-            node_ids.add(e["from_asset_id"])
-            node_ids.add(e["to_asset_id"])
-            
-        # Fetch Nodes
-        assets = self.client.table("asset").select("*").in_("asset_id", list(node_ids)).execute().data
-        
-        # Transform
-        nodes_list = [{"id": a["asset_id"], "data": {"label": a["name_display"], "type": a["asset_type"]}} for a in assets]
-        edges_list = [{"id": e["edge_id"], "source": e["from_asset_id"], "target": e["to_asset_id"], "label": e["edge_type"]} for e in all_edges]
-        
-        return {"nodes": nodes_list, "edges": edges_list}
+        # k-hop neighbourhood (both directions) with a recursive CTE: one round trip at any depth
+        return self._rpc_graph("graph_subgraph", {
+            "p_center_id": center_id,
+            "p_depth": max(0, depth),
+            "p_limit": limit
+        })
+
+    def find_paths(self, from_id: str, to_id: str, max_hops: int):
+        # Shortest path (both directions) of at most max_hops edges; empty graph when there is none
+        return self._rpc_graph("graph_shortest_path", {
+            "p_from_id": from_id,
+            "p_to_id": to_id,
+            "p_max_hops": max(0, max_hops)
+        })
+
+    def get_impact(self, asset_id: str, direction: str, max_depth: Optional[int], limit: int):
+        # Migration 17_graph_impact.sql: one-direction BFS in Postgres, one round trip
+        data = self.client.rpc("graph_impact", {
+            "p_asset_id": asset_id,
+            "p_direction": direction,
+            "p_max_depth": max_depth,
+            "p_limit": max(0, limit)
+        }).execute().data
+        if isinstance(data, list): # Some PostgREST versions wrap scalar results
+            data = data[0] if data else None
+        return data or {"asset_id": asset_id, "direction": direction, "assets": []}
+
+class InMemoryGraphService(GraphService):
+    """
+    Read side served from the in-memory CSR graph of each solution (graph_engine).
+    Writes stay in the catalog (CatalogService); the graph reloads after a job completes.
+    """
+    def __init__(self):
+        from .graph_engine import get_graph_engine
+        self.engine = get_graph_engine()
+
+    def upsert_node(self, label: str, properties: dict):
+        # No-op, managed by CatalogService
+        pass
+
+    def upsert_relationship(self, source_props: dict, target_props: dict, rel_type: str):
+        # No-op, managed by CatalogService
+        pass
+
+    def delete_solution_nodes(self, solution_id: str):
+        self.engine.invalidate(solution_id)
+
+    def data_version(self, solution_id: str) -> Optional[str]:
+        # The job the cached graph was loaded from, which may lag the catalog by GRAPH_ENGINE_REFRESH_SECONDS
+        return self.engine.get_versioned(solution_id)[1]
+
+    def _graph_of(self, asset_id: str):
+        solution_id = self.engine.find_solution(asset_id)
+        return self.engine.get(solution_id) if solution_id else None
+
+    def get_graph_data(self, solution_id: str):
+        graph = self.engine.get(solution_id)
+        print(f"[MEMORY GRAPH] {solution_id}: {graph.node_count} assets and {graph.edge_count} edges")
+        return graph.to_frontend()
+
+    def get_subgraph(self, center_id: str, depth: int, limit: int):
+        graph = self._graph_of(center_id)
+        return graph.subgraph(center_id, max(0, depth), limit) if graph else {"nodes": [], "edges": []}
 
     def find_paths(self, from_id: str, to_id: str, max_hops: int):
-        # Not implemented for SQL yet (requires recursive query)
-        return {"nodes": [], "edges": []}
+        graph = self._graph_of(from_id)
+        return graph.shortest_path(from_id, to_id, max(0, max_hops)) if graph else {"nodes": [], "edges": []}
+
+    def list_nodes(self, solution_id: str, after: Optional[str], limit: int, fields: Optional[List[str]] = None) -> List[dict]:
+        graph = self.engine.get(solution_id)
+        nodes = [project_node({"id": graph.node_ids[i], "data": graph.node_data[i]}, fields) for i in graph.node_page(after, limit)]
+        return self._add_tags(solution_id, nodes, fields)
+
+    def get_nodes(self, solution_id: str, ids: List[str], fields: Optional[List[str]] = None) -> List[dict]:
+        graph = self.engine.get(solution_id)
+        found = [graph.index[i] for i in ids if i in graph.index]
+        nodes = [project_node({"id": graph.node_ids[i], "data": graph.node_data[i]}, fields) for i in found]
+        return self._add_tags(solution_id, nodes, fields)
+
+    def _add_tags(self, solution_id: str, nodes: List[dict], fields: Optional[List[str]]) -> List[dict]:
+        # The graph is loaded without tags (opt-in, migration 14): read them for the served nodes only
+        if not fields or "tags" not in fields or not nodes:
+            return nodes
+        ids = [n["id"] for n in nodes]
+        tags = {}
+        for start in range(0, len(ids), 200): # IN filter per request (URL length)
+            rows = self.engine.supabase.table("asset").select("asset_id, tags")\
+                .eq("project_id", solution_id).in_("asset_id", ids[start:start + 200]).execute().data or []
+            tags.update((row["asset_id"], row.get("tags") or {}) for row in rows)
+        for node in nodes:
+            node["data"]["tags"] = tags.get(node["id"], {})
+        return nodes
+
+    def list_edges(self, solution_id: str, after: Optional[str], limit: int) -> List[dict]:
+        graph = self.engine.get(solution_id)
+        return graph.edges_to_frontend(graph.edge_page(after, limit))
+
+    def get_impact(self, asset_id: str, direction: str, max_depth: int, limit: int):
+        # direction: "downstream" (what this asset feeds) or "upstream" (what it is built from)
+        graph = self._graph_of(asset_id)
+        if not graph:
+            return {"asset_id": asset_id, "direction": direction, "assets": []}
+        reached = graph.impact(asset_id, direction, max_depth, limit=limit)
+        return {
+            "asset_id": asset_id,
+            "direction": direction,
+            "assets": [{"id": a, "depth": d, "data": graph.node_data[graph.index[a]]} for a, d in reached]
+        }
 
 def get_graph_service() -> GraphService:
     print(f"[GRAPH SERVICE] Mode: {settings.GRAPH_MODE}")
@@ -321,6 +692,12 @@ def get_graph_service() -> GraphService:
             return SupabaseGraphService()
     elif settings.GRAPH_MODE == "SUPABASE":
         return SupabaseGraphService()
+    elif settings.GRAPH_MODE == "MEMORY":
+        from .graph_engine import NUMPY_AVAILABLE
+        if NUMPY_AVAILABLE:
+            return InMemoryGraphService()
+        print("numpy is not installed, GRAPH_MODE=MEMORY not available. Falling back to SUPABASE.")
+        return SupabaseGraphService()
     else:
         # Default to Supabase instead of Mock if not specified, assuming we want persistence
         # Or keep Mock if explicitly MOCK
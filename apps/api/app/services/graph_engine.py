@@ -0,0 +1,344 @@
+"""
+Graph Engine - grafo de linaje en memoria por solución (CSR en NumPy)
+
+Los asset_id se internan a enteros 0..n-1 y las aristas se guardan como arrays
+CSR (offsets + vecinos + índice de arista) en ambos sentidos, con el tipo de
+arista como int8 (int16/int32 si hay más etiquetas: edge_type es texto libre del LLM). BFS, k-hop y caminos mínimos expanden la frontera entera de
+un nivel con operaciones vectorizadas (sin bucle Python por arista).
+
+Se carga perezosamente desde el catálogo (RPC graph_project, migración 14) y se
+invalida cuando termina un job: invalidate_graph() en el mismo proceso, o al
+detectar un job_run completado más reciente (comprobado cada
+GRAPH_ENGINE_REFRESH_SECONDS) desde otro proceso.
+"""
+import bisect
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+from ..config import settings
+
+DOWNSTREAM = "downstream" # from -> to
+UPSTREAM = "upstream"     # to -> from
+BOTH = "both"
+
+def _build_csr(keys, values, eids, n: int):
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=offsets[1:])
+    return offsets, values[order].astype(np.int32), eids[order].astype(np.int32)
+
+def _expand(offsets, frontier):
+    """CSR positions of all the neighbours of frontier, and the frontier node of each one"""
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+    # starts[i] + 0..counts[i]-1 for every i, without a Python loop
+    shift = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return shift + np.arange(total, dtype=np.int64), np.repeat(frontier, counts)
+
+class CSRGraph:
+    """Immutable lineage graph of one solution"""
+
+    def __init__(self, node_ids: List[str], node_data: List[Dict[str, Any]], src, dst, edge_type, edge_ids: List[str], type_names: List[str]):
+        self.node_ids = node_ids
+        self.node_data = node_data
+        self.index = {asset_id: i for i, asset_id in enumerate(node_ids)}
+        self.src = src
+        self.dst = dst
+        self.edge_type = edge_type
+        self.edge_ids = edge_ids
+        self.type_names = type_names
+        self._orders: Dict[str, Tuple[List[int], List[str]]] = {} # Keyset pages, built on first use
+        n = len(node_ids)
+        eids = np.arange(len(src), dtype=np.int32)
+        self.fwd = _build_csr(src, dst, eids, n) # (offsets, to, edge)
+        self.rev = _build_csr(dst, src, eids, n) # (offsets, from, edge)
+
+    @classmethod
+    def from_catalog(cls, graph: Dict[str, List[Dict[str, Any]]]) -> "CSRGraph":
+        """From the frontend shape {nodes: [{id, data}], edges: [{id, source, target, label}]} (graph_project)"""
+        node_ids, node_data, index = [], [], {}
+        for node in graph.get("nodes") or []:
+            index[node["id"]] = len(node_ids)
+            node_ids.append(node["id"])
+            node_data.append(node.get("data") or {})
+
+        def intern(asset_id: str) -> int:
+            i = index.get(asset_id)
+            if i is None: # Edge to an asset that is not in the project (deleted/other project)
+                i = index[asset_id] = len(node_ids)
+                node_ids.append(asset_id)
+                node_data.append({"label": asset_id, "type": "unknown"})
+            return i
+
+        edges = graph.get("edges") or []
+        type_codes: Dict[str, int] = {}
+        src = np.fromiter((intern(e["source"]) for e in edges), dtype=np.int32, count=len(edges))
+        dst = np.fromiter((intern(e["target"]) for e in edges), dtype=np.int32, count=len(edges))
+        edge_type = np.fromiter((type_codes.setdefault(e["label"], len(type_codes)) for e in edges), dtype=np.int32, count=len(edges))
+        # Catalog edge_type is free text (LLM output): the narrowest dtype that fits every label
+        for dtype in (np.int8, np.int16):
+            if len(type_codes) <= np.iinfo(dtype).max + 1:
+                edge_type = edge_type.astype(dtype)
+                break
+        return cls(node_ids, node_data, src, dst, edge_type, [e["id"] for e in edges], list(type_codes))
+
+    @property
+    def node_count(self) -> int:
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.src)
+
+    def _type_mask(self, edge_types: Optional[Iterable[str]]):
+        if not edge_types:
+            return None
+        codes = [self.type_names.index(t) for t in edge_types if t in self.type_names]
+        mask = np.zeros(max(len(self.type_names), 1), dtype=bool)
+        mask[codes] = True
+        return mask
+
+    def bfs(self, sources: Iterable[int], direction: str = DOWNSTREAM, max_depth: Optional[int] = None,
+            edge_types: Optional[Iterable[str]] = None, limit: Optional[int] = None, target: Optional[int] = None):
+        """
+        Level-synchronous BFS. Returns (depth, parent_edge) arrays over all nodes
+        (-1 = not reached). Stops at max_depth, once limit nodes are reached, or
+        when target is reached.
+        """
+        n = self.node_count
+        depth = np.full(n, -1, dtype=np.int32)
+        parent_edge = np.full(n, -1, dtype=np.int32)
+        frontier = np.unique(np.asarray(list(sources), dtype=np.int32))
+        depth[frontier] = 0
+        type_mask = self._type_mask(edge_types)
+        csrs = [self.fwd] if direction == DOWNSTREAM else [self.rev] if direction == UPSTREAM else [self.fwd, self.rev]
+        reached = len(frontier)
+        level = 0
+        while frontier.size and (max_depth is None or level < max_depth):
+            if limit is not None and reached >= limit:
+                break
+            if target is not None and depth[target] >= 0:
+                break
+            level += 1
+            neighbours, edges = [], []
+            for offsets, nbr, eid in csrs:
+                pos, _ = _expand(offsets, frontier)
+                neighbours.append(nbr[pos])
+                edges.append(eid[pos])
+            nbrs = np.concatenate(neighbours)
+            eids = np.concatenate(edges)
+            keep = depth[nbrs] < 0
+            if type_mask is not None:
+                keep &= type_mask[self.edge_type[eids]]
+            nbrs, eids = nbrs[keep], eids[keep]
+            # Scatter instead of np.unique (no sort): one edge wins per node, its entry is the new frontier
+            depth[nbrs] = level
+            parent_edge[nbrs] = eids
+            frontier = nbrs[parent_edge[nbrs] == eids]
+            reached += len(frontier)
+        return depth, parent_edge
+
+    def impact(self, asset_id: str, direction: str = DOWNSTREAM, max_depth: Optional[int] = None,
+               edge_types: Optional[Iterable[str]] = None, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Assets reachable from asset_id following (downstream) or against (upstream) the edges: [(asset_id, depth)]"""
+        start = self.index.get(asset_id)
+        if start is None:
+            return []
+        depth, _ = self.bfs([start], direction, max_depth, edge_types, limit)
+        nodes = np.flatnonzero(depth > 0)
+        nodes = nodes[np.argsort(depth[nodes], kind="stable")]
+        if limit is not None:
+            nodes = nodes[:limit]
+        return [(self.node_ids[i], int(depth[i])) for i in nodes]
+
+    def subgraph(self, center_id: str, depth: int, limit: int) -> Dict[str, List[Dict[str, Any]]]:
+        """k-hop neighbourhood (both directions), at most limit nodes closest first, with the edges among them"""
+        center = self.index.get(center_id)
+        if center is None:
+            return {"nodes": [], "edges": []}
+        depths, _ = self.bfs([center], BOTH, max_depth=depth, limit=limit)
+        nodes = np.flatnonzero(depths >= 0)
+        nodes = nodes[np.argsort(depths[nodes], kind="stable")][:max(1, limit)]
+        return self.to_frontend(nodes, depths)
+
+    def shortest_path(self, from_id: str, to_id: str, max_hops: int) -> Dict[str, Any]:
+        """One shortest path (both directions) of at most max_hops edges; empty when there is none"""
+        start, target = self.index.get(from_id), self.index.get(to_id)
+        if start is None or target is None:
+            return {"nodes": [], "edges": []}
+        depth, parent_edge = self.bfs([start], BOTH, max_depth=max_hops, target=target)
+        if depth[target] < 0:
+            return {"nodes": [], "edges": []}
+        nodes, edges = [target], []
+        current = target
+        while current != start:
+            e = int(parent_edge[current])
+            edges.append(e)
+            current = int(self.src[e]) if self.dst[e] == current else int(self.dst[e])
+            nodes.append(current)
+        nodes.reverse()
+        edges.reverse()
+        graph = self.to_frontend(np.asarray(nodes), depth, edges=np.asarray(edges, dtype=np.int64))
+        graph["hops"] = len(edges)
+        return graph
+
+    def _page(self, name: str, ids: List[str], after: Optional[str], limit: int) -> List[int]:
+        if name not in self._orders:
+            order = sorted(range(len(ids)), key=ids.__getitem__)
+            self._orders[name] = (order, [ids[i] for i in order])
+        order, keys = self._orders[name]
+        start = bisect.bisect_right(keys, after) if after is not None else 0
+        return order[start:start + limit]
+
+    def node_page(self, after: Optional[str], limit: int) -> List[int]:
+        """Indexes of the nodes with id > after, ordered by id"""
+        return self._page("nodes", self.node_ids, after, limit)
+
+    def edge_page(self, after: Optional[str], limit: int) -> List[int]:
+        """Indexes of the edges with id > after, ordered by id"""
+        return self._page("edges", self.edge_ids, after, limit)
+
+    def induced_edges(self, nodes):
+        """Edge indexes with both ends in nodes"""
+        mask = np.zeros(self.node_count, dtype=bool)
+        mask[nodes] = True
+        offsets, nbr, eid = self.fwd
+        pos, _ = _expand(offsets, np.asarray(nodes, dtype=np.int32))
+        return eid[pos][mask[nbr[pos]]]
+
+    def to_frontend(self, nodes=None, depth=None, edges=None) -> Dict[str, List[Dict[str, Any]]]:
+        """{nodes: [{id, data}], edges: [{id, source, target, label}]}; all nodes/edges when nodes is None"""
+        if nodes is None:
+            nodes = np.arange(self.node_count)
+            edges = np.arange(self.edge_count)
+        elif edges is None:
+            edges = self.induced_edges(nodes)
+        out_nodes = []
+        for i in nodes.tolist():
+            data = self.node_data[i]
+            if depth is not None:
+                data = {**data, "depth": int(depth[i])}
+            out_nodes.append({"id": self.node_ids[i], "data": data})
+        return {"nodes": out_nodes, "edges": self.edges_to_frontend(edges)}
+
+    def edges_to_frontend(self, edges) -> List[Dict[str, Any]]:
+        edges = np.asarray(edges, dtype=np.int64)
+        ids, types = self.node_ids, self.type_names
+        return [
+            {"id": self.edge_ids[e], "source": ids[s], "target": ids[d], "label": types[t]}
+            for e, s, d, t in zip(edges.tolist(), self.src[edges].tolist(), self.dst[edges].tolist(), self.edge_type[edges].tolist())
+        ]
+
+def last_completed_job(supabase, solution_id: str) -> Optional[str]:
+    """Version of a solution's catalog: "<job_id>@<finished_at>" of its last completed job"""
+    res = supabase.table("job_run").select("job_id, finished_at")\
+        .eq("project_id", solution_id).eq("status", "completed")\
+        .order("finished_at", desc=True, nullsfirst=False).limit(1).execute()
+    return f"{res.data[0]['job_id']}@{res.data[0].get('finished_at')}" if res.data else None
+
+class GraphEngine:
+    """LRU of CSRGraph per solution, loaded lazily from the catalog. Thread-safe."""
+
+    def __init__(self, supabase, max_solutions: int, refresh_seconds: float):
+        self.supabase = supabase
+        self.max_solutions = max(1, max_solutions)
+        self.refresh_seconds = refresh_seconds
+        self._graphs: "OrderedDict[str, Tuple[CSRGraph, Optional[str], float]]" = OrderedDict() # id -> (graph, last job, checked at)
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+
+    def _last_completed_job(self, solution_id: str) -> Optional[str]:
+        return last_completed_job(self.supabase, solution_id)
+
+    def _touch(self, solution_id: str, entry, checked: bool = False):
+        with self._lock:
+            if self._graphs.get(solution_id) is entry: # Not invalidated meanwhile
+                if checked:
+                    self._graphs[solution_id] = (entry[0], entry[1], time.monotonic())
+                self._graphs.move_to_end(solution_id)
+
+    def get(self, solution_id: str) -> CSRGraph:
+        return self.get_versioned(solution_id)[0]
+
+    def get_versioned(self, solution_id: str) -> Tuple[CSRGraph, Optional[str]]:
+        """Graph and the job version it was loaded from (what an ETag of the served data must use)"""
+        with self._lock:
+            entry = self._graphs.get(solution_id)
+            load_lock = self._load_locks.setdefault(solution_id, threading.Lock())
+        latest = None
+        if entry:
+            if time.monotonic() - entry[2] < self.refresh_seconds:
+                self._touch(solution_id, entry)
+                return entry[0], entry[1]
+            # Another process may have completed a job since the load
+            latest = self._last_completed_job(solution_id)
+            if latest == entry[1]:
+                self._touch(solution_id, entry, checked=True)
+                return entry[0], entry[1]
+
+        with load_lock: # One load per solution, concurrent requests wait for it
+            with self._lock:
+                current = self._graphs.get(solution_id)
+            if current and current is not entry:
+                return current[0], current[1] # Loaded by another request while waiting
+            start = time.time()
+            version = latest or self._last_completed_job(solution_id)
+            data = self.supabase.rpc("graph_project", {"p_project_id": solution_id}).execute().data
+            if isinstance(data, list):
+                data = data[0] if data else None
+            graph = CSRGraph.from_catalog(data or {})
+            print(f"[GRAPH ENGINE] Loaded {solution_id}: {graph.node_count} nodes, {graph.edge_count} edges "
+                  f"in {int((time.time() - start) * 1000)}ms")
+            with self._lock:
+                self._graphs[solution_id] = (graph, version, time.monotonic())
+                self._graphs.move_to_end(solution_id)
+                while len(self._graphs) > self.max_solutions:
+                    self._graphs.popitem(last=False)
+            return graph, version
+
+    def find_solution(self, asset_id: str) -> Optional[str]:
+        """Solution of an asset: a loaded graph that contains it, else the catalog"""
+        with self._lock:
+            for solution_id, (graph, _, _) in self._graphs.items():
+                if asset_id in graph.index:
+                    return solution_id
+        res = self.supabase.table("asset").select("project_id").eq("asset_id", asset_id).limit(1).execute()
+        return res.data[0]["project_id"] if res.data else None
+
+    def invalidate(self, solution_id: Optional[str] = None):
+        with self._lock:
+            if solution_id is None:
+                self._graphs.clear()
+            else:
+                self._graphs.pop(solution_id, None)
+
+# Singleton
+_graph_engine = None
+_graph_engine_lock = threading.Lock()
+
+def get_graph_engine() -> GraphEngine:
+    global _graph_engine
+    with _graph_engine_lock:
+        if _graph_engine is None:
+            from supabase import create_client
+            key = settings.SUPABASE_SERVICE_ROLE_KEY or settings.SUPABASE_KEY
+            _graph_engine = GraphEngine(create_client(settings.SUPABASE_URL, key),
+                                        settings.GRAPH_ENGINE_MAX_SOLUTIONS, settings.GRAPH_ENGINE_REFRESH_SECONDS)
+    return _graph_engine
+
+def invalidate_graph(solution_id: Optional[str] = None):
+    """Drops the in-memory graph of a solution (all when None), e.g. when a job completes"""
+    if _graph_engine is not None:
+        _graph_engine.invalidate(solution_id)
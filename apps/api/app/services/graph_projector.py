@@ -0,0 +1,228 @@
+import queue
+import re
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from supabase import Client
+
+from .graph import GraphService
+
+class GraphProjector:
+    """
+    Streams the catalog rows a job persisted into a GraphService (Neo4j).
+
+    Input are the per-file deltas returned by CatalogService.sync_with_provenance
+    ({path: {"asset_ids", "edge_ids"}}). Files are projected in batches: the
+    asset/edge rows are read back from the catalog (projected columns, chunked
+    IN lookups) and written with the bulk upserts, which MERGE by id, so
+    projecting a file twice is harmless. After each batch its files are recorded
+    in graph_projection_checkpoint (migration 15) per project: path -> job whose
+    output is in the graph. A retried job skips what it already projected, and
+    catch_up() projects every manifest entry the graph does not have yet (REUSEd
+    files, files of an earlier job whose projection failed). retract() removes
+    what the manifest retracted from the catalog.
+
+    With start() the projection runs in a background thread fed by submit(), so
+    the orchestrator can hand over an area as soon as it is persisted and keep
+    extracting the next one. close() waits for the queue to drain.
+    """
+
+    LOOKUP_CHUNK_SIZE = 200 # Valores por filtro IN (limita el largo de la URL de PostgREST)
+    ASSET_COLUMNS = "asset_id, name_display, asset_type, system, tags, parent_asset_id"
+    EDGE_COLUMNS = "edge_id, from_asset_id, to_asset_id, edge_type, confidence, is_hypothesis"
+
+    def __init__(self, supabase: Client, graph_service: GraphService, job_id: str, project_id: str, batch_size: int = 5000):
+        self.supabase = supabase
+        self.graph = graph_service
+        self.job_id = job_id
+        self.project_id = project_id
+        self.batch_size = max(1, batch_size)
+        self.checkpoint = self._load_checkpoint() # path -> job_id of the projected output
+        resumed = sum(1 for version in self.checkpoint.values() if version == job_id)
+        if resumed:
+            print(f"[GRAPH PROJECTOR] Resuming job {job_id}: {resumed} files already projected")
+        self.stats = {"files": 0, "assets": 0, "edges": 0, "resumed_files": resumed, "batches": 0, "retracted": 0}
+        self._written_assets = set() # Assets already upserted by this run (edge endpoints)
+        self._queue: "queue.Queue[Optional[Dict[str, Dict]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def _load_checkpoint(self) -> Dict[str, Optional[str]]:
+        checkpoint = {}
+        page_size = 1000
+        offset = 0
+        while True:
+            res = self.supabase.table("graph_projection_checkpoint")\
+                .select("path, job_id")\
+                .eq("project_id", self.project_id)\
+                .order("path")\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+            rows = res.data or []
+            checkpoint.update((row["path"], row.get("job_id")) for row in rows)
+            if len(rows) < page_size:
+                break
+            offset += page_size
+        return checkpoint
+
+    # --- Background mode ---
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=f"graph-projector-{self.job_id}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            provenance = self._queue.get()
+            if provenance is None:
+                return
+            if self._error is not None:
+                continue # Drain: files after a failure stay unprojected (no checkpoint) and are retried
+            try:
+                self.project(provenance)
+            except Exception as e:
+                print(f"[GRAPH PROJECTOR] Projection failed: {e}")
+                self._error = e
+
+    def submit(self, provenance: Dict[str, Dict]):
+        """Queues the deltas of some persisted files (projects them right away when not started)"""
+        if self._thread is None:
+            self.project(provenance)
+        else:
+            self._queue.put(provenance)
+
+    def close(self) -> Dict[str, int]:
+        """Waits for the queued deltas; raises the first projection error"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise self._error
+        return self.stats
+
+    # --- Projection ---
+
+    def project(self, provenance: Dict[str, Dict]):
+        """Deltas persisted by this job"""
+        self._project_versions({path: (prov, self.job_id) for path, prov in provenance.items()})
+
+    def catch_up(self, manifest: Dict[str, Dict]) -> int:
+        """
+        Projects the manifest entries (ManifestService.load) whose output is not in the graph:
+        files REUSEd by incremental runs and files whose projection failed in an earlier job.
+        Returns the number of files projected.
+        """
+        pending = {
+            path: ({"asset_ids": row.get("asset_ids") or [], "edge_ids": row.get("edge_ids") or []}, row.get("job_id"))
+            for path, row in manifest.items()
+            if path not in self.checkpoint or self.checkpoint[path] != row.get("job_id")
+        }
+        if pending:
+            print(f"[GRAPH PROJECTOR] Catching up {len(pending)} files missing from the graph")
+            self._project_versions(pending)
+        return len(pending)
+
+    def retract(self, asset_ids: List[str], edge_ids: List[str], deleted_paths: List[str]):
+        """Removes from the graph what ManifestService.retract deleted from the catalog"""
+        if edge_ids:
+            self.graph.delete_relationships_bulk(self.project_id, edge_ids)
+        if asset_ids:
+            self.graph.delete_nodes_bulk(asset_ids) # DETACH: also edges of other files that pointed to them
+        paths = sorted(deleted_paths)
+        for start in range(0, len(paths), self.LOOKUP_CHUNK_SIZE):
+            self.supabase.table("graph_projection_checkpoint").delete()\
+                .eq("project_id", self.project_id).in_("path", paths[start:start + self.LOOKUP_CHUNK_SIZE]).execute()
+        for path in paths:
+            self.checkpoint.pop(path, None)
+        self._written_assets.difference_update(asset_ids)
+        self.stats["retracted"] += len(asset_ids) + len(edge_ids)
+
+    def _project_versions(self, provenance: Dict[str, Tuple[Dict, Optional[str]]]):
+        batch, rows = [], 0
+        for path, (prov, version) in sorted(provenance.items()):
+            if path in self.checkpoint and self.checkpoint[path] == version:
+                continue
+            batch.append((path, prov, version))
+            rows += len(prov.get("asset_ids") or []) + len(prov.get("edge_ids") or [])
+            if rows >= self.batch_size:
+                self._project_batch(batch)
+                batch, rows = [], 0
+        if batch:
+            self._project_batch(batch)
+
+    def _project_batch(self, batch: List[Tuple[str, Dict, Optional[str]]]):
+        edge_ids = sorted({e for _, prov, _ in batch for e in prov.get("edge_ids") or []})
+        edges = self._fetch("edge_index", self.EDGE_COLUMNS, "edge_id", edge_ids)
+
+        # Endpoints may come from other files/jobs: MATCH would silently drop the edge without them
+        asset_ids = {a for _, prov, _ in batch for a in prov.get("asset_ids") or []}
+        for edge in edges:
+            asset_ids.add(edge["from_asset_id"])
+            asset_ids.add(edge["to_asset_id"])
+        assets = self._fetch("asset", self.ASSET_COLUMNS, "asset_id", sorted(asset_ids - self._written_assets))
+
+        self.graph.upsert_nodes_bulk("Asset", [self._node_properties(a) for a in assets])
+        rows_by_type: Dict[str, List[dict]] = defaultdict(list)
+        for edge in edges:
+            rows_by_type[self._relationship_type(edge["edge_type"])].append({
+                "source_id": edge["from_asset_id"],
+                "target_id": edge["to_asset_id"],
+                "id": edge["edge_id"],
+                "confidence": edge.get("confidence"),
+                "is_hypothesis": bool(edge.get("is_hypothesis"))
+            })
+        for rel_type, rows in rows_by_type.items():
+            self.graph.upsert_relationships_bulk(rel_type, rows)
+        self._written_assets.update(a["asset_id"] for a in assets)
+
+        # Checkpoint only once the graph has the whole batch
+        self.supabase.table("graph_projection_checkpoint").upsert([
+            {
+                "project_id": self.project_id,
+                "path": path,
+                "job_id": version,
+                "asset_count": len(prov.get("asset_ids") or []),
+                "edge_count": len(prov.get("edge_ids") or []),
+                "projected_at": datetime.now(timezone.utc).isoformat()
+            }
+            for path, prov, version in batch
+        ], on_conflict="project_id,path").execute()
+        self.checkpoint.update((path, version) for path, _, version in batch)
+
+        self.stats["files"] += len(batch)
+        self.stats["assets"] += len(assets)
+        self.stats["edges"] += len(edges)
+        self.stats["batches"] += 1
+
+    def _fetch(self, table: str, columns: str, key: str, ids: List[str]) -> List[Dict]:
+        rows = []
+        for start in range(0, len(ids), self.LOOKUP_CHUNK_SIZE):
+            res = self.supabase.table(table).select(columns).in_(key, ids[start:start + self.LOOKUP_CHUNK_SIZE]).execute()
+            rows.extend(res.data or [])
+        return rows
+
+    def _node_properties(self, asset: Dict) -> Dict:
+        # Neo4j properties are scalars or lists of scalars: nested tags are flattened
+        tags = asset.get("tags") or {}
+        columns = tags.get("columns") or []
+        return {
+            "id": asset["asset_id"],
+            "name": asset.get("name_display"),
+            "type": asset.get("asset_type"),
+            "system": asset.get("system") or "unknown",
+            "schema_name": tags.get("schema") or "",
+            "summary": tags.get("description") or tags.get("summary") or "",
+            "columns": [name for name in (c.get("name") if isinstance(c, dict) else str(c) for c in columns) if name],
+            "parent_id": asset.get("parent_asset_id"),
+            "solution_id": self.project_id
+        }
+
+    @staticmethod
+    def _relationship_type(edge_type: str) -> str:
+        # Catalog edge types are free text (LLM output): READS_FROM, "reads from", depends-on...
+        rel_type = re.sub(r"[^A-Za-z0-9_]+", "_", (edge_type or "RELATED_TO").strip()).upper().strip("_")
+        if not rel_type or rel_type[0].isdigit():
+            rel_type = f"REL_{rel_type}"
+        return rel_type
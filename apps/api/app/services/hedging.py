@@ -0,0 +1,120 @@
+"""
+Hedging - Carrera de modelos en la cadena de fallbacks
+
+Si el modelo primario no respondió en su p95 de latencia, se lanza el primer
+fallback en paralelo; gana el primer resultado válido (JSON que pasa la
+validación de esquema) y se cancela el otro.
+
+Configuración en config/models.yml, sección `hedging`:
+
+    hedging:
+      enabled: false        # por defecto: el hedge duplica llamadas a la cola lenta
+      percentile: 95        # percentil de latencia del primario que dispara el hedge
+      min_samples: 20       # sin suficientes muestras no se hace hedge (salvo default_delay_ms)
+      window: 200           # últimas N latencias exitosas por modelo
+      min_delay_ms: 1000    # nunca antes de este tiempo
+      default_delay_ms: 0   # delay mientras no hay muestras (0 = sin hedge)
+      actions: [extract_strict, extract_sql]   # vacío = todas las acciones con fallbacks
+
+Las latencias registradas son las de llamadas exitosas, sin contar la espera del rate limiter;
+el reloj del hedge también empieza cuando el primario obtiene su slot, y no hay hedge
+mientras el primario está en cooldown por un 429.
+"""
+import math
+import threading
+from collections import deque, defaultdict
+from typing import Dict, Any, Optional
+
+DEFAULTS = {
+    "enabled": False,
+    "percentile": 95,
+    "min_samples": 20,
+    "window": 200,
+    "min_delay_ms": 1000,
+    "default_delay_ms": 0,
+    "actions": []
+}
+
+class LatencyTracker:
+    """Ventana deslizante de latencias (ms) por modelo. Thread-safe."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._lock = threading.Lock()
+        self._samples: Dict[str, deque] = {}
+
+    def record(self, model: str, latency_ms: float):
+        with self._lock:
+            samples = self._samples.get(model)
+            if samples is None:
+                samples = self._samples[model] = deque(maxlen=self.window)
+            samples.append(latency_ms)
+
+    def count(self, model: str) -> int:
+        with self._lock:
+            return len(self._samples.get(model, ()))
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(model, ()))
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, math.ceil(pct / 100.0 * len(samples)) - 1))
+        return samples[index]
+
+class HedgePolicy:
+    """Decide cuándo lanzar el hedge y lleva las estadísticas de quién gana"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULTS, **(config or {})}
+        self.latencies = LatencyTracker(int(self.config["window"]))
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hedged": 0, "primary": 0, "fallback": 0, "none": 0})
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config["enabled"])
+
+    def applies_to(self, action_name: str) -> bool:
+        actions = self.config.get("actions") or []
+        return self.enabled and (not actions or action_name in actions)
+
+    def hedge_delay_ms(self, model: str) -> Optional[float]:
+        """Milisegundos a esperar al primario antes del hedge; None = no hacer hedge"""
+        if self.latencies.count(model) >= int(self.config["min_samples"]):
+            delay = self.latencies.percentile(model, float(self.config["percentile"]))
+        else:
+            delay = float(self.config["default_delay_ms"]) or None
+        if delay is None:
+            return None
+        return max(float(self.config["min_delay_ms"]), delay)
+
+    def record_latency(self, model: str, latency_ms: float):
+        self.latencies.record(model, latency_ms)
+
+    def record_outcome(self, action_name: str, winner: Optional[str]):
+        """winner: 'primary', 'fallback' o None (ambos fallaron)"""
+        with self._lock:
+            stats = self._stats[action_name]
+            stats["hedged"] += 1
+            stats[winner or "none"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                action: {**s, "fallback_win_rate": round(s["fallback"] / s["hedged"], 3) if s["hedged"] else 0.0}
+                for action, s in self._stats.items()
+            }
+
+# Singleton
+_hedge_policy = None
+_hedge_policy_lock = threading.Lock()
+
+def get_hedge_policy() -> HedgePolicy:
+    """Política global configurada desde la sección hedging de models.yml"""
+    global _hedge_policy
+    with _hedge_policy_lock:
+        if _hedge_policy is None:
+            from ..router import get_model_router
+            _hedge_policy = HedgePolicy(get_model_router().config.get("hedging"))
+    return _hedge_policy
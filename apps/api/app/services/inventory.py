@@ -0,0 +1,64 @@
+"""
+Inventory - Recorrido rápido de un directorio para el planner
+
+os.scandir (el tipo de cada entrada viene del propio listado, sin stat extra),
+poda de los directorios ignorados antes de descender (should_descend) y cada
+directorio se lista y se stat-ea en un pool de threads: en árboles grandes o
+en discos de red el coste es de syscalls, que liberan el GIL.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from ..config import settings
+
+# (ruta relativa con '/', tamaño, mtime)
+FileStat = Tuple[str, int, Optional[float]]
+
+def _scan_dir(root: str, rel_dir: str) -> Tuple[List[FileStat], List[str]]:
+    """Lista un directorio: archivos con su stat y subdirectorios (relativos a root)"""
+    files, dirs = [], []
+    path = os.path.join(root, rel_dir) if rel_dir else root
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir():
+                        # Como os.walk: los symlinks a directorios no se siguen
+                        if not entry.is_symlink():
+                            dirs.append(rel_path)
+                        continue
+                    st = entry.stat()
+                    files.append((rel_path, st.st_size, st.st_mtime))
+                except OSError:
+                    files.append((rel_path, 0, None))
+    except OSError as e:
+        print(f"[INVENTORY] Cannot scan {path}: {e}")
+    return files, dirs
+
+def scan_tree(root: str, should_descend: Optional[Callable[[str], bool]] = None,
+              max_workers: Optional[int] = None) -> Iterator[FileStat]:
+    """
+    Todos los archivos bajo root. should_descend(rel_dir) -> False poda el subárbol
+    entero (ni se lista). El orden no está garantizado.
+    """
+    workers = max(1, max_workers or settings.INVENTORY_MAX_WORKERS)
+    if workers == 1:
+        stack = [""]
+        while stack:
+            files, dirs = _scan_dir(root, stack.pop())
+            yield from files
+            stack.extend(d for d in dirs if should_descend is None or should_descend(d))
+        return
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inventory") as pool:
+        pending = {pool.submit(_scan_dir, root, "")}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, dirs = future.result()
+                yield from files
+                for d in dirs:
+                    if should_descend is None or should_descend(d):
+                        pending.add(pool.submit(_scan_dir, root, d))
@@ -7,11 +7,15 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from ..config import settings
 from ..models.extraction import ExtractionResult
+from .chunking import chunk_content, merge_extractions, get_chunking_config
 
 # --- Service ---
 
 import os
 
+# Tamaño de trozo: el mismo que el antiguo recorte a 15k caracteres
+CHUNK_TOKENS = 15000 // 4
+
 class LLMService:
     def __init__(self):
         self.llm = ChatOpenAI(
@@ -46,12 +50,11 @@ class LLMService:
         
         user_prompt_template = """
         Analyze the following code file: '{file_path}'
-        
+        {chunk_note}
         CODE CONTENT:
         ```
         {code_content} 
         ```
-        (Code truncated if too long)
         
         Return a JSON object matching the requested schema.
         {format_instructions}
@@ -65,13 +68,22 @@ class LLMService:
         
         chain = prompt | self.llm | self.parser
         
+        # Archivos grandes: trozos estructurales (GO, Executables, defs) en paralelo en vez de truncar
+        chunks = chunk_content(file_path, code_content, CHUNK_TOKENS)
+        inputs = [{
+            "file_path": file_path,
+            "chunk_note": f"(Part {c.index + 1} of {len(chunks)}, lines {c.start_line}-{c.end_line})" if len(chunks) > 1 else "",
+            "code_content": c.text,
+            "format_instructions": format_instructions
+        } for c in chunks]
+        
         try:
-            # Pass variables to the chain
-            result = chain.invoke({
-                "file_path": file_path, 
-                "code_content": code_content[:15000],
-                "format_instructions": format_instructions
-            })
+            if len(chunks) == 1:
+                result = chain.invoke(inputs[0])
+            else:
+                print(f"Splitting {file_path} into {len(chunks)} chunks")
+                partials = chain.batch(inputs, config={"max_concurrency": int(get_chunking_config()["max_parallel"])})
+                result = merge_extractions(partials, chunks)
             
             # Ensure meta matches
             if isinstance(result, dict):
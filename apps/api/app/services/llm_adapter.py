@@ -4,9 +4,28 @@ Adaptador LLM para ActionRunner - Integración con Groq y OpenRouter
 import os
 import json
 import time
-from typing import Dict, Any, Optional
+import asyncio
+import threading
+import weakref
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+
+import httpx
 
 from ..config import settings
+from .rate_limiter import parse_retry_after
+
+try:
+    import h2 # noqa: F401 (httpx lo usa para HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Endpoints OpenAI-compatible usados por el cliente async
+PROVIDER_BASE_URLS = {
+    "groq": lambda: settings.GROQ_BASE_URL,
+    "openrouter": lambda: settings.OPENROUTER_BASE_URL,
+}
 
 class LLMAdapter:
     """
@@ -18,12 +37,21 @@ class LLMAdapter:
         self.groq_client = None
         self.openai_client = None # Para OpenRouter (usa interfaz OpenAI)
         
+        # Async: un cliente HTTP (pool de conexiones) y un semáforo por proveedor y
+        # por event loop (varios loops pueden convivir, p.ej. uno por hilo). Los pools
+        # de un loop cerrado o recolectado se retiran y se cierran en el siguiente uso.
+        self._async_lock = threading.Lock()
+        self._async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Tuple[httpx.AsyncClient, asyncio.Semaphore]]]" = weakref.WeakKeyDictionary()
+        self._retired_clients: deque = deque() # Clientes pendientes de aclose()
+        self._closing = set() # Tareas aclose() en curso (referencia fuerte)
+        
     def _get_groq_client(self):
         if not self.groq_client:
             from groq import Groq
             if not settings.GROQ_API_KEY:
                 print("[LLM ADAPTER] WARNING: GROQ_API_KEY not set")
-            self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
+            # Sin reintentos internos del SDK: los 429 los gestiona el rate limiter del ActionRunner
+            self.groq_client = Groq(api_key=settings.GROQ_API_KEY, max_retries=0)
         return self.groq_client
 
     def _get_openrouter_client(self):
@@ -32,8 +60,9 @@ class LLMAdapter:
             # Favor specific OpenRouter key if available
             key = settings.OPENROUTER_API_KEY or settings.OPENAI_API_KEY
             self.openai_client = OpenAI(
-                base_url="https://openrouter.ai/api/v1",
+                base_url=settings.OPENROUTER_BASE_URL,
                 api_key=key,
+                max_retries=0,
             )
         return self.openai_client
 
@@ -43,24 +72,27 @@ class LLMAdapter:
         messages: list,
         temperature: float = 0.1,
         max_tokens: int = 1800,
-        provider: str = None
+        provider: str = None,
+        timeout_ms: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Llamada unificada a LLM. Despacha al proveedor correcto.
+        timeout_ms: tiempo máximo de la llamada (ModelConfig.timeout_ms); None = LLM_REQUEST_TIMEOUT_SECONDS.
         """
         provider = provider or settings.LLM_PROVIDER
         
         if provider == "groq":
-            return self.call_groq(model, messages, temperature, max_tokens)
+            return self.call_groq(model, messages, temperature, max_tokens, timeout_ms)
         else:
-            return self.call_openrouter(model, messages, temperature, max_tokens)
+            return self.call_openrouter(model, messages, temperature, max_tokens, timeout_ms)
 
     def call_groq(
         self,
         model: str,
         messages: list,
         temperature: float = 0.1,
-        max_tokens: int = 1800
+        max_tokens: int = 1800,
+        timeout_ms: Optional[int] = None
     ) -> Dict[str, Any]:
         """Llamada a Groq"""
         try:
@@ -73,7 +105,8 @@ class LLMAdapter:
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                stream=False
+                stream=False,
+                timeout=self._timeout_seconds(timeout_ms)
             )
             
             content = completion.choices[0].message.content
@@ -95,19 +128,15 @@ class LLMAdapter:
             import traceback
             error_details = traceback.format_exc()
             print(f"[LLM ADAPTER] Groq Error: {e}\n{error_details}")
-            return {
-                "success": False,
-                "error": str(e),
-                "tokens_in": 0,
-                "tokens_out": 0
-            }
+            return self._error_result(str(e), e)
 
     def call_openrouter(
         self,
         model: str,
         messages: list,
         temperature: float = 0.1,
-        max_tokens: int = 1800
+        max_tokens: int = 1800,
+        timeout_ms: Optional[int] = None
     ) -> Dict[str, Any]:
         """Llamada a OpenRouter (formato raw para ActionRunner)"""
         try:
@@ -121,7 +150,8 @@ class LLMAdapter:
                 model=model,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                timeout=self._timeout_seconds(timeout_ms)
             )
             
             content = completion.choices[0].message.content
@@ -137,12 +167,159 @@ class LLMAdapter:
                 
         except Exception as e:
             print(f"[LLM ADAPTER] OpenRouter Error: {e}")
+            return self._error_result(str(e), e)
+
+    # --- Async ---
+
+    async def acall_model(
+        self,
+        model: str,
+        messages: list,
+        temperature: float = 0.1,
+        max_tokens: int = 1800,
+        provider: str = None,
+        timeout_ms: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Versión async de call_model (mismo dict de resultado). Usa un cliente
+        httpx pooled (HTTP/2 si está disponible) y limita las llamadas en vuelo
+        por proveedor con un semáforo. timeout_ms acota la petición completa
+        (no solo cada operación de red como el timeout de httpx).
+        """
+        provider = provider or settings.LLM_PROVIDER
+        if provider != "groq":
+            provider = "openrouter" # Mismo despacho que call_model
+        client, semaphore = self._get_async_client(provider)
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": False
+        }
+        try:
+            async with semaphore:
+                response = await asyncio.wait_for(
+                    client.post("/chat/completions", json=payload),
+                    timeout=self._timeout_seconds(timeout_ms)
+                )
+            response.raise_for_status()
+            body = response.json()
+            
+            usage = body.get("usage") or {}
             return {
-                "success": False,
-                "error": str(e),
-                "tokens_in": 0,
-                "tokens_out": 0
+                "success": True,
+                "content": body["choices"][0]["message"]["content"],
+                "tokens_in": usage.get("prompt_tokens", 0),
+                "tokens_out": usage.get("completion_tokens", 0),
+                "provider": provider
             }
+        except Exception as e:
+            detail = str(e) or type(e).__name__
+            if isinstance(e, asyncio.TimeoutError):
+                detail = f"Timeout after {self._timeout_seconds(timeout_ms):.1f}s"
+            elif isinstance(e, httpx.HTTPStatusError):
+                detail = f"{e.response.status_code}: {e.response.text[:500]}"
+            print(f"[LLM ADAPTER] {provider} async Error: {detail}")
+            return self._error_result(detail, e)
+
+    @staticmethod
+    def _timeout_seconds(timeout_ms: Optional[int]) -> float:
+        return timeout_ms / 1000.0 if timeout_ms else float(settings.LLM_REQUEST_TIMEOUT_SECONDS)
+
+    @staticmethod
+    def _error_result(detail: str, e: Exception) -> Dict[str, Any]:
+        """Error dict; includes HTTP status, Retry-After and timeouts when the SDK/httpx exposes them"""
+        response = getattr(e, "response", None)
+        status_code = getattr(e, "status_code", None) or getattr(response, "status_code", None)
+        return {
+            "success": False,
+            "error": detail,
+            "timed_out": isinstance(e, (asyncio.TimeoutError, httpx.TimeoutException)) or "Timeout" in type(e).__name__,
+            "status_code": status_code,
+            "retry_after": parse_retry_after(getattr(response, "headers", None)),
+            "tokens_in": 0,
+            "tokens_out": 0
+        }
+
+    def _get_async_client(self, provider: str) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            pools = self._async_pools.get(loop)
+            if pools is None:
+                # Loops cerrados que siguen vivos: sus clientes ya no sirven
+                for old_loop in [l for l in self._async_pools.keys() if l.is_closed()]:
+                    self._retire(self._async_pools.pop(old_loop))
+                pools = self._async_pools[loop] = {}
+                weakref.finalize(loop, self._retire, pools) # Loop recolectado sin aclose()
+            if provider not in pools:
+                pools[provider] = self._new_async_client(provider)
+            client_and_semaphore = pools[provider]
+        self._close_retired(loop)
+        return client_and_semaphore
+
+    def _new_async_client(self, provider: str) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        headers = {"Content-Type": "application/json"}
+        if provider == "groq":
+            headers["Authorization"] = f"Bearer {settings.GROQ_API_KEY}"
+            concurrency = settings.LLM_MAX_CONCURRENCY_GROQ
+        else:
+            headers["Authorization"] = f"Bearer {settings.OPENROUTER_API_KEY or settings.OPENAI_API_KEY}"
+            headers["HTTP-Referer"] = "https://diggerai.app"
+            headers["X-Title"] = "DiggerAI"
+            concurrency = settings.LLM_MAX_CONCURRENCY_OPENROUTER
+        
+        client = httpx.AsyncClient(
+            base_url=PROVIDER_BASE_URLS[provider](),
+            headers=headers,
+            http2=settings.LLM_HTTP2 and HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(settings.LLM_REQUEST_TIMEOUT_SECONDS, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+        return client, asyncio.Semaphore(max(1, concurrency))
+
+    def _retire(self, pools: Dict[str, Tuple[httpx.AsyncClient, asyncio.Semaphore]]):
+        # Sin lock: también corre desde weakref.finalize (deque.extend es atómico)
+        self._retired_clients.extend(client for client, _ in pools.values())
+        pools.clear()
+
+    def _close_retired(self, loop: asyncio.AbstractEventLoop):
+        while self._retired_clients:
+            try:
+                client = self._retired_clients.popleft()
+            except IndexError:
+                break
+            task = loop.create_task(self._aclose_quietly(client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _aclose_quietly(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except Exception as e:
+            print(f"[LLM ADAPTER] Failed to close a retired async client: {e}")
+
+    async def aclose(self):
+        """Cierra los pools async del loop actual y los retirados (llamar antes de cerrar el event loop)"""
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            pools = self._async_pools.pop(loop, None)
+            if pools:
+                self._retire(pools)
+        while self._retired_clients:
+            try:
+                client = self._retired_clients.popleft()
+            except IndexError:
+                break
+            await self._aclose_quietly(client)
+        if self._closing:
+            await asyncio.gather(*[t for t in self._closing if t.get_loop() is loop], return_exceptions=True)
 
 # Crear instancia global
 _llm_adapter = None
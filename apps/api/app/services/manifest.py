@@ -0,0 +1,130 @@
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Iterable, Optional
+from supabase import Client
+
+class ManifestService:
+    """
+    Per-solution file manifest (path, size, mtime, content hash) of the last
+    successful run, plus the assets/edges each file produced.
+
+    Used by incremental re-analysis: the planner diffs a new upload against it
+    (unchanged files are REUSEd) and the orchestrator retracts catalog rows of
+    files that were deleted or no longer produce them.
+    """
+
+    CHUNK_SIZE = 200
+
+    def __init__(self, supabase: Client):
+        self.supabase = supabase
+
+    @staticmethod
+    def hash_file(full_path: str, block_size: int = 1024 * 1024) -> Optional[str]:
+        """sha256 of the file bytes (streamed)"""
+        digest = hashlib.sha256()
+        try:
+            with open(full_path, 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b""):
+                    digest.update(block)
+        except OSError:
+            return None
+        return digest.hexdigest()
+
+    def load(self, project_id: str) -> Dict[str, Dict]:
+        """Returns Map<path, manifest row> for the solution (paged)"""
+        manifest = {}
+        page_size = 1000
+        offset = 0
+        while True:
+            res = self.supabase.table("solution_manifest")\
+                .select("*")\
+                .eq("project_id", project_id)\
+                .order("path")\
+                .range(offset, offset + page_size - 1)\
+                .execute()
+            rows = res.data or []
+            for row in rows:
+                manifest[row["path"]] = row
+            if len(rows) < page_size:
+                break
+            offset += page_size
+        return manifest
+
+    @staticmethod
+    def is_unchanged(previous: Optional[Dict], size_bytes: int, content_hash: Optional[str]) -> bool:
+        if not previous or not content_hash:
+            return False
+        if previous.get("size_bytes") is not None and previous["size_bytes"] != size_bytes:
+            return False
+        return previous.get("content_hash") == content_hash
+
+    def save_entries(self, project_id: str, job_id: str, entries: List[Dict]):
+        """Upserts manifest rows: entries = [{path, size_bytes, mtime, content_hash, asset_ids, edge_ids}]"""
+        now = datetime.now().isoformat()
+        rows = [{
+            "project_id": project_id,
+            "path": e["path"],
+            "size_bytes": e.get("size_bytes"),
+            "mtime": e.get("mtime"),
+            "content_hash": e.get("content_hash"),
+            "asset_ids": sorted(set(e.get("asset_ids") or [])),
+            "edge_ids": sorted(set(e.get("edge_ids") or [])),
+            "job_id": job_id,
+            "updated_at": now
+        } for e in entries]
+        for i in range(0, len(rows), self.CHUNK_SIZE):
+            self.supabase.table("solution_manifest")\
+                .upsert(rows[i:i + self.CHUNK_SIZE], on_conflict="project_id,path")\
+                .execute()
+
+    def retract(self, project_id: str, deleted_paths: Iterable[str], stale: Optional[Dict[str, Dict]] = None) -> Dict[str, int]:
+        """
+        Removes catalog rows that are no longer produced by any file.
+
+        deleted_paths: files gone from the upload (their manifest rows are dropped).
+        stale: Map<path, {"asset_ids": [...], "edge_ids": [...]}> of ids a changed file
+               produced before but not in this run.
+        Assets/edges still referenced by another manifest entry are kept.
+        Returns the counts plus the retracted "asset_ids"/"edge_ids" (for the graph projection).
+        """
+        deleted_paths = set(deleted_paths or [])
+        stale = stale or {}
+        if not deleted_paths and not stale:
+            return {"assets": 0, "edges": 0, "evidences": 0, "asset_ids": [], "edge_ids": []}
+
+        manifest = self.load(project_id)
+
+        candidate_assets, candidate_edges = set(), set()
+        for path in deleted_paths:
+            row = manifest.get(path) or {}
+            candidate_assets.update(row.get("asset_ids") or [])
+            candidate_edges.update(row.get("edge_ids") or [])
+        for ids in stale.values():
+            candidate_assets.update(ids.get("asset_ids") or [])
+            candidate_edges.update(ids.get("edge_ids") or [])
+
+        # Anything still claimed by a surviving file stays
+        for path, row in manifest.items():
+            if path in deleted_paths:
+                continue
+            candidate_assets.difference_update(row.get("asset_ids") or [])
+            candidate_edges.difference_update(row.get("edge_ids") or [])
+
+        edges = sorted(candidate_edges)
+        assets = sorted(candidate_assets)
+        for i in range(0, len(edges), self.CHUNK_SIZE):
+            self.supabase.table("edge_index").delete().in_("edge_id", edges[i:i + self.CHUNK_SIZE]).execute()
+        for i in range(0, len(assets), self.CHUNK_SIZE):
+            # ON DELETE CASCADE removes edges of other files that pointed to a retracted asset
+            self.supabase.table("asset").delete().in_("asset_id", assets[i:i + self.CHUNK_SIZE]).execute()
+
+        evidences = 0
+        paths = sorted(deleted_paths)
+        for i in range(0, len(paths), self.CHUNK_SIZE):
+            chunk = paths[i:i + self.CHUNK_SIZE]
+            res = self.supabase.table("evidence").delete().eq("project_id", project_id).in_("file_path", chunk).execute()
+            evidences += len(res.data or [])
+            self.supabase.table("solution_manifest").delete().eq("project_id", project_id).in_("path", chunk).execute()
+            self.supabase.table("column_lineage").delete().eq("project_id", project_id).in_("path", chunk).execute()
+
+        return {"assets": len(assets), "edges": len(edges), "evidences": evidences, "asset_ids": assets, "edge_ids": edges}
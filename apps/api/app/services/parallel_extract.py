@@ -0,0 +1,250 @@
+"""
+Native extraction in a process pool.
+
+SSISDeepExtractor (XML parsing), DataStageExtractor (DSX exports),
+SqlGlotExtractor (sqlglot parser) and PythonAstExtractor (ast) are CPU bound, so threads only get one core because of the GIL. ParallelExtractor
+shards files across worker processes. Each worker returns a batch of
+NativeExtraction results pickled once with protocol 5. The caller stays the
+single writer that syncs the catalog.
+"""
+import os
+import pickle
+import time
+import uuid
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ..config import settings
+
+# Extensions with a CPU bound native parser (the rest go to the LLM)
+NATIVE_EXTENSIONS = {".dtsx", ".dsx", ".isx", ".sql", ".py"}
+# Archives parsed from their bytes (read_text would mangle them)
+BINARY_EXTENSIONS = {".isx"}
+# Parsed from a binary stream when large (SSISStreamingExtractor.extract_deep_stream)
+STREAM_EXTENSIONS = {".dtsx"}
+
+@dataclass
+class NativeExtraction:
+    """Result of one file: data has the ActionResult.data shape (nodes/edges/evidences/metadata)"""
+    file_path: str
+    success: bool
+    data: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    extractor: Optional[str] = None
+    processing_time_ms: int = 0
+
+def supports(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in NATIVE_EXTENSIONS
+
+def is_binary(file_path: str) -> bool:
+    return os.path.splitext(file_path)[1].lower() in BINARY_EXTENSIONS
+
+def is_streamed(file_path: str, size_bytes: Optional[int]) -> bool:
+    """Large packages are parsed from a stream: never decoded into a str nor copied to a worker"""
+    from .extractors.ssis_stream import STREAMING_MIN_CHARS
+    return (os.path.splitext(file_path)[1].lower() in STREAM_EXTENSIONS
+            and size_bytes is not None and size_bytes >= STREAMING_MIN_CHARS)
+
+def read_source(source, path: str) -> Union[str, bytes]:
+    """Content of an ArchiveSource file as the native parsers expect it: bytes for archives, text otherwise"""
+    if is_binary(path):
+        with source.open(path) as f:
+            return f.read()
+    return source.read_text(path)
+
+def resolve_processes(processes: Optional[int] = None) -> int:
+    """PARSER_PROCESSES (0 = one per core)"""
+    processes = settings.PARSER_PROCESSES if processes is None else processes
+    return max(1, processes or os.cpu_count() or 1)
+
+def cir_to_result_data(cir_package) -> Dict[str, Any]:
+    """
+    CIRPackage (SSIS/DataStage) -> standard nodes/edges result (what ActionRunner.extract_file returns).
+    column_lineage (ColumnLineageGraph.to_dict()) is persisted per file by ColumnLineageStore.
+    """
+    from .column_lineage import ColumnLineageGraph
+
+    nodes = []
+    edges = []
+
+    # Group transformations by node_id
+    trans_map = {}
+    for t in cir_package.transformations:
+        if t.node_id not in trans_map: trans_map[t.node_id] = []
+        trans_map[t.node_id].append({
+            "column": t.column_name,
+            "expression": t.expression_raw,
+            "lineage_id": t.lineage_id,
+            "input_lineage_ids": t.input_column_lineage_ids
+        })
+
+    for node in cir_package.nodes:
+        attrs = node.properties.copy()
+        attrs["transformations"] = trans_map.get(node.id, [])
+        attrs["columns_metadata"] = node.columns_metadata
+
+        # Derive a flat list of unique column names for simple UI display
+        flat_columns = sorted(list(set([c.get("name") for c in node.columns_metadata if c.get("name")])))
+        attrs["columns"] = flat_columns
+
+        nodes.append({
+            "node_id": node.id,
+            "name": node.name,
+            "node_type": node.type.lower(),
+            "system": cir_package.source_system,
+            "parent_node_id": node.parent_id, # Top level for Pydantic model
+            "attributes": attrs,
+            "columns_metadata": node.columns_metadata # Keep as field too
+        })
+
+    for flow in cir_package.data_flows:
+        edges.append({
+            "edge_id": str(uuid.uuid4()),
+            "from_node_id": flow.source_id,
+            "to_node_id": flow.target_id,
+            "edge_type": "FLOWS_TO",
+            "confidence": 1.0,
+            "rationale": "Directly extracted from SSIS Data Flow pipeline XML" if cir_package.source_system == "SSIS"
+                         else f"Directly extracted from {cir_package.source_system} job link",
+            "attributes": {"columns": flow.columns, "column_map": flow.column_map}
+        })
+
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "metadata": {"extractor": f"native_deep_{cir_package.source_system.lower()}", "version": "3.0"},
+        "evidences": [],
+        "column_lineage": ColumnLineageGraph.from_package(cir_package).to_dict()
+    }
+
+# Per-process native extractors (built once per worker). Not ExtractorRegistry:
+# workers never need the LLM extractor (or its client/credentials).
+_extractors = None
+
+def _get_extractor(file_path: str):
+    global _extractors
+    if _extractors is None:
+        from .extractors.sql_glot import SqlGlotExtractor
+        from .extractors.ssis_stream import SSISStreamingExtractor
+        from .extractors.python_ast import PythonAstExtractor
+        from .extractors.datastage import DataStageExtractor
+        datastage = DataStageExtractor()
+        _extractors = {".sql": SqlGlotExtractor(), ".dtsx": SSISStreamingExtractor(), ".py": PythonAstExtractor(),
+                       ".dsx": datastage, ".isx": datastage}
+    return _extractors.get(os.path.splitext(file_path)[1].lower())
+
+def extract_native(file_path: str, content: Optional[Union[str, bytes]] = None) -> NativeExtraction:
+    """Runs the native extractor of one file (content is read from file_path when None; bytes for archives)"""
+    from .extractors.sql_glot import SqlGlotExtractor, SQLGLOT_AVAILABLE
+    from .extractors.python_ast import PythonAstExtractor
+
+    start = time.time()
+    try:
+        if content is None and is_streamed(file_path, os.path.getsize(file_path)):
+            with open(file_path, "rb") as f:
+                return extract_native_stream(file_path, f)
+        if content is None:
+            with open(file_path, "rb") as f:
+                content = f.read()
+            if not is_binary(file_path):
+                # Same decoding as ArchiveSource.read_text: no newline translation, so
+                # LineIndex offsets match the file on disk (CRLF included)
+                content = content.decode("utf-8", errors="ignore")
+        extractor = _get_extractor(file_path)
+
+        cir_package = extractor.extract_deep(file_path, content) if extractor else None
+        if cir_package:
+            return _package_extraction(file_path, cir_package, start)
+        elif (isinstance(extractor, SqlGlotExtractor) and SQLGLOT_AVAILABLE) or isinstance(extractor, PythonAstExtractor):
+            result = extractor.extract(file_path, content)
+            data, name = {"nodes": [n.model_dump() for n in result.nodes],
+                          "edges": [e.model_dump() for e in result.edges],
+                          "evidences": [e.model_dump() for e in result.evidences],
+                          "metadata": result.meta}, result.meta["extractor"]
+        else:
+            return NativeExtraction(file_path, False, error_message="No native parser",
+                                    processing_time_ms=int((time.time() - start) * 1000))
+        return NativeExtraction(file_path, True, data=data, extractor=name,
+                                processing_time_ms=int((time.time() - start) * 1000))
+    except Exception as e:
+        return NativeExtraction(file_path, False, error_message=str(e),
+                                processing_time_ms=int((time.time() - start) * 1000))
+
+def extract_native_stream(file_path: str, stream: BinaryIO) -> NativeExtraction:
+    """Large package (is_streamed) read from a binary stream: a file on disk or ArchiveSource.open(path)"""
+    start = time.time()
+    try:
+        cir_package = _get_extractor(file_path).extract_deep_stream(file_path, stream)
+        if not cir_package:
+            return NativeExtraction(file_path, False, error_message="Streaming parser returned no package",
+                                    processing_time_ms=int((time.time() - start) * 1000))
+        return _package_extraction(file_path, cir_package, start)
+    except Exception as e:
+        return NativeExtraction(file_path, False, error_message=str(e),
+                                processing_time_ms=int((time.time() - start) * 1000))
+
+def _package_extraction(file_path: str, cir_package, start: float) -> NativeExtraction:
+    data = cir_to_result_data(cir_package)
+    return NativeExtraction(file_path, True, data=data, extractor=data["metadata"]["extractor"],
+                            processing_time_ms=int((time.time() - start) * 1000))
+
+def _extract_batch(batch: List[Tuple[str, Optional[str]]]) -> bytes:
+    # Worker side: one pickle (protocol 5) per batch instead of one per object
+    return pickle.dumps([extract_native(path, content) for path, content in batch], protocol=5)
+
+class ParallelExtractor:
+    """
+    Shards files across worker processes and yields NativeExtraction results in
+    input order, keeping at most 2 batches per worker in flight (bounded memory).
+    With 1 process everything runs inline.
+    """
+
+    def __init__(self, processes: Optional[int] = None, batch_size: int = 8):
+        self.processes = resolve_processes(processes)
+        self.batch_size = max(1, batch_size)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: workers never inherit the parent's threads, locks or sockets
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def map(self, files: Iterable[Tuple[str, Optional[str]]]) -> Iterator[NativeExtraction]:
+        """files: (path, content); content None = the worker reads the path itself (no copy through the pipe)"""
+        if self.processes <= 1:
+            for path, content in files:
+                yield extract_native(path, content)
+            return
+
+        pool = self._get_pool()
+        in_flight = []
+        batch = []
+        max_in_flight = self.processes * 2
+
+        def drain(limit: int):
+            while len(in_flight) > limit:
+                yield from pickle.loads(in_flight.pop(0).result())
+
+        for item in files:
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                in_flight.append(pool.submit(_extract_batch, batch))
+                batch = []
+                yield from drain(max_in_flight)
+        if batch:
+            in_flight.append(pool.submit(_extract_batch, batch))
+        yield from drain(0)
@@ -2,28 +2,43 @@ import os
 import uuid
 import logging
 from datetime import datetime
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Union
 from supabase import Client
 
+from ..config import settings
+
 from ..models.planning import (
     JobPlan, JobPlanArea, JobPlanItem, 
     JobPlanStatus, JobPlanMode, AreaKey, Strategy, RecommendedAction
 )
-from .policy_engine import PolicyEngine
+from .policy_engine import get_policy_engine
 from .estimator import Estimator
+from .manifest import ManifestService
+from .archive import ArchiveSource, DirectorySource
+from .extractors.python_ast import PythonAstExtractor
 
 logger = logging.getLogger(__name__)
 
+ITEM_INSERT_BATCH = 500 # job_plan_item rows per insert round trip
+
 class PlannerService:
     def __init__(self, supabase: Client):
         self.supabase = supabase
-        self.policy_engine = PolicyEngine()
+        self.manifest = ManifestService(supabase)
         
-    def create_plan(self, job_id: str, root_path: str, mode: JobPlanMode = JobPlanMode.STANDARD) -> str:
+    def create_plan(self, job_id: str, root_path: Union[str, ArchiveSource], mode: JobPlanMode = JobPlanMode.STANDARD) -> str:
         """
-        Scans the directory, generates a plan, persists it, and returns plan_id.
+        Scans the artifact (directory path or ArchiveSource), generates a plan, persists it, and returns plan_id.
+        Size, policy and content hash of each file are computed in this single pass;
+        excluded directories are pruned before descending and hashing runs in parallel.
         """
-        logger.info(f"Creating plan for Job {job_id} at {root_path}")
+        source = root_path if isinstance(root_path, ArchiveSource) else DirectorySource(root_path)
+        logger.info(f"Creating plan for Job {job_id} at {source.root}")
+        
+        # Current rule set (hot-reloaded) + the solution's overrides
+        user_overrides = self._load_user_overrides(job_id)
+        policy_engine = get_policy_engine(user_overrides)
         
         # 1. Create JobPlan Header
         plan_id = str(uuid.uuid4())
@@ -32,6 +47,8 @@ class PlannerService:
             "job_id": job_id,
             "status": JobPlanStatus.DRAFT,
             "mode": mode,
+            "user_overrides": user_overrides,
+            "policy_version": policy_engine.version,
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
         }
@@ -40,59 +57,93 @@ class PlannerService:
         # 2. Create Areas
         areas = self._create_areas(plan_id)
         
+        # Incremental: diff against the manifest of the last successful run
+        previous_manifest = None
+        if mode == JobPlanMode.INCREMENTAL:
+            previous_manifest = self._load_previous_manifest(job_id)
+
         # 3. Inventory & Classify
         items = []
         total_stats = {"total_files": 0, "total_cost": 0.0, "total_time": 0.0}
+        if previous_manifest is not None:
+            total_stats.update({"reused_files": 0, "changed_files": 0, "deleted_paths": []})
         
-        for root, dirs, files in os.walk(root_path):
-            for file in files:
-                full_path = os.path.join(root, file)
-                rel_path = os.path.relpath(full_path, root_path).replace("\\", "/")
-                
-                try:
-                    size_bytes = os.path.getsize(full_path)
-                except OSError:
-                    size_bytes = 0
-                
-                # Policy Check
-                rec_action, reason = self.policy_engine.evaluate(rel_path, size_bytes)
-                
-                # Classification & Strategy
-                area_key, strategy = self._classify_file(rel_path, rec_action)
-                
-                # Estimation
-                est = Estimator.estimate(size_bytes, strategy)
-                
-                # Create Item
-                area_id = areas[area_key]
-                item_id = str(uuid.uuid4())
-                
-                item = {
-                    "item_id": item_id,
-                    "plan_id": plan_id,
-                    "area_id": area_id,
-                    "path": rel_path,
-                    "size_bytes": size_bytes,
-                    "file_type": rel_path.split('.')[-1].upper() if '.' in rel_path else "UNKNOWN",
-                    "classifier": {"reason": reason},
-                    "strategy": strategy,
-                    "recommended_action": rec_action,
-                    "enabled": rec_action == RecommendedAction.PROCESS,
-                    "order_index": 0, # To be refined later
-                    "estimate": est
-                }
-                items.append(item)
-                
-                # Stats
-                if rec_action == RecommendedAction.PROCESS:
-                    total_stats["total_files"] += 1
-                    total_stats["total_cost"] += est["cost_usd"]
-                    total_stats["total_time"] += est["time_seconds"]
+        entries = []
+        for entry in source.entries(policy_engine.should_descend):
+            rec_action, reason = policy_engine.evaluate(entry.path, entry.size_bytes)
+            entries.append((entry, rec_action, reason))
+        entries.sort(key=lambda e: e[0].path) # scan order is not deterministic
+
+        # Content hash of the files that will be processed (parallel reads);
+        # reused by the manifest and the incremental diff
+        to_hash = [entry.path for entry, rec_action, _ in entries if rec_action == RecommendedAction.PROCESS]
+        with ThreadPoolExecutor(max_workers=max(1, settings.INVENTORY_MAX_WORKERS), thread_name_prefix="planner-hash") as pool:
+            hashes = dict(zip(to_hash, pool.map(source.hash, to_hash)))
+            # Python scripts: AST parser confidence decides how much LLM they need
+            to_analyze = [path for path in to_hash if path.lower().endswith(".py")]
+            py_confidence = dict(zip(to_analyze, pool.map(lambda p: self._python_confidence(source, p), to_analyze)))
         
-        # Batch Insert Items (chunks of 100)
-        chunk_size = 100
-        for i in range(0, len(items), chunk_size):
-            chunk = items[i:i+chunk_size]
+        for entry, rec_action, reason in entries:
+            rel_path = entry.path
+            size_bytes = entry.size_bytes
+            
+            # Classification & Strategy
+            area_key, strategy = self._classify_file(rel_path, rec_action)
+            classifier = {"reason": reason}
+            if rel_path in py_confidence:
+                classifier["parser_confidence"] = py_confidence[rel_path]
+                if strategy == Strategy.LLM_ONLY:
+                    strategy = self._python_strategy(py_confidence[rel_path])
+
+            file_hash = hashes.get(rel_path)
+            if previous_manifest is not None and rec_action == RecommendedAction.PROCESS:
+                if ManifestService.is_unchanged(previous_manifest.get(rel_path), size_bytes, file_hash):
+                    strategy = Strategy.REUSE
+                    total_stats["reused_files"] += 1
+                else:
+                    total_stats["changed_files"] += 1
+            
+            # Estimation
+            est = Estimator.estimate(size_bytes, strategy)
+            
+            # Create Item
+            area_id = areas[area_key]
+            item_id = str(uuid.uuid4())
+            
+            item = {
+                "item_id": item_id,
+                "plan_id": plan_id,
+                "area_id": area_id,
+                "path": rel_path,
+                "file_hash": file_hash,
+                "size_bytes": size_bytes,
+                "file_type": rel_path.split('.')[-1].upper() if '.' in rel_path else "UNKNOWN",
+                "classifier": classifier,
+                "strategy": strategy,
+                "recommended_action": rec_action,
+                "enabled": rec_action == RecommendedAction.PROCESS,
+                "order_index": 0, # To be refined later
+                "estimate": est
+            }
+            items.append(item)
+            
+            # Stats
+            if rec_action == RecommendedAction.PROCESS:
+                total_stats["total_files"] += 1
+                total_stats["total_cost"] += est["cost_usd"]
+                total_stats["total_time"] += est["time_seconds"]
+        
+        if previous_manifest is not None:
+            current_paths = {i["path"] for i in items if i["recommended_action"] == RecommendedAction.PROCESS}
+            total_stats["deleted_paths"] = sorted(set(previous_manifest) - current_paths)
+            logger.info(
+                f"Incremental plan: {total_stats['reused_files']} reused, {total_stats['changed_files']} changed, "
+                f"{len(total_stats['deleted_paths'])} deleted"
+            )
+
+        # Batch Insert Items
+        for i in range(0, len(items), ITEM_INSERT_BATCH):
+            chunk = items[i:i+ITEM_INSERT_BATCH]
             self.supabase.table("job_plan_item").insert(chunk).execute()
             
         # Update Plan Summary
@@ -109,6 +160,25 @@ class PlannerService:
         
         return plan_id
 
+    def _load_user_overrides(self, job_id: str) -> Dict:
+        """Per-solution overrides (solutions.config.user_overrides); copied to the plan"""
+        try:
+            job = self.supabase.table("job_run").select("project_id").eq("job_id", job_id).single().execute()
+            solution = self.supabase.table("solutions").select("config").eq("id", job.data["project_id"]).single().execute()
+            return ((solution.data or {}).get("config") or {}).get("user_overrides") or {}
+        except Exception as e:
+            logger.warning(f"Could not load solution overrides, using default policy: {e}")
+            return {}
+
+    def _load_previous_manifest(self, job_id: str) -> Dict[str, Dict]:
+        """Manifest of the job's solution; empty (= everything changed) if there is none yet"""
+        try:
+            job = self.supabase.table("job_run").select("project_id").eq("job_id", job_id).single().execute()
+            return self.manifest.load(job.data["project_id"])
+        except Exception as e:
+            logger.warning(f"Could not load solution manifest, planning as full run: {e}")
+            return {}
+
     def _create_areas(self, plan_id: str) -> Dict[AreaKey, str]:
         """Creates default areas and returns Map<AreaKey, AreaID>"""
         areas_def = [
@@ -117,19 +187,34 @@ class PlannerService:
             {"key": AreaKey.AUX, "title": "Auxiliary & Scripts", "order": 3}
         ]
         
-        area_map = {}
-        for a in areas_def:
-            area_id = str(uuid.uuid4())
-            self.supabase.table("job_plan_area").insert({
-                "area_id": area_id,
-                "plan_id": plan_id,
-                "area_key": a["key"],
-                "title": a["title"],
-                "order_index": a["order"]
-            }).execute()
-            area_map[a["key"]] = area_id
+        rows = [{
+            "area_id": str(uuid.uuid4()),
+            "plan_id": plan_id,
+            "area_key": a["key"],
+            "title": a["title"],
+            "order_index": a["order"]
+        } for a in areas_def]
+        # Single round-trip
+        self.supabase.table("job_plan_area").insert(rows).execute()
             
-        return area_map
+        return {row["area_key"]: row["area_id"] for row in rows}
+
+    @staticmethod
+    def _python_confidence(source: ArchiveSource, path: str) -> float:
+        try:
+            return PythonAstExtractor().analyze(source.read_text(path)).confidence
+        except Exception as e:
+            logger.warning(f"Python analysis failed for {path}: {e}")
+            return 0.0
+
+    @staticmethod
+    def _python_strategy(confidence: float) -> Strategy:
+        """Python scripts: parser alone when the AST resolves (almost) every data access"""
+        if confidence >= settings.PY_PARSER_ONLY_CONFIDENCE:
+            return Strategy.PARSER_ONLY
+        if confidence >= settings.PY_PARSER_PLUS_LLM_CONFIDENCE:
+            return Strategy.PARSER_PLUS_LLM
+        return Strategy.LLM_ONLY
 
     def _classify_file(self, path: str, rec_action: RecommendedAction) -> tuple[AreaKey, Strategy]:
         """Heuristic classification"""
@@ -147,7 +232,10 @@ class PlannerService:
              return AreaKey.FOUNDATION, Strategy.LLM_ONLY
 
         # 2. Packages
-        if ext in ["dtsx", "dsx"]:
+        if ext in ["dsx", "isx"]:
+            return AreaKey.PACKAGES, Strategy.PARSER_ONLY # Native DataStage parser (DataStageExtractor)
+
+        if ext == "dtsx":
             return AreaKey.PACKAGES, Strategy.PARSER_PLUS_LLM # Hybrid Parser v3
             
         if "jobs" in lower_path or "pipelines" in lower_path:
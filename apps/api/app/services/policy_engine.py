@@ -1,18 +1,52 @@
+import os
+import re
+import json
 import fnmatch
-from typing import List, Optional
+import hashlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
 from ..models.planning import Strategy, RecommendedAction
 
+POLICY_CONFIG_PATH = os.path.join(Path(__file__).parent.parent.parent, "config", "policy.yml")
+
+@dataclass(frozen=True)
+class PolicyRules:
+    """Base rule set (config/policy.yml). version: content hash, recorded on every plan."""
+    skip_extensions: Tuple[str, ...]
+    skip_paths: Tuple[str, ...]
+    max_size_bytes: int
+    version: str
+
+    @classmethod
+    def build(cls, skip_extensions, skip_paths, max_size_bytes: int) -> "PolicyRules":
+        skip_extensions = tuple(sorted({str(e).lower().lstrip(".") for e in skip_extensions}))
+        skip_paths = tuple(str(p) for p in skip_paths)
+        max_size_bytes = int(max_size_bytes)
+        return cls(skip_extensions, skip_paths, max_size_bytes,
+                   _fingerprint([skip_extensions, skip_paths, max_size_bytes]))
+
+def _fingerprint(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
 class PolicyEngine:
     """
     Implements rules for SKIP/IGNORE based on file metadata.
     Reference: discover_ai_v_3.md Section 2
+
+    Extension blocklist, path globs and per-solution overrides are compiled into
+    a single regex; should_descend() lets walkers prune excluded subtrees.
     """
-    
+
     DEFAULT_SKIP_EXTENSIONS = {
-        "bak", "dump", "dmp", "tar", "gz", "zip", "rar", "7z", "iso", 
+        "bak", "dump", "dmp", "tar", "gz", "zip", "rar", "7z", "iso",
         "exe", "dll", "bin", "dat", "log"
     }
-    
+
     DEFAULT_SKIP_PATHS = [
         "**/node_modules/**",
         "**/.git/**",
@@ -28,14 +62,47 @@ class PolicyEngine:
         "**/obj/**", # SSIS build output
         "**/bin/**"  # SSIS build output
     ]
-    
+
     DEFAULT_MAX_SIZE_BYTES = 524_288_000 # 500 MB
 
-    def __init__(self, overrides: Optional[dict] = None):
+    # Override keys that change the rule set (the rest, e.g. max_workers, don't)
+    OVERRIDE_KEYS = ("skip_extensions", "skip_paths", "max_file_size_bytes")
+
+    def __init__(self, overrides: Optional[dict] = None, rules: Optional[PolicyRules] = None):
         self.overrides = overrides or {}
-        self.skip_extensions = self.DEFAULT_SKIP_EXTENSIONS
-        self.skip_paths = self.DEFAULT_SKIP_PATHS
-        self.max_size_bytes = self.overrides.get("max_file_size_bytes", self.DEFAULT_MAX_SIZE_BYTES)
+        rules = rules or get_policy_rules()
+
+        extra_extensions = {str(e).lower().lstrip(".") for e in self.overrides.get("skip_extensions") or []}
+        self.skip_extensions = set(rules.skip_extensions) | extra_extensions
+        self.skip_paths = list(rules.skip_paths) + [p for p in self.overrides.get("skip_paths") or [] if p not in rules.skip_paths]
+        self.max_size_bytes = int(self.overrides.get("max_file_size_bytes") or rules.max_size_bytes)
+
+        # Version of the effective rule set: base version (+ overrides fingerprint)
+        policy_overrides = {k: self.overrides[k] for k in self.OVERRIDE_KEYS if self.overrides.get(k)}
+        self.version = rules.version + (f"+{_fingerprint(policy_overrides)[:8]}" if policy_overrides else "")
+
+        self._matcher = self._compile_matcher()
+        # Globs ending in '*' match everything below a directory: those prune whole subtrees
+        prune_globs = [p for p in self.skip_paths if p.endswith("*")]
+        self._prune_dir_re = re.compile("|".join(self._translate(p) for p in prune_globs)) if prune_globs else None
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        # fnmatchcase semantics, except that a leading '**/' also matches at the root
+        # ('**/node_modules/**' covers 'node_modules/...' too, as in .gitignore)
+        variants = [pattern, pattern[3:]] if pattern.startswith("**/") else [pattern]
+        return "|".join(f"(?:{fnmatch.translate(v)})" for v in variants)
+
+    def _compile_matcher(self) -> Optional[re.Pattern]:
+        # One alternative per rule, in evaluation order (extension before globs);
+        # m.lastgroup tells which rule matched
+        alternatives = []
+        if self.skip_extensions:
+            extensions = "|".join(re.escape(e) for e in sorted(self.skip_extensions))
+            alternatives.append(f"(?P<ext>(?s:.*)\\.(?i:{extensions})\\Z)")
+        for i, pattern in enumerate(self.skip_paths):
+            alternatives.append(f"(?P<glob{i}>{self._translate(pattern)})")
+        return re.compile("|".join(alternatives)) if alternatives else None
 
     def evaluate(self, file_path: str, size_bytes: int) -> tuple[RecommendedAction, str]:
         """
@@ -45,22 +112,84 @@ class PolicyEngine:
         if size_bytes > self.max_size_bytes:
             return RecommendedAction.SKIP, f"File too large ({size_bytes} bytes > {self.max_size_bytes})"
 
-        # 2. Extension Check
-        ext = file_path.split('.')[-1].lower() if '.' in file_path else ""
-        if ext in self.skip_extensions:
-            return RecommendedAction.SKIP, f"Extension .{ext} is in blocklist"
-
-        # 3. Path Check (Glob)
+        # 2. Extension + Path Check (compiled)
         # normalize path separator
         normalized_path = file_path.replace("\\", "/")
-        for pattern in self.skip_paths:
-            if fnmatch.fnmatch(normalized_path, pattern):
-                return RecommendedAction.SKIP, f"Path matches ignored pattern: {pattern}"
+        match = self._matcher.match(normalized_path) if self._matcher else None
+        if match:
+            if match.lastgroup == "ext":
+                ext = file_path.split('.')[-1].lower()
+                return RecommendedAction.SKIP, f"Extension .{ext} is in blocklist"
+            pattern = self.skip_paths[int(match.lastgroup[len("glob"):])]
+            return RecommendedAction.SKIP, f"Path matches ignored pattern: {pattern}"
 
         return RecommendedAction.PROCESS, "Passes policy checks"
 
+    def should_descend(self, dir_path: str) -> bool:
+        """
+        False if every file under dir_path would be skipped by a path glob
+        (e.g. '**/node_modules/**'), so walkers can prune the whole subtree.
+        """
+        if not self._prune_dir_re:
+            return True
+        normalized_dir = dir_path.replace("\\", "/").rstrip("/") + "/"
+        return not self._prune_dir_re.match(normalized_dir)
+
     def is_binary_extension(self, file_path: str) -> bool:
         # Simple extension check for likely binaries not already skipped
         binary_exts = {"png", "jpg", "jpeg", "gif", "pdf", "ico", "woff", "woff2", "ttf", "eot"}
         ext = file_path.split('.')[-1].lower() if '.' in file_path else ""
         return ext in binary_exts
+
+# Rule set singleton, hot-reloaded when config/policy.yml changes
+_rules: Optional[PolicyRules] = None
+_rules_mtime = None
+_engines: Dict[Tuple[str, str], PolicyEngine] = {}
+_rules_lock = threading.Lock()
+
+def _load_rules(previous: Optional[PolicyRules]) -> PolicyRules:
+    try:
+        with open(POLICY_CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        config = {}
+    except yaml.YAMLError as e:
+        # A broken edit must not stop planning: keep the rules in force
+        print(f"[POLICY] Error parsing policy.yml, keeping previous rules: {e}")
+        if previous:
+            return previous
+        config = {}
+    return PolicyRules.build(
+        config.get("skip_extensions", PolicyEngine.DEFAULT_SKIP_EXTENSIONS),
+        config.get("skip_paths", PolicyEngine.DEFAULT_SKIP_PATHS),
+        config.get("max_file_size_bytes", PolicyEngine.DEFAULT_MAX_SIZE_BYTES),
+    )
+
+def get_policy_rules() -> PolicyRules:
+    """Current base rule set; config/policy.yml is re-read when its mtime changes"""
+    global _rules, _rules_mtime
+    try:
+        mtime = os.stat(POLICY_CONFIG_PATH).st_mtime_ns
+    except OSError:
+        mtime = None
+    with _rules_lock:
+        if _rules is None or mtime != _rules_mtime:
+            previous = _rules
+            _rules, _rules_mtime = _load_rules(previous), mtime
+            if previous is None or previous.version != _rules.version:
+                print(f"[POLICY] Loaded rule set {_rules.version}")
+        return _rules
+
+def get_policy_engine(overrides: Optional[dict] = None) -> PolicyEngine:
+    """Compiled engine for the current rules + overrides (cached per version)"""
+    rules = get_policy_rules()
+    key = (rules.version, json.dumps(overrides or {}, sort_keys=True, default=str))
+    with _rules_lock:
+        engine = _engines.get(key)
+    if engine is None:
+        engine = PolicyEngine(overrides, rules)
+        with _rules_lock:
+            if len(_engines) >= 64:
+                _engines.clear()
+            _engines[key] = engine
+    return engine
@@ -1,77 +1,359 @@
+"""
+Job Queue - Cola de jobs con leases, heartbeats, reintentos y notificaciones.
+
+Un worker reclama (claim) un job y obtiene un lease de QUEUE_LEASE_SECONDS que
+renueva con heartbeats mientras el job corre. Si el worker muere, el lease
+expira y otro worker vuelve a reclamar el job. Los fallos se reintentan con
+backoff exponencial hasta max_attempts (columna `attempts`).
+
+Backends:
+- SQLJobQueue: Supabase/Postgres (RPCs claim_job / heartbeat_job / release_job,
+  migración 11_job_queue_leases.sql). Con DATABASE_URL + psycopg usa LISTEN/NOTIFY.
+- SQLiteJobQueue: archivo SQLite local, misma semántica, para pruebas de carga sin Supabase.
+
+En ambos casos, polling cada QUEUE_POLL_INTERVAL segundos queda como fallback.
+"""
+import os
+import time
+import uuid
+import random
+import socket
+import sqlite3
+import datetime
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional
+
 from supabase import create_client, Client
 from ..config import settings
-import datetime
 
-class SQLJobQueue:
+try:
+    import psycopg
+    PSYCOPG_AVAILABLE = True
+except ImportError:
+    PSYCOPG_AVAILABLE = False
+
+NOTIFY_CHANNEL = "job_queue"
+
+# Instancias SQLite del mismo archivo en este proceso comparten el wakeup
+_sqlite_wakeups: Dict[str, threading.Event] = {}
+_sqlite_wakeups_lock = threading.Lock()
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped"""
+    delay = settings.QUEUE_BACKOFF_BASE_SECONDS * (2 ** max(0, attempts - 1))
+    delay = min(delay, settings.QUEUE_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+class JobQueue(ABC):
+    """Interfaz común de las colas de jobs"""
+
+    def __init__(self):
+        # Wakeup en proceso: un enqueue en este proceso despierta a los workers sin esperar al poll
+        self._wakeup = threading.Event()
+
+    @abstractmethod
+    def enqueue_job(self, job_id: str, delay_seconds: float = 0):
+        """Add a job to the queue."""
+
+    @abstractmethod
+    def claim(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Claims the next available job (pending or with an expired lease). None if there is none."""
+
+    @abstractmethod
+    def heartbeat(self, queue_id: str, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+        """Extends the lease. False if the worker no longer owns the job."""
+
+    @abstractmethod
+    def complete_job(self, queue_id: str, worker_id: Optional[str] = None):
+        """Mark job as completed in queue."""
+
+    @abstractmethod
+    def fail_job(self, queue_id: str, error_message: str, worker_id: Optional[str] = None) -> str:
+        """Releases a failed job: back to 'pending' with backoff, or 'failed' if out of attempts. Returns the new status."""
+
+    def fetch_next_job(self):
+        """Compat: claim with a throwaway worker id"""
+        return self.claim(default_worker_id())
+
+    def notify(self):
+        self._wakeup.set()
+
+    def wait_for_work(self, timeout: float) -> bool:
+        """Blocks until a new job may be available or timeout. True if woken by a notification."""
+        woken = self._wakeup.wait(timeout)
+        self._wakeup.clear()
+        return woken
+
+    def close(self):
+        pass
+
+class SQLJobQueue(JobQueue):
     def __init__(self):
+        super().__init__()
         self.supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
         # Use Service Role Key for worker operations if available to bypass RLS
         if settings.SUPABASE_SERVICE_ROLE_KEY:
             self.admin_supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_SERVICE_ROLE_KEY)
         else:
             self.admin_supabase = self.supabase
+        self._listener = None
+        self._listener_lock = threading.Lock()
 
-    def enqueue_job(self, job_id: str):
+    def enqueue_job(self, job_id: str, delay_seconds: float = 0):
         """Add a job to the queue."""
+        now = datetime.datetime.utcnow()
         data = {
             "job_id": job_id,
             "status": "pending",
             "attempts": 0,
-            "created_at": datetime.datetime.utcnow().isoformat(),
-            "updated_at": datetime.datetime.utcnow().isoformat()
+            "max_attempts": settings.QUEUE_MAX_ATTEMPTS,
+            "available_at": (now + datetime.timedelta(seconds=delay_seconds)).isoformat(),
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat()
         }
         res = self.admin_supabase.table("job_queue").insert(data).execute()
+        self.notify() # NOTIFY lo emite el trigger; esto cubre workers en este mismo proceso
         return res.data
 
-    def fetch_next_job(self):
-        """Fetch the next pending job. Simple FIFO."""
-        # 1. Get oldest pending job
-        res = self.admin_supabase.table("job_queue")\
-            .select("*")\
-            .eq("status", "pending")\
-            .order("created_at")\
-            .limit(1)\
-            .execute()
-        
-        if not res.data:
-            return None
-        
-        job_queue_item = res.data[0]
-        
-        # 2. Mark as processing (Optimistic locking via status check)
-        # We try to update only if status is still pending
-        update_res = self.admin_supabase.table("job_queue")\
-            .update({
-                "status": "processing",
-                "updated_at": datetime.datetime.utcnow().isoformat()
-            })\
-            .eq("id", job_queue_item["id"])\
-            .eq("status", "pending")\
-            .execute()
-            
-        if not update_res.data:
-            # Race condition lost, try again recursively or return None
-            return None
-            
-        return update_res.data[0]
+    def claim(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        # FOR UPDATE SKIP LOCKED en el RPC: dos workers nunca reciben el mismo job
+        res = self.admin_supabase.rpc("claim_job", {
+            "p_worker_id": worker_id,
+            "p_lease_seconds": lease_seconds or settings.QUEUE_LEASE_SECONDS
+        }).execute()
+        rows = res.data or []
+        if isinstance(rows, dict):
+            rows = [rows]
+        return rows[0] if rows else None
 
-    def complete_job(self, queue_id: str):
+    def heartbeat(self, queue_id: str, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+        res = self.admin_supabase.rpc("heartbeat_job", {
+            "p_id": queue_id,
+            "p_worker_id": worker_id,
+            "p_lease_seconds": lease_seconds or settings.QUEUE_LEASE_SECONDS
+        }).execute()
+        return bool(res.data)
+
+    def complete_job(self, queue_id: str, worker_id: Optional[str] = None):
         """Mark job as completed in queue."""
-        self.admin_supabase.table("job_queue")\
+        query = self.admin_supabase.table("job_queue")\
             .update({
                 "status": "completed",
+                "locked_until": None,
                 "updated_at": datetime.datetime.utcnow().isoformat()
             })\
-            .eq("id", queue_id)\
-            .execute()
+            .eq("id", queue_id)
+        if worker_id:
+            query = query.eq("locked_by", worker_id)
+        query.execute()
 
-    def fail_job(self, queue_id: str, error_message: str):
-        """Mark job as failed in queue."""
-        self.admin_supabase.table("job_queue")\
-            .update({
-                "status": "failed",
-                "last_error": error_message,
-                "updated_at": datetime.datetime.utcnow().isoformat()
-            })\
-            .eq("id", queue_id)\
-            .execute()
+    def fail_job(self, queue_id: str, error_message: str, worker_id: Optional[str] = None) -> str:
+        # attempts ya fue incrementado por claim_job; el RPC decide pending (con backoff) o failed
+        res = self.admin_supabase.rpc("release_job", {
+            "p_id": queue_id,
+            "p_worker_id": worker_id,
+            "p_error": error_message,
+            "p_backoff_base_seconds": settings.QUEUE_BACKOFF_BASE_SECONDS,
+            "p_backoff_max_seconds": settings.QUEUE_BACKOFF_MAX_SECONDS
+        }).execute()
+        return res.data or "lost"
+
+    def wait_for_work(self, timeout: float) -> bool:
+        listener = self._get_listener()
+        if listener is None:
+            return super().wait_for_work(timeout)
+        if self._wakeup.is_set():
+            self._wakeup.clear()
+            return True
+        try:
+            for _ in listener.notifies(timeout=timeout, stop_after=1):
+                return True
+            return False
+        except Exception as e:
+            print(f"[QUEUE] LISTEN connection lost ({e}). Falling back to polling.")
+            self._close_listener()
+            return super().wait_for_work(timeout)
+
+    def _get_listener(self):
+        """Dedicated Postgres connection for LISTEN (needs DATABASE_URL + psycopg)"""
+        if not (PSYCOPG_AVAILABLE and settings.DATABASE_URL):
+            return None
+        with self._listener_lock:
+            if self._listener is None:
+                try:
+                    self._listener = psycopg.connect(settings.DATABASE_URL, autocommit=True)
+                    self._listener.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                    print(f"[QUEUE] Listening on channel '{NOTIFY_CHANNEL}'")
+                except Exception as e:
+                    print(f"[QUEUE] LISTEN unavailable ({e}). Using polling.")
+                    self._listener = None
+            return self._listener
+
+    def _close_listener(self):
+        with self._listener_lock:
+            if self._listener is not None:
+                try:
+                    self._listener.close()
+                except Exception:
+                    pass
+                self._listener = None
+
+    def close(self):
+        self._close_listener()
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Misma semántica que SQLJobQueue sobre un archivo SQLite (WAL).
+    Varios procesos pueden compartir el archivo: el claim corre en una
+    transacción BEGIN IMMEDIATE, así que nunca se entrega un job dos veces.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__()
+        self.path = path or settings.QUEUE_SQLITE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with _sqlite_wakeups_lock:
+            self._wakeup = _sqlite_wakeups.setdefault(os.path.abspath(self.path), threading.Event())
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS job_queue (
+                id TEXT PRIMARY KEY,
+                job_id TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                last_error TEXT,
+                locked_by TEXT,
+                locked_until REAL,
+                heartbeat_at REAL,
+                available_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_claim ON job_queue(status, available_at)")
+
+    def enqueue_job(self, job_id: str, delay_seconds: float = 0):
+        now = time.time()
+        row = {
+            "id": str(uuid.uuid4()),
+            "job_id": job_id,
+            "status": "pending",
+            "attempts": 0,
+            "max_attempts": settings.QUEUE_MAX_ATTEMPTS,
+            "available_at": now + delay_seconds,
+            "created_at": now,
+            "updated_at": now
+        }
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_queue (id, job_id, status, attempts, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (:id, :job_id, :status, :attempts, :max_attempts, :available_at, :created_at, :updated_at)", row
+            )
+        self.notify()
+        return [row]
+
+    def claim(self, worker_id: str, lease_seconds: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        lease = lease_seconds or settings.QUEUE_LEASE_SECONDS
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Abandoned leases that already used all their attempts fail for good
+                self._conn.execute(
+                    "UPDATE job_queue SET status = 'failed', last_error = COALESCE(last_error, 'lease expired'), "
+                    "locked_until = NULL, updated_at = ? "
+                    "WHERE status = 'processing' AND locked_until < ? AND attempts >= max_attempts",
+                    (now, now)
+                )
+                row = self._conn.execute(
+                    "SELECT id FROM job_queue "
+                    "WHERE (status = 'pending' AND available_at <= ?) OR (status = 'processing' AND locked_until < ?) "
+                    "ORDER BY available_at, created_at LIMIT 1",
+                    (now, now)
+                ).fetchone()
+                if not row:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE job_queue SET status = 'processing', locked_by = ?, locked_until = ?, heartbeat_at = ?, "
+                    "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (worker_id, now + lease, now, now, row["id"])
+                )
+                claimed = self._conn.execute("SELECT * FROM job_queue WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return dict(claimed)
+
+    def heartbeat(self, queue_id: str, worker_id: str, lease_seconds: Optional[int] = None) -> bool:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE job_queue SET locked_until = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ? AND locked_by = ? AND status = 'processing'",
+                (now + (lease_seconds or settings.QUEUE_LEASE_SECONDS), now, now, queue_id, worker_id)
+            )
+        return cur.rowcount == 1
+
+    def complete_job(self, queue_id: str, worker_id: Optional[str] = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE job_queue SET status = 'completed', locked_until = NULL, updated_at = ? "
+                "WHERE id = ? AND (? IS NULL OR locked_by = ?)",
+                (time.time(), queue_id, worker_id, worker_id)
+            )
+
+    def fail_job(self, queue_id: str, error_message: str, worker_id: Optional[str] = None) -> str:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT attempts, max_attempts, locked_by FROM job_queue WHERE id = ?", (queue_id,)
+            ).fetchone()
+            if not row or (worker_id and row["locked_by"] != worker_id):
+                return "lost" # Lease reclaimed by another worker: not ours to release
+            if row["attempts"] < row["max_attempts"]:
+                status, available_at = "pending", now + backoff_seconds(row["attempts"])
+            else:
+                status, available_at = "failed", now
+            self._conn.execute(
+                "UPDATE job_queue SET status = ?, last_error = ?, available_at = ?, locked_by = NULL, "
+                "locked_until = NULL, updated_at = ? WHERE id = ?",
+                (status, error_message, available_at, now, queue_id)
+            )
+        if status == "pending":
+            self.notify()
+        return status
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM job_queue GROUP BY status").fetchall()
+        return {r[0]: r[1] for r in rows}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Singleton
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Cola global según QUEUE_BACKEND ('supabase' | 'sqlite')"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            if settings.QUEUE_BACKEND == "sqlite":
+                _job_queue = SQLiteJobQueue()
+            else:
+                _job_queue = SQLJobQueue()
+    return _job_queue
@@ -0,0 +1,288 @@
+"""
+Rate Limiter - Límites por proveedor/modelo para las llamadas a LLM
+
+- Token buckets de requests/min y tokens/min (proveedor y, opcionalmente, modelo).
+- Concurrencia adaptativa AIMD por proveedor+modelo: +1 por ventana de éxitos,
+  x0.5 ante 429/503. Un 429 con Retry-After bloquea nuevas llamadas hasta ese momento.
+
+Configuración en config/models.yml, sección `rate_limits`:
+
+    rate_limits:
+      max_wait_seconds: 120          # espera máxima por un slot antes de pasar al fallback
+      max_throttle_retries: 3        # reintentos del mismo modelo tras un 429/503
+      providers:
+        openrouter: {requests_per_minute: 200, tokens_per_minute: 400000, max_concurrency: 32}
+      models:
+        "llama-3.3-70b-versatile": {requests_per_minute: 30, tokens_per_minute: 6000}
+
+Sin configuración no hay límites de tasa (solo AIMD con los valores por defecto).
+"""
+import time
+import asyncio
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, List
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+DEFAULTS = {
+    "max_wait_seconds": 120.0,
+    "max_throttle_retries": 3,
+    "default_retry_after_seconds": 2.0,
+    "max_concurrency": 16,
+    "min_concurrency": 1,
+    "initial_concurrency": 4, # Arranque conservador; AIMD sube hasta max_concurrency
+    "decrease_factor": 0.5,
+    "output_tokens_ratio": 0.25 # Reserva de tokens de salida = max_tokens * ratio (se ajusta al terminar)
+}
+
+def parse_retry_after(headers: Optional[Dict[str, str]]) -> Optional[float]:
+    """Retry-After (segundos o fecha HTTP) o x-ratelimit-reset-* ("1m30s", "2.5s", "250ms")"""
+    if not headers:
+        return None
+    headers = {k.lower(): v for k, v in dict(headers).items()}
+    value = headers.get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except Exception:
+                pass
+    resets = [_parse_duration(headers[h]) for h in ("x-ratelimit-reset-requests", "x-ratelimit-reset-tokens") if h in headers]
+    resets = [r for r in resets if r is not None]
+    return max(resets) if resets else None
+
+def _parse_duration(value: str) -> Optional[float]:
+    total, number = 0.0, ""
+    value = value.strip()
+    i = 0
+    try:
+        while i < len(value):
+            ch = value[i]
+            if ch.isdigit() or ch == ".":
+                number += ch
+            elif value.startswith("ms", i):
+                total += float(number) / 1000.0; number = ""; i += 1
+            elif ch in "hms":
+                total += float(number) * {"h": 3600, "m": 60, "s": 1}[ch]; number = ""
+            i += 1
+        if number:
+            total += float(number)
+        return total
+    except ValueError:
+        return None
+
+def is_throttled(llm_result: Dict[str, Any]) -> bool:
+    if llm_result.get("success"):
+        return False
+    if llm_result.get("status_code") in THROTTLE_STATUS_CODES:
+        return True
+    error = str(llm_result.get("error", "")).lower()
+    return "429" in error or "rate limit" in error
+
+class TokenBucket:
+    """Bucket de `rate_per_minute` con capacidad de un minuto. No thread-safe (lo protege el registry)."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        amount = min(amount, self.capacity) # Una petición más grande que el bucket espera a tenerlo lleno
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self.tokens -= amount
+
+class ModelLimiter:
+    """Estado de un proveedor+modelo: concurrencia AIMD y cooldown por Retry-After"""
+
+    def __init__(self, key: str, max_concurrency: int, min_concurrency: int, initial_concurrency: int, buckets: List[TokenBucket], token_buckets: List[TokenBucket]):
+        self.key = key
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.last_decrease = 0.0
+        self.request_buckets = buckets
+        self.token_buckets = token_buckets
+        self.throttled = 0
+        self.successes = 0
+
+class RateLimiterRegistry:
+    """Limitadores por (proveedor, modelo). Thread-safe; sirve para llamadas sync y async."""
+
+    POLL_SECONDS = 0.05
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULTS, **(config or {})}
+        self._lock = threading.Lock()
+        self._limiters: Dict[str, ModelLimiter] = {}
+        self._provider_buckets: Dict[str, Dict[str, TokenBucket]] = {}
+
+    @property
+    def max_wait_seconds(self) -> float:
+        return float(self.config["max_wait_seconds"])
+
+    @property
+    def max_throttle_retries(self) -> int:
+        return int(self.config["max_throttle_retries"])
+
+    def estimate_tokens(self, messages: list, max_tokens: int) -> int:
+        prompt_chars = sum(len(m.get("content") or "") for m in messages)
+        return int(prompt_chars / 4 + max_tokens * self.config["output_tokens_ratio"])
+
+    def get(self, provider: str, model: str) -> ModelLimiter:
+        key = f"{provider}/{model}"
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._build(key, provider, model)
+                self._limiters[key] = limiter
+            return limiter
+
+    def _build(self, key: str, provider: str, model: str) -> ModelLimiter:
+        provider_cfg = (self.config.get("providers") or {}).get(provider, {})
+        model_cfg = (self.config.get("models") or {}).get(model, {})
+
+        # Los buckets del proveedor se comparten entre todos sus modelos
+        if provider not in self._provider_buckets:
+            self._provider_buckets[provider] = self._make_buckets(provider_cfg)
+        shared = self._provider_buckets[provider]
+        own = self._make_buckets(model_cfg)
+
+        request_buckets = [b for b in (shared.get("rpm"), own.get("rpm")) if b]
+        token_buckets = [b for b in (shared.get("tpm"), own.get("tpm")) if b]
+        max_concurrency = int(model_cfg.get("max_concurrency", provider_cfg.get("max_concurrency", self.config["max_concurrency"])))
+        min_concurrency = int(model_cfg.get("min_concurrency", provider_cfg.get("min_concurrency", self.config["min_concurrency"])))
+        initial = int(model_cfg.get("initial_concurrency", provider_cfg.get("initial_concurrency", self.config["initial_concurrency"])))
+        return ModelLimiter(key, max_concurrency, min(min_concurrency, max_concurrency), initial, request_buckets, token_buckets)
+
+    @staticmethod
+    def _make_buckets(cfg: Dict[str, Any]) -> Dict[str, TokenBucket]:
+        buckets = {}
+        if cfg.get("requests_per_minute"):
+            buckets["rpm"] = TokenBucket(float(cfg["requests_per_minute"]))
+        if cfg.get("tokens_per_minute"):
+            buckets["tpm"] = TokenBucket(float(cfg["tokens_per_minute"]))
+        return buckets
+
+    # --- Acquire / Release ---
+
+    def try_acquire(self, limiter: ModelLimiter, tokens: int) -> float:
+        """
+        0 si se obtuvo un slot (y se consumieron los buckets); si no, segundos sugeridos de espera.
+        Tras obtenerlo, el llamador anota time.monotonic() como inicio y lo pasa a release().
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, limiter.cooldown_until - now)
+            if limiter.in_flight >= int(limiter.limit):
+                wait = max(wait, self.POLL_SECONDS)
+            for bucket in limiter.request_buckets:
+                wait = max(wait, bucket.wait_time(1, now))
+            for bucket in limiter.token_buckets:
+                wait = max(wait, bucket.wait_time(tokens, now))
+            if wait > 0:
+                return wait
+            limiter.in_flight += 1
+            for bucket in limiter.request_buckets:
+                bucket.consume(1)
+            for bucket in limiter.token_buckets:
+                bucket.consume(tokens)
+            return 0.0
+
+    def acquire(self, limiter: ModelLimiter, tokens: int, max_wait: Optional[float] = None, cancelled: Optional[threading.Event] = None) -> bool:
+        """Espera un slot; False si se agota max_wait o se activa cancelled"""
+        deadline = time.monotonic() + (self.max_wait_seconds if max_wait is None else max_wait)
+        while True:
+            if cancelled is not None and cancelled.is_set():
+                return False
+            wait = self.try_acquire(limiter, tokens)
+            if wait == 0:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(wait, remaining, 1.0))
+
+    async def aacquire(self, limiter: ModelLimiter, tokens: int, max_wait: Optional[float] = None) -> bool:
+        deadline = time.monotonic() + (self.max_wait_seconds if max_wait is None else max_wait)
+        while True:
+            wait = self.try_acquire(limiter, tokens)
+            if wait == 0:
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(wait, remaining, 1.0))
+
+    def in_cooldown(self, limiter: ModelLimiter) -> bool:
+        """El modelo está esperando un Retry-After (429/503 reciente)"""
+        with self._lock:
+            return limiter.cooldown_until > time.monotonic()
+
+    def release(self, limiter: ModelLimiter, llm_result: Dict[str, Any], reserved_tokens: int, started_at: float = 0.0):
+        """Libera el slot y ajusta AIMD, cooldown y el consumo real de tokens"""
+        with self._lock:
+            now = time.monotonic()
+            limiter.in_flight = max(0, limiter.in_flight - 1)
+
+            if is_throttled(llm_result):
+                limiter.throttled += 1
+                retry_after = llm_result.get("retry_after")
+                if retry_after is None:
+                    retry_after = self.config["default_retry_after_seconds"]
+                limiter.cooldown_until = max(limiter.cooldown_until, now + retry_after)
+                # Solo reduce una vez por "generación": los 429 de peticiones lanzadas antes
+                # de la última reducción ya están contados en ella
+                if started_at >= limiter.last_decrease:
+                    previous = limiter.limit
+                    limiter.limit = max(limiter.min_concurrency, limiter.limit * self.config["decrease_factor"])
+                    limiter.last_decrease = now
+                    print(f"[RATE LIMITER] {limiter.key} throttled: concurrency {previous:.1f} -> {limiter.limit:.1f}, retry after {retry_after:.1f}s")
+                return
+
+            # Consumo real de tokens vs reservado (429 no consume)
+            if llm_result.get("success"):
+                limiter.successes += 1
+                limiter.limit = min(limiter.max_concurrency, limiter.limit + 1.0 / max(limiter.limit, 1.0))
+                actual = (llm_result.get("tokens_in") or 0) + (llm_result.get("tokens_out") or 0)
+                if actual:
+                    for bucket in limiter.token_buckets:
+                        bucket.consume(actual - reserved_tokens)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                key: {
+                    "concurrency_limit": round(l.limit, 2),
+                    "in_flight": l.in_flight,
+                    "throttled": l.throttled,
+                    "successes": l.successes
+                }
+                for key, l in self._limiters.items()
+            }
+
+# Singleton
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiterRegistry:
+    """Registry global configurado desde la sección rate_limits de models.yml"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            from ..router import get_model_router
+            _rate_limiter = RateLimiterRegistry(get_model_router().config.get("rate_limits"))
+    return _rate_limiter
@@ -0,0 +1,171 @@
+"""
+SQL Parse Cache - resumen de tablas por sentencia SQL ya parseada
+
+Clave: sha1(dialect + sentencia normalizada: sin comentarios, espacios colapsados).
+Valor: lo que SqlGlotExtractor necesita del AST (tablas y su rol), no el AST:
+    [[schema, table, rel_type, snippet], ...]  o  {"error": "..."} si no parsea
+(sin línea: la misma sentencia aparece en posiciones distintas; SqlGlotExtractor la
+resuelve con el offset de la sentencia en el archivo)
+Sentencias idénticas repetidas entre migraciones se parsean una sola vez.
+LRU acotado por entradas en memoria; opcionalmente persistido en SQLite
+(read-through, compartido entre procesos del ParallelExtractor).
+"""
+import os
+import re
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+def statement_key(dialect: str, normalized: str) -> str:
+    return hashlib.sha1(f"{dialect}\0{normalized}".encode("utf-8", errors="ignore")).hexdigest()
+
+# Tokens that matter for splitting: whitespace, comments, literals/quoted identifiers, ';'
+_TOKEN_RE = re.compile(
+    r"(?P<ws>\s+)|(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<lit>'(?:[^']|'')*'?|\"(?:[^\"]|\"\")*\"?|\[[^\]]*\]?|`[^`]*`?)|(?P<semi>;)",
+    re.S
+)
+
+def split_statements(batch: str, split: bool = True) -> List[Tuple[str, str, int]]:
+    """
+    Splits a batch on top-level ';' (not inside quotes, [identifiers] or comments).
+    Returns (statement, normalized, offset of statement in batch) triples;
+    normalized has comments removed and whitespace collapsed outside literals. split=False keeps the batch as one
+    statement (procedure/trigger bodies, where ';' does not end the batch).
+    """
+    out = []
+    norm = []
+    start = pos = 0
+
+    def flush(end: int):
+        normalized = "".join(norm).strip()
+        if normalized and normalized != ";":
+            raw = batch[start:end]
+            statement = raw.lstrip()
+            out.append((statement.rstrip(), normalized, start + len(raw) - len(statement)))
+        norm.clear()
+
+    for m in _TOKEN_RE.finditer(batch):
+        if m.start() > pos:
+            norm.append(batch[pos:m.start()])
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "ws" or kind == "comment":
+            if norm and norm[-1] != " ":
+                norm.append(" ")
+        elif kind == "lit":
+            norm.append(m.group())
+        else:
+            norm.append(";")
+            if split:
+                flush(pos)
+                start = pos
+    if pos < len(batch):
+        norm.append(batch[pos:])
+    flush(len(batch))
+    return out
+
+class SqlParseCache:
+    """LRU en memoria (entradas) + SQLite opcional. Thread-safe."""
+
+    _MISS = object()
+
+    def __init__(self, max_entries: int, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS sql_parse_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    summary TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            # Persisted store bounded at 4x the memory LRU (oldest out)
+            self._conn.execute(
+                "DELETE FROM sql_parse_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM sql_parse_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (max_entries * 4,)
+            )
+
+    def get_or_parse(self, dialect: str, normalized: str, parse: Callable[[], Any]) -> Any:
+        key = statement_key(dialect, normalized)
+        with self._lock:
+            summary = self._entries.get(key, self._MISS)
+            if summary is not self._MISS:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return summary
+            if self._conn is not None:
+                row = self._conn.execute("SELECT summary FROM sql_parse_cache WHERE cache_key = ?", (key,)).fetchone()
+                if row:
+                    summary = json.loads(row[0])
+                    self._remember(key, summary)
+                    self.hits += 1
+                    return summary
+            self.misses += 1
+
+        summary = parse() # Outside the lock: parsing is the slow part
+        with self._lock:
+            self._remember(key, summary)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sql_parse_cache (cache_key, summary, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(summary), time.time())
+                )
+        return summary
+
+    def _remember(self, key: str, summary: Any):
+        self._entries[key] = summary
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM sql_parse_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persisted": self._conn is not None
+            }
+
+# Singleton
+_sql_parse_cache = None
+_sql_parse_cache_lock = threading.Lock()
+
+def get_sql_parse_cache() -> Optional[SqlParseCache]:
+    """Obtiene el cache global, o None si está deshabilitado"""
+    global _sql_parse_cache
+    if settings.SQL_PARSE_CACHE_MAX_ENTRIES <= 0:
+        return None
+    with _sql_parse_cache_lock:
+        if _sql_parse_cache is None:
+            path = os.path.join(settings.CACHE_DIR, "sql_parse_cache.sqlite") if settings.SQL_PARSE_CACHE_PERSIST else None
+            try:
+                _sql_parse_cache = SqlParseCache(settings.SQL_PARSE_CACHE_MAX_ENTRIES, path)
+            except Exception as e:
+                print(f"[SQL PARSE CACHE] Persistence disabled, could not open cache: {e}")
+                _sql_parse_cache = SqlParseCache(settings.SQL_PARSE_CACHE_MAX_ENTRIES)
+    return _sql_parse_cache
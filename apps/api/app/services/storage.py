@@ -2,13 +2,70 @@ import os
 import zipfile
 import shutil
 import git
+import httpx
 from supabase import create_client
 from ..config import settings
+from .archive import ArchiveSource, DirectorySource, ZipArchiveSource
+
+# Bucket is 'source-code' based on frontend logic
+BUCKET_NAME = "source-code"
 
 class StorageService:
     def __init__(self):
         self.supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
         
+    def open_artifact(self, storage_path: str) -> ArchiveSource:
+        """
+        Streaming ingestion: returns an ArchiveSource over the artifact without extracting it.
+        ZIPs are downloaded in chunks to disk (never fully in memory) and read in place;
+        local ZIPs are read where they are. Git URLs are cloned as before.
+        """
+        storage_path = storage_path.strip()
+        print(f"[STORAGE] Opening artifact: '{storage_path}'")
+        
+        if storage_path.lower().startswith("http://") or storage_path.lower().startswith("https://"):
+            print("[STORAGE] Detected Git URL. Cloning...")
+            return DirectorySource(self.clone_repo(storage_path))
+        
+        extract_dir = os.path.join(settings.UPLOAD_DIR, os.path.splitext(os.path.basename(storage_path))[0])
+        
+        if storage_path.startswith("local://") or os.path.isabs(storage_path):
+            source_path = storage_path.replace("local://", "")
+            if not os.path.exists(source_path):
+                 raise Exception(f"Local file not found: {source_path}")
+            if os.path.isdir(source_path):
+                return DirectorySource(source_path)
+            print(f"[STORAGE] Reading local ZIP in place: {source_path}")
+            return ZipArchiveSource(source_path, root=extract_dir)
+        
+        local_zip_path = os.path.join(settings.UPLOAD_DIR, os.path.basename(storage_path))
+        self.download_to_file(storage_path, local_zip_path)
+        return ZipArchiveSource(local_zip_path, root=extract_dir, delete_on_close=True)
+
+    def download_to_file(self, storage_path: str, local_path: str) -> int:
+        """Chunked download from Supabase Storage to disk. Returns bytes written."""
+        url = f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/{BUCKET_NAME}/{storage_path.lstrip('/')}"
+        headers = {"Authorization": f"Bearer {settings.SUPABASE_KEY}", "apikey": settings.SUPABASE_KEY}
+        print(f"Downloading {storage_path} to {local_path} (streaming)...")
+        
+        written = 0
+        tmp_path = f"{local_path}.part"
+        try:
+            with httpx.stream("GET", url, headers=headers, timeout=httpx.Timeout(60.0, connect=10.0), follow_redirects=True) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for block in response.iter_bytes(settings.STORAGE_DOWNLOAD_CHUNK_BYTES):
+                        f.write(block)
+                        written += len(block)
+            os.replace(tmp_path, local_path)
+        except Exception as e:
+            print(f"Error downloading file: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise e
+        print(f"[STORAGE] Downloaded {written} bytes")
+        return written
+
     def download_and_extract(self, storage_path: str) -> str:
         """
         Downloads a ZIP from Supabase Storage, extracts it, and returns the extraction directory.
@@ -35,16 +92,8 @@ class StorageService:
         else:
             print(f"Downloading {storage_path} to {local_zip_path}...")
             
-            # Download from Supabase
-            # Bucket is 'source-code' based on frontend logic
-            bucket_name = "source-code"
-            try:
-                with open(local_zip_path, 'wb+') as f:
-                    res = self.supabase.storage.from_(bucket_name).download(storage_path)
-                    f.write(res)
-            except Exception as e:
-                print(f"Error downloading file: {e}")
-                raise e
+            # Download from Supabase (chunked, never the whole ZIP in memory)
+            self.download_to_file(storage_path, local_zip_path)
             
         print(f"Extracting to {extract_dir}...")
         
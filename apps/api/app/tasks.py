@@ -2,6 +2,7 @@ import asyncio
 import os
 from .config import settings
 from .services.graph import get_graph_service
+from .services.graph_engine import invalidate_graph
 from .services.storage import StorageService
 from .services.llm import LLMService
 from supabase import create_client
@@ -55,7 +56,9 @@ async def analyze_solution_task(job_id: str, file_path: str):
                 "summary": analysis.summary,
                 "solution_id": solution_id # Tag with solution_id
             }
-            graph_service.upsert_node("Asset", script_node)
+            # One bulk write per file (UNWIND batches in Neo4j) instead of one round trip per node/edge
+            asset_rows = [script_node]
+            relationship_rows = {"INPUT_OF": [], "OUTPUT_TO": []}
             
             # Inputs
             for inp in analysis.inputs:
@@ -74,8 +77,8 @@ async def analyze_solution_task(job_id: str, file_path: str):
                     "columns": inp.columns or [],
                     "solution_id": solution_id # Tag with solution_id
                 }
-                graph_service.upsert_node("Asset", input_node)
-                graph_service.upsert_relationship(input_node, script_node, "INPUT_OF")
+                asset_rows.append(input_node)
+                relationship_rows["INPUT_OF"].append({"source_id": input_node["id"], "target_id": script_node["id"]})
                 
             # Outputs
             for out in analysis.outputs:
@@ -94,11 +97,16 @@ async def analyze_solution_task(job_id: str, file_path: str):
                     "columns": out.columns or [],
                     "solution_id": solution_id # Tag with solution_id
                 }
-                graph_service.upsert_node("Asset", output_node)
-                graph_service.upsert_relationship(script_node, output_node, "OUTPUT_TO")
+                asset_rows.append(output_node)
+                relationship_rows["OUTPUT_TO"].append({"source_id": script_node["id"], "target_id": output_node["id"]})
+
+            graph_service.upsert_nodes_bulk("Asset", asset_rows)
+            for rel_type, rows in relationship_rows.items():
+                graph_service.upsert_relationships_bulk(rel_type, rows)
         
         # 4. Cleanup & Finish
         supabase.from_("solutions").update({"status": "READY"}).eq("id", solution_id).execute()
+        invalidate_graph(solution_id)
         print(f"Job {solution_id} Completed Successfully.")
         
     except Exception as e:
@@ -1,4 +1,5 @@
 import asyncio
+import threading
 import traceback
 import sys
 import os
@@ -8,14 +9,20 @@ if __name__ == "__main__" and __package__ is None:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     __package__ = "app"
 
-from .services.queue import SQLJobQueue
-from .pipeline import PipelineOrchestrator
+from .services.queue import JobQueue, get_job_queue, default_worker_id
+from .pipeline import PipelineOrchestrator, JobCancelled
 from .config import settings
+from .services.graph_engine import invalidate_graph
 from supabase import create_client
 
-async def process_job(job_queue_item):
+def process_job(job_queue_item, queue: JobQueue, worker_id: str = None, cancelled: threading.Event = None):
+    """
+    Runs one claimed job (blocking). Called from a worker thread.
+    `cancelled` is set by the heartbeat when the lease is lost: the pipeline stops
+    between items/areas and the job is left to its new owner (no complete/fail).
+    """
     job_id = job_queue_item["job_id"]
-    queue = SQLJobQueue()
+    project_id = None
     
     # Cliente Supabase
     key_to_use = settings.SUPABASE_SERVICE_ROLE_KEY if settings.SUPABASE_SERVICE_ROLE_KEY else settings.SUPABASE_KEY
@@ -46,7 +53,7 @@ async def process_job(job_queue_item):
         print(f"[WORKER] Starting Pipeline for {file_path}...")
         
         # Instanciar orquestador pasando el cliente supabase
-        orchestrator = PipelineOrchestrator(supabase)
+        orchestrator = PipelineOrchestrator(supabase, cancelled=cancelled)
         
         # Ejecutar pipeline (esto bloquea el worker por ahora, idealmente sería async)
         # Como el orchestrator usa llamadas síncronas a LLM, está bien en este worker
@@ -61,7 +68,7 @@ async def process_job(job_queue_item):
                 print(f"[WORKER] Job {job_id} paused for planning approval.")
                 # We complete the queue item because this 'run' is done. 
                 # The approval process must re-enqueue the job.
-                queue.complete_job(job_queue_item["id"])
+                queue.complete_job(job_queue_item["id"], worker_id)
             else:
                 # Completar Job
                 supabase.table("job_run").update({
@@ -70,19 +77,29 @@ async def process_job(job_queue_item):
                     "progress_pct": 100
                 }).eq("job_id", job_id).execute()
                 
-                queue.complete_job(job_queue_item["id"])
+                queue.complete_job(job_queue_item["id"], worker_id)
                 
                 # Actualizar estado de solución
                 supabase.table("solutions").update({"status": "READY"}).eq("id", project_id).execute()
+                invalidate_graph(project_id) # Grafo en memoria (GRAPH_MODE=MEMORY) de este proceso
                 print(f"[WORKER] Job {job_id} Completed Successfully")
             
         else:
             raise Exception("Pipeline execution failed (check logs)")
         
+    except JobCancelled as e:
+        print(f"[WORKER] Job {job_id} abandoned: {e}")
     except Exception as e:
         print(f"[WORKER] Job {job_id} Failed: {e}")
         traceback.print_exc()
         
+        # Reintento con backoff o fallo definitivo (según attempts)
+        queue_status = queue.fail_job(job_queue_item["id"], str(e), worker_id)
+        if queue_status == "pending":
+            print(f"[WORKER] Job {job_id} will be retried (attempt {job_queue_item.get('attempts')} failed)")
+            supabase.table("job_run").update({"status": "queued", "error_message": str(e)}).eq("job_id", job_id).execute()
+            return
+        
         # Registrar error
         supabase.table("job_run").update({
             "status": "failed", 
@@ -90,22 +107,72 @@ async def process_job(job_queue_item):
             "finished_at": "now()"
         }).eq("job_id", job_id).execute()
         
-        supabase.table("solutions").update({"status": "ERROR"}).eq("id", project_id).execute()
-        queue.fail_job(job_queue_item["id"], str(e))
+        if project_id:
+            supabase.table("solutions").update({"status": "ERROR"}).eq("id", project_id).execute()
 
-async def worker_loop():
-    queue = SQLJobQueue()
-    print("[WORKER] Started polling (New Pipeline Enabled)...")
+async def _heartbeat(queue: JobQueue, job_queue_item, worker_id: str, cancelled: threading.Event):
+    """
+    Renews the lease while the job runs; a dead worker stops renewing and the job is reclaimed.
+    If another worker reclaimed it, sets `cancelled` so the handler stops.
+    """
+    interval = max(1.0, settings.QUEUE_LEASE_SECONDS / 3)
     while True:
+        await asyncio.sleep(interval)
         try:
-            job = queue.fetch_next_job()
-            if job:
-                await process_job(job)
-            else:
-                await asyncio.sleep(5) # Poll interval
+            still_owner = await asyncio.to_thread(queue.heartbeat, job_queue_item["id"], worker_id)
+            if not still_owner:
+                print(f"[WORKER] Lost lease for job {job_queue_item['job_id']} (reclaimed by another worker), cancelling")
+                cancelled.set()
+                return
+        except Exception as e:
+            print(f"[WORKER] Heartbeat error for job {job_queue_item['job_id']}: {e}")
+
+async def run_claimed_job(queue: JobQueue, job_queue_item, worker_id: str, slots: asyncio.Semaphore, handler=process_job):
+    cancelled = threading.Event()
+    heartbeat = asyncio.create_task(_heartbeat(queue, job_queue_item, worker_id, cancelled))
+    try:
+        await asyncio.to_thread(handler, job_queue_item, queue, worker_id, cancelled)
+    except Exception as e:
+        print(f"[WORKER] Unexpected error in job {job_queue_item['job_id']}: {e}")
+    finally:
+        heartbeat.cancel()
+        slots.release()
+        queue.notify() # Un slot libre: volver a reclamar sin esperar al poll
+
+async def worker_loop(queue: JobQueue = None, concurrency: int = None, handler=process_job, stop: threading.Event = None):
+    """
+    Claims jobs while there are free slots (up to `concurrency` jobs at once) and waits
+    for notifications when idle. `handler(job, queue, worker_id, cancelled)` must complete/fail
+    the job, unless `cancelled` (lease lost) is set.
+    """
+    queue = queue or get_job_queue()
+    concurrency = max(1, concurrency or settings.WORKER_CONCURRENCY)
+    worker_id = default_worker_id()
+    slots = asyncio.Semaphore(concurrency)
+    running = set()
+    print(f"[WORKER] {worker_id} started ({concurrency} concurrent jobs, backend={type(queue).__name__})...")
+    
+    while not (stop and stop.is_set()):
+        await slots.acquire()
+        try:
+            job = await asyncio.to_thread(queue.claim, worker_id)
         except Exception as e:
             print(f"[WORKER] Loop Error: {e}")
-            await asyncio.sleep(5)
+            job = None
+        
+        if job:
+            print(f"[WORKER] Claimed job {job['job_id']} (attempt {job.get('attempts')})")
+            task = asyncio.create_task(run_claimed_job(queue, job, worker_id, slots, handler))
+            running.add(task)
+            task.add_done_callback(running.discard)
+            continue
+        
+        slots.release()
+        # Idle: espera notificación (LISTEN/NOTIFY o wakeup en proceso) con polling como fallback
+        await asyncio.to_thread(queue.wait_for_work, settings.QUEUE_POLL_INTERVAL)
+    
+    if running:
+        await asyncio.gather(*running, return_exceptions=True)
 
 if __name__ == "__main__":
     asyncio.run(worker_loop())
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+Benchmark: LLMAdapter.acall_model (pooled async client) vs call_model (sync SDK in threads).
+
+Starts a local fake OpenAI-compatible server (/v1/chat/completions answering
+after a fixed latency) and measures requests/sec at several concurrency levels.
+The fake server speaks HTTP/1.1 (uvicorn), so the async numbers show
+connection pooling + keep-alive; HTTP/2 multiplexing applies against TLS endpoints.
+
+Usage (from apps/api):
+    python scripts/bench_async_llm.py --latency-ms 100 --concurrency 1,8,32,128
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.services.llm_adapter import LLMAdapter
+
+MESSAGES = [
+    {"role": "system", "content": "Extract nodes and edges."},
+    {"role": "user", "content": json.dumps({"file_path": "a.sql", "content": "SELECT * FROM t"})}
+]
+
+def build_app(latency_ms: float) -> Starlette:
+    async def completions(request):
+        body = await request.json()
+        await asyncio.sleep(latency_ms / 1000.0)
+        return JSONResponse({
+            "id": "cmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": "{\"nodes\": [], \"edges\": []}"}
+            }],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120}
+        })
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+def start_server(latency_ms: float) -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    config = uvicorn.Config(build_app(latency_ms), host="127.0.0.1", port=port, log_level="error",
+                            backlog=4096, limit_concurrency=None)
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+async def run_async(concurrency: int, n_requests: int) -> float:
+    settings.LLM_MAX_CONCURRENCY_OPENROUTER = concurrency
+    adapter = LLMAdapter()
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        adapter.acall_model("bench-model", MESSAGES, provider="openrouter") for _ in range(n_requests)
+    ])
+    elapsed = time.perf_counter() - start
+    await adapter.aclose()
+    failures = [r for r in results if not r["success"]]
+    assert not failures, failures[0]
+    return n_requests / elapsed
+
+def run_sync(concurrency: int, n_requests: int) -> float:
+    adapter = LLMAdapter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(lambda _: adapter.call_model("bench-model", MESSAGES, provider="openrouter"), range(n_requests)))
+        elapsed = time.perf_counter() - start
+    failures = [r for r in results if not r["success"]]
+    assert not failures, failures[0]
+    return n_requests / elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--concurrency", type=str, default="1,8,32,128")
+    parser.add_argument("--rounds", type=int, default=4, help="requests per run = concurrency * rounds")
+    parser.add_argument("--skip-sync", action="store_true")
+    args = parser.parse_args()
+
+    port = start_server(args.latency_ms)
+    settings.OPENROUTER_BASE_URL = f"http://127.0.0.1:{port}/v1"
+    settings.OPENROUTER_API_KEY = "bench"
+    settings.LLM_MAX_CONNECTIONS = max(int(c) for c in args.concurrency.split(","))
+
+    print("\n--- Async LLM Adapter Benchmark ---")
+    print(f"fake server latency={args.latency_ms}ms (ideal req/s = concurrency * {1000 / args.latency_ms:.0f})")
+    print(f"{'concurrency':>11} {'async req/s':>12} {'sync req/s':>11}")
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        n_requests = max(concurrency * args.rounds, 8)
+        async_rps = asyncio.run(run_async(concurrency, n_requests))
+        sync_rps = "-" if args.skip_sync else f"{run_sync(concurrency, n_requests):.1f}"
+        print(f"{concurrency:>11} {async_rps:>12.1f} {sync_rps:>11}")
+
+if __name__ == "__main__":
+    main()
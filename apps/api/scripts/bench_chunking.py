@@ -0,0 +1,130 @@
+"""
+Benchmark: lineage coverage of oversized files, head/tail truncation vs structural chunking.
+
+Generates large SQL (GO batches), DTSX (many Executables) and Python files and
+runs them through ActionRunner.run_action("extract_strict") against a local fake
+LLM server that "extracts" one node per table/task name present in the content
+it receives (latency proportional to input size). Reports the fraction of the
+names that end up in the result and the wall time.
+
+- truncation: chunking disabled, the previous head/tail cut at 200k chars
+- chunking: GO batches / Executables / top-level defs packed per token budget, run in parallel
+
+Usage (from apps/api):
+    python scripts/bench_chunking.py --objects 4000 --latency-ms-per-10k 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.services import chunking
+from app.services.hedging import HedgePolicy
+from app.services.rate_limiter import RateLimiterRegistry
+
+NAME_RE = re.compile(r"\b(obj_\d+)\b")
+
+def build_app(latency_ms_per_10k: float) -> Starlette:
+    async def completions(request):
+        body = await request.json()
+        content = json.loads(body["messages"][-1]["content"])["content"]
+        await asyncio.sleep(len(content) / 10_000 * latency_ms_per_10k / 1000.0)
+        names = sorted(set(NAME_RE.findall(content)))
+        nodes = [{"node_id": n, "node_type": "table", "name": n, "system": "sqlserver"} for n in names]
+        edges = [{"edge_id": f"e{i}", "from_node_id": a, "to_node_id": b, "edge_type": "FLOWS_TO"}
+                 for i, (a, b) in enumerate(zip(names, names[1:]))]
+        return JSONResponse({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": json.dumps({"nodes": nodes, "edges": edges})}}],
+            "usage": {"prompt_tokens": len(content) // 4, "completion_tokens": len(nodes) * 20}
+        })
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+def start_server(latency_ms_per_10k: float) -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    server = uvicorn.Server(uvicorn.Config(build_app(latency_ms_per_10k), host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+def make_sql(n: int) -> str:
+    filler = "-- " + "x" * 120 + "\n"
+    return "".join(
+        f"CREATE PROCEDURE dbo.obj_{i} AS\nBEGIN\n{filler * 3}  INSERT INTO dbo.target SELECT * FROM dbo.src;\nEND;\nGO\n"
+        for i in range(n)
+    )
+
+def make_dtsx(n: int) -> str:
+    tasks = "".join(
+        f'    <DTS:Executable DTS:refId="Package\\obj_{i}" DTS:ObjectName="obj_{i}">\n'
+        f'      <DTS:ObjectData><SQLTask:SqlTaskData SQLTask:SqlStatementSource="{"EXEC something; " * 25}"/></DTS:ObjectData>\n'
+        f'    </DTS:Executable>\n'
+        for i in range(n)
+    )
+    return (
+        '<?xml version="1.0"?>\n<DTS:Executable xmlns:DTS="www.microsoft.com/SqlServer/Dts" DTS:refId="Package">\n'
+        '  <DTS:ConnectionManagers><DTS:ConnectionManager DTS:ObjectName="dw"/></DTS:ConnectionManagers>\n'
+        f'  <DTS:Executables>\n{tasks}  </DTS:Executables>\n</DTS:Executable>\n'
+    )
+
+def make_python(n: int) -> str:
+    body = "".join(f"    x = load('{'y' * 100}')\n" for _ in range(4))
+    return "import pandas as pd\n\n" + "".join(f"def obj_{i}():\n{body}    return x\n\n" for i in range(n))
+
+class NullLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+def run_case(file_path: str, content: str, expected: int, enabled: bool):
+    from app.actions import ActionRunner
+    chunking._chunking_config = {**chunking.DEFAULTS, "enabled": enabled, "max_chunk_tokens": 24000, "max_parallel": 8}
+    runner = ActionRunner(NullLogger())
+    runner.rate_limiter = RateLimiterRegistry({"max_concurrency": 10_000, "initial_concurrency": 10_000})
+    runner.hedging = HedgePolicy({"enabled": False})
+
+    start = time.perf_counter()
+    result = runner.run_action("extract_strict", {"file_path": file_path, "content": content}, {})
+    elapsed = time.perf_counter() - start
+    assert result.success, result.error_message
+    found = {n["node_id"] for n in result.data["nodes"]}
+    return len(found) / expected, elapsed, result.chunks or 1
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--objects", type=int, default=4000)
+    parser.add_argument("--latency-ms-per-10k", type=float, default=50.0, help="fake LLM latency per 10k chars of input")
+    args = parser.parse_args()
+
+    settings.OPENROUTER_BASE_URL = f"http://127.0.0.1:{start_server(args.latency_ms_per_10k)}/v1"
+    settings.OPENROUTER_API_KEY = "bench"
+    settings.EXTRACTION_CACHE_ENABLED = False
+
+    cases = [("migrations.sql", make_sql(args.objects)), ("package.dtsx", make_dtsx(args.objects)), ("etl.py", make_python(args.objects))]
+    print("\n--- Chunking Benchmark ---")
+    print(f"{'file':<15} {'chars':>9} {'mode':<11} {'chunks':>6} {'coverage':>9} {'seconds':>8}")
+    for file_path, content in cases:
+        for label, enabled in (("truncation", False), ("chunking", True)):
+            coverage, elapsed, chunks = run_case(file_path, content, args.objects, enabled)
+            print(f"{file_path:<15} {len(content):>9} {label:<11} {chunks:>6} {coverage:>8.1%} {elapsed:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: in-memory CSR lineage graph (GRAPH_MODE=MEMORY).
+
+Builds a synthetic layered lineage graph (sources -> staging -> marts, with
+random fan-in/fan-out between layers) with --edges edges in the graph_project
+shape, loads it into a CSRGraph and reports build time plus ms per query for
+downstream/upstream impact, k-hop subgraphs and shortest paths. A dict-of-lists
+BFS over the same edges is timed as the baseline.
+
+Usage (from apps/api):
+    python scripts/bench_graph_engine.py --edges 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import deque
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.graph_engine import CSRGraph, DOWNSTREAM, UPSTREAM
+
+EDGE_TYPES = ["READS_FROM", "WRITES_TO", "DEPENDS_ON", "CONTAINS"]
+
+def synthetic_graph(edges: int, layers: int, seed: int):
+    rng = random.Random(seed)
+    nodes_count = max(edges // 5, layers)
+    per_layer = nodes_count // layers
+    nodes = [{"id": f"a{i}", "data": {"label": f"asset_{i}", "type": "table", "system": "bench"}} for i in range(per_layer * layers)]
+    out = []
+    for e in range(edges):
+        layer = rng.randrange(layers - 1)
+        s = layer * per_layer + rng.randrange(per_layer)
+        d = (layer + 1) * per_layer + rng.randrange(per_layer)
+        out.append({"id": f"e{e}", "source": f"a{s}", "target": f"a{d}", "label": rng.choice(EDGE_TYPES)})
+    return {"nodes": nodes, "edges": out}
+
+def baseline_downstream(adjacency, start: str, max_depth: int):
+    seen = {start}
+    queue = deque([(start, 0)])
+    while queue:
+        current, depth = queue.popleft()
+        if depth == max_depth:
+            continue
+        for nxt in adjacency.get(current, ()):
+            if nxt not in seen:
+                seen.add(nxt)
+                queue.append((nxt, depth + 1))
+    return len(seen) - 1
+
+def timed(fn, repeat: int):
+    fn() # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edges", type=int, default=1_000_000)
+    parser.add_argument("--layers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    data = synthetic_graph(args.edges, args.layers, args.seed)
+    start = time.perf_counter()
+    graph = CSRGraph.from_catalog(data)
+    build = time.perf_counter() - start
+    csr_mb = sum(a.nbytes for csr in (graph.fwd, graph.rev) for a in csr) / 1e6
+
+    print("\n--- In-Memory Graph Engine Benchmark ---")
+    print(f"nodes={graph.node_count} edges={graph.edge_count} build={build:.2f}s csr={csr_mb:.1f} MB")
+
+    per_layer = graph.node_count // args.layers
+    source, sink = "a0", f"a{graph.node_count - 1}"
+    middle = f"a{(args.layers // 2) * per_layer}"
+    rows = [
+        ("downstream (3 hops)", lambda: len(graph.impact(source, DOWNSTREAM, max_depth=3))),
+        ("downstream (all)", lambda: len(graph.impact(source, DOWNSTREAM))),
+        ("upstream (all)", lambda: len(graph.impact(sink, UPSTREAM))),
+        ("downstream READS_FROM only", lambda: len(graph.impact(source, DOWNSTREAM, edge_types=["READS_FROM"]))),
+        ("subgraph (depth 2, limit 500)", lambda: len(graph.subgraph(middle, 2, 500)["nodes"])),
+        ("shortest path", lambda: graph.shortest_path(source, sink, 10).get("hops")),
+    ]
+    for label, fn in rows:
+        ms, result = timed(fn, args.repeat)
+        print(f"{label:<32} {ms:>9.2f} ms  -> {result}")
+
+    adjacency = {}
+    for e in data["edges"]:
+        adjacency.setdefault(e["source"], []).append(e["target"])
+    ms, result = timed(lambda: baseline_downstream(adjacency, source, args.layers), 1)
+    print(f"{'dict BFS downstream (baseline)':<32} {ms:>9.2f} ms  -> {result}")
+
+if __name__ == "__main__":
+    main()
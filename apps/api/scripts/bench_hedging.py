@@ -0,0 +1,167 @@
+"""
+Benchmark: tail latency of ActionRunner with and without hedged requests.
+
+A local fake OpenAI-compatible server answers the primary model of extract_strict
+in --fast-ms, except for a --slow-rate fraction of requests that take --slow-ms
+(a slow tail). The first fallback always answers in --fallback-ms.
+
+- no hedging: a slow primary call is simply waited for (previous behaviour)
+- hedging: after the primary's p95 the fallback is raced; the loser is cancelled
+
+Also checks that ModelConfig.timeout_ms is enforced: with a primary that hangs,
+the call fails with error_type="timeout" and the fallback chain answers.
+
+Usage (from apps/api):
+    python scripts/bench_hedging.py --items 400 --slow-rate 0.03 --slow-ms 3000
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import ClientDisconnect
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.services.hedging import HedgePolicy
+from app.services.rate_limiter import RateLimiterRegistry
+
+class FakeProvider:
+    def __init__(self, primary: str, args):
+        self.primary = primary
+        self.args = args
+        self.rng = random.Random(7)
+        self.hang = False
+        self.calls = Counter()
+
+    async def completions(self, request):
+        try:
+            body = await request.json()
+        except ClientDisconnect:
+            return JSONResponse({}, status_code=499)
+        model = body.get("model")
+        self.calls[model] += 1
+        if model != self.primary:
+            delay = self.args.fallback_ms
+        elif self.hang:
+            delay = 3_600_000
+        else:
+            delay = self.args.slow_ms if self.rng.random() < self.args.slow_rate else self.args.fast_ms
+        await asyncio.sleep(delay / 1000.0)
+        return JSONResponse({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "{\"nodes\": [], \"edges\": []}"}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20}
+        })
+
+def start_server(provider: FakeProvider) -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    app = Starlette(routes=[Route("/v1/chat/completions", provider.completions, methods=["POST"])])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error", backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+class NullLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+def make_runner(hedging: HedgePolicy):
+    from app.actions import ActionRunner
+    runner = ActionRunner(NullLogger())
+    runner.rate_limiter = RateLimiterRegistry({"max_concurrency": 10_000, "initial_concurrency": 10_000})
+    runner.hedging = hedging
+    return runner
+
+async def run(runner, items: int, concurrency: int, warmup: int = 0):
+    # Warm-up (sin medir): llena la ventana de latencias del primario para el p95
+    for i in range(warmup):
+        await runner.arun_action("extract_strict", {"file_path": f"w{i}.sql", "content": f"SELECT -{i}"}, {})
+
+    gate = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with gate:
+            start = time.perf_counter()
+            result = await runner.arun_action("extract_strict", {"file_path": f"f{i}.sql", "content": f"SELECT {i}"}, {})
+            latencies.append((time.perf_counter() - start) * 1000)
+            return result
+
+    results = await asyncio.gather(*[one(i) for i in range(items)])
+    await runner.llm_service.aclose()
+    return results, sorted(latencies)
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(p / 100.0 * len(values)))]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--fast-ms", type=float, default=100.0)
+    parser.add_argument("--slow-ms", type=float, default=3000.0)
+    parser.add_argument("--slow-rate", type=float, default=0.03)
+    parser.add_argument("--fallback-ms", type=float, default=250.0)
+    parser.add_argument("--warmup", type=int, default=30, help="sequential calls before measuring")
+    args = parser.parse_args()
+
+    settings.EXTRACTION_CACHE_ENABLED = False
+    settings.OPENROUTER_API_KEY = "bench"
+
+    from app.router import get_model_router
+    action = get_model_router().get_action_config("extract_strict")
+    provider = FakeProvider(action.primary.model, args)
+    settings.OPENROUTER_BASE_URL = f"http://127.0.0.1:{start_server(provider)}/v1"
+
+    print("\n--- Hedged Requests Benchmark ---")
+    print(f"items={args.items} concurrency={args.concurrency} primary={args.fast_ms:.0f}ms "
+          f"({args.slow_rate:.0%} at {args.slow_ms:.0f}ms) fallback={args.fallback_ms:.0f}ms")
+    print(f"{'scenario':<11} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>7} {'failed':>7} "
+          f"{'extra calls':>12} {'fallback wins':>14}")
+    scenarios = [
+        ("no hedging", HedgePolicy({"enabled": False})),
+        ("hedging", HedgePolicy({"enabled": True, "min_samples": 20, "min_delay_ms": 0})),
+    ]
+    for label, policy in scenarios:
+        # Misma secuencia de latencias en ambos escenarios
+        provider.rng = random.Random(7)
+        results, latencies = asyncio.run(run(make_runner(policy), args.items, args.concurrency, args.warmup))
+        extra = sum(provider.calls.values()) - args.items - args.warmup
+        provider.calls.clear()
+        wins = Counter(r.hedge_winner for r in results if r.hedged)
+        print(f"{label:<11} {pct(latencies, 50):>7.0f} {pct(latencies, 95):>7.0f} {pct(latencies, 99):>7.0f} "
+              f"{latencies[-1]:>7.0f} {sum(1 for r in results if not r.success):>7} {extra:>12} "
+              f"{wins['fallback']:>8}/{sum(wins.values()):<5}")
+        if policy.enabled:
+            delay = policy.hedge_delay_ms(action.primary.model)
+            print(f"{'':<11} hedge delay (primary p95) after the run: {delay:.0f}ms")
+
+    # timeout_ms: el primario cuelga; la llamada se corta en timeout_ms y responde el fallback
+    provider.hang = True
+    get_model_router().config["actions"]["extract_strict"]["timeout_ms"] = 500
+    runner = make_runner(HedgePolicy({"enabled": False}))
+    start = time.perf_counter()
+    results, _ = asyncio.run(run(runner, 4, 4))
+    elapsed = (time.perf_counter() - start) * 1000
+    assert all(r.success and r.fallback_used for r in results), results
+    print(f"timeout     primary hangs, timeout_ms=500: 4/4 answered by fallback in {elapsed:.0f}ms")
+
+if __name__ == "__main__":
+    main()
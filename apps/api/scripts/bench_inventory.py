@@ -0,0 +1,124 @@
+"""
+Benchmark: planner inventory over a synthetic monorepo.
+
+Generates --files files: source (SQL/Python/DTSX) plus a .git object store,
+node_modules and bin/obj build output, which the PolicyEngine skips. Times the
+inventory step of PlannerService.create_plan (walk + stat + policy):
+
+- legacy: os.walk of the whole tree, os.path.getsize per file, fnmatch per glob (previous behaviour)
+- scandir: os.scandir, ignored directories pruned before descent, one compiled glob regex
+  (with 1 thread and with --workers threads listing/stat-ing directories)
+
+Then runs the whole create_plan (parallel hashing of PROCESS files, batched inserts)
+against the in-memory Supabase and reports its round trips.
+
+Usage (from apps/api):
+    python scripts/bench_inventory.py --files 100000 --workers 4
+"""
+import argparse
+import fnmatch
+import os
+import shutil
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from fake_supabase import FakeSupabase
+from app.config import settings
+from app.services.archive import DirectorySource
+from app.services.policy_engine import PolicyEngine
+
+LAYOUT = [
+    # (fraction, directory template, extension)
+    (0.35, "solution/sql/schema_{d}", "sql"),
+    (0.10, "solution/etl/module_{d}", "py"),
+    (0.05, "solution/ssis/project_{d}", "dtsx"),
+    (0.25, "solution/.git/objects/{d:02x}", "pack"),
+    (0.20, "solution/web/node_modules/pkg_{d}/lib", "js"),
+    (0.05, "solution/ssis/project_{d}/bin/Development", "ispac"),
+]
+
+def build_tree(root: str, n_files: int):
+    for fraction, template, ext in LAYOUT:
+        count = int(n_files * fraction)
+        for i in range(count):
+            directory = os.path.join(root, template.format(d=i // 100))
+            if i % 100 == 0:
+                os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, f"f_{i}.{ext}"), "w") as f:
+                f.write(f"-- {i}\n")
+
+def legacy_inventory(root: str):
+    # Previous PlannerService.create_plan loop
+    skip_paths = PolicyEngine.DEFAULT_SKIP_PATHS
+    skip_extensions = PolicyEngine.DEFAULT_SKIP_EXTENSIONS
+    out = []
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            full_path = os.path.join(dirpath, name)
+            rel_path = os.path.relpath(full_path, root)
+            size_bytes = os.path.getsize(full_path)
+            ext = rel_path.split('.')[-1].lower() if '.' in rel_path else ""
+            action = "PROCESS"
+            if ext in skip_extensions:
+                action = "SKIP"
+            else:
+                normalized_path = rel_path.replace("\\", "/")
+                for pattern in skip_paths:
+                    if fnmatch.fnmatch(normalized_path, pattern):
+                        action = "SKIP"
+                        break
+            out.append((rel_path, size_bytes, action))
+    return out
+
+def scandir_inventory(root: str):
+    policy = PolicyEngine()
+    return [(e.path, e.size_bytes, policy.evaluate(e.path, e.size_bytes)[0])
+            for e in DirectorySource(root).entries(policy.should_descend)]
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_inventory_")
+    try:
+        _, build_s = timed(build_tree, root, args.files)
+        print("\n--- Planner Inventory Benchmark ---")
+        print(f"files={args.files} (tree built in {build_s:.1f}s)")
+        print(f"{'inventory':<22} {'seconds':>8} {'files seen':>11} {'PROCESS':>8}")
+
+        legacy, legacy_s = timed(legacy_inventory, root)
+        legacy_process = sum(1 for *_, action in legacy if action == "PROCESS")
+        print(f"{'legacy os.walk':<22} {legacy_s:>8.2f} {len(legacy):>11} {legacy_process:>8}")
+
+        for workers in (1, args.workers):
+            settings.INVENTORY_MAX_WORKERS = workers
+            current, elapsed = timed(scandir_inventory, root)
+            process = sum(1 for *_, action in current if action == "PROCESS")
+            assert process == legacy_process, (process, legacy_process)
+            print(f"{f'scandir+prune x{workers}':<22} {elapsed:>8.2f} {len(current):>11} {process:>8}  ({legacy_s / elapsed:.1f}x)")
+
+        from app.services.planner import PlannerService
+        db = FakeSupabase()
+        job_id = str(uuid.uuid4())
+        db.tables["job_run"].append({"job_id": job_id, "status": "running"})
+        PlannerService(db).create_plan(job_id, root)
+        print(f"full create_plan: {len(db.tables['job_plan_item'])} items, {db.round_trips} Supabase round trips")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Load test for the lease-based job queue on the local SQLite backend.
+
+Runs several worker loops (app.worker.worker_loop, each in its own thread and
+event loop, each with its own SQLite connection) against one queue file with a
+stub handler instead of the pipeline:
+
+1. throughput: N jobs, a fraction of them fail once and are retried with backoff
+2. crash recovery: a worker claims jobs and dies; their leases expire and
+   the surviving workers reclaim them
+3. pickup latency of an idle worker: in-process wakeup vs polling only
+
+Usage (from apps/api):
+    python scripts/bench_job_queue.py --jobs 500 --workers 4 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.services.queue import SQLiteJobQueue
+from app.worker import worker_loop
+
+class StubHandler:
+    """Sleeps job_ms; jobs listed in fail_once fail on their first attempt."""
+
+    def __init__(self, job_ms: float, fail_once=()):
+        self.job_ms = job_ms
+        self.fail_once = set(fail_once)
+        self.claims = Counter()
+        self.claimed_at = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, job, queue, worker_id, cancelled=None):
+        with self._lock:
+            self.claims[job["job_id"]] += 1
+            self.claimed_at.setdefault(job["job_id"], time.perf_counter())
+        time.sleep(self.job_ms / 1000.0)
+        if job["job_id"] in self.fail_once and job["attempts"] == 1:
+            queue.fail_job(job["id"], "stub failure", worker_id)
+        else:
+            queue.complete_job(job["id"], worker_id)
+
+def start_workers(path: str, n_workers: int, concurrency: int, handler, stop: threading.Event):
+    threads = []
+    for _ in range(n_workers):
+        t = threading.Thread(
+            target=lambda: asyncio.run(worker_loop(SQLiteJobQueue(path), concurrency, handler, stop)),
+            daemon=True
+        )
+        t.start()
+        threads.append(t)
+    return threads
+
+def wait_until(predicate, timeout: float) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+def bench_throughput(path, args):
+    producer = SQLiteJobQueue(path)
+    job_ids = [str(uuid.uuid4()) for _ in range(args.jobs)]
+    handler = StubHandler(args.job_ms, fail_once=job_ids[::int(1 / args.fail_rate)] if args.fail_rate else ())
+    stop = threading.Event()
+
+    start = time.perf_counter()
+    threads = start_workers(path, args.workers, args.concurrency, handler, stop)
+    for job_id in job_ids:
+        producer.enqueue_job(job_id)
+    done = wait_until(lambda: producer.stats().get("completed", 0) == args.jobs, timeout=120)
+    elapsed = time.perf_counter() - start
+    stop.set(); producer.notify()
+    for t in threads: t.join(timeout=5)
+
+    retried = sum(1 for c in handler.claims.values() if c > 1)
+    assert done, f"Not all jobs completed: {producer.stats()}"
+    assert retried == len(handler.fail_once), "A job was claimed twice without failing"
+    print(f"throughput      {args.jobs} jobs in {elapsed:.2f}s = {args.jobs / elapsed:.0f} jobs/s "
+          f"(ideal {args.workers * args.concurrency * 1000 / args.job_ms:.0f}), {retried} retried after backoff")
+
+def bench_crash_recovery(path, args):
+    producer = SQLiteJobQueue(path)
+    job_ids = [str(uuid.uuid4()) for _ in range(args.workers * 2)]
+    for job_id in job_ids:
+        producer.enqueue_job(job_id)
+
+    # A worker that claims and dies: no heartbeat, no completion
+    lease = 1
+    crashed = [producer.claim("crashed-worker", lease_seconds=lease) for _ in range(args.workers)]
+    crashed_at = time.perf_counter()
+
+    handler = StubHandler(args.job_ms)
+    stop = threading.Event()
+    threads = start_workers(path, args.workers, args.concurrency, handler, stop)
+    done = wait_until(lambda: producer.stats().get("completed", 0) == len(job_ids), timeout=30)
+    recovered = max(handler.claimed_at[j["job_id"]] for j in crashed) - crashed_at
+    stop.set(); producer.notify()
+    for t in threads: t.join(timeout=5)
+
+    assert done, f"Abandoned jobs were not reclaimed: {producer.stats()}"
+    print(f"crash recovery  {len(crashed)} abandoned jobs reclaimed {recovered:.2f}s after the crash (lease {lease}s)")
+
+def bench_pickup_latency(path, args, use_wakeup: bool):
+    producer = SQLiteJobQueue(path)
+    if not use_wakeup:
+        producer.notify = lambda: None # only the poll finds new jobs
+    handler = StubHandler(0)
+    stop = threading.Event()
+    threads = start_workers(path, 1, 1, handler, stop)
+    time.sleep(0.2) # let the worker go idle
+
+    latencies = []
+    for _ in range(args.latency_samples):
+        job_id = str(uuid.uuid4())
+        enqueued = time.perf_counter()
+        producer.enqueue_job(job_id)
+        wait_until(lambda: job_id in handler.claimed_at, timeout=settings.QUEUE_POLL_INTERVAL * 3)
+        latencies.append((handler.claimed_at[job_id] - enqueued) * 1000)
+        time.sleep(0.05)
+    stop.set(); SQLiteJobQueue(path).notify()
+    for t in threads: t.join(timeout=settings.QUEUE_POLL_INTERVAL * 2)
+
+    latencies.sort()
+    label = "wakeup" if use_wakeup else "polling only"
+    print(f"pickup latency  {label:<13} p50={latencies[len(latencies) // 2]:.1f}ms max={latencies[-1]:.1f}ms "
+          f"(poll interval {settings.QUEUE_POLL_INTERVAL * 1000:.0f}ms)")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--job-ms", type=float, default=20.0)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--latency-samples", type=int, default=10)
+    args = parser.parse_args()
+
+    settings.QUEUE_POLL_INTERVAL = 1.0
+    settings.QUEUE_BACKOFF_BASE_SECONDS = 0.05
+    settings.QUEUE_LEASE_SECONDS = 30
+
+    print("\n--- Job Queue Load Test (SQLite backend) ---")
+    print(f"workers={args.workers} concurrency={args.concurrency} job={args.job_ms}ms")
+    with tempfile.TemporaryDirectory() as tmp:
+        bench_throughput(os.path.join(tmp, "throughput.sqlite"), args)
+        bench_crash_recovery(os.path.join(tmp, "crash.sqlite"), args)
+        bench_pickup_latency(os.path.join(tmp, "latency_wakeup.sqlite"), args, use_wakeup=True)
+        bench_pickup_latency(os.path.join(tmp, "latency_poll.sqlite"), args, use_wakeup=False)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: evidence locators of RegexExtractor on a large generated SQL file.
+
+- legacy: line_start/line_end with content.count('\\n', 0, pos) per match (previous behaviour, O(matches x size))
+- LineIndex: newline offsets computed once, bisect per match (+ byte_start/byte_end)
+
+Checks both give the same lines and that byte offsets slice the encoded file back
+to the matched text.
+
+Usage (from apps/api):
+    python scripts/bench_line_index.py --lines 40000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.extractors.line_index import LineIndex
+from app.services.extractors.regex import RegexExtractor
+
+TABLE_RE = re.compile(r'(?:FROM|JOIN)\s+([a-zA-Z0-9_]+(?:\.[a-zA-Z0-9_]+)?)', re.IGNORECASE)
+
+def build_sql(lines: int) -> str:
+    out = []
+    for i in range(lines // 4):
+        out.append(f"-- generated step {i} (año {i % 7})")
+        out.append(f"INSERT INTO stage.t_{i % 500} (id, name)")
+        out.append(f"SELECT c.id, c.name FROM dbo.customers_{i % 300} c")
+        out.append(f"JOIN dbo.orders o ON o.customer_id = c.id;")
+    return "\n".join(out) + "\n"
+
+def legacy_lines(content: str):
+    return [(content.count('\n', 0, m.start()) + 1, content.count('\n', 0, m.end()) + 1) for m in TABLE_RE.finditer(content)]
+
+def indexed_lines(content: str):
+    index = LineIndex(content)
+    return [(index.line_of(m.start()), index.line_of(m.end())) for m in TABLE_RE.finditer(content)]
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=40_000)
+    args = parser.parse_args()
+
+    content = build_sql(args.lines)
+    print("\n--- Line Index Benchmark ---")
+    print(f"lines={args.lines} size={len(content.encode()) / 1024 / 1024:.1f}MB matches={sum(1 for _ in TABLE_RE.finditer(content))}")
+
+    legacy, legacy_s = timed(legacy_lines, content)
+    indexed, indexed_s = timed(indexed_lines, content)
+    assert legacy == indexed
+    print(f"{'count per match':<18} {legacy_s:>8.2f}s")
+    print(f"{'LineIndex':<18} {indexed_s:>8.2f}s ({legacy_s / indexed_s:.0f}x, same lines)")
+
+    result, extract_s = timed(RegexExtractor().extract, "generated.sql", content)
+    encoded = content.encode("utf-8")
+    ok = all(encoded[e.locator.byte_start:e.locator.byte_end].decode("utf-8") == e.snippet for e in result.evidences)
+    print(f"RegexExtractor.extract: {extract_s:.2f}s, {len(result.evidences)} evidences, byte offsets slice back to the snippet: {ok}")
+
+if __name__ == "__main__":
+    main()
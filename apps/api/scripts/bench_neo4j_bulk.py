@@ -0,0 +1,69 @@
+"""
+Benchmark: Neo4jGraphService bulk writes against a local Neo4j (NEO4J_URI,
+NEO4J_USER, NEO4J_PASSWORD).
+
+Writes --nodes assets and --edges random relationships under a throwaway
+solution_id, first with upsert_nodes_bulk / upsert_relationships_bulk (UNWIND
+batches of NEO4J_BATCH_SIZE rows) and then, for the first --single rows only,
+with one upsert_node / upsert_relationship call per row, and reports rows/s.
+The bench solution is deleted at the end.
+
+Usage (from apps/api):
+    python scripts/bench_neo4j_bulk.py --nodes 20000 --edges 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.services.graph import Neo4jGraphService
+
+def rate(label: str, rows: int, elapsed: float):
+    print(f"{label:<28} {rows:>8} rows {elapsed:>8.2f}s {rows / elapsed:>10.0f} rows/s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--edges", type=int, default=100000)
+    parser.add_argument("--single", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    solution_id = f"bench-{uuid.uuid4()}"
+    nodes = [{"id": f"{solution_id}:{i}", "name": f"asset_{i}", "type": "TABLE", "solution_id": solution_id}
+             for i in range(args.nodes)]
+    edges = [{"source_id": nodes[rng.randrange(args.nodes)]["id"], "target_id": nodes[rng.randrange(args.nodes)]["id"]}
+             for _ in range(args.edges)]
+
+    service = Neo4jGraphService()
+    print("\n--- Neo4j Bulk Write Benchmark ---")
+    print(f"uri={settings.NEO4J_URI} batch={settings.NEO4J_BATCH_SIZE} nodes={args.nodes} edges={args.edges}")
+    try:
+        start = time.perf_counter()
+        service.upsert_nodes_bulk("Asset", nodes)
+        rate("nodes (bulk)", len(nodes), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        service.upsert_relationships_bulk("READS_FROM", edges)
+        rate("edges (bulk)", len(edges), time.perf_counter() - start)
+
+        single = edges[:args.single]
+        start = time.perf_counter()
+        for row in single:
+            service.upsert_relationship({"id": row["source_id"]}, {"id": row["target_id"]}, "WRITES_TO")
+        rate("edges (one call per row)", len(single), time.perf_counter() - start)
+    finally:
+        service.delete_solution_nodes(solution_id)
+        service.close()
+
+if __name__ == "__main__":
+    main()
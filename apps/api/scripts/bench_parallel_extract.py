@@ -0,0 +1,97 @@
+"""
+Benchmark: native extraction (SSIS deep + sqlglot) in one process vs ParallelExtractor.
+
+Writes --files packages/scripts: .dtsx built from test_data/test_logic.dtsx
+(its Data Flow repeated up to --dtsx-kb) and T-SQL scripts with INSERT/SELECT
+batches. Times ParallelExtractor.map with each --processes value (1 = inline,
+same as the serial loop), checks every run produced the same nodes/edges, and
+reports the size of the worker -> parent payload (pickle protocol 5 vs JSON).
+
+Usage (from apps/api):
+    python scripts/bench_parallel_extract.py --files 200 --processes 1,4,8
+"""
+import argparse
+import json
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.parallel_extract import ParallelExtractor, extract_native
+
+FIXTURE = Path(__file__).parent.parent / "test_data" / "test_logic.dtsx"
+
+def build_files(root: str, n_files: int, dtsx_kb: int):
+    fixture = FIXTURE.read_text(encoding="utf-8")
+    data_flow = re.search(r"( *<DTS:Executable DTS:ObjectName=\"MyDataFlowTask\".*?\n    </DTS:Executable>\n)", fixture, re.S).group(1)
+    paths = []
+    for i in range(n_files):
+        if i % 2 == 0:
+            path = os.path.join(root, f"package_{i:05d}.dtsx")
+            blocks, size, j = [], 0, 0
+            while size < dtsx_kb * 1024:
+                block = data_flow.replace("Package\\DFT", f"Package\\DFT{j}").replace("MyDataFlowTask", f"DataFlow_{j}")
+                blocks.append(block)
+                size += len(block)
+                j += 1
+            text = ('<?xml version="1.0"?>\n<DTS:Executable xmlns:DTS="www.microsoft.com/SqlServer/Dts" '
+                    f'DTS:ObjectName="Package_{i}">\n  <DTS:Executables>\n' + "".join(blocks) + "  </DTS:Executables>\n</DTS:Executable>\n")
+        else:
+            path = os.path.join(root, f"load_{i:05d}.sql")
+            text = "\nGO\n".join(
+                f"INSERT INTO stage.t_{i}_{k} (id, name) SELECT c.id, UPPER(c.name) FROM dbo.customers c "
+                f"JOIN dbo.orders o ON o.customer_id = c.id WHERE o.total > {k}"
+                for k in range(60))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        paths.append(path)
+    return paths
+
+def shape(extraction) -> tuple:
+    data = extraction.data or {}
+    return (extraction.file_path, extraction.success, len(data.get("nodes", [])), len(data.get("edges", [])))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=200)
+    parser.add_argument("--dtsx-kb", type=int, default=512)
+    parser.add_argument("--processes", default="1,4,8")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_parallel_extract_")
+    try:
+        paths = build_files(root, args.files, args.dtsx_kb)
+        print("\n--- Parallel Native Extraction Benchmark ---")
+        print(f"files={len(paths)} (half .dtsx ~{args.dtsx_kb}KB, half .sql), cores={os.cpu_count()}")
+        print(f"{'processes':>9} {'seconds':>8} {'files/s':>8} {'speedup':>8}")
+
+        baseline, expected = None, None
+        for processes in [int(p) for p in args.processes.split(",")]:
+            start = time.perf_counter()
+            with ParallelExtractor(processes) as extractor:
+                shapes = [shape(e) for e in extractor.map((p, None) for p in paths)]
+            elapsed = time.perf_counter() - start
+            expected = expected or shapes
+            assert shapes == expected, "results differ between runs"
+            baseline = baseline or elapsed
+            print(f"{processes:>9} {elapsed:>8.2f} {len(paths) / elapsed:>8.1f} {baseline / elapsed:>7.1f}x")
+        print(f"same results in every run: True ({sum(s[1] for s in expected)}/{len(expected)} extracted)")
+
+        # Worker -> parent payload for one batch
+        batch = [extract_native(p) for p in paths[:8]]
+        pickled = len(pickle.dumps(batch, protocol=5))
+        as_json = len(json.dumps([e.__dict__ for e in batch], default=str))
+        print(f"payload per 8-file batch: pickle5 {pickled / 1024:.0f}KB, json {as_json / 1024:.0f}KB")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
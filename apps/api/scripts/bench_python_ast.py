@@ -0,0 +1,146 @@
+"""
+Benchmark: routing of Python scripts with the AST extractor.
+
+Generates --files scripts: Airflow DAGs (operators wired with >>, chain, set_upstream),
+pandas/Spark jobs with static table names and SQL literals, jobs building queries
+with f-strings, and scripts with dynamic table names / exec (what still needs the LLM).
+Reports the planner routing split (before: every .py was LLM_ONLY), the estimated
+LLM cost/time (Estimator) before and after, and PythonAstExtractor time per file.
+
+Usage (from apps/api):
+    python scripts/bench_python_ast.py --files 2000
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.models.planning import Strategy
+from app.services.estimator import Estimator
+from app.services.planner import PlannerService
+from app.services.extractors import sql_glot
+from app.services.extractors.python_ast import PythonAstExtractor
+
+def airflow_dag(i: int) -> str:
+    return f'''from datetime import datetime
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from airflow.providers.microsoft.mssql.operators.mssql import MsSqlOperator
+from airflow.models.baseoperator import chain
+
+def transform():
+    pass
+
+with DAG("dag_{i}", start_date=datetime(2024, 1, 1), schedule="@daily") as dag:
+    stage = MsSqlOperator(task_id="stage", sql="INSERT INTO stage.orders_{i} SELECT * FROM dbo.orders WHERE day = '{{{{ ds }}}}'")
+    clean = PythonOperator(task_id="clean", python_callable=transform)
+    load = MsSqlOperator(task_id="load", sql="MERGE INTO dw.fact_orders t USING stage.orders_{i} s ON t.id = s.id WHEN MATCHED THEN UPDATE SET t.total = s.total;")
+    audit = PythonOperator(task_id="audit", python_callable=transform)
+    notify = PythonOperator(task_id="notify", python_callable=transform)
+    stage >> clean >> [load, audit]
+    notify.set_upstream(load)
+    chain(audit, notify)
+'''
+
+def pandas_job(i: int) -> str:
+    return f'''import pandas as pd
+from sqlalchemy import create_engine, text
+
+ENGINE = create_engine("mssql+pyodbc://dsn")
+SOURCE = "sales.customers_{i}"
+
+def run():
+    customers = pd.read_sql_table(SOURCE, ENGINE)
+    orders = pd.read_sql("SELECT o.id, o.total FROM sales.orders o JOIN sales.items t ON t.order_id = o.id", ENGINE)
+    df = customers.merge(orders, on="id")
+    df.to_sql("customer_totals_{i}", ENGINE, schema="mart", if_exists="replace")
+    with ENGINE.begin() as conn:
+        conn.execute(text("DELETE FROM mart.stale_{i} WHERE loaded < GETDATE() - 7"))
+
+if __name__ == "__main__":
+    run()
+'''
+
+def fstring_job(i: int) -> str:
+    return f'''from pyspark.sql import SparkSession
+
+spark = SparkSession.builder.getOrCreate()
+
+def run(day, region):
+    events = spark.read.table("lake.events_{i}")
+    spark.sql(f"INSERT INTO lake.daily_{i} SELECT * FROM lake.events_{i} WHERE day = '{{day}}'")
+    spark.sql(f"SELECT * FROM lake.regions WHERE region = '{{region}}'")
+    events.write.saveAsTable("lake.events_copy_{i}")
+'''
+
+def dynamic_job(i: int) -> str:
+    return f'''import importlib
+import pandas as pd
+
+def run(engine, config):
+    module = importlib.import_module(config["plugin"])
+    for table in config["tables"]:
+        df = pd.read_sql_table(table, engine)
+        df.to_sql(config["target"] + "_{i}", engine)
+    exec(config["post_hook"])
+'''
+
+def build_corpus(n_files: int):
+    kinds = [("airflow", airflow_dag), ("pandas", pandas_job), ("fstring", fstring_job), ("dynamic", dynamic_job)]
+    return [(f"jobs/{kinds[i % 4][0]}_{i:05d}.py", kinds[i % 4][1](i)) for i in range(n_files)]
+
+def totals(files, strategies):
+    cost = elapsed = 0.0
+    for (path, content), strategy in zip(files, strategies):
+        est = Estimator.estimate(len(content.encode("utf-8")), strategy)
+        cost += est["cost_usd"]
+        elapsed += est["time_seconds"]
+    return cost, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000)
+    args = parser.parse_args()
+
+    files = build_corpus(args.files)
+    extractor = PythonAstExtractor()
+    sql_glot.print = lambda *a, **k: None # parse error lines
+
+    start = time.perf_counter()
+    confidences = [extractor.analyze(content).confidence for _, content in files]
+    analyze_s = time.perf_counter() - start
+    strategies = [PlannerService._python_strategy(c) for c in confidences]
+
+    start = time.perf_counter()
+    edges = Counter()
+    for path, content in files:
+        for e in extractor.extract(path, content).edges:
+            edges[e.edge_type] += 1
+    extract_s = time.perf_counter() - start
+
+    by_kind = {}
+    for (path, _), strategy, confidence in zip(files, strategies, confidences):
+        by_kind.setdefault(path.split("/")[1].split("_")[0], Counter())[(strategy.value, confidence)] += 1
+
+    before = totals(files, [Strategy.LLM_ONLY] * len(files))
+    after = totals(files, strategies)
+
+    print("\n--- Python AST Extractor Benchmark ---")
+    print(f"files={len(files)}")
+    for kind, counter in by_kind.items():
+        print(f"  {kind:<8} " + ", ".join(f"{s} (confidence {c}): {n}" for (s, c), n in sorted(counter.items())))
+    split = Counter(s.value for s in strategies)
+    print(f"routing: " + ", ".join(f"{s}={n}" for s, n in sorted(split.items())) + f" (before: LLM_ONLY={len(files)})")
+    print(f"estimated LLM cost: ${before[0]:.2f} -> ${after[0]:.2f}; estimated time: {before[1]:.0f}s -> {after[1]:.0f}s")
+    print(f"analyze (planner): {analyze_s / len(files) * 1000:.2f} ms/file; "
+          f"extract: {extract_s / len(files) * 1000:.2f} ms/file")
+    print("edges: " + ", ".join(f"{t}={n}" for t, n in sorted(edges.items())))
+
+if __name__ == "__main__":
+    main()
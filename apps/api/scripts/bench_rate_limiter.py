@@ -0,0 +1,132 @@
+"""
+Benchmark: ActionRunner under provider throttling, with and without the rate limiter.
+
+A local fake OpenAI-compatible server accepts at most --server-capacity requests
+in flight per model and answers 429 + Retry-After beyond that (like Groq/OpenRouter
+under load). N extractions are run concurrently with arun_action:
+
+- no limiter: every 429 goes straight to the fallback chain (previous behaviour)
+- limiter: AIMD concurrency + Retry-After, retrying the primary before falling back
+
+Usage (from apps/api):
+    python scripts/bench_rate_limiter.py --items 300 --concurrency 64 --server-capacity 8
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+from app.services.rate_limiter import RateLimiterRegistry
+
+class FakeProvider:
+    def __init__(self, latency_ms: float, capacity: int, retry_after: float):
+        self.latency_ms, self.capacity, self.retry_after = latency_ms, capacity, retry_after
+        self.in_flight = Counter()
+        self.served = Counter()
+        self.throttled = Counter()
+
+    def reset(self):
+        self.served.clear(); self.throttled.clear()
+
+    async def completions(self, request):
+        body = await request.json()
+        model = body.get("model")
+        if self.in_flight[model] >= self.capacity:
+            self.throttled[model] += 1
+            return JSONResponse({"error": {"message": "Rate limit exceeded", "code": 429}}, status_code=429,
+                                headers={"Retry-After": str(self.retry_after)})
+        self.in_flight[model] += 1
+        try:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+        finally:
+            self.in_flight[model] -= 1
+        self.served[model] += 1
+        return JSONResponse({
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "{\"nodes\": [], \"edges\": []}"}}],
+            "usage": {"prompt_tokens": 100, "completion_tokens": 20}
+        })
+
+def start_server(provider: FakeProvider) -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    app = Starlette(routes=[Route("/v1/chat/completions", provider.completions, methods=["POST"])])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error", backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+class NullLogger:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+async def run(runner, items: int, concurrency: int):
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with gate:
+            return await runner.arun_action("extract_strict", {"file_path": f"f{i}.sql", "content": f"SELECT {i}"}, {})
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[one(i) for i in range(items)])
+    elapsed = time.perf_counter() - start
+    await runner.llm_service.aclose()
+    return results, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--server-capacity", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    args = parser.parse_args()
+
+    provider = FakeProvider(args.latency_ms, args.server_capacity, args.retry_after)
+    port = start_server(provider)
+    settings.OPENROUTER_BASE_URL = f"http://127.0.0.1:{port}/v1"
+    settings.OPENROUTER_API_KEY = "bench"
+    settings.LLM_MAX_CONCURRENCY_OPENROUTER = args.concurrency
+    settings.EXTRACTION_CACHE_ENABLED = False
+
+    from app.actions import ActionRunner
+
+    scenarios = [
+        ("no limiter", RateLimiterRegistry({"max_throttle_retries": 0, "max_concurrency": 10_000, "initial_concurrency": 10_000})),
+        ("aimd limiter", RateLimiterRegistry({"max_concurrency": args.concurrency})),
+    ]
+    print("\n--- Rate Limiter Benchmark ---")
+    print(f"items={args.items} client_concurrency={args.concurrency} server_capacity={args.server_capacity}/model "
+          f"latency={args.latency_ms}ms retry_after={args.retry_after}s")
+    print(f"{'scenario':<13} {'seconds':>8} {'items/s':>8} {'primary':>8} {'fallback':>9} {'failed':>7} {'429s':>6}")
+    for label, registry in scenarios:
+        provider.reset()
+        runner = ActionRunner(NullLogger())
+        runner.rate_limiter = registry
+        results, elapsed = asyncio.run(run(runner, args.items, args.concurrency))
+        ok = [r for r in results if r.success]
+        fallback = sum(1 for r in ok if r.fallback_used)
+        print(f"{label:<13} {elapsed:>8.2f} {len(ok) / elapsed:>8.1f} {len(ok) - fallback:>8} {fallback:>9} "
+              f"{len(results) - len(ok):>7} {sum(provider.throttled.values()):>6}")
+        stats = {k: v["concurrency_limit"] for k, v in registry.stats().items()}
+        print(f"{'':<13} final concurrency limits: {stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark: SqlGlotExtractor over a SQL corpus with heavy duplication.
+
+Generates --files scripts: T-SQL migrations (GO batches, [brackets], procedures)
+and PostgreSQL ones ($$ functions, SERIAL, ::casts), where most statements come
+from a shared pool of --unique statements (the same DDL/DML repeated across
+migration files), and compares:
+
+- legacy: every GO batch parsed with read="tsql", re-parsed with "postgres" on any error (previous behaviour)
+- detect: dialect picked once per file, statement split, no cache
+- cache: same + statement cache (in memory), then a second run on a fresh process-like
+  cache warmed from the persisted SQLite file
+
+Reports seconds, sqlglot.parse calls, and whether the (file, table, relation) sets match.
+
+Usage (from apps/api):
+    python scripts/bench_sql_parse_cache.py --files 3000 --unique 300
+"""
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import sqlglot
+from app.config import settings
+from app.services import sql_parse_cache
+from app.services.extractors import sql_glot
+from app.services.extractors.sql_glot import SqlGlotExtractor
+
+def tsql_statement(i: int) -> str:
+    kind = i % 4
+    if kind == 0:
+        return (f"CREATE TABLE [dbo].[t_{i}] (\n  [id] INT IDENTITY(1,1) NOT NULL,\n  [name] NVARCHAR(100) NULL,\n"
+                f"  [created] DATETIME2 DEFAULT GETDATE()\n);")
+    if kind == 1:
+        return (f"INSERT INTO stage.s_{i} (id, name)\nSELECT TOP 100 c.id, UPPER(c.name)\nFROM dbo.customers c\n"
+                f"JOIN dbo.orders o ON o.customer_id = c.id\nWHERE o.total > {i};")
+    if kind == 2:
+        return (f"WITH recent AS (SELECT id FROM dbo.orders WHERE created > DATEADD(day, -{i % 30}, GETDATE()))\n"
+                f"UPDATE dbo.customers SET last_order = GETDATE() WHERE id IN (SELECT id FROM recent);")
+    return (f"CREATE PROCEDURE dbo.load_{i} AS\nBEGIN\n  SET NOCOUNT ON;\n  DELETE FROM stage.s_{i};\n"
+            f"  INSERT INTO stage.s_{i} SELECT * FROM dbo.src_{i};\nEND")
+
+def postgres_statement(i: int) -> str:
+    kind = i % 3
+    if kind == 0:
+        return f"CREATE TABLE public.t_{i} (id SERIAL PRIMARY KEY, payload JSONB, created TIMESTAMPTZ DEFAULT now());"
+    if kind == 1:
+        return (f"INSERT INTO public.t_{i} (payload) SELECT row_to_json(c)::jsonb FROM public.customers c "
+                f"WHERE c.name ILIKE 'a%' ON CONFLICT DO NOTHING;")
+    return (f"CREATE OR REPLACE FUNCTION public.f_{i}() RETURNS void AS $$\nBEGIN\n"
+            f"  INSERT INTO public.audit SELECT * FROM public.t_{i};\nEND;\n$$ LANGUAGE plpgsql;")
+
+def build_corpus(root: str, n_files: int, n_unique: int, seed: int = 7):
+    rnd = random.Random(seed)
+    pool_tsql = [tsql_statement(i) for i in range(n_unique)]
+    pool_pg = [postgres_statement(i) for i in range(n_unique // 3)]
+    for f in range(n_files):
+        postgres = f % 5 == 0
+        statements = []
+        for k in range(12):
+            if rnd.random() < 0.9:
+                statements.append(rnd.choice(pool_pg if postgres else pool_tsql))
+            else: # File specific
+                statements.append((postgres_statement if postgres else tsql_statement)(n_unique + f * 12 + k))
+        if postgres:
+            text = "\n\n".join(statements)
+        else:
+            text = "\n".join(f"-- step {k}\n{s}\nGO" for k, s in enumerate(statements))
+        with open(os.path.join(root, f"migration_{f:05d}.sql"), "w", encoding="utf-8") as fh:
+            fh.write(text)
+
+class ParseCounter:
+    def __init__(self):
+        self.calls = 0
+        self._parse = sqlglot.parse
+
+    def __enter__(self):
+        def counted(*args, **kwargs):
+            self.calls += 1
+            return self._parse(*args, **kwargs)
+        sqlglot.parse = counted
+        return self
+
+    def __exit__(self, *exc):
+        sqlglot.parse = self._parse
+
+def legacy_extract(extractor: SqlGlotExtractor, file_path: str, content: str):
+    # Previous SqlGlotExtractor.extract parse loop (same node/edge/evidence building)
+    nodes, edges, evidences = [], [], []
+    clean_content = re.sub(r'^\s*#.*$', '', content, flags=re.MULTILINE)
+    for batch in re.split(r'^\s*GO\s*$', clean_content, flags=re.MULTILINE | re.IGNORECASE):
+        if not batch.strip():
+            continue
+        try:
+            for stmt in sqlglot.parse(batch, read="tsql"):
+                extractor._emit_refs(extractor._statement_refs(stmt), file_path, "file", nodes, edges, evidences)
+        except Exception:
+            try:
+                for stmt in sqlglot.parse(batch, read="postgres"):
+                    extractor._emit_refs(extractor._statement_refs(stmt), file_path, "file", nodes, edges, evidences)
+            except Exception:
+                continue
+    names = {n.node_id: n.name for n in nodes}
+    return {(file_path, names[e.to_node_id], e.edge_type) for e in edges}
+
+def current_extract(extractor: SqlGlotExtractor, file_path: str, content: str):
+    result = extractor.extract(file_path, content)
+    names = {n.node_id: n.name for n in result.nodes}
+    return {(file_path, names[e.to_node_id], e.edge_type) for e in result.edges}
+
+def run(label: str, fn, files, extractor):
+    out = set()
+    with ParseCounter() as counter:
+        start = time.perf_counter()
+        for path, content in files:
+            out |= fn(extractor, path, content)
+        elapsed = time.perf_counter() - start
+    return label, elapsed, counter.calls, out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=3000)
+    parser.add_argument("--unique", type=int, default=300)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bench_sql_parse_")
+    try:
+        build_corpus(root, args.files, args.unique)
+        files = []
+        for name in sorted(os.listdir(root)):
+            with open(os.path.join(root, name), encoding="utf-8") as fh:
+                files.append((name, fh.read()))
+        extractor = SqlGlotExtractor()
+        sql_glot.print = lambda *a, **k: None # parse error lines
+
+        rows = [run("legacy tsql+retry", legacy_extract, files, extractor)]
+
+        settings.SQL_PARSE_CACHE_MAX_ENTRIES = 0
+        sql_parse_cache._sql_parse_cache = None
+        rows.append(run("detect, no cache", current_extract, files, extractor))
+
+        settings.SQL_PARSE_CACHE_MAX_ENTRIES = 50_000
+        settings.SQL_PARSE_CACHE_PERSIST = True
+        settings.CACHE_DIR = os.path.join(root, ".cache")
+        sql_parse_cache._sql_parse_cache = None
+        rows.append(run("detect + cache", current_extract, files, extractor))
+        sql_parse_cache._sql_parse_cache = None # New process: empty memory, persisted SQLite
+        rows.append(run("warm persisted cache", current_extract, files, extractor))
+
+        print("\n--- SQL Parse Cache Benchmark ---")
+        print(f"files={len(files)} unique pooled statements={args.unique}")
+        print(f"{'run':<22} {'seconds':>8} {'parse calls':>12} {'edges':>8} {'speedup':>8}")
+        baseline = rows[0][1]
+        for label, elapsed, calls, out in rows:
+            print(f"{label:<22} {elapsed:>8.2f} {calls:>12} {len(out):>8} {baseline / elapsed:>7.1f}x")
+        legacy, current = rows[0][3], rows[1][3]
+        print(f"same (file, table, relation) as legacy: {len(legacy & current)}/{len(legacy | current)}; "
+              f"cached runs identical to uncached: {rows[1][3] == rows[2][3] == rows[3][3]}")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark: SSIS deep extraction, full tree (SSISDeepExtractor) vs iterparse (SSISStreamingExtractor),
+from the decoded str (extract_deep) and from the binary file (extract_deep_stream, what the
+pipeline uses for large packages: "file" includes what the other modes load beforehand).
+
+Scales test_data/test_logic.dtsx up to --size-mb: its Data Flow task is repeated
+with unique refIds (every 10th one inside a Sequence Container) next to Execute
+SQL tasks carrying large statements, like a real 50-100MB package. Each extractor
+runs in its own process; reports time, peak RSS above the loaded content, and
+whether both produced the same CIRPackage (ids normalized).
+
+Usage (from apps/api):
+    python scripts/bench_ssis_stream.py --size-mb 64
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+FIXTURE = Path(__file__).parent.parent / "test_data" / "test_logic.dtsx"
+
+def build_package(path: str, size_mb: int):
+    fixture = FIXTURE.read_text(encoding="utf-8")
+    data_flow = re.search(r"( *<DTS:Executable DTS:ObjectName=\"MyDataFlowTask\".*?\n    </DTS:Executable>\n)", fixture, re.S).group(1)
+    sql_task = (
+        '    <DTS:Executable DTS:ObjectName="LoadStage_{i}" DTS:ExecutableType="Microsoft.ExecuteSQLTask">\n'
+        '      <DTS:ObjectData><SQLTask:SqlTaskData xmlns:SQLTask="www.microsoft.com/sqlserver/dts/tasks/sqltask" '
+        'SQLTask:SqlStatementSource="' + "INSERT INTO stage.t_{i} SELECT * FROM dbo.src_{i}; " * 40 + '"/></DTS:ObjectData>\n'
+        '    </DTS:Executable>\n'
+    )
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0"?>\n<DTS:Executable xmlns:DTS="www.microsoft.com/SqlServer/Dts" DTS:ObjectName="ScaledPackage">\n  <DTS:Executables>\n')
+        i = 0
+        while written < target:
+            block = data_flow.replace("Package\\DFT", f"Package\\DFT{i}").replace("MyDataFlowTask", f"DataFlow_{i}")
+            if i % 10 == 0:
+                block = (f'    <DTS:Executable DTS:ObjectName="Sequence_{i}" DTS:ExecutableType="STOCK:SEQUENCE">\n'
+                         f'      <DTS:Executables>\n{block}      </DTS:Executables>\n    </DTS:Executable>\n')
+            block += sql_task.format(i=i)
+            f.write(block)
+            written += len(block)
+            i += 1
+        f.write("  </DTS:Executables>\n</DTS:Executable>\n")
+
+def digest(package) -> str:
+    # Same package modulo the random uuids
+    ids = {}
+    data = package.model_dump()
+    text = json.dumps(data, sort_keys=True)
+    for node_id in [data["package_id"]] + [n["id"] for n in data["nodes"]]:
+        ids.setdefault(node_id, f"n{len(ids)}")
+    text = re.sub(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", lambda m: ids.get(m.group(0), "?"), text)
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def worker(mode: str, path: str):
+    from app.services.extractors import ssis_stream
+    from app.services.extractors.ssis_deep import SSISDeepExtractor
+    from app.services.extractors.ssis_stream import SSISStreamingExtractor
+    ssis_stream.STREAMING_MIN_CHARS = 0
+
+    if mode == "file":
+        # Pipeline path for large packages: parsed from the binary stream, no str copy at all
+        base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            package = SSISStreamingExtractor().extract_deep_stream(path, f)
+        elapsed = time.perf_counter() - start
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            content = f.read()
+        base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        extractor = SSISDeepExtractor() if mode == "tree" else SSISStreamingExtractor()
+        start = time.perf_counter()
+        package = extractor.extract_deep(path, content)
+        elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "seconds": elapsed,
+        "rss_mb": (peak_kb - base_kb) / 1024,
+        "nodes": len(package.nodes),
+        "flows": len(package.data_flows),
+        "transforms": len(package.transformations),
+        "digest": digest(package),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        return worker(*args.worker)
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_ssis_"), "scaled.dtsx")
+    build_package(path, args.size_mb)
+    print("\n--- SSIS Streaming Extractor Benchmark ---")
+    print(f"package={os.path.getsize(path) / 1024 / 1024:.0f}MB (test_logic.dtsx scaled)")
+    print(f"{'extractor':<10} {'seconds':>8} {'peak RSS MB':>12} {'nodes':>7} {'flows':>6} {'transforms':>11} {'digest':>17}")
+    digests = set()
+    for mode in ("tree", "stream", "file"):
+        out = subprocess.run([sys.executable, __file__, "--worker", mode, path], capture_output=True, text=True, check=True)
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        digests.add(r["digest"])
+        print(f"{mode:<10} {r['seconds']:>8.2f} {r['rss_mb']:>12.0f} {r['nodes']:>7} {r['flows']:>6} {r['transforms']:>11} {r['digest']:>17}")
+    print("same CIRPackage:", len(digests) == 1)
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
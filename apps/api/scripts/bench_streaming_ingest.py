@@ -0,0 +1,141 @@
+"""
+Benchmark: artifact ingestion, download + extractall vs streaming ZIP ingestion.
+
+Builds a ZIP with --files small SQL scripts plus --skipped-mb of incompressible
+build output / backups (bin/, *.bak) that the PolicyEngine skips, serves it from
+a local fake Supabase Storage endpoint and times ingest + plan + reading the
+PROCESS items (what the orchestrator does before calling the LLM):
+
+- extract: whole object downloaded in memory, written, extractall, os.walk (previous behaviour)
+- stream: chunked download to disk, inventory from the ZIP central directory,
+          only PROCESS members decompressed (hash in the planner, read_text per item)
+
+Reports wall time, bytes written to disk and peak Python heap (tracemalloc).
+
+Usage (from apps/api):
+    python scripts/bench_streaming_ingest.py --files 2000 --skipped-mb 128
+"""
+import argparse
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import zipfile
+from pathlib import Path
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "bench")
+sys.path.append(str(Path(__file__).parent.parent))
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import FileResponse
+from starlette.routing import Route
+
+from fake_supabase import FakeSupabase
+from app.config import settings
+from app.services.archive import DirectorySource
+from app.services.storage import StorageService, BUCKET_NAME
+
+def build_zip(zip_path: str, n_files: int, skipped_mb: int):
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for i in range(n_files):
+            zf.writestr(f"solution/sql/proc_{i:05d}.sql",
+                        f"CREATE PROCEDURE dbo.proc_{i} AS\nINSERT INTO dbo.t_{i} SELECT * FROM dbo.src_{i};\nGO\n" * 20)
+        block = 8 * 1024 * 1024
+        for i in range(max(1, skipped_mb * 1024 * 1024 // block)):
+            name = f"solution/bin/Release/package_{i}.dll" if i % 2 else f"backups/dw_{i}.bak"
+            zf.writestr(name, os.urandom(block), compress_type=zipfile.ZIP_STORED)
+
+def start_server(zip_path: str) -> int:
+    async def download(request):
+        return FileResponse(zip_path)
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    app = Starlette(routes=[Route(f"/storage/v1/object/{BUCKET_NAME}/{{path:path}}", download)])
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+def disk_usage(path: str) -> int:
+    total = 0
+    for dirpath, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(dirpath, name))
+    return total
+
+def extract_ingest(storage: StorageService, storage_path: str, upload_dir: str):
+    # Previous StorageService.download_and_extract: whole object in memory, then extractall
+    url = f"{settings.SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}/{storage_path}"
+    local_zip_path = os.path.join(upload_dir, os.path.basename(storage_path))
+    extract_dir = os.path.splitext(local_zip_path)[0]
+    with open(local_zip_path, "wb+") as f:
+        f.write(httpx.get(url).content)
+    with zipfile.ZipFile(local_zip_path, "r") as zip_ref:
+        zip_ref.extractall(extract_dir)
+    written = os.path.getsize(local_zip_path) + disk_usage(extract_dir)
+    os.remove(local_zip_path)
+    return DirectorySource(extract_dir), written
+
+def stream_ingest(storage: StorageService, storage_path: str, upload_dir: str):
+    source = storage.open_artifact(storage_path)
+    return source, os.path.getsize(source.zip_path)
+
+def run_case(ingest, storage_path: str):
+    from app.services.planner import PlannerService
+
+    upload_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    settings.UPLOAD_DIR = upload_dir
+    db = FakeSupabase()
+    job_id = str(uuid.uuid4())
+    db.tables["job_run"].append({"job_id": job_id, "status": "running"})
+    storage = StorageService()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    source, written = ingest(storage, storage_path, upload_dir)
+    plan_id = PlannerService(db).create_plan(job_id, source)
+    items = [i for i in db.tables["job_plan_item"] if i["plan_id"] == plan_id and i["enabled"]]
+    chars = sum(len(source.read_text(i["path"])) for i in items)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    source.close()
+    shutil.rmtree(upload_dir, ignore_errors=True)
+    return elapsed, written, peak, len(items), chars
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--skipped-mb", type=int, default=128, help="incompressible build output / backups in the ZIP")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_artifact_")
+    zip_path = os.path.join(workdir, "solution.zip")
+    build_zip(zip_path, args.files, args.skipped_mb)
+    settings.SUPABASE_URL = f"http://127.0.0.1:{start_server(zip_path)}"
+    storage_path = f"{uuid.uuid4()}/solution.zip"
+
+    mb = 1024 * 1024
+    print("\n--- Streaming Ingestion Benchmark ---")
+    print(f"zip={os.path.getsize(zip_path) / mb:.0f}MB files={args.files} skipped={args.skipped_mb}MB")
+    print(f"{'mode':<8} {'seconds':>8} {'disk MB':>8} {'peak heap MB':>13} {'items':>6} {'chars read':>11}")
+    for label, ingest in (("extract", extract_ingest), ("stream", stream_ingest)):
+        elapsed, written, peak, items, chars = run_case(ingest, storage_path)
+        print(f"{label:<8} {elapsed:>8.2f} {written / mb:>8.0f} {peak / mb:>13.1f} {items:>6} {chars:>11}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+In-memory stand-in for the supabase-py client used by the benchmark scripts.
+
+Implements the subset of the PostgREST query builder the services use
+(select/insert/update/upsert/delete + eq/neq/in_/gt/gte/lt/lte/order/limit/range/single)
+and counts every execute() as one round trip. Optional latency simulates the network.
+"""
+import copy
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+@dataclass
+class FakeResponse:
+    data: Any
+    count: Optional[int] = None
+
+class FakeSupabase:
+    def __init__(self, latency_ms: float = 0.0):
+        self.tables: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        self.latency_ms = latency_ms
+        self.round_trips = 0
+        self.calls_by_table: Dict[str, int] = defaultdict(int)
+        self.rpc_handlers: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def table(self, name: str) -> "FakeQuery":
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Optional[Dict[str, Any]] = None) -> "FakeRpc":
+        return FakeRpc(self, fn, params or {})
+
+    def reset_counters(self):
+        self.round_trips = 0
+        self.calls_by_table.clear()
+
+    def _tick(self, table: str):
+        with self._lock:
+            self.round_trips += 1
+            self.calls_by_table[table] += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+
+class FakeRpc:
+    def __init__(self, db: FakeSupabase, fn: str, params: Dict[str, Any]):
+        self.db, self.fn, self.params = db, fn, params
+
+    def execute(self) -> FakeResponse:
+        self.db._tick(f"rpc:{self.fn}")
+        handler = self.db.rpc_handlers.get(self.fn)
+        return FakeResponse(data=handler(self.db, **self.params) if handler else None)
+
+class FakeQuery:
+    def __init__(self, db: FakeSupabase, table: str):
+        self.db = db
+        self.table_name = table
+        self.op = "select"
+        self.columns = "*"
+        self.payload: Any = None
+        self.filters: List[Any] = []
+        self.order_by: List[Any] = []
+        self.limit_n: Optional[int] = None
+        self.offset_n: int = 0
+        self.single_row = False
+        self.count_mode: Optional[str] = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+
+    # --- Operations ---
+    def select(self, columns: str = "*", count: Optional[str] = None):
+        self.columns, self.count_mode = columns, count
+        return self
+
+    def insert(self, rows):
+        self.op, self.payload = "insert", rows
+        return self
+
+    def update(self, data):
+        self.op, self.payload = "update", data
+        return self
+
+    def upsert(self, rows, on_conflict: str = "", ignore_duplicates: bool = False, **kwargs):
+        self.op, self.payload = "upsert", rows
+        self.on_conflict, self.ignore_duplicates = on_conflict, ignore_duplicates
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    # --- Filters ---
+    def eq(self, col, val): self.filters.append(lambda r: r.get(col) == val); return self
+    def neq(self, col, val): self.filters.append(lambda r: r.get(col) != val); return self
+    def gt(self, col, val): self.filters.append(lambda r: r.get(col) is not None and r.get(col) > val); return self
+    def gte(self, col, val): self.filters.append(lambda r: r.get(col) is not None and r.get(col) >= val); return self
+    def lt(self, col, val): self.filters.append(lambda r: r.get(col) is not None and r.get(col) < val); return self
+    def lte(self, col, val): self.filters.append(lambda r: r.get(col) is not None and r.get(col) <= val); return self
+    def is_(self, col, val):
+        target = None if val in (None, "null") else val
+        self.filters.append(lambda r: r.get(col) is target)
+        return self
+
+    def in_(self, col, values):
+        values = set(values)
+        self.filters.append(lambda r: r.get(col) in values)
+        return self
+
+    def order(self, col, desc: bool = False, **kwargs):
+        self.order_by.append((col, desc))
+        return self
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def range(self, start, end):
+        self.offset_n, self.limit_n = start, end - start + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    # --- Execution ---
+    def _matches(self, row) -> bool:
+        return all(f(row) for f in self.filters)
+
+    def _project(self, row):
+        if self.columns.strip() == "*":
+            return copy.deepcopy(row)
+        cols = [c.strip() for c in self.columns.split(",") if c.strip()]
+        return {c: copy.deepcopy(row.get(c)) for c in cols}
+
+    def execute(self) -> FakeResponse:
+        self.db._tick(self.table_name)
+        with self.db._lock:
+            rows = self.db.tables[self.table_name]
+            if self.op == "select":
+                result = [r for r in rows if self._matches(r)]
+                for col, desc in reversed(self.order_by):
+                    result.sort(key=lambda r: (r.get(col) is None, r.get(col)), reverse=desc)
+                count = len(result) if self.count_mode else None
+                if self.offset_n:
+                    result = result[self.offset_n:]
+                if self.limit_n is not None:
+                    result = result[:self.limit_n]
+                data = [self._project(r) for r in result]
+                if self.single_row:
+                    return FakeResponse(data=data[0] if data else None, count=count)
+                return FakeResponse(data=data, count=count)
+
+            if self.op == "insert":
+                payload = self.payload if isinstance(self.payload, list) else [self.payload]
+                inserted = []
+                for row in payload:
+                    row = copy.deepcopy(row)
+                    row.setdefault("id", str(uuid.uuid4()))
+                    rows.append(row)
+                    inserted.append(copy.deepcopy(row))
+                return FakeResponse(data=inserted)
+
+            if self.op == "upsert":
+                payload = self.payload if isinstance(self.payload, list) else [self.payload]
+                keys = [k.strip() for k in (self.on_conflict or "").split(",") if k.strip()]
+                out = []
+                for row in payload:
+                    existing = None
+                    if keys:
+                        existing = next((r for r in rows if all(r.get(k) == row.get(k) for k in keys)), None)
+                    if existing is not None:
+                        # Like PostgREST: resolution=ignore-duplicates returns only the inserted rows
+                        if not self.ignore_duplicates:
+                            existing.update(copy.deepcopy(row))
+                            out.append(copy.deepcopy(existing))
+                    else:
+                        new_row = copy.deepcopy(row)
+                        rows.append(new_row)
+                        out.append(copy.deepcopy(new_row))
+                return FakeResponse(data=out)
+
+            if self.op == "update":
+                updated = []
+                for r in rows:
+                    if self._matches(r):
+                        r.update(copy.deepcopy(self.payload))
+                        updated.append(copy.deepcopy(r))
+                return FakeResponse(data=updated)
+
+            if self.op == "delete":
+                kept, deleted = [], []
+                for r in rows:
+                    (deleted if self._matches(r) else kept).append(r)
+                self.db.tables[self.table_name] = kept
+                return FakeResponse(data=deleted)
+
+        raise ValueError(f"Unsupported operation {self.op}")
@@ -228,8 +228,16 @@ function GraphContent({ id, solution }: { id: string, solution: any }) {
         setGraphLoading(true);
         try {
             const apiUrl = `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/solutions/${id}/graph`;
-            const response = await axios.get(apiUrl);
-            const { nodes: rawNodes, edges: rawEdges } = response.data;
+            // Load the graph in pages (large solutions time out as a single response)
+            const rawNodes: any[] = [];
+            const rawEdges: any[] = [];
+            let cursor: string | null = null;
+            do {
+                const response: any = await axios.get(apiUrl, { params: { limit: 5000, ...(cursor ? { cursor } : {}) } });
+                rawNodes.push(...response.data.nodes);
+                rawEdges.push(...response.data.edges);
+                cursor = response.data.next_cursor;
+            } while (cursor);
 
             // Sort nodes so parents come before children
             const sortedRawNodes = [...rawNodes].sort((a, b) => {
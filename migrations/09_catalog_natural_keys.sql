@@ -0,0 +1,49 @@
+-- 09_catalog_natural_keys.sql
+-- Natural keys for the batched catalog sync (CatalogService bulk upserts).
+-- Existing duplicates are merged into the oldest row before creating the unique indexes.
+
+BEGIN;
+
+-- 1. Merge duplicate assets (same project_id, name_display, asset_type)
+CREATE TEMP TABLE asset_dupes ON COMMIT DROP AS
+SELECT asset_id AS dup_id, keeper_id
+FROM (
+    SELECT asset_id,
+           FIRST_VALUE(asset_id) OVER (
+               PARTITION BY project_id, name_display, asset_type
+               ORDER BY created_at, asset_id
+           ) AS keeper_id
+    FROM asset
+) ranked
+WHERE asset_id <> keeper_id;
+
+UPDATE edge_index e SET from_asset_id = d.keeper_id FROM asset_dupes d WHERE e.from_asset_id = d.dup_id;
+UPDATE edge_index e SET to_asset_id = d.keeper_id FROM asset_dupes d WHERE e.to_asset_id = d.dup_id;
+UPDATE asset a SET parent_asset_id = d.keeper_id FROM asset_dupes d WHERE a.parent_asset_id = d.dup_id;
+DELETE FROM asset a USING asset_dupes d WHERE a.asset_id = d.dup_id;
+
+-- 2. Merge duplicate edges (same project_id, from, to, edge_type)
+CREATE TEMP TABLE edge_dupes ON COMMIT DROP AS
+SELECT edge_id AS dup_id, keeper_id
+FROM (
+    SELECT edge_id,
+           FIRST_VALUE(edge_id) OVER (
+               PARTITION BY project_id, from_asset_id, to_asset_id, edge_type
+               ORDER BY created_at, edge_id
+           ) AS keeper_id
+    FROM edge_index
+) ranked
+WHERE edge_id <> keeper_id;
+
+INSERT INTO edge_evidence (edge_id, evidence_id)
+SELECT d.keeper_id, ee.evidence_id
+FROM edge_evidence ee JOIN edge_dupes d ON ee.edge_id = d.dup_id
+ON CONFLICT DO NOTHING;
+DELETE FROM edge_index e USING edge_dupes d WHERE e.edge_id = d.dup_id;
+
+-- 3. Unique indexes used as ON CONFLICT targets
+CREATE UNIQUE INDEX IF NOT EXISTS uq_asset_natural_key ON asset(project_id, name_display, asset_type);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_edge_natural_key ON edge_index(project_id, from_asset_id, to_asset_id, edge_type);
+CREATE INDEX IF NOT EXISTS idx_evidence_project_hash ON evidence(project_id, hash);
+
+COMMIT;
@@ -0,0 +1,25 @@
+-- 10_solution_manifest.sql
+-- Incremental re-analysis: per-solution file manifest of the last successful run.
+
+-- 1. Manifest (one row per processed file)
+CREATE TABLE IF NOT EXISTS solution_manifest (
+    project_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    path TEXT NOT NULL, -- relative path inside the artifact
+    size_bytes BIGINT,
+    mtime DOUBLE PRECISION,
+    content_hash TEXT, -- sha256 of the file bytes
+    asset_ids JSONB DEFAULT '[]', -- assets produced by this file (provenance for retraction)
+    edge_ids JSONB DEFAULT '[]', -- edges produced by this file
+    job_id UUID REFERENCES job_run(job_id) ON DELETE SET NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (project_id, path)
+);
+
+CREATE INDEX IF NOT EXISTS idx_solution_manifest_project ON solution_manifest(project_id);
+
+ALTER TABLE solution_manifest ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "allow_all" ON solution_manifest;
+CREATE POLICY "allow_all" ON solution_manifest FOR ALL USING (true) WITH CHECK (true);
+
+-- 2. Job analysis mode (full | update | incremental)
+ALTER TABLE job_run ADD COLUMN IF NOT EXISTS analysis_mode TEXT DEFAULT 'full';
@@ -0,0 +1,122 @@
+-- 11_job_queue_leases.sql
+-- Lease-based job queue: claim with SKIP LOCKED, heartbeats, retries with backoff, NOTIFY on new work.
+
+-- 1. Lease / retry columns
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS locked_by TEXT;
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMPTZ;
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS available_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE job_queue ADD COLUMN IF NOT EXISTS max_attempts INT DEFAULT 3;
+
+UPDATE job_queue SET available_at = created_at WHERE available_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_job_queue_claim ON job_queue(status, available_at);
+
+-- 2. Claim: next pending job (or one whose lease expired), atomically, without blocking other workers
+CREATE OR REPLACE FUNCTION claim_job(p_worker_id TEXT, p_lease_seconds INT DEFAULT 120)
+RETURNS SETOF job_queue
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Abandoned leases that already used all their attempts fail for good
+    UPDATE job_queue
+    SET status = 'failed',
+        last_error = COALESCE(last_error, 'lease expired'),
+        locked_until = NULL,
+        updated_at = NOW()
+    WHERE status = 'processing' AND locked_until < NOW() AND attempts >= max_attempts;
+
+    RETURN QUERY
+    UPDATE job_queue q
+    SET status = 'processing',
+        locked_by = p_worker_id,
+        locked_until = NOW() + make_interval(secs => p_lease_seconds),
+        heartbeat_at = NOW(),
+        attempts = q.attempts + 1,
+        updated_at = NOW()
+    WHERE q.id = (
+        SELECT id FROM job_queue
+        WHERE (status = 'pending' AND available_at <= NOW())
+           OR (status = 'processing' AND locked_until < NOW())
+        ORDER BY available_at, created_at
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING q.*;
+END;
+$$;
+
+-- 3. Heartbeat: extend the lease if the worker still owns the job
+CREATE OR REPLACE FUNCTION heartbeat_job(p_id UUID, p_worker_id TEXT, p_lease_seconds INT DEFAULT 120)
+RETURNS BOOLEAN
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    UPDATE job_queue
+    SET locked_until = NOW() + make_interval(secs => p_lease_seconds),
+        heartbeat_at = NOW(),
+        updated_at = NOW()
+    WHERE id = p_id AND locked_by = p_worker_id AND status = 'processing';
+    RETURN FOUND;
+END;
+$$;
+
+-- 4. Release after a failure: retry with exponential backoff (+-20% jitter) or fail when out of attempts.
+-- Returns the new status, or 'lost' if the lease was reclaimed by another worker.
+CREATE OR REPLACE FUNCTION release_job(
+    p_id UUID,
+    p_worker_id TEXT,
+    p_error TEXT,
+    p_backoff_base_seconds DOUBLE PRECISION DEFAULT 10,
+    p_backoff_max_seconds DOUBLE PRECISION DEFAULT 600
+)
+RETURNS TEXT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_job job_queue%ROWTYPE;
+    v_status TEXT;
+    v_delay DOUBLE PRECISION;
+BEGIN
+    SELECT * INTO v_job FROM job_queue WHERE id = p_id FOR UPDATE;
+    IF NOT FOUND OR (p_worker_id IS NOT NULL AND v_job.locked_by IS DISTINCT FROM p_worker_id) THEN
+        RETURN 'lost';
+    END IF;
+
+    IF v_job.attempts < v_job.max_attempts THEN
+        v_status := 'pending';
+        v_delay := LEAST(p_backoff_base_seconds * power(2, GREATEST(v_job.attempts - 1, 0)), p_backoff_max_seconds)
+                   * (0.8 + random() * 0.4);
+    ELSE
+        v_status := 'failed';
+        v_delay := 0;
+    END IF;
+
+    UPDATE job_queue
+    SET status = v_status,
+        last_error = p_error,
+        available_at = NOW() + make_interval(secs => v_delay),
+        locked_by = NULL,
+        locked_until = NULL,
+        updated_at = NOW()
+    WHERE id = p_id;
+    RETURN v_status;
+END;
+$$;
+
+-- 5. Wake up listening workers when work becomes available
+CREATE OR REPLACE FUNCTION notify_job_queue()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF NEW.status = 'pending' THEN
+        PERFORM pg_notify('job_queue', NEW.id::text);
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_job_queue_notify ON job_queue;
+CREATE TRIGGER trg_job_queue_notify
+    AFTER INSERT OR UPDATE OF status ON job_queue
+    FOR EACH ROW EXECUTE FUNCTION notify_job_queue();
@@ -0,0 +1,24 @@
+-- 12_hedged_requests.sql
+-- Hedged LLM requests: record when the first fallback raced the primary and who won.
+
+-- 1. Hedge columns on the per-file audit log
+ALTER TABLE file_processing_log ADD COLUMN IF NOT EXISTS hedged BOOLEAN DEFAULT FALSE;
+ALTER TABLE file_processing_log ADD COLUMN IF NOT EXISTS hedge_winner TEXT; -- primary, fallback, none
+ALTER TABLE file_processing_log ADD COLUMN IF NOT EXISTS hedge_delay_ms INT; -- primary p95 used as delay
+
+CREATE INDEX IF NOT EXISTS idx_file_log_hedged ON file_processing_log(action_name) WHERE hedged;
+
+-- 2. Win rates per action
+CREATE OR REPLACE VIEW hedge_win_rates AS
+SELECT
+    action_name,
+    COUNT(*) AS hedged_calls,
+    COUNT(*) FILTER (WHERE hedge_winner = 'primary') AS primary_wins,
+    COUNT(*) FILTER (WHERE hedge_winner = 'fallback') AS fallback_wins,
+    COUNT(*) FILTER (WHERE hedge_winner = 'none') AS both_failed,
+    ROUND(COUNT(*) FILTER (WHERE hedge_winner = 'fallback')::NUMERIC / NULLIF(COUNT(*), 0), 3) AS fallback_win_rate,
+    ROUND(AVG(hedge_delay_ms)::NUMERIC, 0) AS avg_hedge_delay_ms,
+    ROUND(AVG(latency_ms)::NUMERIC, 0) AS avg_latency_ms
+FROM file_processing_log
+WHERE hedged
+GROUP BY action_name;
@@ -0,0 +1,7 @@
+-- 13_policy_versions.sql
+-- Versioned inventory policy: each plan records the rule set it was built with.
+
+-- 1. Version of the PolicyEngine rule set (config/policy.yml hash + overrides fingerprint)
+ALTER TABLE job_plan ADD COLUMN IF NOT EXISTS policy_version TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_job_plan_policy_version ON job_plan(policy_version);
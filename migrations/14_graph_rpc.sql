@@ -0,0 +1,141 @@
+-- 14_graph_rpc.sql
+-- Server-side graph assembly for SupabaseGraphService: k-hop subgraphs and shortest paths
+-- with recursive CTEs, returning the frontend shape ({nodes: [{id, data}], edges: [{id, source, target, label}]})
+-- as one JSONB value (one round trip, no PostgREST row cap, only the projected fields).
+-- The whole tags JSONB (columns_metadata, transformations...) is opt-in (p_with_tags): by default a node
+-- carries the fields the graph view draws, and columns only once.
+
+-- 1. Covering indexes for the traversal: both directions are index-only lookups
+CREATE INDEX IF NOT EXISTS idx_edge_index_from_cover ON edge_index(from_asset_id) INCLUDE (to_asset_id, edge_id, edge_type);
+CREATE INDEX IF NOT EXISTS idx_edge_index_to_cover ON edge_index(to_asset_id) INCLUDE (from_asset_id, edge_id, edge_type);
+CREATE INDEX IF NOT EXISTS idx_edge_index_project ON edge_index(project_id);
+
+-- 2. Node projection shared by the functions below
+-- (earlier signatures dropped: CREATE OR REPLACE with a new parameter would add an ambiguous overload)
+DROP FUNCTION IF EXISTS graph_node_json(asset, INT);
+DROP FUNCTION IF EXISTS graph_project(UUID);
+DROP FUNCTION IF EXISTS graph_subgraph(UUID, INT, INT);
+DROP FUNCTION IF EXISTS graph_shortest_path(UUID, UUID, INT);
+
+CREATE OR REPLACE FUNCTION graph_node_json(a asset, p_depth INT DEFAULT NULL, p_with_tags BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT jsonb_build_object(
+        'id', a.asset_id,
+        'data', jsonb_build_object(
+            'label', a.name_display,
+            'type', a.asset_type,
+            'system', COALESCE(a.system, 'unknown'),
+            'schema', COALESCE(a.tags->>'schema', ''),
+            'columns', COALESCE(a.tags->'columns', '[]'::jsonb),
+            'summary', COALESCE(NULLIF(a.tags->>'description', ''), a.tags->>'summary', ''),
+            'parentId', COALESCE(a.parent_asset_id::text, a.tags->>'parent_node_id')
+        ) || CASE WHEN p_depth IS NULL THEN '{}'::jsonb ELSE jsonb_build_object('depth', p_depth) END
+          || CASE WHEN p_with_tags THEN jsonb_build_object('tags', COALESCE(a.tags, '{}'::jsonb)) ELSE '{}'::jsonb END
+    );
+$$;
+
+-- 3. Whole project graph (replaces select("*") on asset + edge_index and the reshaping in Python)
+CREATE OR REPLACE FUNCTION graph_project(p_project_id UUID, p_with_tags BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'nodes', COALESCE((SELECT jsonb_agg(graph_node_json(a, NULL, p_with_tags)) FROM asset a WHERE a.project_id = p_project_id), '[]'::jsonb),
+        'edges', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', e.edge_id, 'source', e.from_asset_id, 'target', e.to_asset_id, 'label', e.edge_type))
+            FROM edge_index e WHERE e.project_id = p_project_id
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- 4. k-hop subgraph around a node (edges in both directions), at most p_limit nodes, closest first.
+-- UNION (not UNION ALL) drops repeated (asset, depth) rows, so each level costs at most one pass over the
+-- edges of the reached nodes; the result is the subgraph induced by the selected nodes.
+CREATE OR REPLACE FUNCTION graph_subgraph(p_center_id UUID, p_depth INT DEFAULT 1, p_limit INT DEFAULT 100, p_with_tags BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    WITH RECURSIVE reach(asset_id, depth) AS (
+        SELECT p_center_id, 0
+        UNION
+        SELECT n.asset_id, r.depth + 1
+        FROM reach r
+        CROSS JOIN LATERAL (
+            SELECT e.to_asset_id AS asset_id FROM edge_index e WHERE e.from_asset_id = r.asset_id
+            UNION ALL
+            SELECT e.from_asset_id FROM edge_index e WHERE e.to_asset_id = r.asset_id
+        ) n
+        WHERE r.depth < p_depth
+    ),
+    nodes AS (
+        SELECT asset_id, MIN(depth) AS depth
+        FROM reach
+        GROUP BY asset_id
+        ORDER BY MIN(depth), asset_id
+        LIMIT GREATEST(p_limit, 1)
+    )
+    SELECT jsonb_build_object(
+        'nodes', COALESCE((
+            SELECT jsonb_agg(graph_node_json(a, n.depth, p_with_tags) ORDER BY n.depth)
+            FROM nodes n JOIN asset a ON a.asset_id = n.asset_id
+        ), '[]'::jsonb),
+        'edges', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', e.edge_id, 'source', e.from_asset_id, 'target', e.to_asset_id, 'label', e.edge_type))
+            FROM nodes s
+            JOIN edge_index e ON e.from_asset_id = s.asset_id
+            JOIN nodes t ON t.asset_id = e.to_asset_id
+        ), '[]'::jsonb)
+    );
+$$;
+
+-- 5. One shortest path (edges in both directions) of at most p_max_hops edges.
+-- BFS distances from p_from_id (recursive CTE, stops expanding at p_to_id), then walk back from p_to_id
+-- picking one neighbour one hop closer at each step. Empty graph when there is no such path.
+CREATE OR REPLACE FUNCTION graph_shortest_path(p_from_id UUID, p_to_id UUID, p_max_hops INT DEFAULT 5, p_with_tags BOOLEAN DEFAULT FALSE)
+RETURNS JSONB
+LANGUAGE sql STABLE
+AS $$
+    WITH RECURSIVE reach(asset_id, depth) AS (
+        SELECT p_from_id, 0
+        UNION
+        SELECT n.asset_id, r.depth + 1
+        FROM reach r
+        CROSS JOIN LATERAL (
+            SELECT e.to_asset_id AS asset_id FROM edge_index e WHERE e.from_asset_id = r.asset_id
+            UNION ALL
+            SELECT e.from_asset_id FROM edge_index e WHERE e.to_asset_id = r.asset_id
+        ) n
+        WHERE r.depth < p_max_hops AND r.asset_id <> p_to_id
+    ),
+    dist AS (
+        SELECT asset_id, MIN(depth) AS depth FROM reach GROUP BY asset_id
+    ),
+    walk(asset_id, depth, edge_id) AS (
+        SELECT asset_id, depth, NULL::UUID FROM dist WHERE asset_id = p_to_id
+        UNION ALL
+        SELECT prev.asset_id, w.depth - 1, prev.edge_id
+        FROM walk w
+        CROSS JOIN LATERAL (
+            SELECT d.asset_id, e.edge_id
+            FROM edge_index e
+            JOIN dist d ON d.asset_id = CASE WHEN e.from_asset_id = w.asset_id THEN e.to_asset_id ELSE e.from_asset_id END
+            WHERE (e.from_asset_id = w.asset_id OR e.to_asset_id = w.asset_id) AND d.depth = w.depth - 1
+            ORDER BY d.asset_id
+            LIMIT 1
+        ) prev
+        WHERE w.depth > 0
+    )
+    SELECT jsonb_build_object(
+        'nodes', COALESCE((
+            SELECT jsonb_agg(graph_node_json(a, w.depth, p_with_tags) ORDER BY w.depth)
+            FROM walk w JOIN asset a ON a.asset_id = w.asset_id
+        ), '[]'::jsonb),
+        'edges', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', e.edge_id, 'source', e.from_asset_id, 'target', e.to_asset_id, 'label', e.edge_type) ORDER BY w.depth)
+            FROM walk w JOIN edge_index e ON e.edge_id = w.edge_id
+        ), '[]'::jsonb),
+        'hops', (SELECT depth FROM dist WHERE asset_id = p_to_id)
+    );
+$$;
@@ -0,0 +1,19 @@
+-- 15_graph_projection.sql
+-- Checkpoint of the graph projection (catalog -> Neo4j), per project: path -> job whose output
+-- (solution_manifest.job_id) is in the graph. A retried job skips what it already projected, and
+-- any job projects the manifest entries whose checkpoint is missing or older (files REUSEd by an
+-- incremental run, files whose projection failed in an earlier job).
+
+CREATE TABLE IF NOT EXISTS graph_projection_checkpoint (
+    project_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    path TEXT NOT NULL, -- relative path inside the artifact (same key as solution_manifest)
+    job_id UUID, -- job that produced the projected output (no FK: it outlives job_run cleanup)
+    asset_count INT DEFAULT 0,
+    edge_count INT DEFAULT 0,
+    projected_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (project_id, path)
+);
+
+ALTER TABLE graph_projection_checkpoint ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "allow_all" ON graph_projection_checkpoint;
+CREATE POLICY "allow_all" ON graph_projection_checkpoint FOR ALL USING (true) WITH CHECK (true);
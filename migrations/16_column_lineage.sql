@@ -0,0 +1,19 @@
+-- 16_column_lineage.sql
+-- Column-level lineage of SSIS/DataStage packages (ColumnLineageGraph.to_dict()), one row per file.
+-- Physical table columns share their key across files, so merging every row of a project answers
+-- "where does this column come from" across packages (GET /solutions/{id}/columns/lineage).
+
+CREATE TABLE IF NOT EXISTS column_lineage (
+    project_id UUID NOT NULL REFERENCES solutions(id) ON DELETE CASCADE,
+    path TEXT NOT NULL, -- relative path inside the artifact (same key as solution_manifest)
+    job_id UUID, -- job that extracted it
+    graph JSONB NOT NULL, -- {"columns", "labels", "edges": {"src", "dst", "kind"}, "edge_kinds"}
+    column_count INT DEFAULT 0,
+    edge_count INT DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (project_id, path)
+);
+
+ALTER TABLE column_lineage ENABLE ROW LEVEL SECURITY;
+DROP POLICY IF EXISTS "allow_all" ON column_lineage;
+CREATE POLICY "allow_all" ON column_lineage FOR ALL USING (true) WITH CHECK (true);
@@ -0,0 +1,52 @@
+-- 17_graph_impact.sql
+-- Impact analysis for SupabaseGraphService (POST /graph/impact): the assets reachable from one asset
+-- following (downstream) or against (upstream) the edges, with their depth, closest first.
+-- Same result as InMemoryGraphService.get_impact: {asset_id, direction, assets: [{id, depth, data}]}.
+--
+-- A recursive CTE cannot keep a global visited set, so with no depth bound it would go round every
+-- cycle forever; the BFS runs one level per loop step instead, and each asset is expanded once.
+-- Uses the covering indexes of migration 14 (one direction per level).
+
+CREATE OR REPLACE FUNCTION graph_impact(p_asset_id UUID, p_direction TEXT DEFAULT 'downstream', p_max_depth INT DEFAULT NULL, p_limit INT DEFAULT 1000)
+RETURNS JSONB
+LANGUAGE plpgsql STABLE
+AS $$
+DECLARE
+    v_frontier UUID[] := ARRAY[p_asset_id];
+    v_seen UUID[] := ARRAY[p_asset_id];
+    v_ids UUID[] := '{}';
+    v_depths INT[] := '{}';
+    v_depth INT := 0;
+BEGIN
+    WHILE cardinality(v_frontier) > 0 AND cardinality(v_ids) < p_limit
+          AND (p_max_depth IS NULL OR v_depth < p_max_depth) LOOP
+        v_depth := v_depth + 1;
+        IF p_direction = 'upstream' THEN
+            v_frontier := ARRAY(
+                SELECT e.from_asset_id FROM edge_index e WHERE e.to_asset_id = ANY(v_frontier)
+                EXCEPT SELECT unnest(v_seen)
+            );
+        ELSE
+            v_frontier := ARRAY(
+                SELECT e.to_asset_id FROM edge_index e WHERE e.from_asset_id = ANY(v_frontier)
+                EXCEPT SELECT unnest(v_seen)
+            );
+        END IF;
+        -- Last level cut to the limit (by id, so the result is stable)
+        v_frontier := ARRAY(SELECT f FROM unnest(v_frontier) f ORDER BY f LIMIT p_limit - cardinality(v_ids));
+        v_seen := v_seen || v_frontier;
+        v_ids := v_ids || v_frontier;
+        v_depths := v_depths || array_fill(v_depth, ARRAY[cardinality(v_frontier)]);
+    END LOOP;
+
+    RETURN jsonb_build_object(
+        'asset_id', p_asset_id,
+        'direction', p_direction,
+        'assets', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('id', r.asset_id, 'depth', r.depth, 'data', graph_node_json(a)->'data') ORDER BY r.ord)
+            FROM unnest(v_ids, v_depths) WITH ORDINALITY AS r(asset_id, depth, ord)
+            JOIN asset a ON a.asset_id = r.asset_id
+        ), '[]'::jsonb)
+    );
+END;
+$$;